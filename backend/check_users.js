@@ -1,6 +1,5 @@
-const { PrismaClient } = require('@prisma/client');
+const prisma = require('./db/prisma');
 const bcrypt = require('bcryptjs');
-const prisma = new PrismaClient();
 
 async function main() {
   try {
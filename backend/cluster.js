@@ -0,0 +1,141 @@
+/**
+ * Modo cluster del backend: un proceso HTTP por núcleo
+ *
+ * El proceso primario lanza CLUSTER_WORKERS copias de server.js (por defecto una por
+ * núcleo) que comparten el puerto. Los cron jobs corren en un solo worker, el que gana
+ * la elección de líder (services/liderCron.service.js).
+ *
+ * Uso:
+ *   node cluster.js              (npm run start:cluster)
+ *
+ * Señales del primario:
+ *   SIGHUP           reinicio escalonado: cada worker se reemplaza cuando el nuevo ya escucha
+ *   SIGTERM, SIGINT  apagado ordenado de todos los workers
+ *
+ * Si DB_POOL_SIZE no está definido, el pool que Prisma usaría en un solo proceso
+ * (núcleos * 2 + 1) se reparte entre los workers, con un mínimo de 3 conexiones cada uno.
+ */
+require('dotenv').config();
+const cluster = require('cluster');
+const os = require('os');
+const path = require('path');
+
+const NUCLEOS = typeof os.availableParallelism === 'function' ? os.availableParallelism() : os.cpus().length;
+const WORKERS = Math.max(1, parseInt(process.env.CLUSTER_WORKERS || String(NUCLEOS), 10));
+// Los workers salen solos a los APAGADO_MS; unos segundos después se fuerza
+const APAGADO_MS = parseInt(process.env.APAGADO_MS || '25000', 10) + 5000;
+const ESPERA_REINICIO_MS = 1000;
+const ESPERA_REINICIO_MAX_MS = 30000;
+// Un worker que vive menos que esto se considera caído al arrancar
+const VIDA_MINIMA_MS = 10000;
+
+let apagando = false;
+let reiniciando = false;
+let fallosSeguidos = 0;
+
+/**
+ * Variables de entorno de cada worker
+ */
+function entornoWorker() {
+  const env = { CLUSTER_WORKERS: String(WORKERS) };
+  if (!process.env.DB_POOL_SIZE) {
+    env.DB_POOL_SIZE = String(Math.max(3, Math.ceil((os.cpus().length * 2 + 1) / WORKERS)));
+  }
+  return env;
+}
+
+function lanzarWorker() {
+  const worker = cluster.fork(entornoWorker());
+  worker.iniciado = Date.now();
+  return worker;
+}
+
+/**
+ * Esperar a que un worker escuche; rechaza si sale antes
+ */
+function esperarEscuchando(worker) {
+  return new Promise((resolve, reject) => {
+    const alSalir = (code) => reject(new Error(`worker ${worker.process.pid} salió con código ${code} al arrancar`));
+    worker.once('listening', () => {
+      worker.removeListener('exit', alSalir);
+      resolve(worker);
+    });
+    worker.once('exit', alSalir);
+  });
+}
+
+/**
+ * Pedir a un worker que termine (SIGTERM) y forzarlo si no lo hace a tiempo
+ */
+function detenerWorker(worker) {
+  return new Promise((resolve) => {
+    if (worker.isDead()) return resolve();
+
+    const forzar = setTimeout(() => {
+      console.warn(`[Cluster] Worker ${worker.process.pid} no terminó en ${APAGADO_MS}ms, forzando`);
+      worker.process.kill('SIGKILL');
+    }, APAGADO_MS);
+    worker.once('exit', () => {
+      clearTimeout(forzar);
+      resolve();
+    });
+    worker.reemplazado = true;
+    worker.process.kill('SIGTERM');
+  });
+}
+
+/**
+ * Reemplazar los workers de a uno: siempre queda al menos WORKERS - 1 atendiendo
+ */
+async function reiniciarEscalonado() {
+  if (reiniciando || apagando) return;
+
+  reiniciando = true;
+  console.log('[Cluster] Reinicio escalonado de los workers...');
+  try {
+    for (const worker of Object.values(cluster.workers)) {
+      if (apagando) break;
+      const nuevo = await esperarEscuchando(lanzarWorker());
+      console.log(`[Cluster] Worker ${nuevo.process.pid} escuchando, reemplazando a ${worker.process.pid}`);
+      await detenerWorker(worker);
+    }
+    console.log('[Cluster] Reinicio escalonado completado');
+  } catch (error) {
+    // Un worker nuevo que no arranca deja los anteriores atendiendo
+    console.error('[Cluster] Reinicio escalonado abortado:', error.message);
+  } finally {
+    reiniciando = false;
+  }
+}
+
+async function apagar(signal) {
+  if (apagando) return;
+
+  apagando = true;
+  console.log(`[Cluster] ${signal} recibido, deteniendo ${Object.keys(cluster.workers).length} workers...`);
+  await Promise.all(Object.values(cluster.workers).map(detenerWorker));
+  process.exit(0);
+}
+
+if (cluster.isPrimary) {
+  cluster.setupPrimary({ exec: path.join(__dirname, 'server.js') });
+
+  cluster.on('exit', (worker, code, signal) => {
+    if (apagando || worker.reemplazado) return;
+
+    // Relanzar con espera creciente si los workers caen al arrancar (p. ej. sin base de datos)
+    fallosSeguidos = Date.now() - worker.iniciado < VIDA_MINIMA_MS ? fallosSeguidos + 1 : 0;
+    const espera = Math.min(ESPERA_REINICIO_MS * 2 ** fallosSeguidos, ESPERA_REINICIO_MAX_MS);
+    console.error(`[Cluster] Worker ${worker.process.pid} terminó (${signal || code}), relanzando en ${espera}ms`);
+    setTimeout(() => {
+      if (!apagando) lanzarWorker();
+    }, espera);
+  });
+
+  for (let i = 0; i < WORKERS; i++) lanzarWorker();
+  console.log(`[Cluster] Primario ${process.pid}: ${WORKERS} workers (${NUCLEOS} núcleos), pool por worker ${entornoWorker().DB_POOL_SIZE || process.env.DB_POOL_SIZE}`);
+
+  process.on('SIGHUP', () => reiniciarEscalonado());
+  process.once('SIGTERM', apagar);
+  process.once('SIGINT', apagar);
+}
@@ -0,0 +1,73 @@
+/**
+ * Cron Job - Cola de alertas programadas
+ *
+ * Cada minuto drena alerta_programadas con ALERTAS_WORKERS loops en paralelo. Los
+ * lotes se reclaman con FOR UPDATE SKIP LOCKED, así que todas las instancias del
+ * backend (y los procesos de scripts/alertas-worker.js) pueden correrlo a la vez sin
+ * enviar dos veces la misma alerta. ALERTAS_WORKERS=0 lo deshabilita en esta instancia.
+ * Zona horaria: America/Bogota
+ */
+const cron = require('node-cron');
+const alertaService = require('../services/alerta.service');
+
+const WORKERS = parseInt(process.env.ALERTAS_WORKERS || '2', 10);
+
+class AlertasProgramadasCronJob {
+  constructor() {
+    this.job = null;
+    this.isRunning = false;
+  }
+
+  /**
+   * Iniciar el cron job
+   */
+  iniciar() {
+    if (WORKERS <= 0) {
+      console.log('[CRON] Cola de alertas programadas deshabilitada en esta instancia (ALERTAS_WORKERS=0)');
+      return this;
+    }
+
+    this.job = cron.schedule('* * * * *', async () => {
+      await this.ejecutar();
+    }, {
+      scheduled: true,
+      timezone: 'America/Bogota'
+    });
+
+    console.log(`[CRON] Cola de alertas programadas: cada minuto, ${WORKERS} workers`);
+    return this;
+  }
+
+  /**
+   * Drenar la cola; si la corrida anterior sigue en curso no se lanza otra
+   */
+  async ejecutar() {
+    if (this.isRunning) return null;
+
+    this.isRunning = true;
+    const inicio = Date.now();
+
+    try {
+      const resultado = await alertaService.drenarAlertasPendientes({ workers: WORKERS });
+      if (resultado.reclamadas > 0) {
+        console.log(`[CRON] Alertas programadas procesadas en ${Date.now() - inicio}ms:`, resultado);
+      }
+      return resultado;
+    } catch (error) {
+      console.error('[CRON] Error procesando alertas programadas:', error.message);
+      return null;
+    } finally {
+      this.isRunning = false;
+    }
+  }
+
+  /**
+   * Detener el cron job
+   */
+  detener() {
+    if (this.job) this.job.stop();
+    console.log('[CRON] Cola de alertas programadas detenida');
+  }
+}
+
+module.exports = new AlertasProgramadasCronJob();
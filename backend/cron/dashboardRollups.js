@@ -0,0 +1,81 @@
+/**
+ * Cron Job - Rollups del dashboard
+ *
+ * - Cada noche a las 2:30 AM recalcula los rollups diarios desde facturas y citas
+ *   (corrige cualquier desvío de los triggers) y vacía el cache del dashboard.
+ * - Cada 5 minutos refresca el snapshot de productos con stock bajo.
+ * Zona horaria: America/Bogota
+ */
+const cron = require('node-cron');
+const dashboardRollupService = require('../services/dashboardRollup.service');
+const dashboardService = require('../services/dashboard.service');
+
+class DashboardRollupsCronJob {
+  constructor() {
+    this.reconciliacion = null;
+    this.stock = null;
+    this.isRunning = false;
+  }
+
+  /**
+   * Iniciar los cron jobs
+   */
+  iniciar() {
+    this.reconciliacion = cron.schedule('0 30 2 * * *', async () => {
+      await this.ejecutarReconciliacion();
+    }, {
+      scheduled: true,
+      timezone: 'America/Bogota'
+    });
+
+    this.stock = cron.schedule('0 */5 * * * *', async () => {
+      try {
+        await dashboardRollupService.refrescarStockBajo();
+      } catch (error) {
+        console.error('[CRON] Error refrescando stock bajo del dashboard:', error.message);
+      }
+    }, {
+      scheduled: true,
+      timezone: 'America/Bogota'
+    });
+
+    console.log('[CRON] Rollups del dashboard: reconciliación diaria 2:30 AM, stock bajo cada 5 minutos');
+    return this;
+  }
+
+  /**
+   * Recalcular los rollups desde las tablas fuente
+   */
+  async ejecutarReconciliacion() {
+    if (this.isRunning) {
+      console.log('[CRON] Reconciliación del dashboard ya en ejecución, omitiendo...');
+      return null;
+    }
+
+    this.isRunning = true;
+    const inicio = Date.now();
+
+    try {
+      const resultado = await dashboardRollupService.reconciliar();
+      dashboardService.limpiarCache();
+      console.log(`[CRON] Rollups del dashboard reconciliados en ${Date.now() - inicio}ms:`, resultado);
+      return resultado;
+    } catch (error) {
+      console.error('[CRON] Error reconciliando rollups del dashboard:', error.message);
+      return null;
+    } finally {
+      this.isRunning = false;
+    }
+  }
+
+  /**
+   * Detener los cron jobs
+   */
+  detener() {
+    if (this.reconciliacion) this.reconciliacion.stop();
+    if (this.stock) this.stock.stop();
+    console.log('[CRON] Rollups del dashboard detenidos');
+  }
+}
+
+module.exports = new DashboardRollupsCronJob();
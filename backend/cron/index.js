@@ -0,0 +1,54 @@
+/**
+ * Registro de los cron jobs del backend
+ *
+ * server.js no inicia los cron jobs directamente: los arranca el proceso que gana la
+ * elección de líder (services/liderCron.service.js), de modo que en modo cluster
+ * corren una sola vez en todo el despliegue. Los módulos se cargan aquí de forma
+ * perezosa porque algunos programan su tarea al hacer require.
+ *
+ * Si el proceso pierde el liderazgo las tareas se pausan y se reanudan al recuperarlo.
+ */
+const cron = require('node-cron');
+
+let tareas = null;
+
+/**
+ * Programar todos los cron jobs (la primera vez) o reanudarlos
+ */
+function iniciar() {
+  if (tareas) {
+    tareas.forEach(tarea => tarea.start());
+    console.log(`[CRON] ${tareas.length} tareas reanudadas`);
+    return;
+  }
+
+  const previas = new Set(cron.getTasks().values());
+
+  require('./limpiarReservas').iniciar();
+  require('./depreciacion').iniciar();
+  require('./siigoSync').start();
+  require('./miaPassExpiration').initMiaPassExpirationCron();
+  require('./verificarPagos').iniciar();
+  require('./recordatoriosCitas').initRecordatoriosCitasCron();
+  require('./dashboardRollups').iniciar();
+  require('./alertasProgramadas').iniciar();
+
+  if (process.env.NODE_ENV !== 'test') {
+    // Cron job para alertas de documentos legales (diario a las 8:00 AM)
+    require('../jobs/alertasDocumentosLegales.job');
+  }
+
+  tareas = [...cron.getTasks().values()].filter(tarea => !previas.has(tarea));
+  console.log(`✓ Cron jobs inicializados (${tareas.length} tareas)`);
+}
+
+/**
+ * Pausar las tareas programadas; una ejecución ya en curso termina normalmente
+ */
+function pausar() {
+  if (!tareas) return;
+  tareas.forEach(tarea => tarea.stop());
+  console.log(`[CRON] ${tareas.length} tareas pausadas`);
+}
+
+module.exports = { iniciar, pausar };
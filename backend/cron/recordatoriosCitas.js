@@ -4,183 +4,315 @@
  * - 7 días antes de la cita
  * - 4 días antes de la cita
  * - 3 horas antes de la cita (el mismo día)
+ *
+ * Despacho: las citas de las tres cohortes se agrupan en lotes de hasta
+ * RECORDATORIOS_LOTE recordatorios (máximo 100, el límite de la API batch de Resend) que
+ * se envían con RECORDATORIOS_CONCURRENCIA lotes en vuelo. Cada lote enviado marca sus
+ * citas con un solo updateMany. Los errores transitorios (red, 429, 5xx) se reintentan
+ * con espera exponencial; si la API rechaza el lote completo (p. ej. un email inválido)
+ * sus recordatorios se envían uno por uno. Cada envío lleva una clave de idempotencia
+ * (cohorte + citas), así que reintentar un lote que sí llegó a Resend antes de perder la
+ * conexión no duplica los emails. Cada corrida deja una fila en recordatorios_ejecuciones.
+ *
+ * Para pruebas locales, RESEND_BASE_URL apunta el SDK de Resend a
+ * scripts/fake-email-provider.js.
  */
+const crypto = require('crypto');
 const cron = require('node-cron');
 const prisma = require('../db/prisma');
 const emailService = require('../services/email.service');
 
+const CONCURRENCIA = Math.max(1, parseInt(process.env.RECORDATORIOS_CONCURRENCIA || '4', 10));
+const TAMANO_LOTE = Math.min(Math.max(1, parseInt(process.env.RECORDATORIOS_LOTE || '100', 10)), 100);
+const REINTENTOS = parseInt(process.env.RECORDATORIOS_REINTENTOS || '3', 10);
+const ESPERA_BASE_MS = parseInt(process.env.RECORDATORIOS_ESPERA_MS || '1000', 10);
+
+const COHORTES = [
+  { tipo: '7dias', campo: 'recordatorio7Dias', contador: 'enviados7Dias', etiqueta: '7 días' },
+  { tipo: '4dias', campo: 'recordatorio4Dias', contador: 'enviados4Dias', etiqueta: '4 días' },
+  { tipo: '3horas', campo: 'recordatorio3Horas', contador: 'enviados3Horas', etiqueta: '3 horas' },
+];
+
+const SELECT_CITA = {
+  id: true,
+  fecha: true,
+  hora: true,
+  paciente: { select: { id: true, nombre: true, apellido: true, email: true } },
+  doctor: { select: { id: true, nombre: true, apellido: true } },
+  especialidad: { select: { id: true, titulo: true } },
+};
+
+// Evita que una corrida larga se solape con la siguiente hora
+let enEjecucion = false;
+
+const esperar = ms => new Promise(resolve => setTimeout(resolve, ms));
+
 /**
- * Procesa y envía recordatorios de citas
+ * Errores de red (sin statusCode), rate limit y errores del servidor se reintentan
+ */
+function esReintentable(error) {
+  return !error.statusCode || error.statusCode === 429 || error.statusCode >= 500;
+}
+
+/**
+ * Ejecuta la operación reintentando errores transitorios con espera exponencial
+ */
+async function conReintentos(operacion, metricas) {
+  for (let intento = 0; ; intento++) {
+    try {
+      return await operacion();
+    } catch (error) {
+      if (intento >= REINTENTOS || !esReintentable(error)) throw error;
+      metricas.reintentos++;
+      // Espera base·2^intento con jitter para no reintentar todos los lotes a la vez
+      await esperar(ESPERA_BASE_MS * 2 ** intento * (0.5 + Math.random() / 2));
+    }
+  }
+}
+
+/**
+ * Clave de idempotencia de Resend para los recordatorios de una cohorte a unas citas
+ */
+function claveIdempotencia(cohorte, citaIds) {
+  const huella = crypto.createHash('sha256').update([...citaIds].sort().join(',')).digest('hex');
+  return `recordatorios-${cohorte.tipo}-${huella}`;
+}
+
+/**
+ * Convierte un resultado { success: false } del servicio de email en una excepción
+ */
+async function exigirExito(envio) {
+  const resultado = await envio();
+  if (!resultado.success) {
+    const error = new Error(resultado.error || 'Error enviando email');
+    error.statusCode = resultado.statusCode;
+    throw error;
+  }
+  return resultado;
+}
+
+/**
+ * Ejecuta tarea(item) para todos los items con a lo sumo `limite` en vuelo
  */
-async function procesarRecordatorios() {
-  const ahora = new Date();
+async function ejecutarConConcurrencia(items, limite, tarea) {
+  let siguiente = 0;
+  const trabajador = async () => {
+    while (siguiente < items.length) {
+      await tarea(items[siguiente++]);
+    }
+  };
+  await Promise.all(Array.from({ length: Math.min(limite, items.length) }, trabajador));
+}
+
+/**
+ * La cita de hoy empieza entre 3 y 4 horas desde ahora
+ */
+function enVentanaTresHoras(cita, hoy, ahora) {
+  if (!cita.hora) return false;
+
+  const horaObjetivo = new Date(ahora);
+  horaObjetivo.setHours(ahora.getHours() + 3, ahora.getMinutes(), 0, 0);
+  const horaLimite = new Date(ahora);
+  horaLimite.setHours(ahora.getHours() + 4, ahora.getMinutes(), 0, 0);
+
+  // Convertir hora de cita a Date para comparar
+  const horaCita = new Date(hoy);
+  if (cita.hora instanceof Date) {
+    horaCita.setHours(cita.hora.getHours(), cita.hora.getMinutes(), 0, 0);
+  } else {
+    const [h, m] = String(cita.hora).split(':').map(Number);
+    horaCita.setHours(h, m, 0, 0);
+  }
+
+  return horaCita >= horaObjetivo && horaCita < horaLimite;
+}
+
+/**
+ * Citas pendientes de recordatorio por cohorte
+ */
+async function buscarCohortes(ahora, filtro) {
   const hoy = new Date(ahora);
   hoy.setHours(0, 0, 0, 0);
 
-  let enviados7Dias = 0;
-  let enviados4Dias = 0;
-  let enviados3Horas = 0;
-
-  try {
-    // =====================================================
-    // RECORDATORIOS DE 7 DÍAS
-    // =====================================================
-    const fecha7Dias = new Date(hoy);
-    fecha7Dias.setDate(fecha7Dias.getDate() + 7);
-
-    const citas7Dias = await prisma.cita.findMany({
-      where: {
-        fecha: fecha7Dias,
-        estado: 'Programada',
-        recordatorio7Dias: false,
-      },
-      include: {
-        paciente: { select: { id: true, nombre: true, apellido: true, email: true } },
-        doctor: { select: { id: true, nombre: true, apellido: true } },
-        especialidad: { select: { id: true, titulo: true } },
-      },
-    });
+  const enDias = (dias) => {
+    const fecha = new Date(hoy);
+    fecha.setDate(fecha.getDate() + dias);
+    return fecha;
+  };
+  const buscar = (fecha, campo) => prisma.cita.findMany({
+    where: { ...filtro, fecha, estado: 'Programada', [campo]: false },
+    select: SELECT_CITA,
+  });
 
-    for (const cita of citas7Dias) {
-      if (!cita.paciente?.email) continue;
+  const [citas7Dias, citas4Dias, citasHoy] = await Promise.all([
+    buscar(enDias(7), 'recordatorio7Dias'),
+    buscar(enDias(4), 'recordatorio4Dias'),
+    buscar(hoy, 'recordatorio3Horas'),
+  ]);
+
+  return [
+    { cohorte: COHORTES[0], citas: citas7Dias },
+    { cohorte: COHORTES[1], citas: citas4Dias },
+    { cohorte: COHORTES[2], citas: citasHoy.filter(cita => enVentanaTresHoras(cita, hoy, ahora)) },
+  ];
+}
 
-      try {
-        const result = await emailService.sendAppointmentReminder({
+/**
+ * Arma los recordatorios y los parte en lotes de una sola cohorte
+ */
+function armarLotes(cohortes, metricas) {
+  const lotes = [];
+
+  for (const { cohorte, citas } of cohortes) {
+    metricas.candidatas += citas.length;
+    const conEmail = citas.filter(cita => cita.paciente?.email);
+    metricas.sinEmail += citas.length - conEmail.length;
+
+    for (let desde = 0; desde < conEmail.length; desde += TAMANO_LOTE) {
+      const citasLote = conEmail.slice(desde, desde + TAMANO_LOTE);
+      lotes.push({
+        cohorte,
+        citaIds: citasLote.map(cita => cita.id),
+        mensajes: citasLote.map(cita => emailService.buildAppointmentReminder({
           to: cita.paciente.email,
           paciente: cita.paciente,
           cita,
           doctor: cita.doctor,
           especialidad: cita.especialidad,
-          tipoRecordatorio: '7dias',
-        });
-
-        if (result.success) {
-          await prisma.cita.update({
-            where: { id: cita.id },
-            data: { recordatorio7Dias: true },
-          });
-          enviados7Dias++;
-          console.log(`[Recordatorios] 7 días enviado a ${cita.paciente.email}`);
-        }
-      } catch (err) {
-        console.error(`[Recordatorios] Error enviando 7 días a ${cita.paciente.email}:`, err.message);
-      }
+          tipoRecordatorio: cohorte.tipo,
+        })),
+      });
     }
+  }
 
-    // =====================================================
-    // RECORDATORIOS DE 4 DÍAS
-    // =====================================================
-    const fecha4Dias = new Date(hoy);
-    fecha4Dias.setDate(fecha4Dias.getDate() + 4);
-
-    const citas4Dias = await prisma.cita.findMany({
-      where: {
-        fecha: fecha4Dias,
-        estado: 'Programada',
-        recordatorio4Dias: false,
-      },
-      include: {
-        paciente: { select: { id: true, nombre: true, apellido: true, email: true } },
-        doctor: { select: { id: true, nombre: true, apellido: true } },
-        especialidad: { select: { id: true, titulo: true } },
-      },
-    });
+  return lotes;
+}
 
-    for (const cita of citas4Dias) {
-      if (!cita.paciente?.email) continue;
+/**
+ * Envía los recordatorios de un lote uno por uno; devuelve los ids de las citas enviadas
+ */
+async function enviarIndividualmente(lote, metricas) {
+  const enviadas = [];
+  for (let i = 0; i < lote.mensajes.length; i++) {
+    try {
+      const idempotencyKey = claveIdempotencia(lote.cohorte, [lote.citaIds[i]]);
+      await conReintentos(() => exigirExito(() => emailService.send({ ...lote.mensajes[i], idempotencyKey })), metricas);
+      enviadas.push(lote.citaIds[i]);
+    } catch (err) {
+      metricas.fallidos++;
+      console.error(`[Recordatorios] Error enviando ${lote.cohorte.etiqueta} a ${lote.mensajes[i].to}:`, err.message);
+    }
+  }
+  return enviadas;
+}
 
-      try {
-        const result = await emailService.sendAppointmentReminder({
-          to: cita.paciente.email,
-          paciente: cita.paciente,
-          cita,
-          doctor: cita.doctor,
-          especialidad: cita.especialidad,
-          tipoRecordatorio: '4dias',
-        });
-
-        if (result.success) {
-          await prisma.cita.update({
-            where: { id: cita.id },
-            data: { recordatorio4Dias: true },
-          });
-          enviados4Dias++;
-          console.log(`[Recordatorios] 4 días enviado a ${cita.paciente.email}`);
-        }
-      } catch (err) {
-        console.error(`[Recordatorios] Error enviando 4 días a ${cita.paciente.email}:`, err.message);
-      }
+/**
+ * Envía un lote y marca sus citas
+ */
+async function despacharLote(lote, metricas) {
+  metricas.lotes++;
+  let enviadas;
+
+  try {
+    const idempotencyKey = claveIdempotencia(lote.cohorte, lote.citaIds);
+    await conReintentos(() => exigirExito(() => emailService.sendBatch(lote.mensajes, { idempotencyKey })), metricas);
+    enviadas = lote.citaIds;
+  } catch (err) {
+    if (esReintentable(err)) {
+      // Reintentos agotados: las citas quedan sin marcar para la próxima corrida
+      metricas.fallidos += lote.citaIds.length;
+      console.error(`[Recordatorios] Lote de ${lote.citaIds.length} (${lote.cohorte.etiqueta}) no enviado:`, err.message);
+      return;
     }
+    console.warn(`[Recordatorios] Lote rechazado (${err.message}); enviando ${lote.citaIds.length} recordatorios uno por uno`);
+    enviadas = await enviarIndividualmente(lote, metricas);
+  }
 
-    // =====================================================
-    // RECORDATORIOS DE 3 HORAS (mismo día)
-    // =====================================================
-    // Buscar citas de hoy que tengan hora en las próximas 3-4 horas
-    const horaActual = ahora.getHours();
-    const minutosActuales = ahora.getMinutes();
-
-    // Calcular rango de hora: citas entre 3 y 4 horas desde ahora
-    const horaObjetivo = new Date(ahora);
-    horaObjetivo.setHours(horaActual + 3, minutosActuales, 0, 0);
-
-    const horaLimite = new Date(ahora);
-    horaLimite.setHours(horaActual + 4, minutosActuales, 0, 0);
-
-    const citasHoy = await prisma.cita.findMany({
-      where: {
-        fecha: hoy,
-        estado: 'Programada',
-        recordatorio3Horas: false,
-      },
-      include: {
-        paciente: { select: { id: true, nombre: true, apellido: true, email: true } },
-        doctor: { select: { id: true, nombre: true, apellido: true } },
-        especialidad: { select: { id: true, titulo: true } },
+  if (!enviadas.length) return;
+
+  try {
+    await conReintentos(() => prisma.cita.updateMany({
+      where: { id: { in: enviadas } },
+      data: { [lote.cohorte.campo]: true },
+    }), metricas);
+    metricas[lote.cohorte.contador] += enviadas.length;
+  } catch (err) {
+    // Enviados pero sin marcar: se reenviarían en la próxima corrida
+    metricas.fallidos += enviadas.length;
+    console.error(`[Recordatorios] Error marcando ${enviadas.length} citas (${lote.cohorte.etiqueta}):`, err.message);
+  }
+}
+
+/**
+ * Guarda las métricas de la corrida; un error aquí no debe tumbar el cron
+ */
+async function registrarEjecucion(metricas, iniciadoEn, error) {
+  const finalizadoEn = new Date();
+  try {
+    await prisma.ejecucionRecordatorios.create({
+      data: {
+        ...metricas,
+        iniciadoEn,
+        finalizadoEn,
+        duracionMs: finalizadoEn - iniciadoEn,
+        error: error ? String(error.message).slice(0, 1000) : null,
       },
     });
+  } catch (err) {
+    console.error('[Recordatorios] Error registrando métricas de la corrida:', err.message);
+  }
+  return finalizadoEn - iniciadoEn;
+}
+
+/**
+ * Procesa y envía recordatorios de citas
+ *
+ * @param {object} [opciones]
+ * @param {object} [opciones.filtro] - Condición adicional sobre las citas (p. ej. el
+ *   benchmark limita la corrida a sus citas sintéticas)
+ * @returns {Promise<object|null>} Métricas de la corrida, o null si ya había una en curso
+ */
+async function procesarRecordatorios({ filtro = {} } = {}) {
+  if (enEjecucion) {
+    console.warn('[Recordatorios] La corrida anterior sigue en curso, omitiendo...');
+    return null;
+  }
 
-    for (const cita of citasHoy) {
-      if (!cita.paciente?.email || !cita.hora) continue;
+  const metricas = {
+    candidatas: 0,
+    sinEmail: 0,
+    enviados7Dias: 0,
+    enviados4Dias: 0,
+    enviados3Horas: 0,
+    fallidos: 0,
+    lotes: 0,
+    reintentos: 0,
+  };
 
-      // Convertir hora de cita a Date para comparar
-      const horaCita = new Date(hoy);
-      if (cita.hora instanceof Date) {
-        horaCita.setHours(cita.hora.getHours(), cita.hora.getMinutes(), 0, 0);
-      } else {
-        const [h, m] = String(cita.hora).split(':').map(Number);
-        horaCita.setHours(h, m, 0, 0);
-      }
+  if (!emailService.isEnabled()) {
+    console.warn('[Recordatorios] Servicio de email deshabilitado. No se envían recordatorios.');
+    return { ...metricas, duracionMs: 0 };
+  }
 
-      // Si la cita está entre 3 y 4 horas desde ahora, enviar recordatorio
-      if (horaCita >= horaObjetivo && horaCita < horaLimite) {
-        try {
-          const result = await emailService.sendAppointmentReminder({
-            to: cita.paciente.email,
-            paciente: cita.paciente,
-            cita,
-            doctor: cita.doctor,
-            especialidad: cita.especialidad,
-            tipoRecordatorio: '3horas',
-          });
-
-          if (result.success) {
-            await prisma.cita.update({
-              where: { id: cita.id },
-              data: { recordatorio3Horas: true },
-            });
-            enviados3Horas++;
-            console.log(`[Recordatorios] 3 horas enviado a ${cita.paciente.email}`);
-          }
-        } catch (err) {
-          console.error(`[Recordatorios] Error enviando 3 horas a ${cita.paciente.email}:`, err.message);
-        }
-      }
-    }
+  enEjecucion = true;
+  const iniciadoEn = new Date();
+  let errorGeneral = null;
 
-    return { enviados7Dias, enviados4Dias, enviados3Horas };
+  try {
+    const cohortes = await buscarCohortes(iniciadoEn, filtro);
+    const lotes = armarLotes(cohortes, metricas);
+    await ejecutarConConcurrencia(lotes, CONCURRENCIA, lote => despacharLote(lote, metricas));
   } catch (error) {
+    errorGeneral = error;
     console.error('[Recordatorios] Error general:', error);
-    throw error;
+  }
+
+  try {
+    const duracionMs = await registrarEjecucion(metricas, iniciadoEn, errorGeneral);
+    if (errorGeneral) throw errorGeneral;
+    return { ...metricas, duracionMs };
+  } finally {
+    enEjecucion = false;
   }
 }
 
@@ -246,7 +378,10 @@ function initRecordatoriosCitasCron() {
 
       const resultado = await procesarRecordatorios();
 
-      console.log(`[Recordatorios] Enviados - 7 días: ${resultado.enviados7Dias}, 4 días: ${resultado.enviados4Dias}, 3 horas: ${resultado.enviados3Horas}`);
+      if (resultado) {
+        console.log(`[Recordatorios] Enviados - 7 días: ${resultado.enviados7Dias}, 4 días: ${resultado.enviados4Dias}, 3 horas: ${resultado.enviados3Horas}`);
+        console.log(`[Recordatorios] Fallidos: ${resultado.fallidos}, lotes: ${resultado.lotes}, reintentos: ${resultado.reintentos}, duración: ${resultado.duracionMs}ms`);
+      }
       console.log('[Recordatorios] ========================================');
     } catch (error) {
       console.error('[Recordatorios] Error en cron job:', error);
@@ -9,6 +9,7 @@
 const cron = require('node-cron');
 const prisma = require('../db/prisma');
 const epaycoService = require('../services/epayco.service');
+const disponibilidadCache = require('../services/disponibilidadCache.service');
 
 /**
  * Verificar estado de un pago en ePayco
@@ -144,10 +145,11 @@ async function procesarPagosPendientes() {
         // Si fue rechazado o fallido, cancelar la cita
         if ((resultado.status === 'rejected' || resultado.status === 'failed') &&
             sesion.cita?.estado === 'PendientePago') {
-          await prisma.cita.update({
+          const citaCancelada = await prisma.cita.update({
             where: { id: sesion.citaId },
             data: { estado: 'Cancelada' },
           });
+          disponibilidadCache.invalidarDia(citaCancelada.doctorId, citaCancelada.fecha);
           actualizados++;
           console.log(`[CRON Pagos] Cita ${sesion.citaId} cancelada por pago ${resultado.status}`);
         }
@@ -166,10 +168,11 @@ async function procesarPagosPendientes() {
     });
 
     for (const cita of citasExpiradas) {
-      await prisma.cita.update({
+      const citaCancelada = await prisma.cita.update({
         where: { id: cita.id },
         data: { estado: 'Cancelada' },
       });
+      disponibilidadCache.invalidarDia(citaCancelada.doctorId, citaCancelada.fecha);
       actualizados++;
       console.log(`[CRON Pagos] Cita ${cita.id} cancelada por expiración (24h sin pago)`);
     }
@@ -0,0 +1,139 @@
+/**
+ * Instrumentación de consultas por petición
+ *
+ * Cada petición HTTP corre dentro de un contexto de AsyncLocalStorage (ver
+ * middleware/consultas.js). db/prisma.js registra aquí cada operación de Prisma con su
+ * duración, así que una petición sabe cuántas consultas hizo y cuánto tiempo pasó en la
+ * base de datos. Las operaciones fuera de una petición (cron jobs, scripts) no se miden.
+ *
+ * - CONSULTAS_PRESUPUESTO: consultas por petición a partir de las que se registra un aviso
+ * - CONSULTAS_UMBRAL_N1: repeticiones de la misma operación (modelo.operación) en una
+ *   petición que se reportan como posible N+1
+ */
+const { AsyncLocalStorage } = require('async_hooks');
+
+const PRESUPUESTO = parseInt(process.env.CONSULTAS_PRESUPUESTO || '20', 10);
+const UMBRAL_N1 = parseInt(process.env.CONSULTAS_UMBRAL_N1 || '5', 10);
+// Rutas distintas que guarda el reporte agregado
+const MAX_RUTAS = 500;
+
+const almacen = new AsyncLocalStorage();
+const rutas = new Map();
+
+const redondear = (ms) => Math.round(ms * 10) / 10;
+
+/**
+ * Ejecutar fn dentro de un contexto de medición nuevo
+ *
+ * @returns {Promise<{ resultado: *, contexto: Object }>}
+ */
+async function medir(fn) {
+  const contexto = { consultas: 0, dbMs: 0, operaciones: new Map() };
+  const resultado = await almacen.run(contexto, fn);
+  return { resultado, contexto };
+}
+
+const activo = () => almacen.getStore() !== undefined;
+
+/**
+ * Registrar una operación en el contexto de la petición actual (si lo hay)
+ */
+function registrar(modelo, operacion, ms) {
+  const contexto = almacen.getStore();
+  if (!contexto) return;
+
+  const clave = modelo ? `${modelo}.${operacion}` : operacion;
+  contexto.consultas++;
+  contexto.dbMs += ms;
+  contexto.operaciones.set(clave, (contexto.operaciones.get(clave) || 0) + 1);
+}
+
+/**
+ * Operaciones repetidas al menos UMBRAL_N1 veces, de más a menos
+ *
+ * @returns {Array<{ operacion: string, veces: number }>}
+ */
+function repetidas(contexto) {
+  return [...contexto.operaciones.entries()]
+    .filter(([, veces]) => veces >= UMBRAL_N1)
+    .sort((a, b) => b[1] - a[1])
+    .map(([operacion, veces]) => ({ operacion, veces }));
+}
+
+const excedePresupuesto = (contexto) => contexto.consultas > PRESUPUESTO;
+
+/**
+ * Ruta con los identificadores reemplazados por :id, para agrupar el reporte
+ */
+function normalizarRuta(path) {
+  return path
+    .split('/')
+    .map(segmento => (/^\d+$/.test(segmento)
+      || /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i.test(segmento)
+      || /^c[a-z0-9]{20,}$/.test(segmento)
+      ? ':id'
+      : segmento))
+    .join('/');
+}
+
+/**
+ * Acumular el contexto de una petición terminada en el reporte por ruta
+ */
+function acumular(ruta, contexto) {
+  let stats = rutas.get(ruta);
+  if (!stats) {
+    if (rutas.size >= MAX_RUTAS) return;
+    stats = { peticiones: 0, consultas: 0, consultasMax: 0, dbMs: 0, dbMsMax: 0, excedidas: 0, n1: {} };
+    rutas.set(ruta, stats);
+  }
+
+  stats.peticiones++;
+  stats.consultas += contexto.consultas;
+  stats.consultasMax = Math.max(stats.consultasMax, contexto.consultas);
+  stats.dbMs += contexto.dbMs;
+  stats.dbMsMax = Math.max(stats.dbMsMax, contexto.dbMs);
+  if (excedePresupuesto(contexto)) stats.excedidas++;
+  repetidas(contexto).forEach(({ operacion, veces }) => {
+    stats.n1[operacion] = Math.max(stats.n1[operacion] || 0, veces);
+  });
+}
+
+/**
+ * Reporte agregado por ruta, ordenado por consultas promedio
+ */
+function getReporte() {
+  const reporte = [...rutas.entries()].map(([ruta, stats]) => ({
+    ruta,
+    peticiones: stats.peticiones,
+    consultas: {
+      promedio: redondear(stats.consultas / stats.peticiones),
+      max: stats.consultasMax,
+    },
+    dbMs: {
+      promedio: redondear(stats.dbMs / stats.peticiones),
+      max: redondear(stats.dbMsMax),
+    },
+    excedidas: stats.excedidas,
+    posiblesN1: stats.n1,
+  }));
+  reporte.sort((a, b) => b.consultas.promedio - a.consultas.promedio);
+
+  return { presupuesto: PRESUPUESTO, umbralN1: UMBRAL_N1, rutas: reporte };
+}
+
+function reiniciar() {
+  rutas.clear();
+}
+
+module.exports = {
+  PRESUPUESTO,
+  medir,
+  activo,
+  registrar,
+  repetidas,
+  excedePresupuesto,
+  normalizarRuta,
+  acumular,
+  getReporte,
+  reiniciar,
+};
@@ -0,0 +1,113 @@
+/**
+ * Configuración y métricas del pool de conexiones de Prisma
+ *
+ * Todo el proceso comparte un único PrismaClient (db/prisma.js) y por tanto un
+ * único pool. El tamaño y los timeouts se configuran por variables de entorno y
+ * se agregan como parámetros de la URL de conexión (los que ya vengan en
+ * DATABASE_URL tienen prioridad):
+ *
+ * - DB_POOL_SIZE        -> connection_limit (default Prisma: núcleos * 2 + 1)
+ * - DB_POOL_TIMEOUT_S   -> pool_timeout, espera máxima por una conexión libre
+ * - DB_QUERY_TIMEOUT_S  -> socket_timeout, duración máxima de una consulta
+ * - DB_CONNECT_TIMEOUT_S -> connect_timeout
+ */
+const os = require('os');
+
+const PARAMETROS_URL = {
+  connection_limit: 'DB_POOL_SIZE',
+  pool_timeout: 'DB_POOL_TIMEOUT_S',
+  socket_timeout: 'DB_QUERY_TIMEOUT_S',
+  connect_timeout: 'DB_CONNECT_TIMEOUT_S',
+};
+
+/**
+ * Agregar los parámetros del pool a la URL de conexión
+ */
+function buildDatabaseUrl(databaseUrl, env = process.env) {
+  if (!databaseUrl) return databaseUrl;
+
+  const url = new URL(databaseUrl);
+  Object.entries(PARAMETROS_URL).forEach(([parametro, variable]) => {
+    if (env[variable] && !url.searchParams.has(parametro)) {
+      url.searchParams.set(parametro, env[variable]);
+    }
+  });
+  return url.toString();
+}
+
+/**
+ * Configuración efectiva del pool a partir de la URL final
+ */
+function getPoolConfig(databaseUrl) {
+  const params = databaseUrl ? new URL(databaseUrl).searchParams : new URLSearchParams();
+  const numero = (nombre) => (params.has(nombre) ? parseInt(params.get(nombre), 10) : null);
+
+  return {
+    connectionLimit: numero('connection_limit') || os.cpus().length * 2 + 1,
+    poolTimeoutS: numero('pool_timeout') ?? 10,
+    queryTimeoutS: numero('socket_timeout'),
+    connectTimeoutS: numero('connect_timeout') ?? 5,
+  };
+}
+
+const valorMetrica = (lista, key) => {
+  const metrica = (lista || []).find(m => m.key === key);
+  return metrica ? metrica.value : 0;
+};
+
+const promedioHistograma = (lista, key) => {
+  const metrica = (lista || []).find(m => m.key === key);
+  if (!metrica || !metrica.value.count) return { avg: 0, count: 0 };
+  return {
+    avg: Math.round((metrica.value.sum / metrica.value.count) * 100) / 100,
+    count: metrica.value.count,
+  };
+};
+
+/**
+ * Métricas del pool (requiere previewFeatures = ["metrics"] en schema.prisma)
+ *
+ * @returns {Promise<Object>} Conexiones abiertas/ocupadas/libres, consultas y tiempos de espera
+ */
+async function getPoolMetrics(prisma, config = poolConfig) {
+  let metricas;
+  try {
+    metricas = await prisma.$metrics.json();
+  } catch (err) {
+    return { config, metrics: null, error: err.message };
+  }
+
+  const { counters, gauges, histograms } = metricas;
+  const espera = promedioHistograma(histograms, 'prisma_client_queries_wait_histogram_ms');
+  const duracion = promedioHistograma(histograms, 'prisma_client_queries_duration_histogram_ms');
+
+  return {
+    config,
+    connections: {
+      open: valorMetrica(gauges, 'prisma_pool_connections_open'),
+      busy: valorMetrica(gauges, 'prisma_pool_connections_busy'),
+      idle: valorMetrica(gauges, 'prisma_pool_connections_idle'),
+      opened: valorMetrica(counters, 'prisma_pool_connections_opened_total'),
+      closed: valorMetrica(counters, 'prisma_pool_connections_closed_total'),
+    },
+    queries: {
+      total: valorMetrica(counters, 'prisma_client_queries_total'),
+      active: valorMetrica(gauges, 'prisma_client_queries_active'),
+      waiting: valorMetrica(gauges, 'prisma_client_queries_wait'),
+    },
+    waitMs: espera,
+    durationMs: duracion,
+  };
+}
+
+// URL y configuración efectivas del proceso
+const databaseUrl = buildDatabaseUrl(process.env.DATABASE_URL);
+const poolConfig = getPoolConfig(databaseUrl);
+
+module.exports = {
+  databaseUrl,
+  poolConfig,
+  buildDatabaseUrl,
+  getPoolConfig,
+  getPoolMetrics,
+};
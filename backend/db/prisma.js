@@ -1,11 +1,35 @@
+const { performance } = require('perf_hooks');
 const { PrismaClient } = require('@prisma/client');
+const { databaseUrl } = require('./pool');
+const consultas = require('./consultas');
 
-const prisma = new PrismaClient({
+// Único cliente (y pool de conexiones) del proceso: no crear otros PrismaClient
+const cliente = new PrismaClient({
   log: ['error', 'warn'],
+  ...(databaseUrl ? { datasources: { db: { url: databaseUrl } } } : {}),
+});
+
+// Cuenta y cronometra cada operación dentro de la petición en curso (db/consultas.js).
+// Se hace con una extensión y no con los eventos 'query' porque estos llegan desde el
+// motor sin el contexto asíncrono de la petición
+const prisma = cliente.$extends({
+  name: 'consultasPorPeticion',
+  query: {
+    async $allOperations({ model, operation, args, query }) {
+      if (!consultas.activo()) return query(args);
+
+      const inicio = performance.now();
+      try {
+        return await query(args);
+      } finally {
+        consultas.registrar(model, operation, performance.now() - inicio);
+      }
+    },
+  },
 });
 
 process.on('beforeExit', async () => {
-  await prisma.$disconnect();
+  await cliente.$disconnect();
 });
 
 module.exports = prisma;
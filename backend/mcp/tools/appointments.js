@@ -6,6 +6,8 @@
 
 const prisma = require('../../db/prisma');
 const disponibilidadService = require('../../services/disponibilidad.service');
+const disponibilidadCache = require('../../services/disponibilidadCache.service');
+const { ValidationError } = require('../../utils/errors');
 
 // UUID validation helper
 const isValidUUID = (str) => {
@@ -351,22 +353,35 @@ const handlers = {
       throw new Error(`Horario no disponible: ${err.message}`);
     }
 
-    // Create appointment
-    const cita = await prisma.cita.create({
-      data: {
-        pacienteId: paciente.id,
+    // Create appointment, re-checking the slot against the DB under the doctor/day lock
+    let cita;
+    try {
+      cita = await disponibilidadService.conHorarioReservado({
         doctorId: doctor.usuarioId,
-        especialidadId: especialidad.id,
-        tipoCita: 'Especialidad',
-        fecha: new Date(fecha + 'T00:00:00Z'),
-        hora: new Date(`1970-01-01T${hora}:00Z`),
+        fecha,
+        hora,
         duracionMinutos: especialidad.duracionMinutos,
-        costo: especialidad.costoCOP,
-        motivo: motivo || 'Consulta programada vía WhatsApp',
-        estado: 'Programada',
-        prioridad: 'Media',
-      },
-    });
+      }, (tx) => tx.cita.create({
+        data: {
+          pacienteId: paciente.id,
+          doctorId: doctor.usuarioId,
+          especialidadId: especialidad.id,
+          tipoCita: 'Especialidad',
+          fecha: new Date(fecha + 'T00:00:00Z'),
+          hora: new Date(`1970-01-01T${hora}:00Z`),
+          duracionMinutos: especialidad.duracionMinutos,
+          costo: especialidad.costoCOP,
+          motivo: motivo || 'Consulta programada vía WhatsApp',
+          estado: 'Programada',
+          prioridad: 'Media',
+        },
+      }));
+    } catch (err) {
+      if (err instanceof ValidationError) throw new Error(`Horario no disponible: ${err.message}`);
+      throw err;
+    }
+
+    disponibilidadCache.actualizarCita(null, cita);
 
     return {
       exito: true,
@@ -425,6 +440,8 @@ const handlers = {
       },
     });
 
+    disponibilidadCache.invalidarDia(cita.doctorId, cita.fecha);
+
     const fechaFormateada = new Date(cita.fecha).toLocaleDateString('es-CO', {
       weekday: 'long',
       year: 'numeric',
@@ -509,17 +526,31 @@ const handlers = {
       minute: '2-digit',
     });
 
-    // Update appointment
-    await prisma.cita.update({
-      where: { id: cita_id },
-      data: {
-        fecha: new Date(nueva_fecha + 'T00:00:00Z'),
-        hora: new Date(`1970-01-01T${nueva_hora}:00Z`),
-        notas: cita.notas
-          ? `${cita.notas}\n[Reprogramada vía WhatsApp de ${fechaAnterior} ${horaAnterior}]: ${motivo || 'Sin motivo especificado'}`
-          : `[Reprogramada vía WhatsApp de ${fechaAnterior} ${horaAnterior}]: ${motivo || 'Sin motivo especificado'}`,
-      },
-    });
+    // Update appointment, re-checking the new slot against the DB under the doctor/day lock
+    try {
+      await disponibilidadService.conHorarioReservado({
+        doctorId: cita.doctorId,
+        fecha: nueva_fecha,
+        hora: nueva_hora,
+        duracionMinutos: cita.especialidad.duracionMinutos,
+        excludeCitaId: cita_id,
+      }, (tx) => tx.cita.update({
+        where: { id: cita_id },
+        data: {
+          fecha: new Date(nueva_fecha + 'T00:00:00Z'),
+          hora: new Date(`1970-01-01T${nueva_hora}:00Z`),
+          notas: cita.notas
+            ? `${cita.notas}\n[Reprogramada vía WhatsApp de ${fechaAnterior} ${horaAnterior}]: ${motivo || 'Sin motivo especificado'}`
+            : `[Reprogramada vía WhatsApp de ${fechaAnterior} ${horaAnterior}]: ${motivo || 'Sin motivo especificado'}`,
+        },
+      }));
+    } catch (err) {
+      if (err instanceof ValidationError) throw new Error(`Nuevo horario no disponible: ${err.message}`);
+      throw err;
+    }
+
+    disponibilidadCache.invalidarDia(cita.doctorId, cita.fecha);
+    disponibilidadCache.invalidarDia(cita.doctorId, nueva_fecha);
 
     return {
       exito: true,
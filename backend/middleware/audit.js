@@ -1,4 +1,4 @@
-const prisma = require('../db/prisma');
+const auditQueue = require('../services/auditQueue.service');
 
 const auditMiddleware = (action, resource) => {
   return async (c, next) => {
@@ -12,19 +12,19 @@ const auditMiddleware = (action, resource) => {
     if (c.res.status >= 200 && c.res.status < 300) {
       try {
         const user = c.get('user');
-        const body = await c.req.json().catch(() => ({})); // Try to get body, might fail if already consumed or not json
+        // Reutilizar el body ya parseado por el handler en lugar de parsearlo de nuevo
+        const body = c.req.bodyCache.json ? await c.req.bodyCache.json.catch(() => ({})) : {};
         const { id } = c.req.param();
 
-        await prisma.auditLog.create({
-          data: {
-            userId: user ? user.id : null,
-            action: action || c.req.method,
-            resource: resource || c.req.path,
-            resourceId: id || null,
-            details: body,
-            ipAddress: c.req.header('x-forwarded-for') || c.req.header('cf-connecting-ip') || 'unknown',
-            userAgent: c.req.header('user-agent'),
-          }
+        // Encolar sin esperar el INSERT: la cola escribe en lote (ver auditQueue.service)
+        await auditQueue.enqueue({
+          userId: user ? user.id : null,
+          action: action || c.req.method,
+          resource: resource || c.req.path,
+          resourceId: id || null,
+          details: body,
+          ipAddress: c.req.header('x-forwarded-for') || c.req.header('cf-connecting-ip') || 'unknown',
+          userAgent: c.req.header('user-agent'),
         });
       } catch (err) {
         console.error('Failed to create audit log:', err);
@@ -3,11 +3,9 @@
  */
 const { verifyToken } = require('../utils/auth');
 const { error } = require('../utils/response');
-const { PrismaClient } = require('@prisma/client');
+const prisma = require('../db/prisma');
 const roleService = require('../services/role.service');
 
-const prisma = new PrismaClient();
-
 /**
  * Middleware para verificar token JWT
  * Acepta token via header Authorization o query parameter ?token=
@@ -86,7 +84,7 @@ const requirePermission = (permissionName) => {
       }
 
       // Obtener roles y permisos del usuario usando el nuevo servicio
-      const { permissions, roles } = await roleService.getUserRoles(user.id);
+      const { permissions, roles } = await roleService.getUserRolesCached(user.id);
       
       // Check for super admin role or specific permission
       const isSuperAdmin = roles.some(r => r.name === 'SUPER_ADMIN' || r.isSystem);
@@ -120,7 +118,7 @@ const permissionMiddleware = (modulo) => {
 
       // Mapeo temporal o verificación simple
       // Si el usuario tiene ALGÚN permiso que empiece con el nombre del módulo, pasa
-      const { permissions, roles } = await roleService.getUserRoles(user.id);
+      const { permissions, roles } = await roleService.getUserRolesCached(user.id);
 
       const isSuperAdmin = roles.some(r => r.name === 'SUPER_ADMIN' || r.isSystem);
       if (isSuperAdmin) {
@@ -0,0 +1,82 @@
+const crypto = require('crypto');
+
+/**
+ * Comparación débil de ETags (RFC 9110 §8.8.3.2): se ignora el prefijo W/
+ */
+const sinPrefijoDebil = (etag) => etag.trim().replace(/^W\//, '');
+
+const coincideEtag = (ifNoneMatch, etag) => {
+  if (ifNoneMatch.trim() === '*') return true;
+  const actual = sinPrefijoDebil(etag);
+  return ifNoneMatch.split(',').some(candidato => sinPrefijoDebil(candidato) === actual);
+};
+
+/**
+ * GET condicional a partir de la huella del recurso
+ *
+ * La huella se calcula antes del handler (una consulta de agregación barata). Si el
+ * cliente ya tiene la versión vigente (If-None-Match, o If-Modified-Since cuando no
+ * envía ETag) se responde 304 sin ejecutar el handler. En caso contrario la respuesta
+ * 200 sale con ETag, Last-Modified y Cache-Control: private, no-cache para que el
+ * cliente revalide en cada poll.
+ *
+ * El ETag incluye la ruta y el query string, así cada página/filtro tiene el suyo.
+ * If-Modified-Since solo ve el máximo de updatedAt (no detecta borrados); por eso se
+ * ignora cuando viene If-None-Match, como indica el RFC.
+ *
+ * @param {(c: import('hono').Context) => Promise<{version: string, lastModified: Date|null}|null>} obtenerHuella
+ */
+const conditionalGet = (obtenerHuella) => {
+  return async (c, next) => {
+    let huella;
+    try {
+      huella = await obtenerHuella(c);
+    } catch (err) {
+      // Sin huella no hay condicional: se sirve la respuesta completa
+      console.error('[Conditional] Error calculando huella:', err.message);
+      return next();
+    }
+
+    // Sin huella (p. ej. faltan parámetros) el handler responde como siempre
+    if (!huella) return next();
+
+    const url = new URL(c.req.url);
+    const digest = crypto.createHash('sha1')
+      .update(`${huella.version}|${url.pathname}${url.search}`)
+      .digest('base64url');
+    const etag = `W/"${digest}"`;
+    const lastModified = huella.lastModified ? new Date(huella.lastModified) : null;
+
+    const cabeceras = {
+      ETag: etag,
+      'Cache-Control': 'private, no-cache',
+      ...(lastModified && { 'Last-Modified': lastModified.toUTCString() }),
+    };
+
+    const ifNoneMatch = c.req.header('if-none-match');
+    const ifModifiedSince = c.req.header('if-modified-since');
+    let noModificado = false;
+
+    if (ifNoneMatch) {
+      noModificado = coincideEtag(ifNoneMatch, etag);
+    } else if (ifModifiedSince && lastModified) {
+      const desde = Date.parse(ifModifiedSince);
+      // Las fechas HTTP tienen resolución de segundos
+      noModificado = !Number.isNaN(desde) && Math.floor(lastModified.getTime() / 1000) * 1000 <= desde;
+    }
+
+    if (noModificado) {
+      return c.body(null, 304, cabeceras);
+    }
+
+    await next();
+
+    if (c.res.status === 200) {
+      for (const [nombre, valor] of Object.entries(cabeceras)) {
+        c.res.headers.set(nombre, valor);
+      }
+    }
+  };
+};
+
+module.exports = { conditionalGet };
@@ -0,0 +1,44 @@
+const { performance } = require('perf_hooks');
+const consultas = require('../db/consultas');
+
+/**
+ * Instrumentación de consultas por petición
+ *
+ * Corre el resto de la cadena dentro de un contexto de db/consultas.js y, al terminar,
+ * agrega a la respuesta la cabecera Server-Timing con las consultas a la base de datos
+ * y su tiempo acumulado, más el tiempo total de la petición:
+ *
+ *   Server-Timing: db;dur=12.4;desc="8 consultas", app;dur=31.0
+ *
+ * Las peticiones que superan CONSULTAS_PRESUPUESTO o repiten una misma operación
+ * (posible N+1) se registran con console.warn, y todas se acumulan en el reporte por
+ * ruta (GET /health/consultas).
+ */
+const medirConsultas = () => async (c, next) => {
+  const inicio = performance.now();
+  const { contexto } = await consultas.medir(() => next());
+  const totalMs = performance.now() - inicio;
+
+  const ruta = `${c.req.method} ${consultas.normalizarRuta(c.req.path)}`;
+  consultas.acumular(ruta, contexto);
+
+  try {
+    c.res.headers.append(
+      'Server-Timing',
+      `db;dur=${contexto.dbMs.toFixed(1)};desc="${contexto.consultas} consultas", app;dur=${totalMs.toFixed(1)}`
+    );
+  } catch (err) {
+    // Respuestas con cabeceras inmutables (p. ej. proxied): se omite la cabecera
+  }
+
+  const repetidas = consultas.repetidas(contexto);
+  if (consultas.excedePresupuesto(contexto) || repetidas.length > 0) {
+    const n1 = repetidas.map(({ operacion, veces }) => `${operacion} x${veces}`).join(', ');
+    console.warn(
+      `[Consultas] ${ruta}: ${contexto.consultas} consultas en ${contexto.dbMs.toFixed(1)}ms de DB ` +
+      `(presupuesto ${consultas.PRESUPUESTO})${n1 ? `; posible N+1: ${n1}` : ''}`
+    );
+  }
+};
+
+module.exports = { medirConsultas };
@@ -0,0 +1,38 @@
+-- Búsqueda indexada de productos insensible a acentos
+-- Reemplaza el escaneo secuencial con unaccent(lower(...)) LIKE '%...%' por un
+-- índice GIN de trigramas sobre una columna normalizada y mantenida por la BD.
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent() es STABLE (depende del search_path); este envoltorio fija el
+-- diccionario para poder usarlo en columnas generadas e índices.
+CREATE OR REPLACE FUNCTION immutable_unaccent(text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+
+-- Texto de búsqueda normalizado (minúsculas, sin acentos)
+ALTER TABLE "productos" ADD COLUMN "search_text" TEXT GENERATED ALWAYS AS (
+  immutable_unaccent(lower(
+    COALESCE("nombre", '') || ' ' ||
+    COALESCE("principio_activo", '') || ' ' ||
+    COALESCE("descripcion", '') || ' ' ||
+    COALESCE("codigo_atc", '') || ' ' ||
+    COALESCE("cum", '') || ' ' ||
+    COALESCE("sku", '')
+  ))
+) STORED;
+
+-- Nombre normalizado, usado para ordenar por coincidencia de prefijo
+ALTER TABLE "productos" ADD COLUMN "nombre_normalizado" TEXT GENERATED ALWAYS AS (
+  immutable_unaccent(lower("nombre"))
+) STORED;
+
+CREATE INDEX "productos_search_text_trgm_idx" ON "productos" USING GIN ("search_text" gin_trgm_ops);
+CREATE INDEX "productos_nombre_normalizado_idx" ON "productos" ("nombre_normalizado" text_pattern_ops);
+
+-- Búsqueda exacta por código (CUM, código de barras, ATC). El SKU ya es único.
+CREATE INDEX "productos_cum_idx" ON "productos" ("cum");
+CREATE INDEX "productos_codigo_barras_idx" ON "productos" ("codigo_barras");
+CREATE INDEX "productos_codigo_atc_idx" ON "productos" ("codigo_atc");
@@ -0,0 +1,2 @@
+-- Gráficas y listados de signos vitales filtran por paciente y rango de fechas
+CREATE INDEX IF NOT EXISTS "signos_vitales_paciente_id_fecha_registro_idx" ON "signos_vitales" ("paciente_id", "fecha_registro");
@@ -0,0 +1,11 @@
+-- CreateTable
+CREATE TABLE "permisos_invalidaciones" (
+    "id" BIGSERIAL NOT NULL,
+    "usuario_id" UUID,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "permisos_invalidaciones_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "permisos_invalidaciones_created_at_idx" ON "permisos_invalidaciones"("created_at");
@@ -0,0 +1,27 @@
+-- CreateTable
+CREATE TABLE "importaciones_productos" (
+    "id" TEXT NOT NULL,
+    "estado" TEXT NOT NULL DEFAULT 'pendiente',
+    "archivo" TEXT NOT NULL,
+    "nombre_archivo" TEXT,
+    "categoria_id" TEXT,
+    "usuario_id" TEXT,
+    "bytes_totales" BIGINT NOT NULL DEFAULT 0,
+    "bytes_procesados" BIGINT NOT NULL DEFAULT 0,
+    "filas_procesadas" INTEGER NOT NULL DEFAULT 0,
+    "creados" INTEGER NOT NULL DEFAULT 0,
+    "actualizados" INTEGER NOT NULL DEFAULT 0,
+    "errores" INTEGER NOT NULL DEFAULT 0,
+    "errores_detalle" JSONB,
+    "rss_pico_mb" DOUBLE PRECISION,
+    "mensaje_error" TEXT,
+    "iniciado_en" TIMESTAMP(3),
+    "finalizado_en" TIMESTAMP(3),
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updated_at" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "importaciones_productos_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "importaciones_productos_estado_idx" ON "importaciones_productos"("estado");
@@ -0,0 +1,22 @@
+-- Búsqueda indexada de pacientes (/pacientes/search)
+-- Reemplaza los cuatro contains ... mode: 'insensitive' combinados con OR (escaneo
+-- secuencial) por índices para documento, correo y nombre completo normalizado.
+-- Usa immutable_unaccent() y pg_trgm creados en add_producto_search_index.
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Nombre completo normalizado (minúsculas, sin acentos): "maría gómez" -> "maria gomez"
+ALTER TABLE "pacientes" ADD COLUMN "nombre_completo_normalizado" TEXT GENERATED ALWAYS AS (
+  immutable_unaccent(lower(COALESCE("nombre", '') || ' ' || COALESCE("apellido", '')))
+) STORED;
+
+-- Coincidencias parciales por palabra (trigramas) y por prefijo del nombre completo
+CREATE INDEX "pacientes_nombre_completo_trgm_idx" ON "pacientes" USING GIN ("nombre_completo_normalizado" gin_trgm_ops);
+CREATE INDEX "pacientes_nombre_completo_prefix_idx" ON "pacientes" ("nombre_completo_normalizado" text_pattern_ops);
+
+-- Prefijo de documento (la igualdad ya usa el índice único de cédula)
+CREATE INDEX "pacientes_cedula_prefix_idx" ON "pacientes" ("cedula" text_pattern_ops);
+
+-- Prefijo de correo
+CREATE INDEX "pacientes_email_lower_prefix_idx" ON "pacientes" (lower("email") text_pattern_ops);
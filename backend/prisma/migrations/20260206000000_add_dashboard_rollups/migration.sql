@@ -0,0 +1,129 @@
+-- Rollups diarios para /dashboard/stats
+-- Los triggers de facturas y citas aplican cada escritura como un delta sobre la fila
+-- del día, sin importar qué servicio la haga. El job nocturno dashboardRollups
+-- recalcula todo desde las tablas fuente para corregir cualquier desvío.
+
+-- Día calendario en hora de Colombia (las marcas de tiempo se guardan en UTC)
+CREATE OR REPLACE FUNCTION dashboard_dia(ts TIMESTAMP)
+RETURNS DATE
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT (ts AT TIME ZONE 'UTC' AT TIME ZONE 'America/Bogota')::date $$;
+
+-- CreateTable
+CREATE TABLE "dashboard_ingresos_diarios" (
+    "fecha" DATE NOT NULL,
+    "total" DECIMAL(14,2) NOT NULL DEFAULT 0,
+    "facturas" INTEGER NOT NULL DEFAULT 0,
+    "updated_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "dashboard_ingresos_diarios_pkey" PRIMARY KEY ("fecha")
+);
+
+-- CreateTable (doctor_id = '' para citas sin doctor)
+CREATE TABLE "dashboard_citas_diarias" (
+    "fecha" DATE NOT NULL,
+    "estado" TEXT NOT NULL,
+    "doctor_id" TEXT NOT NULL DEFAULT '',
+    "cantidad" INTEGER NOT NULL DEFAULT 0,
+
+    CONSTRAINT "dashboard_citas_diarias_pkey" PRIMARY KEY ("fecha", "estado", "doctor_id")
+);
+
+-- CreateTable
+CREATE TABLE "dashboard_stock_bajo" (
+    "producto_id" TEXT NOT NULL,
+    "nombre" TEXT NOT NULL,
+    "cantidad_total" INTEGER NOT NULL,
+    "cantidad_min_alerta" INTEGER NOT NULL,
+    "actualizado_en" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "dashboard_stock_bajo_pkey" PRIMARY KEY ("producto_id")
+);
+
+-- Facturas: ingresos por día (excluye canceladas)
+CREATE OR REPLACE FUNCTION dashboard_rollup_factura()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.estado <> 'Cancelada' THEN
+    UPDATE "dashboard_ingresos_diarios"
+    SET "total" = "total" - OLD.total, "facturas" = "facturas" - 1, "updated_at" = now()
+    WHERE "fecha" = dashboard_dia(OLD.fecha_emision);
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.estado <> 'Cancelada' THEN
+    INSERT INTO "dashboard_ingresos_diarios" ("fecha", "total", "facturas")
+    VALUES (dashboard_dia(NEW.fecha_emision), NEW.total, 1)
+    ON CONFLICT ("fecha") DO UPDATE SET
+      "total" = "dashboard_ingresos_diarios"."total" + EXCLUDED."total",
+      "facturas" = "dashboard_ingresos_diarios"."facturas" + 1,
+      "updated_at" = now();
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER "facturas_dashboard_rollup_ins_del"
+AFTER INSERT OR DELETE ON "facturas"
+FOR EACH ROW EXECUTE FUNCTION dashboard_rollup_factura();
+
+CREATE TRIGGER "facturas_dashboard_rollup_upd"
+AFTER UPDATE OF "estado", "total", "fecha_emision" ON "facturas"
+FOR EACH ROW
+WHEN (OLD.estado IS DISTINCT FROM NEW.estado OR OLD.total IS DISTINCT FROM NEW.total OR OLD.fecha_emision IS DISTINCT FROM NEW.fecha_emision)
+EXECUTE FUNCTION dashboard_rollup_factura();
+
+-- Citas: cantidad por día, estado y doctor (las citas sin fecha no se cuentan)
+CREATE OR REPLACE FUNCTION dashboard_rollup_cita()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.fecha IS NOT NULL THEN
+    UPDATE "dashboard_citas_diarias"
+    SET "cantidad" = "cantidad" - 1
+    WHERE "fecha" = OLD.fecha
+      AND "estado" = OLD.estado::text
+      AND "doctor_id" = COALESCE(OLD.doctor_id::text, '');
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.fecha IS NOT NULL THEN
+    INSERT INTO "dashboard_citas_diarias" ("fecha", "estado", "doctor_id", "cantidad")
+    VALUES (NEW.fecha, NEW.estado::text, COALESCE(NEW.doctor_id::text, ''), 1)
+    ON CONFLICT ("fecha", "estado", "doctor_id") DO UPDATE SET
+      "cantidad" = "dashboard_citas_diarias"."cantidad" + 1;
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER "citas_dashboard_rollup_ins_del"
+AFTER INSERT OR DELETE ON "citas"
+FOR EACH ROW EXECUTE FUNCTION dashboard_rollup_cita();
+
+CREATE TRIGGER "citas_dashboard_rollup_upd"
+AFTER UPDATE OF "estado", "fecha", "doctor_id" ON "citas"
+FOR EACH ROW
+WHEN (OLD.estado IS DISTINCT FROM NEW.estado OR OLD.fecha IS DISTINCT FROM NEW.fecha OR OLD.doctor_id IS DISTINCT FROM NEW.doctor_id)
+EXECUTE FUNCTION dashboard_rollup_cita();
+
+-- Carga inicial
+INSERT INTO "dashboard_ingresos_diarios" ("fecha", "total", "facturas")
+SELECT dashboard_dia(fecha_emision), SUM(total), COUNT(*)
+FROM "facturas"
+WHERE estado <> 'Cancelada'
+GROUP BY 1;
+
+INSERT INTO "dashboard_citas_diarias" ("fecha", "estado", "doctor_id", "cantidad")
+SELECT fecha, estado::text, COALESCE(doctor_id::text, ''), COUNT(*)
+FROM "citas"
+WHERE fecha IS NOT NULL
+GROUP BY 1, 2, 3;
+
+INSERT INTO "dashboard_stock_bajo" ("producto_id", "nombre", "cantidad_total", "cantidad_min_alerta")
+SELECT id, nombre, cantidad_total, cantidad_min_alerta
+FROM "productos"
+WHERE activo = true AND cantidad_total <= cantidad_min_alerta;
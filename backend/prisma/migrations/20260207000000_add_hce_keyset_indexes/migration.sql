@@ -0,0 +1,11 @@
+-- Paginación por cursor de los listados HCE: ORDER BY fecha DESC, id DESC con filtro
+-- "(fecha, id) < cursor" por paciente se resuelve con un recorrido del índice
+-- (un B-tree se lee hacia atrás igual de rápido).
+
+-- Reemplaza al índice (paciente_id, fecha_registro): el nuevo cubre las mismas consultas
+DROP INDEX IF EXISTS "signos_vitales_paciente_id_fecha_registro_idx";
+CREATE INDEX "signos_vitales_paciente_id_fecha_registro_id_idx" ON "signos_vitales" ("paciente_id", "fecha_registro", "id");
+
+CREATE INDEX "evoluciones_clinicas_paciente_id_fecha_evolucion_id_idx" ON "evoluciones_clinicas" ("paciente_id", "fecha_evolucion", "id");
+CREATE INDEX "diagnosticos_hce_paciente_id_fecha_diagnostico_id_idx" ON "diagnosticos_hce" ("paciente_id", "fecha_diagnostico", "id");
+CREATE INDEX "alertas_clinicas_paciente_id_fecha_alerta_id_idx" ON "alertas_clinicas" ("paciente_id", "fecha_alerta", "id");
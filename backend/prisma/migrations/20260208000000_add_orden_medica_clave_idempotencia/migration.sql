@@ -0,0 +1,6 @@
+-- Ingreso de resultados por lote (/ordenes-medicas/completar-lote)
+-- Cada resultado del analizador trae una clave de idempotencia; se guarda en la orden
+-- que completó para que reenviar la misma corrida no vuelva a aplicar los resultados.
+ALTER TABLE "ordenes_medicas" ADD COLUMN "clave_idempotencia" TEXT;
+
+CREATE UNIQUE INDEX "ordenes_medicas_clave_idempotencia_key" ON "ordenes_medicas"("clave_idempotencia");
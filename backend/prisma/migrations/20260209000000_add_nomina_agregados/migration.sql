@@ -0,0 +1,31 @@
+-- Totales de nómina guardados en el periodo
+-- procesarNomina los acumula lote a lote junto con los detalles, así /resumen no tiene
+-- que leer todas las filas de th_nomina_detalle del periodo.
+ALTER TABLE "th_periodos_nomina"
+    ADD COLUMN "total_devengado" DECIMAL(65,30) NOT NULL DEFAULT 0,
+    ADD COLUMN "total_deducciones" DECIMAL(65,30) NOT NULL DEFAULT 0,
+    ADD COLUMN "neto_pagar" DECIMAL(65,30) NOT NULL DEFAULT 0,
+    ADD COLUMN "aportes_empresa" DECIMAL(65,30) NOT NULL DEFAULT 0,
+    ADD COLUMN "provisiones" DECIMAL(65,30) NOT NULL DEFAULT 0,
+    ADD COLUMN "empleados_procesados" INTEGER NOT NULL DEFAULT 0;
+
+-- Periodos procesados antes de esta migración
+UPDATE "th_periodos_nomina" p
+SET "total_devengado" = d."total_devengado",
+    "total_deducciones" = d."total_deducciones",
+    "neto_pagar" = d."neto_pagar",
+    "aportes_empresa" = d."aportes_empresa",
+    "provisiones" = d."provisiones",
+    "empleados_procesados" = d."empleados"
+FROM (
+    SELECT "periodo_id",
+           SUM("total_devengado") AS "total_devengado",
+           SUM("total_deducciones") AS "total_deducciones",
+           SUM("neto_pagar") AS "neto_pagar",
+           SUM("salud_empresa" + "pension_empresa" + "arl" + "caja_compensacion" + "sena" + "icbf") AS "aportes_empresa",
+           SUM("cesantias" + "int_cesantias" + "prima" + "vacaciones_prov") AS "provisiones",
+           COUNT(*)::INTEGER AS "empleados"
+    FROM "th_nomina_detalle"
+    GROUP BY "periodo_id"
+) d
+WHERE p."id" = d."periodo_id";
@@ -0,0 +1,24 @@
+-- Índice de interacciones medicamentosas (ver services/interaccionesMedicamentos.service.js)
+-- Una fila por par de principios activos normalizados (principio_a < principio_b) que la
+-- descripción de un producto declara como interacción. Se llena con
+-- POST /productos/interacciones/reconstruir y se mantiene al crear o editar productos.
+CREATE TABLE "interacciones_medicamentos" (
+    "id" TEXT NOT NULL,
+    "producto_id" TEXT NOT NULL,
+    "principio_a" TEXT NOT NULL,
+    "principio_b" TEXT NOT NULL,
+    "severidad" TEXT NOT NULL,
+    "detalle" TEXT,
+    "created_at" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "interacciones_medicamentos_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "interacciones_medicamentos_producto_id_principio_a_principio_b_key" ON "interacciones_medicamentos"("producto_id", "principio_a", "principio_b");
+
+-- CreateIndex
+CREATE INDEX "interacciones_medicamentos_principio_a_principio_b_idx" ON "interacciones_medicamentos"("principio_a", "principio_b");
+
+-- AddForeignKey
+ALTER TABLE "interacciones_medicamentos" ADD CONSTRAINT "interacciones_medicamentos_producto_id_fkey" FOREIGN KEY ("producto_id") REFERENCES "productos"("id") ON DELETE CASCADE ON UPDATE CASCADE;
@@ -0,0 +1,23 @@
+-- Métricas por corrida del cron de recordatorios de citas (ver cron/recordatoriosCitas.js)
+-- Una fila por ejecución de procesarRecordatorios: cuántas citas encontró cada cohorte,
+-- cuántos recordatorios salieron, cuántos fallaron tras agotar reintentos y cuánto tardó.
+CREATE TABLE "recordatorios_ejecuciones" (
+    "id" TEXT NOT NULL,
+    "iniciado_en" TIMESTAMP(3) NOT NULL,
+    "finalizado_en" TIMESTAMP(3) NOT NULL,
+    "duracion_ms" INTEGER NOT NULL,
+    "candidatas" INTEGER NOT NULL DEFAULT 0,
+    "sin_email" INTEGER NOT NULL DEFAULT 0,
+    "enviados_7_dias" INTEGER NOT NULL DEFAULT 0,
+    "enviados_4_dias" INTEGER NOT NULL DEFAULT 0,
+    "enviados_3_horas" INTEGER NOT NULL DEFAULT 0,
+    "fallidos" INTEGER NOT NULL DEFAULT 0,
+    "lotes" INTEGER NOT NULL DEFAULT 0,
+    "reintentos" INTEGER NOT NULL DEFAULT 0,
+    "error" TEXT,
+
+    CONSTRAINT "recordatorios_ejecuciones_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "recordatorios_ejecuciones_iniciado_en_idx" ON "recordatorios_ejecuciones"("iniciado_en");
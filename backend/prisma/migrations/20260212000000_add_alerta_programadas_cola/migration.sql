@@ -0,0 +1,17 @@
+-- Cola de alertas programadas con reclamo de filas (ver AlertaService.reclamarAlertas)
+-- Cada worker reclama un lote con FOR UPDATE SKIP LOCKED y lo arrienda hasta
+-- bloqueada_hasta; si el worker muere, el lote vuelve a la cola al vencer el arriendo.
+-- Tras ALERTAS_MAX_INTENTOS errores la fila pasa a la cola de descarte (fallida_en).
+ALTER TABLE "alerta_programadas"
+    ADD COLUMN "intentos" INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN "bloqueada_hasta" TIMESTAMP(3),
+    ADD COLUMN "bloqueada_por" TEXT,
+    ADD COLUMN "ultimo_error" TEXT,
+    ADD COLUMN "fallida_en" TIMESTAMP(3);
+
+-- Solo las filas reclamables: el índice se mantiene pequeño aunque la tabla crezca
+CREATE INDEX "alerta_programadas_pendientes_idx" ON "alerta_programadas" ("fecha_programada")
+    WHERE "procesada" = false AND "fallida_en" IS NULL;
+
+-- CreateIndex
+CREATE INDEX "alerta_programadas_fallida_en_idx" ON "alerta_programadas"("fallida_en");
@@ -4,6 +4,7 @@
 const { Hono } = require('hono');
 const agendaService = require('../services/agenda.service');
 const { authMiddleware, permissionMiddleware } = require('../middleware/auth');
+const { conditionalGet } = require('../middleware/conditional');
 const { success, error } = require('../utils/response');
 
 const agenda = new Hono();
@@ -111,15 +112,27 @@ agenda.get('/bloques/:doctorId', async (c) => {
  *           type: string
  *           format: uuid
  *         description: Filtrar por doctor
+ *       - in: header
+ *         name: If-None-Match
+ *         schema:
+ *           type: string
+ *         description: ETag de una respuesta anterior
  *     responses:
  *       200:
  *         description: Lista de citas
+ *       304:
+ *         description: La agenda del día no cambió desde el ETag/fecha enviados
  *       400:
  *         description: Fecha requerida
  *       500:
  *         description: Error del servidor
  */
-agenda.get('/citas', async (c) => {
+const huellaAgenda = (c) => {
+  const { fecha, doctorId } = c.req.query();
+  return fecha ? agendaService.obtenerHuellaCitas(fecha, doctorId) : null;
+};
+
+agenda.get('/citas', conditionalGet(huellaAgenda), async (c) => {
   try {
     const { fecha, doctorId } = c.req.query();
 
@@ -198,6 +198,38 @@ router.post('/procesar-pendientes', requirePermission('sst.admin'), async (c) =>
   }
 });
 
+// ============ COLA DE DESCARTE ============
+
+/**
+ * GET /alertas-notificaciones/programadas/descartadas
+ * Alertas programadas que fallaron en todos sus intentos
+ */
+router.get('/programadas/descartadas', async (c) => {
+  try {
+    const query = c.req.query();
+    const result = await alertaService.getAlertasDescartadas({
+      page: parseInt(query.page) || 1,
+      limit: parseInt(query.limit) || 20
+    });
+    return c.json(paginated(result.data, result.pagination));
+  } catch (err) {
+    return c.json(error(err.message), err.status || 500);
+  }
+});
+
+/**
+ * POST /alertas-notificaciones/programadas/:id/reencolar
+ * Devolver una alerta descartada a la cola
+ */
+router.post('/programadas/:id/reencolar', requirePermission('sst.admin'), async (c) => {
+  try {
+    const result = await alertaService.reencolarAlerta(c.req.param('id'));
+    return c.json(success(result, 'Alerta devuelta a la cola'));
+  } catch (err) {
+    return c.json(error(err.message), err.status || 500);
+  }
+});
+
 // ============ TIPOS DE ALERTA ============
 
 /**
@@ -4,6 +4,7 @@
 const { Hono } = require('hono');
 const alertaService = require('../services/alertaClinica.service');
 const { authMiddleware } = require('../middleware/auth');
+const { conditionalGet } = require('../middleware/conditional');
 const { success, error, paginated } = require('../utils/response');
 
 const alertas = new Hono();
@@ -13,6 +14,7 @@ alertas.use('*', authMiddleware);
 
 /**
  * GET /alertas - Obtener todas las alertas
+ * Paginación por page/limit o por cursor (?cursor=, luego pagination.next_cursor); con_total=false omite el conteo
  */
 alertas.get('/', async (c) => {
   try {
@@ -39,8 +41,9 @@ alertas.get('/:id', async (c) => {
 
 /**
  * GET /alertas/activas/:paciente_id - Obtener alertas activas de un paciente
+ * Soporta If-None-Match / If-Modified-Since (304 si no hubo altas, reconocimientos ni borrados)
  */
-alertas.get('/activas/:paciente_id', async (c) => {
+alertas.get('/activas/:paciente_id', conditionalGet((c) => alertaService.getHuellaActivas(c.req.param('paciente_id'))), async (c) => {
   try {
     const { paciente_id } = c.req.param();
     const alertasActivas = await alertaService.getAlertasActivas(paciente_id);
@@ -4,6 +4,7 @@
 const { Hono } = require('hono');
 const categoriaExamenService = require('../services/categoriaExamen.service');
 const { authMiddleware } = require('../middleware/auth');
+const { conditionalGet } = require('../middleware/conditional');
 const { success, error, paginated } = require('../utils/response');
 
 const categoriaExamen = new Hono();
@@ -25,8 +26,9 @@ categoriaExamen.get('/estadisticas', async (c) => {
 
 /**
  * GET /categorias-examenes - Obtener todas las categorías
+ * Soporta If-None-Match / If-Modified-Since (304 si el catálogo no cambió)
  */
-categoriaExamen.get('/', async (c) => {
+categoriaExamen.get('/', conditionalGet(() => categoriaExamenService.getHuella()), async (c) => {
   try {
     const query = c.req.query();
     const result = await categoriaExamenService.getAll(query);
@@ -1,6 +1,7 @@
 const { Hono } = require('hono');
 const dashboardService = require('../services/dashboard.service');
-const { authMiddleware } = require('../middleware/auth');
+const dashboardRollupService = require('../services/dashboardRollup.service');
+const { authMiddleware, roleMiddleware } = require('../middleware/auth');
 
 const app = new Hono();
 
@@ -44,6 +45,15 @@ app.get('/test', (c) => {
  *           type: string
  *           format: date
  *         description: Fecha de fin personalizada
+ *       - in: query
+ *         name: source
+ *         schema:
+ *           type: string
+ *           enum: [rollup, live]
+ *           default: rollup
+ *         description: |
+ *           rollup lee los agregados diarios (con cache de DASHBOARD_CACHE_TTL_MS);
+ *           live recalcula sobre las tablas fuente, útil para verificar los rollups
  *     responses:
  *       200:
  *         description: Estadísticas del dashboard
@@ -56,7 +66,9 @@ app.get('/stats', authMiddleware, async (c) => {
     const startDate = c.req.query('startDate');
     const endDate = c.req.query('endDate');
     
-    const stats = await dashboardService.getDashboardStats(period, startDate, endDate);
+    const stats = c.req.query('source') === 'live'
+      ? await dashboardService.getDashboardStatsLive(period, startDate, endDate)
+      : await dashboardService.getDashboardStats(period, startDate, endDate);
     return c.json({
       success: true,
       data: stats
@@ -70,4 +82,36 @@ app.get('/stats', authMiddleware, async (c) => {
   }
 });
 
+/**
+ * @swagger
+ * /dashboard/rollups/reconciliar:
+ *   post:
+ *     summary: Recalcular los rollups diarios del dashboard desde facturas y citas
+ *     description: Lo mismo que ejecuta el job nocturno; vacía el cache de /dashboard/stats.
+ *     tags: [Dashboard]
+ *     security:
+ *       - bearerAuth: []
+ *     responses:
+ *       200:
+ *         description: Días de ingresos, filas de citas y productos con stock bajo recalculados
+ *       403:
+ *         description: Solo administradores
+ */
+app.post('/rollups/reconciliar', authMiddleware, roleMiddleware('SuperAdmin', 'Admin'), async (c) => {
+  try {
+    const resultado = await dashboardRollupService.reconciliar();
+    dashboardService.limpiarCache();
+    return c.json({
+      success: true,
+      data: resultado
+    });
+  } catch (error) {
+    console.error('Dashboard Rollups Error:', error);
+    return c.json({
+      success: false,
+      message: 'Error al reconciliar los rollups del dashboard'
+    }, 500);
+  }
+});
+
 module.exports = app;
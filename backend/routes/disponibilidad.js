@@ -4,6 +4,7 @@
 const { Hono } = require('hono');
 const disponibilidadService = require('../services/disponibilidad.service');
 const { authMiddleware } = require('../middleware/auth');
+const { todayString } = require('../utils/date');
 
 const disponibilidad = new Hono();
 
@@ -17,6 +18,95 @@ disponibilidad.use('/*', authMiddleware);
  *   description: Consulta de disponibilidad de doctores
  */
 
+/**
+ * @swagger
+ * /disponibilidad/buscar:
+ *   get:
+ *     summary: Buscar los primeros horarios libres entre todos los doctores de una especialidad
+ *     tags: [Disponibilidad]
+ *     security:
+ *       - bearerAuth: []
+ *     parameters:
+ *       - in: query
+ *         name: especialidad_id
+ *         schema:
+ *           type: string
+ *           format: uuid
+ *         required: true
+ *         description: ID de la especialidad
+ *       - in: query
+ *         name: fecha_inicio
+ *         schema:
+ *           type: string
+ *           format: date
+ *         description: Fecha inicial del rango (por defecto hoy)
+ *       - in: query
+ *         name: fecha_fin
+ *         schema:
+ *           type: string
+ *           format: date
+ *         description: Fecha final del rango, máximo 31 días (por defecto fecha_inicio + 6 días)
+ *       - in: query
+ *         name: hora_desde
+ *         schema:
+ *           type: string
+ *         description: Inicio de la ventana horaria (HH:MM)
+ *       - in: query
+ *         name: hora_hasta
+ *         schema:
+ *           type: string
+ *         description: Fin de la ventana horaria (HH:MM)
+ *       - in: query
+ *         name: limite
+ *         schema:
+ *           type: integer
+ *           default: 10
+ *         description: Número máximo de slots (máximo 100)
+ *     responses:
+ *       200:
+ *         description: Primeros slots libres ordenados por fecha y hora
+ *       400:
+ *         description: Parámetros inválidos
+ *       500:
+ *         description: Error del servidor
+ */
+disponibilidad.get('/buscar', async (c) => {
+  try {
+    const { especialidad_id, fecha_inicio, fecha_fin, hora_desde, hora_hasta, limite } = c.req.query();
+
+    const fechaInicio = fecha_inicio || todayString();
+    let fechaFin = fecha_fin;
+    if (!fechaFin) {
+      const fin = new Date(fechaInicio + 'T12:00:00.000Z');
+      fin.setUTCDate(fin.getUTCDate() + 6);
+      fechaFin = fin.toISOString().split('T')[0];
+    }
+
+    const result = await disponibilidadService.buscarPrimerosDisponibles({
+      especialidadId: especialidad_id,
+      fechaInicio,
+      fechaFin,
+      horaDesde: hora_desde || null,
+      horaHasta: hora_hasta || null,
+      limite: Math.min(parseInt(limite) || 10, 100),
+    });
+
+    return c.json({
+      success: true,
+      data: result,
+    });
+  } catch (error) {
+    console.error('Error al buscar disponibilidad:', error);
+    return c.json(
+      {
+        success: false,
+        message: error.message || 'Error al buscar disponibilidad',
+      },
+      error.statusCode || 500
+    );
+  }
+});
+
 /**
  * @swagger
  * /disponibilidad/{doctorId}:
@@ -88,6 +88,21 @@ evoluciones.use('*', authMiddleware);
  *         schema:
  *           type: string
  *         description: Filtrar por médico
+ *       - in: query
+ *         name: limit
+ *         schema:
+ *           type: integer
+ *         description: Registros por página
+ *       - in: query
+ *         name: cursor
+ *         schema:
+ *           type: string
+ *         description: Paginación por cursor (vacío para la primera página, luego pagination.next_cursor). Sustituye a page
+ *       - in: query
+ *         name: con_total
+ *         schema:
+ *           type: boolean
+ *         description: Incluir total/totalPages (por defecto true con page, false con cursor)
  *     responses:
  *       200:
  *         description: Lista de evoluciones
@@ -103,6 +118,8 @@ evoluciones.use('*', authMiddleware);
  *                   type: array
  *                   items:
  *                     $ref: '#/components/schemas/Evolucion'
+ *       400:
+ *         description: Cursor de paginación inválido
  *       500:
  *         description: Error del servidor
  */
@@ -4,6 +4,7 @@
 const { Hono } = require('hono');
 const examenProcedimientoService = require('../services/examenProcedimiento.service');
 const { authMiddleware } = require('../middleware/auth');
+const { conditionalGet } = require('../middleware/conditional');
 const { success, error, paginated } = require('../utils/response');
 
 const examenProcedimiento = new Hono();
@@ -25,8 +26,9 @@ examenProcedimiento.get('/estadisticas', async (c) => {
 
 /**
  * GET /examenes-procedimientos - Obtener todos los exámenes y procedimientos
+ * Soporta If-None-Match / If-Modified-Since (304 si el catálogo no cambió)
  */
-examenProcedimiento.get('/', async (c) => {
+examenProcedimiento.get('/', conditionalGet(() => examenProcedimientoService.getHuella()), async (c) => {
   try {
     const query = c.req.query();
     const result = await examenProcedimientoService.getAll(query);
@@ -2,6 +2,8 @@
  * Rutas de facturas
  */
 const { Hono } = require('hono');
+const { once } = require('events');
+const { PassThrough, Readable } = require('stream');
 const facturaService = require('../services/factura.service');
 const { authMiddleware, permissionMiddleware } = require('../middleware/auth');
 const { success, error, paginated } = require('../utils/response');
@@ -12,6 +14,7 @@ const {
   updateFacturaSchema,
   createPagoSchema,
   generateRIPSSchema,
+  exportRIPSSchema,
   cancelFacturaSchema,
 } = require('../validators/factura.schema');
 const facturaPDFService = require('../services/factura-pdf.service');
@@ -78,6 +81,77 @@ facturas.post('/rips/generar', validate(generateRIPSSchema), async (c) => {
   }
 });
 
+/**
+ * @swagger
+ * /facturas/rips/exportar:
+ *   post:
+ *     summary: Exportar RIPS JSON por streaming (Res. 2275/2023)
+ *     description: |
+ *       Misma estructura que /facturas/rips/generar (sin el envoltorio success/data), pero
+ *       las facturas se consultan por lotes (RIPS_LOTE_FACTURAS) y el documento se escribe
+ *       directamente en la respuesta, así que sirve para periodos completos con miles de
+ *       facturas. Si la exportación falla después de empezar a enviar, la conexión se corta.
+ *     tags: [Facturas]
+ *     security:
+ *       - bearerAuth: []
+ *     requestBody:
+ *       required: true
+ *       content:
+ *         application/json:
+ *           schema:
+ *             type: object
+ *             description: Indicar factura_ids o el periodo (fecha_desde y fecha_hasta)
+ *             properties:
+ *               factura_ids:
+ *                 type: array
+ *                 items:
+ *                   type: string
+ *                   format: uuid
+ *               fecha_desde:
+ *                 type: string
+ *                 format: date
+ *               fecha_hasta:
+ *                 type: string
+ *                 format: date
+ *                 description: Inclusiva. En modo periodo se excluyen facturas canceladas
+ *               cubierto_por_eps:
+ *                 type: boolean
+ *     responses:
+ *       200:
+ *         description: Archivo RIPS JSON (descarga)
+ *         content:
+ *           application/json:
+ *             schema:
+ *               type: object
+ *               description: Objeto JSON con la estructura RIPS
+ *       400:
+ *         description: Criterio inválido
+ *       404:
+ *         description: No hay facturas para el criterio
+ */
+facturas.post('/rips/exportar', validate(exportRIPSSchema), async (c) => {
+  const salida = new PassThrough();
+  const exportacion = exportadorRIPS.exportarRIPS(c.req.validData, salida);
+
+  try {
+    // Los errores previos al primer byte (criterio vacío, sin facturas) aún pueden responderse como JSON
+    await Promise.race([once(salida, 'readable'), exportacion]);
+  } catch (err) {
+    salida.destroy();
+    return c.json(error(err.message), err.statusCode || 500);
+  }
+
+  exportacion.catch((err) => {
+    console.error('Error exportando RIPS:', err.message);
+    salida.destroy(err);
+  });
+
+  return c.body(Readable.toWeb(salida), 200, {
+    'Content-Type': 'application/json',
+    'Content-Disposition': `attachment; filename="RIPS-${new Date().getTime()}.json"`,
+  });
+});
+
 /**
  * @swagger
  * /facturas/batch:
@@ -53,6 +53,8 @@ hce.use('*', authMiddleware);
  *         description: Paciente no encontrado
  *       500:
  *         description: Error al generar el PDF
+ *       503:
+ *         description: Demasiados PDF en generación (PDF_COLA_MAXIMA), reintentar
  */
 hce.get('/:pacienteId/pdf', async (c) => {
   try {
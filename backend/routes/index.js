@@ -0,0 +1,262 @@
+/**
+ * Registro de rutas del backend
+ *
+ * Cada entrada asocia un prefijo con su módulo de rutas y un grupo funcional. server.js
+ * monta el registro con registroRutas.montar(app) según dos variables de entorno:
+ *
+ * - RUTAS_GRUPOS: grupos a montar en esta instancia, separados por coma (default: todos).
+ *   El grupo "base" (auth, usuarios, API pública...) se monta siempre. Los prefijos de
+ *   grupos no montados responden 404.
+ * - RUTAS_CARGA: cómo se cargan los módulos
+ *     perezosa  (default) cada router se carga con la primera petición a su prefijo
+ *     diferida  como perezosa, pero después de arrancar se precargan todos en segundo plano
+ *     inmediata todos se cargan al arrancar (comportamiento anterior)
+ *
+ * Con carga perezosa el arranque no paga el require de servicios, PDFKit, clientes de IA
+ * ni el árbol de Siigo de los módulos que la instancia no usa.
+ */
+const { Hono } = require('hono');
+const { performance } = require('perf_hooks');
+
+const GRUPOS = ['base', 'clinico', 'hospitalizacion', 'farmacia', 'financiero', 'calidad', 'talento-humano', 'ia'];
+const MODOS = ['perezosa', 'diferida', 'inmediata'];
+
+const RUTAS = [
+  // Rutas públicas (sin autenticación)
+  { prefijo: '/public', modulo: './public', grupo: 'base' },
+  { prefijo: '/payments', modulo: './payments', grupo: 'base' },
+  { prefijo: '/documentos-legales', modulo: './documentos-legales', grupo: 'base' },
+  // API v1 para frontend usuario (Front_Usuario_ClinicaMia)
+  { prefijo: '/api/v1', modulo: './api-v1', grupo: 'base' },
+  // MCP - Herramientas para agentes de IA (n8n, WhatsApp, etc.)
+  { prefijo: '/api/v1/mcp', modulo: './mcp', grupo: 'base' },
+  { prefijo: '/auth', modulo: './auth', grupo: 'base' },
+  { prefijo: '/drogueria', modulo: './drogueria', grupo: 'farmacia' },
+  { prefijo: '/pacientes', modulo: './pacientes', grupo: 'clinico' },
+  { prefijo: '/citas', modulo: './citas.routes', grupo: 'clinico' },
+  { prefijo: '/agenda', modulo: './agenda', grupo: 'clinico' },
+  { prefijo: '/reservas', modulo: './reservas', grupo: 'clinico' },
+  { prefijo: '/bloqueos', modulo: './bloqueos', grupo: 'clinico' },
+  { prefijo: '/encuestas-satisfaccion', modulo: './encuestaSatisfaccion', grupo: 'clinico' },
+  { prefijo: '/departamentos', modulo: './departamentos', grupo: 'base' },
+  { prefijo: '/especialidades', modulo: './especialidades', grupo: 'base' },
+  { prefijo: '/usuarios', modulo: './usuarios', grupo: 'base' },
+  { prefijo: '/roles', modulo: './roles', grupo: 'base' },
+  { prefijo: '/permissions', modulo: './permissions', grupo: 'base' },
+  { prefijo: '/audit', modulo: './audit', grupo: 'base' },
+  { prefijo: '/doctores', modulo: './doctores', grupo: 'base' },
+  { prefijo: '/categorias-examenes', modulo: './categoriaExamen', grupo: 'clinico' },
+  { prefijo: '/examenes-procedimientos', modulo: './examenProcedimiento', grupo: 'clinico' },
+  { prefijo: '/categorias-productos', modulo: './categoriaProducto', grupo: 'farmacia' },
+  { prefijo: '/etiquetas-productos', modulo: './etiquetaProducto', grupo: 'farmacia' },
+  { prefijo: '/productos', modulo: './productos', grupo: 'farmacia' },
+  { prefijo: '/documentos-paciente', modulo: './documentosPaciente', grupo: 'clinico' },
+  // Hospitalización
+  { prefijo: '/unidades', modulo: './unidad', grupo: 'hospitalizacion' },
+  { prefijo: '/habitaciones', modulo: './habitacion', grupo: 'hospitalizacion' },
+  { prefijo: '/camas', modulo: './cama', grupo: 'hospitalizacion' },
+  { prefijo: '/admisiones', modulo: './admision', grupo: 'hospitalizacion' },
+  { prefijo: '/turno-caja', modulo: './turno-caja', grupo: 'financiero' },
+  { prefijo: '/movimientos', modulo: './movimiento', grupo: 'hospitalizacion' },
+  // Facturación y órdenes
+  { prefijo: '/ordenes-medicas', modulo: './ordenesMedicas', grupo: 'hospitalizacion' },
+  { prefijo: '/ordenes-medicamentos', modulo: './ordenesMedicamentos', grupo: 'hospitalizacion' },
+  { prefijo: '/facturas', modulo: './facturas', grupo: 'financiero' },
+  { prefijo: '/paquetes-hospitalizacion', modulo: './paquetesHospitalizacion', grupo: 'hospitalizacion' },
+  // HCE
+  { prefijo: '/evoluciones', modulo: './evoluciones', grupo: 'clinico' },
+  { prefijo: '/signos-vitales', modulo: './signosVitales', grupo: 'clinico' },
+  { prefijo: '/diagnosticos', modulo: './diagnosticos', grupo: 'clinico' },
+  { prefijo: '/alertas', modulo: './alertas', grupo: 'clinico' },
+  { prefijo: '/auditoria', modulo: './auditoria', grupo: 'clinico' },
+  { prefijo: '/hce', modulo: './hce', grupo: 'clinico' },
+  { prefijo: '/egresos', modulo: './egresos', grupo: 'hospitalizacion' },
+  { prefijo: '/disponibilidad', modulo: './disponibilidad', grupo: 'clinico' },
+  { prefijo: '/interconsultas', modulo: './interconsulta', grupo: 'clinico' },
+  { prefijo: '/procedimientos', modulo: './procedimiento', grupo: 'clinico' },
+  // Prescripción médica (medicamentos = productos)
+  { prefijo: '/prescripciones', modulo: './prescripciones', grupo: 'clinico' },
+  { prefijo: '/administraciones', modulo: './administraciones', grupo: 'hospitalizacion' },
+  { prefijo: '/consultas', modulo: './consultas', grupo: 'clinico' },
+  { prefijo: '/urgencias', modulo: './urgencias', grupo: 'clinico' },
+  // Enfermería
+  { prefijo: '/asignaciones-enfermeria', modulo: './asignacionesEnfermeria', grupo: 'hospitalizacion' },
+  { prefijo: '/notas-enfermeria', modulo: './notasEnfermeria', grupo: 'hospitalizacion' },
+  { prefijo: '/glucometrias', modulo: './glucometrias', grupo: 'hospitalizacion' },
+  { prefijo: '/balance-liquidos', modulo: './balanceLiquidos', grupo: 'hospitalizacion' },
+  { prefijo: '/transfusiones', modulo: './transfusiones', grupo: 'hospitalizacion' },
+  { prefijo: '/plantillas-notas', modulo: './plantillasNotas', grupo: 'clinico' },
+  { prefijo: '/plantillas-doctor', modulo: './plantillasDoctor', grupo: 'clinico' },
+  { prefijo: '/plantillas-planes', modulo: './plantillas-planes', grupo: 'clinico' },
+  { prefijo: '/dashboard', modulo: './dashboard', grupo: 'base' },
+  // Calidad IPS - Sistema de Gestión de Calidad
+  { prefijo: '/habilitacion', modulo: './habilitacion', grupo: 'calidad' },
+  { prefijo: '/pamec', modulo: './pamec', grupo: 'calidad' },
+  { prefijo: '/eventos-adversos', modulo: './eventosAdversos', grupo: 'calidad' },
+  { prefijo: '/seguridad-paciente', modulo: './seguridadPaciente', grupo: 'calidad' },
+  { prefijo: '/indicadores-sic', modulo: './indicadoresSIC', grupo: 'calidad' },
+  { prefijo: '/pqrs', modulo: './pqrs', grupo: 'calidad' },
+  { prefijo: '/comites', modulo: './comites', grupo: 'calidad' },
+  { prefijo: '/vigilancia-salud', modulo: './vigilanciaSalud', grupo: 'calidad' },
+  { prefijo: '/documentos-calidad', modulo: './documentosCalidad', grupo: 'calidad' },
+  { prefijo: '/planes-accion', modulo: './planesAccion', grupo: 'calidad' },
+  { prefijo: '/acreditacion', modulo: './acreditacion', grupo: 'calidad' },
+  { prefijo: '/quirofanos', modulo: './quirofano', grupo: 'clinico' },
+  { prefijo: '/imagenologia', modulo: './imagenologia', grupo: 'clinico' },
+  { prefijo: '/reportes', modulo: './reportes', grupo: 'base' },
+  { prefijo: '/mia-pass', modulo: './miaPass', grupo: 'financiero' },
+  { prefijo: '/formulario-mia-pass', modulo: './formularioMiaPass', grupo: 'financiero' },
+  { prefijo: '/publicaciones', modulo: './publicaciones', grupo: 'farmacia' },
+  { prefijo: '/tickets', modulo: './tickets', grupo: 'base' },
+  { prefijo: '/ordenes-tienda', modulo: './ordenesTienda', grupo: 'farmacia' },
+  // Trabaja con nosotros - Candidatos de talento humano
+  { prefijo: '/candidates', modulo: './candidatos', grupo: 'talento-humano' },
+  // Calidad 2.0 - Sistema de Gestión de Calidad Mejorado
+  { prefijo: '/calidad2', modulo: './calidad2', grupo: 'calidad' },
+  // Catálogos oficiales (CUPS, CIE-10, CIE-11)
+  { prefijo: '/catalogos', modulo: './catalogos', grupo: 'base' },
+  { prefijo: '/antecedentes', modulo: './antecedentes', grupo: 'clinico' },
+  // Incapacidades, Certificados y Seguimientos
+  { prefijo: '/incapacidades', modulo: './incapacidades', grupo: 'clinico' },
+  { prefijo: '/certificados', modulo: './certificados', grupo: 'clinico' },
+  { prefijo: '/seguimientos', modulo: './seguimientos', grupo: 'clinico' },
+  // AI Assistant y HCE Analyzer
+  { prefijo: '/ai-assistant', modulo: './ai-assistant', grupo: 'ia' },
+  { prefijo: '/hce-analyzer', modulo: './hce-analyzer', grupo: 'ia' },
+  // Talento Humano y SST (Decreto 1072/2015, Res. 0312/2019)
+  { prefijo: '/talento-humano', modulo: './talento-humano', grupo: 'talento-humano' },
+  { prefijo: '/sst', modulo: './sst', grupo: 'talento-humano' },
+  // Alertas y Notificaciones por Email
+  { prefijo: '/alertas-notificaciones', modulo: './alertas-notificaciones', grupo: 'base' },
+  { prefijo: '/notificaciones-doctor', modulo: './notificaciones-doctor', grupo: 'base' },
+  // Siigo, Compras, Contabilidad, Bancos, Activos Fijos y Dashboard Financiero
+  { prefijo: '/siigo', modulo: './siigo', grupo: 'financiero' },
+  { prefijo: '/compras', modulo: './compras', grupo: 'financiero' },
+  { prefijo: '/contabilidad', modulo: './contabilidad', grupo: 'financiero' },
+  { prefijo: '/bancos', modulo: './bancos', grupo: 'financiero' },
+  { prefijo: '/activos-fijos', modulo: './activos-fijos', grupo: 'financiero' },
+  { prefijo: '/dashboard-financiero', modulo: './dashboard-financiero', grupo: 'financiero' },
+  // Solicitudes de Historia Clínica (gestión admin)
+  { prefijo: '/solicitudes-hc', modulo: './solicitudes-hc', grupo: 'clinico' },
+  // Tipos de Usuario y Convenios (configuración)
+  { prefijo: '/tipos-usuario-convenio', modulo: './tipoUsuarioConvenio', grupo: 'base' },
+];
+
+/**
+ * Grupos configurados en RUTAS_GRUPOS ("base" siempre incluido)
+ */
+function gruposConfigurados(valor = process.env.RUTAS_GRUPOS) {
+  if (!valor || valor.trim() === '*') return [...GRUPOS];
+
+  const grupos = valor.split(',').map(g => g.trim()).filter(Boolean);
+  const desconocidos = grupos.filter(g => !GRUPOS.includes(g));
+  if (desconocidos.length > 0) {
+    throw new Error(`RUTAS_GRUPOS contiene grupos desconocidos: ${desconocidos.join(', ')} (disponibles: ${GRUPOS.join(', ')})`);
+  }
+  return GRUPOS.filter(g => g === 'base' || grupos.includes(g));
+}
+
+function modoConfigurado(valor = process.env.RUTAS_CARGA) {
+  const modo = valor || 'perezosa';
+  if (!MODOS.includes(modo)) {
+    throw new Error(`RUTAS_CARGA inválido: ${modo} (${MODOS.join(' | ')})`);
+  }
+  return modo;
+}
+
+class RegistroRutas {
+  constructor() {
+    this.modo = null;
+    this.grupos = [];
+    this.montadas = [];
+    this.cargadas = new Map();
+    this.notFound = null;
+  }
+
+  /**
+   * Montar en la app las rutas de los grupos activos
+   *
+   * @param {Hono} app - App principal
+   * @param {Object} [opciones]
+   * @param {string[]} [opciones.grupos] - Grupos a montar (default: RUTAS_GRUPOS)
+   * @param {string} [opciones.modo] - perezosa | diferida | inmediata (default: RUTAS_CARGA)
+   * @param {Function} [opciones.notFound] - Handler 404 de la app, para los routers perezosos
+   */
+  montar(app, { grupos = gruposConfigurados(), modo = modoConfigurado(), notFound = null } = {}) {
+    this.modo = modo;
+    this.grupos = grupos;
+    this.notFound = notFound;
+    this.montadas = RUTAS.filter(ruta => grupos.includes(ruta.grupo));
+    this.cargadas = new Map();
+
+    if (modo === 'inmediata') {
+      this.montadas.forEach(ruta => app.route(ruta.prefijo, this._cargar(ruta).router));
+      return app;
+    }
+
+    // Los prefijos más largos primero: /api/v1/mcp no debe caer en el router de /api/v1
+    const ordenadas = [...this.montadas].sort((a, b) => b.prefijo.length - a.prefijo.length);
+    ordenadas.forEach((ruta) => {
+      const despachar = (c) => this._subApp(ruta).fetch(c.req.raw, c.env);
+      app.all(ruta.prefijo, despachar);
+      app.all(`${ruta.prefijo}/*`, despachar);
+    });
+    return app;
+  }
+
+  /**
+   * Cargar en segundo plano los routers que aún no se han usado (modo diferida),
+   * cediendo el event loop entre módulo y módulo
+   */
+  async precargar() {
+    for (const ruta of this.montadas) {
+      if (this.cargadas.has(ruta.prefijo)) continue;
+      await new Promise(resolve => setImmediate(resolve));
+      try {
+        this._cargar(ruta);
+      } catch (error) {
+        console.error(`[Rutas] Error precargando ${ruta.prefijo}:`, error.message);
+      }
+    }
+  }
+
+  getStats() {
+    const cargas = [...this.cargadas.entries()].map(([prefijo, { ms }]) => ({ prefijo, ms }));
+    return {
+      modo: this.modo,
+      grupos: this.grupos,
+      montadas: this.montadas.length,
+      cargadas: this.cargadas.size,
+      cargaMs: Math.round(cargas.reduce((total, carga) => total + carga.ms, 0)),
+      masLentas: cargas.sort((a, b) => b.ms - a.ms).slice(0, 5),
+    };
+  }
+
+  _cargar(ruta) {
+    let cargada = this.cargadas.get(ruta.prefijo);
+    if (cargada) return cargada;
+
+    const inicio = performance.now();
+    const router = require(ruta.modulo);
+    cargada = { router, app: null, ms: Math.round((performance.now() - inicio) * 10) / 10 };
+    this.cargadas.set(ruta.prefijo, cargada);
+    return cargada;
+  }
+
+  _subApp(ruta) {
+    const cargada = this._cargar(ruta);
+    if (!cargada.app) {
+      // Sub-app con el prefijo completo: los handlers ven la misma URL que con app.route
+      cargada.app = new Hono().route(ruta.prefijo, cargada.router);
+      if (this.notFound) cargada.app.notFound(this.notFound);
+    }
+    return cargada.app;
+  }
+}
+
+const registroRutas = new RegistroRutas();
+
+module.exports = registroRutas;
+module.exports.RUTAS = RUTAS;
+module.exports.GRUPOS = GRUPOS;
+module.exports.gruposConfigurados = gruposConfigurados;
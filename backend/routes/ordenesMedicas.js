@@ -299,6 +299,69 @@ ordenesMedicas.put('/:id', async (c) => {
   }
 });
 
+/**
+ * @swagger
+ * /ordenes-medicas/completar-lote:
+ *   post:
+ *     summary: Registrar resultados de muchas órdenes en una sola transacción
+ *     description: >
+ *       Pensado para la corrida de un analizador. Cada ítem devuelve su estado
+ *       (completada, duplicada, no_encontrada, error) y los ítems inválidos no abortan
+ *       el lote. Reenviar una clave de idempotencia ya aplicada a la misma orden
+ *       responde duplicada sin volver a escribir.
+ *     tags: [OrdenesMedicas]
+ *     security:
+ *       - bearerAuth: []
+ *     requestBody:
+ *       required: true
+ *       content:
+ *         application/json:
+ *           schema:
+ *             type: object
+ *             required:
+ *               - items
+ *             properties:
+ *               items:
+ *                 type: array
+ *                 maxItems: 2000
+ *                 items:
+ *                   type: object
+ *                   required:
+ *                     - orden_id
+ *                     - resultados
+ *                   properties:
+ *                     orden_id:
+ *                       type: string
+ *                     resultados:
+ *                       type: object
+ *                       description: Resultados estructurados (JSON)
+ *                     archivo_resultado:
+ *                       type: string
+ *                     clave_idempotencia:
+ *                       type: string
+ *                       description: Identificador único del resultado en el analizador
+ *     responses:
+ *       200:
+ *         description: Lote procesado con estado por ítem
+ *       400:
+ *         description: Lote vacío, demasiado grande o claves en uso por otro lote concurrente
+ *       500:
+ *         description: Error del servidor
+ */
+ordenesMedicas.post('/completar-lote', async (c) => {
+  try {
+    const body = await c.req.json();
+    const user = c.get('user');
+    const lote = await ordenMedicaService.completarLote(body.items, user.id, {
+      ipAddress: c.req.header('x-forwarded-for') || c.req.header('cf-connecting-ip') || 'unknown',
+      userAgent: c.req.header('user-agent'),
+    });
+    return c.json(success(lote, `Lote procesado: ${lote.resumen.completada} de ${lote.total} órdenes completadas`));
+  } catch (err) {
+    return c.json(error(err.message), err.statusCode || 500);
+  }
+});
+
 /**
  * @swagger
  * /ordenes-medicas/{id}/completar:
@@ -727,7 +727,15 @@ pacientes.post('/citas/:id/reprogramar', async (c) => {
  *         schema:
  *           type: string
  *         required: true
- *         description: Término de búsqueda (nombre, cédula)
+ *         description: |
+ *           Documento con tipo opcional ("1023456", "CC 1023456"), correo o nombre
+ *           ("maria gomez"). Insensible a mayúsculas y acentos.
+ *       - in: query
+ *         name: limit
+ *         schema:
+ *           type: integer
+ *           default: 10
+ *           maximum: 50
  *     responses:
  *       200:
  *         description: Lista de pacientes encontrados
@@ -751,8 +759,8 @@ pacientes.post('/citas/:id/reprogramar', async (c) => {
  */
 pacientes.get('/search', async (c) => {
   try {
-    const { q } = c.req.query();
-    const pacientes = await pacienteService.search(q);
+    const { q, limit } = c.req.query();
+    const pacientes = await pacienteService.search(q, { limit });
     return c.json(success({ pacientes }));
   } catch (err) {
     return c.json(error(err.message), err.statusCode || 500);
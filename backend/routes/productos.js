@@ -1,7 +1,13 @@
 const { Hono } = require('hono');
+const { Readable } = require('stream');
 const ProductoService = require('../services/producto.service');
+const ImportacionProductosService = require('../services/importacionProductos.service');
 const { success, error } = require('../utils/response');
-const { authMiddleware } = require('../middleware/auth');
+const { authMiddleware, roleMiddleware } = require('../middleware/auth');
+const { conditionalGet } = require('../middleware/conditional');
+const { validate } = require('../middleware/validate');
+const { verificarInteraccionesSchema } = require('../validators/producto.schema');
+const interaccionesService = require('../services/interaccionesMedicamentos.service');
 
 const app = new Hono();
 
@@ -75,7 +81,7 @@ app.use('*', authMiddleware);
  *         name: search
  *         schema:
  *           type: string
- *         description: Buscar por nombre o código
+ *         description: Buscar por nombre, principio activo o código (SKU, CUM, ATC, código de barras), sin distinguir acentos
  *       - in: query
  *         name: categoriaId
  *         schema:
@@ -86,16 +92,32 @@ app.use('*', authMiddleware);
  *         schema:
  *           type: boolean
  *         description: Filtrar por estado activo
+ *       - in: header
+ *         name: If-None-Match
+ *         schema:
+ *           type: string
+ *         description: ETag de una respuesta anterior
  *     responses:
  *       200:
  *         description: Lista de productos
+ *         headers:
+ *           X-Total-Count:
+ *             schema:
+ *               type: integer
+ *             description: Total de productos que cumplen los filtros
+ *           ETag:
+ *             schema:
+ *               type: string
+ *             description: Versión del listado (productos, categorías y lotes)
+ *       304:
+ *         description: El listado no cambió desde el ETag/fecha enviados
  *       500:
  *         description: Error del servidor
  */
-app.get('/', async (c) => {
+app.get('/', conditionalGet(() => ProductoService.getHuella()), async (c) => {
   try {
     const { activo, categoriaId, search, limit, page, controlado, requiereReceta } = c.req.query();
-    const productos = await ProductoService.getAll({
+    const { productos, total } = await ProductoService.buscar({
       activo,
       categoriaId,
       search,
@@ -104,6 +126,8 @@ app.get('/', async (c) => {
       controlado,
       requiereReceta
     });
+    // El cuerpo sigue siendo un array por compatibilidad; el total va en cabecera
+    c.header('X-Total-Count', String(total));
     return c.json(success(productos));
   } catch (err) {
     return c.json(error(err.message), 500);
@@ -133,6 +157,77 @@ app.get('/stats', async (c) => {
   }
 });
 
+/**
+ * @swagger
+ * /productos/interacciones/verificar:
+ *   post:
+ *     summary: Verificar interacciones y alergias de una lista de medicamentos
+ *     description: |
+ *       Consulta el índice de interacciones por principio activo (las mismas alertas que
+ *       se devuelven al crear una prescripción). Con pacienteId también revisa sus alergias.
+ *     tags: [Productos]
+ *     security:
+ *       - bearerAuth: []
+ *     requestBody:
+ *       required: true
+ *       content:
+ *         application/json:
+ *           schema:
+ *             type: object
+ *             required:
+ *               - medicamentosIds
+ *             properties:
+ *               medicamentosIds:
+ *                 type: array
+ *                 items:
+ *                   type: string
+ *               pacienteId:
+ *                 type: string
+ *                 format: uuid
+ *     responses:
+ *       200:
+ *         description: Interacciones (de mayor a menor severidad) y alergias detectadas
+ *       400:
+ *         description: Datos inválidos
+ */
+app.post('/interacciones/verificar', validate(verificarInteraccionesSchema), async (c) => {
+  try {
+    const { medicamentosIds, pacienteId } = c.req.validData;
+    const [interacciones, alergias] = await Promise.all([
+      ProductoService.verificarInteracciones(medicamentosIds),
+      ProductoService.verificarAlergias(pacienteId, medicamentosIds),
+    ]);
+    return c.json(success({ interacciones, alergias }));
+  } catch (err) {
+    return c.json(error(err.message), err.statusCode || 500);
+  }
+});
+
+/**
+ * @swagger
+ * /productos/interacciones/reconstruir:
+ *   post:
+ *     summary: Reconstruir el índice de interacciones desde el catálogo
+ *     tags: [Productos]
+ *     security:
+ *       - bearerAuth: []
+ *     responses:
+ *       200:
+ *         description: Productos analizados, interacciones indexadas y duración
+ *       403:
+ *         description: Solo administradores
+ *       500:
+ *         description: Error del servidor
+ */
+app.post('/interacciones/reconstruir', roleMiddleware('SuperAdmin', 'Admin'), async (c) => {
+  try {
+    const resultado = await interaccionesService.reconstruir();
+    return c.json(success(resultado, 'Índice de interacciones reconstruido'));
+  } catch (err) {
+    return c.json(error(err.message), 500);
+  }
+});
+
 /**
  * @swagger
  * /productos/import-pbs:
@@ -161,9 +256,24 @@ app.post('/import-pbs', async (c) => {
  * /productos/import-csv:
  *   post:
  *     summary: Importar productos desde un archivo CSV
+ *     description: |
+ *       Con `application/json` la importación se procesa completa antes de responder.
+ *       Con `text/csv` el archivo se recibe en streaming y se procesa en segundo plano;
+ *       la respuesta (202) incluye el id del trabajo para consultar el progreso.
  *     tags: [Productos]
  *     security:
  *       - bearerAuth: []
+ *     parameters:
+ *       - in: query
+ *         name: categoriaId
+ *         schema:
+ *           type: string
+ *           format: uuid
+ *         description: Categoría destino (solo para text/csv)
+ *       - in: query
+ *         name: nombreArchivo
+ *         schema:
+ *           type: string
  *     requestBody:
  *       required: true
  *       content:
@@ -179,19 +289,102 @@ app.post('/import-pbs', async (c) => {
  *               categoriaId:
  *                 type: string
  *                 format: uuid
+ *         text/csv:
+ *           schema:
+ *             type: string
+ *             format: binary
  *     responses:
  *       200:
  *         description: Importación completada
+ *       202:
+ *         description: Importación iniciada en segundo plano
  */
 app.post('/import-csv', async (c) => {
   try {
+    const contentType = c.req.header('content-type') || '';
+
+    if (!contentType.includes('application/json')) {
+      if (!c.req.raw.body) return c.json(error('Contenido CSV es requerido'), 400);
+
+      const user = c.get('user');
+      const job = await ImportacionProductosService.crearDesdeStream(Readable.fromWeb(c.req.raw.body), {
+        categoriaId: c.req.query('categoriaId') || null,
+        nombreArchivo: c.req.query('nombreArchivo') || null,
+        usuarioId: user?.id || null,
+      });
+      ImportacionProductosService.iniciar(job.id).catch(() => {});
+      return c.json(success(await ImportacionProductosService.getById(job.id), 'Importación CSV iniciada'), 202);
+    }
+
     const { csv, categoriaId } = await c.req.json();
     if (!csv) return c.json(error('Contenido CSV es requerido'), 400);
     
     const result = await ProductoService.importFromCSV(csv, categoriaId);
     return c.json(success(result, 'Importación CSV completada exitosamente'));
   } catch (err) {
-    return c.json(error(err.message), 500);
+    return c.json(error(err.message), err.statusCode || 500);
+  }
+});
+
+/**
+ * @swagger
+ * /productos/import-csv/{jobId}:
+ *   get:
+ *     summary: Consultar el progreso de una importación CSV
+ *     tags: [Productos]
+ *     security:
+ *       - bearerAuth: []
+ *     parameters:
+ *       - in: path
+ *         name: jobId
+ *         required: true
+ *         schema:
+ *           type: string
+ *           format: uuid
+ *     responses:
+ *       200:
+ *         description: Estado, filas procesadas, creados/actualizados/errores y porcentaje
+ *       404:
+ *         description: Importación no encontrada
+ */
+app.get('/import-csv/:jobId', async (c) => {
+  try {
+    const job = await ImportacionProductosService.getById(c.req.param('jobId'));
+    return c.json(success(job));
+  } catch (err) {
+    return c.json(error(err.message), err.statusCode || 500);
+  }
+});
+
+/**
+ * @swagger
+ * /productos/import-csv/{jobId}/reanudar:
+ *   post:
+ *     summary: Reanudar una importación CSV interrumpida desde la última fila confirmada
+ *     tags: [Productos]
+ *     security:
+ *       - bearerAuth: []
+ *     parameters:
+ *       - in: path
+ *         name: jobId
+ *         required: true
+ *         schema:
+ *           type: string
+ *           format: uuid
+ *     responses:
+ *       202:
+ *         description: Importación reanudada
+ *       400:
+ *         description: La importación ya fue completada o está en proceso
+ *       410:
+ *         description: El archivo de la importación ya no está disponible
+ */
+app.post('/import-csv/:jobId/reanudar', async (c) => {
+  try {
+    const job = await ImportacionProductosService.reanudar(c.req.param('jobId'));
+    return c.json(success(job, 'Importación reanudada'), 202);
+  } catch (err) {
+    return c.json(error(err.message), err.statusCode || 500);
   }
 });
 
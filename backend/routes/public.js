@@ -11,6 +11,8 @@ const { validate } = require('../middleware/validate');
 const { success, error } = require('../utils/response');
 const { createPublicAppointmentSchema } = require('../validators/publicAppointment.schema');
 const disponibilidadService = require('../services/disponibilidad.service');
+const { ValidationError } = require('../utils/errors');
+const disponibilidadCache = require('../services/disponibilidadCache.service');
 const emailService = require('../services/email.service');
 
 const publicRoutes = new Hono();
@@ -252,7 +254,7 @@ publicRoutes.post('/appointments', validate(createPublicAppointmentSchema), asyn
       return c.json(error('Doctor no encontrado'), 404);
     }
 
-    // 4. Validate availability
+    // 4. Validate availability (fast rejection from the occupancy cache)
     try {
       await disponibilidadService.validarDisponibilidad(
         doctor.usuarioId,
@@ -264,27 +266,43 @@ publicRoutes.post('/appointments', validate(createPublicAppointmentSchema), asyn
       return c.json(error(validationError.message), 409);
     }
 
-    // 5. Create appointment with PendientePago status
-    const cita = await prisma.cita.create({
-      data: {
-        pacienteId: paciente.id,
-        doctorId: doctor.usuarioId, // Cita uses Usuario.id, not Doctor.id
-        especialidadId: especialidad.id,
-        tipoCita: 'Especialidad',
-        fecha: new Date(data.fecha + 'T00:00:00Z'),
-        hora: new Date(`1970-01-01T${data.hora}:00Z`),
+    // 5. Create appointment with PendientePago status, re-checking the slot against the DB
+    // under the doctor/day lock (the cache may be stale across instances)
+    let cita;
+    try {
+      cita = await disponibilidadService.conHorarioReservado({
+        doctorId: doctor.usuarioId,
+        fecha: data.fecha,
+        hora: data.hora,
         duracionMinutos: especialidad.duracionMinutos,
-        costo: especialidad.costoCOP,
-        motivo: data.motivo || 'Consulta programada online',
-        estado: 'PendientePago',
-        prioridad: 'Media',
-      },
-      include: {
-        especialidad: true,
-        doctor: true,
-        paciente: true,
-      },
-    });
+      }, (tx) => tx.cita.create({
+        data: {
+          pacienteId: paciente.id,
+          doctorId: doctor.usuarioId, // Cita uses Usuario.id, not Doctor.id
+          especialidadId: especialidad.id,
+          tipoCita: 'Especialidad',
+          fecha: new Date(data.fecha + 'T00:00:00Z'),
+          hora: new Date(`1970-01-01T${data.hora}:00Z`),
+          duracionMinutos: especialidad.duracionMinutos,
+          costo: especialidad.costoCOP,
+          motivo: data.motivo || 'Consulta programada online',
+          estado: 'PendientePago',
+          prioridad: 'Media',
+        },
+        include: {
+          especialidad: true,
+          doctor: true,
+          paciente: true,
+        },
+      }));
+    } catch (reservaError) {
+      if (reservaError instanceof ValidationError) {
+        return c.json(error(reservaError.message), 409);
+      }
+      throw reservaError;
+    }
+
+    disponibilidadCache.actualizarCita(null, cita);
 
     // 6. Send pending payment email notification
     if (paciente.email) {
@@ -86,6 +86,21 @@ signosVitales.use('*', authMiddleware);
  *         schema:
  *           type: string
  *         description: Filtrar por paciente
+ *       - in: query
+ *         name: limit
+ *         schema:
+ *           type: integer
+ *         description: Registros por página
+ *       - in: query
+ *         name: cursor
+ *         schema:
+ *           type: string
+ *         description: Paginación por cursor (vacío para la primera página, luego pagination.next_cursor). Sustituye a page
+ *       - in: query
+ *         name: con_total
+ *         schema:
+ *           type: boolean
+ *         description: Incluir total/totalPages (por defecto true con page, false con cursor)
  *     responses:
  *       200:
  *         description: Lista de signos vitales
@@ -101,6 +116,8 @@ signosVitales.use('*', authMiddleware);
  *                   type: array
  *                   items:
  *                     $ref: '#/components/schemas/SignoVital'
+ *       400:
+ *         description: Cursor de paginación inválido
  *       500:
  *         description: Error del servidor
  */
@@ -192,17 +209,47 @@ signosVitales.post('/', async (c) => {
  *           type: integer
  *           default: 7
  *         description: Número de días atrás a consultar
+ *       - in: query
+ *         name: tipos
+ *         schema:
+ *           type: string
+ *           example: presion,temperatura,frecuenciaCardiaca
+ *         description: Varios tipos separados por coma (activa la respuesta agregada)
+ *       - in: query
+ *         name: resolucion
+ *         schema:
+ *           type: string
+ *           example: 1h
+ *         description: Tamaño del intervalo de agregación (15m, 1h, 1d). Activa la respuesta agregada
+ *       - in: query
+ *         name: max_puntos
+ *         schema:
+ *           type: integer
+ *           default: 300
+ *         description: Máximo de puntos por serie (min/avg/max por intervalo). Activa la respuesta agregada
  *     responses:
  *       200:
- *         description: Datos para gráfica
+ *         description: Datos para gráfica. Sin tipos/resolucion/max_puntos devuelve los registros crudos en `datos`; con ellos devuelve `series` agregadas por tipo
+ *       400:
+ *         description: Tipo o resolución inválidos
  *       500:
  *         description: Error del servidor
  */
 signosVitales.get('/grafica/:paciente_id', async (c) => {
   try {
     const { paciente_id } = c.req.param();
-    const { tipo = 'temperatura', dias = '7' } = c.req.query();
-    
+    const { tipo = 'temperatura', dias = '7', tipos, resolucion, max_puntos } = c.req.query();
+
+    if (tipos || resolucion || max_puntos) {
+      const grafica = await signosVitalesService.getSeriesAgregadas(paciente_id, {
+        tipos: tipos || tipo,
+        diasAtras: parseInt(dias),
+        resolucion,
+        maxPuntos: max_puntos,
+      });
+      return c.json(success(grafica));
+    }
+
     const datos = await signosVitalesService.getGraficaEvolucion(
       paciente_id,
       tipo,
@@ -549,7 +549,9 @@ router.post('/nomina/periodos/:id/procesar', async (c) => {
   try {
     const { id } = c.req.param();
     const userId = c.get('user').id;
-    const periodo = await nominaService.procesarNomina(id, userId);
+    // reiniciar=true descarta lo guardado por una ejecución interrumpida en vez de retomarla
+    const reiniciar = c.req.query('reiniciar') === 'true';
+    const periodo = await nominaService.procesarNomina(id, userId, { reiniciar });
     return c.json(success(periodo, 'Nómina procesada'));
   } catch (err) {
     return c.json(error(err.message), err.statusCode || 400);
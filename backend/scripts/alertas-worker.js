@@ -0,0 +1,52 @@
+/**
+ * Worker de la cola de alertas programadas, para correr en procesos o nodos dedicados
+ *
+ * Uso: node scripts/alertas-worker.js [--workers N] [--continuo]
+ *
+ *   --workers   loops en paralelo en este proceso (default ALERTAS_WORKERS o 2)
+ *   --continuo  no terminar al vaciar la cola: volver a revisarla cada ESPERA_MS
+ *
+ * Sin --continuo drena la cola una vez, imprime "RESULTADO {json}" y termina. Se puede
+ * correr en tantos procesos como se quiera junto con el cron del backend: los lotes se
+ * reclaman con FOR UPDATE SKIP LOCKED.
+ */
+const prisma = require('../db/prisma');
+const alertaService = require('../services/alerta.service');
+
+const ESPERA_MS = 30000;
+
+function leerOpcion(args, nombre, valorDefault) {
+  const i = args.indexOf(`--${nombre}`);
+  return i >= 0 && args[i + 1] !== undefined ? args[i + 1] : valorDefault;
+}
+
+async function ejecutarWorker({ workers, continuo }) {
+  do {
+    const inicio = Date.now();
+    const resultado = await alertaService.drenarAlertasPendientes({ workers });
+    const duracionMs = Date.now() - inicio;
+
+    if (!continuo) {
+      console.log(`RESULTADO ${JSON.stringify({ ...resultado, workers, duracionMs })}`);
+      return;
+    }
+    if (resultado.reclamadas > 0) {
+      console.log(`[AlertasWorker] ${resultado.reclamadas} alertas en ${duracionMs}ms:`, resultado);
+    }
+    await new Promise(resolve => setTimeout(resolve, ESPERA_MS));
+  } while (continuo);
+}
+
+if (require.main === module) {
+  const args = process.argv.slice(2);
+  const workers = parseInt(leerOpcion(args, 'workers', process.env.ALERTAS_WORKERS || '2'), 10);
+
+  ejecutarWorker({ workers, continuo: args.includes('--continuo') })
+    .catch((err) => {
+      console.error('Error en el worker de alertas:', err);
+      process.exitCode = 1;
+    })
+    .finally(() => prisma.$disconnect());
+}
+
+module.exports = { ejecutarWorker };
@@ -0,0 +1,140 @@
+/**
+ * Datos sintéticos para el benchmark de la cola de alertas programadas
+ * (backend_test_alertas.py mide con ellos el drenado con 1, 2 y 4 workers)
+ *
+ * Uso:
+ *   node scripts/benchmark-alertas.js sembrar [alertas]   reinicia la cola sintética con N alertas vencidas
+ *   node scripts/benchmark-alertas.js verificar           imprime "RESULTADO {json}" con el estado de la cola
+ *   node scripts/benchmark-alertas.js limpiar             elimina alertas, historial y configuración sintéticos
+ *
+ * Las alertas son PERSONALIZADA sobre los contratos de los empleados de
+ * benchmark-nomina.js, con una configuración en el módulo BENCHMARK que envía a un
+ * EMAIL_FIJO de example.com. Los workers deben correr con RESEND_BASE_URL apuntando a
+ * scripts/fake-email-provider.js.
+ */
+const prisma = require('../db/prisma');
+const { seedEmpleadosNomina, PREFIJO_DOCUMENTO } = require('./benchmark-nomina');
+
+const ALERTAS_DEFAULT = 50000;
+const EMPLEADOS = 5000;
+const LOTE = 5000;
+const MODULO = 'BENCHMARK';
+const TIPO_ALERTA = 'PERSONALIZADA';
+
+async function obtenerConfiguracion() {
+  const otra = await prisma.alertaConfiguracion.findFirst({
+    where: { tipoAlerta: TIPO_ALERTA, activo: true, modulo: { not: MODULO } },
+    select: { modulo: true },
+  });
+  if (otra) {
+    // enviarAlerta toma la primera configuración activa del tipo
+    throw new Error(`Ya existe una configuración ${TIPO_ALERTA} activa en el módulo ${otra.modulo}`);
+  }
+
+  const config = await prisma.alertaConfiguracion.upsert({
+    where: { modulo_tipoAlerta: { modulo: MODULO, tipoAlerta: TIPO_ALERTA } },
+    update: { activo: true },
+    create: {
+      modulo: MODULO,
+      tipoAlerta: TIPO_ALERTA,
+      nombre: 'Benchmark cola de alertas',
+      diasAnticipacion: [1],
+      asuntoTemplate: 'Benchmark: contrato de {{empleado}} vence en {{diasRestantes}} días',
+      cuerpoTemplate: '<p>Contrato de <strong>{{empleado}}</strong>, vence el {{fechaFin}}.</p>',
+    },
+  });
+
+  const destinatarios = await prisma.alertaDestinatario.count({ where: { configuracionId: config.id } });
+  if (destinatarios === 0) {
+    await prisma.alertaDestinatario.create({
+      data: { configuracionId: config.id, tipoDestinatario: 'EMAIL_FIJO', email: 'bench.alertas@example.com' },
+    });
+  }
+  return config;
+}
+
+async function contratosBenchmark() {
+  const contratos = await prisma.tHContrato.findMany({
+    where: { numeroContrato: { startsWith: PREFIJO_DOCUMENTO } },
+    select: { id: true },
+    orderBy: { numeroContrato: 'asc' },
+  });
+  return contratos.map(c => c.id);
+}
+
+async function limpiarCola(config, contratos) {
+  await prisma.alertaProgramada.deleteMany({ where: { tipoAlerta: TIPO_ALERTA, referenciaId: { in: contratos } } });
+  await prisma.alertaHistorial.deleteMany({ where: { configuracionId: config.id } });
+}
+
+async function sembrar(cantidad) {
+  await seedEmpleadosNomina(EMPLEADOS);
+  const config = await obtenerConfiguracion();
+  const contratos = await contratosBenchmark();
+  await limpiarCola(config, contratos);
+
+  // Vencidas hace un minuto; cada (contrato, diasRestantes) es único, igual que en programarAlertas
+  const fechaProgramada = new Date(Date.now() - 60000);
+  for (let desde = 0; desde < cantidad; desde += LOTE) {
+    const data = [];
+    for (let i = desde; i < Math.min(desde + LOTE, cantidad); i++) {
+      data.push({
+        tipoAlerta: TIPO_ALERTA,
+        referenciaId: contratos[i % contratos.length],
+        referenciaTipo: 'CONTRATO',
+        fechaProgramada,
+        diasRestantes: Math.floor(i / contratos.length) + 1,
+      });
+    }
+    await prisma.alertaProgramada.createMany({ data });
+  }
+  console.log(`  ${cantidad} alertas programadas sobre ${contratos.length} contratos`);
+}
+
+async function verificar() {
+  const config = await obtenerConfiguracion();
+  const where = { tipoAlerta: TIPO_ALERTA, referenciaId: { in: await contratosBenchmark() } };
+
+  const [total, pendientes, descartadas, historial, repetidas] = await Promise.all([
+    prisma.alertaProgramada.count({ where }),
+    prisma.alertaProgramada.count({ where: { ...where, procesada: false, fallidaEn: null } }),
+    prisma.alertaProgramada.count({ where: { ...where, fallidaEn: { not: null } } }),
+    prisma.alertaHistorial.count({ where: { configuracionId: config.id } }),
+    prisma.alertaHistorial.groupBy({
+      by: ['referenciaId', 'asunto'],
+      where: { configuracionId: config.id },
+      having: { id: { _count: { gt: 1 } } },
+    }),
+  ]);
+
+  console.log(`RESULTADO ${JSON.stringify({ total, pendientes, descartadas, historial, duplicadas: repetidas.length })}`);
+}
+
+async function limpiar() {
+  const config = await obtenerConfiguracion();
+  await limpiarCola(config, await contratosBenchmark());
+  await prisma.alertaConfiguracion.delete({ where: { id: config.id } });
+  console.log('  Cola de alertas sintética eliminada (los empleados se limpian con benchmark-nomina.js --limpiar)');
+}
+
+if (require.main === module) {
+  const [accion = 'sembrar', cantidad] = process.argv.slice(2);
+  const acciones = {
+    sembrar: () => sembrar(parseInt(cantidad || ALERTAS_DEFAULT, 10)),
+    verificar,
+    limpiar,
+  };
+  if (!acciones[accion]) {
+    console.error(`Acción desconocida: ${accion} (sembrar | verificar | limpiar)`);
+    process.exit(1);
+  }
+
+  acciones[accion]()
+    .catch((err) => {
+      console.error('Error en el benchmark de alertas:', err);
+      process.exitCode = 1;
+    })
+    .finally(() => prisma.$disconnect());
+}
+
+module.exports = { sembrar, verificar, limpiar };
@@ -0,0 +1,158 @@
+/**
+ * Benchmark del procesamiento de nómina por lotes: siembra una planta sintética de
+ * empleados con contrato activo y procesa un periodo con procesarNomina
+ *
+ * Uso: node scripts/benchmark-nomina.js [empleados] [--limpiar]
+ *
+ *   --limpiar  elimina los datos sintéticos al terminar
+ *
+ * Los empleados llevan documento con PREFIJO_DOCUMENTO y el periodo es PERIODO_BENCHMARK
+ * (un año que no se usa en nóminas reales); si ya existen solo se completan los
+ * faltantes y el periodo se reabre antes de cada corrida. procesarNomina toma todos los
+ * empleados ACTIVO, así que en una base con datos reales también entran en la medición.
+ */
+const { randomUUID } = require('crypto');
+const prisma = require('../db/prisma');
+const nominaService = require('../services/talento-humano/nomina.service');
+
+const EMPLEADOS_DEFAULT = 5000;
+const LOTE = 1000;
+const PREFIJO_DOCUMENTO = 'BENCH-NOM-';
+const CODIGO_CARGO = 'BENCH-NOMINA';
+const PERIODO_BENCHMARK = { anio: 2099, mes: 1, quincena: 1 };
+
+async function obtenerCargo() {
+  return prisma.tHCargo.upsert({
+    where: { codigo: CODIGO_CARGO },
+    update: {},
+    create: { codigo: CODIGO_CARGO, nombre: 'Cargo benchmark nómina' },
+  });
+}
+
+async function seedEmpleadosNomina(cantidad) {
+  const existentes = await prisma.tHEmpleado.count({ where: { documento: { startsWith: PREFIJO_DOCUMENTO } } });
+  if (existentes >= cantidad) {
+    console.log(`  Reutilizando ${existentes} empleados de benchmark`);
+    return;
+  }
+
+  console.log(`  Sembrando ${cantidad - existentes} empleados con contrato activo...`);
+  const cargo = await obtenerCargo();
+  const fechaIngreso = new Date('2024-01-01T00:00:00.000Z');
+
+  for (let desde = existentes; desde < cantidad; desde += LOTE) {
+    const empleados = [];
+    const contratos = [];
+
+    for (let i = desde; i < Math.min(desde + LOTE, cantidad); i++) {
+      const empleadoId = randomUUID();
+      const documento = `${PREFIJO_DOCUMENTO}${String(i).padStart(6, '0')}`;
+
+      empleados.push({
+        id: empleadoId,
+        tipoDocumento: 'CC',
+        documento,
+        nombre: 'Empleado',
+        apellido: `Nómina ${i}`,
+        email: `bench.nomina.${i}@example.com`,
+        telefono: '3000000000',
+        cargoId: cargo.id,
+        fechaIngreso,
+        tipoEmpleado: i % 5 === 0 ? 'MEDICO' : 'ASISTENCIAL',
+      });
+      contratos.push({
+        empleadoId,
+        numeroContrato: documento,
+        tipoContrato: 'INDEFINIDO',
+        fechaInicio: fechaIngreso,
+        // Entre 1 y 8 SMLV aprox., para cubrir auxilio de transporte y fondo de solidaridad
+        salarioBase: 1423500 + (i % 50) * 200000,
+        auxTransporte: true,
+        jornada: 'COMPLETA',
+      });
+    }
+
+    await prisma.tHEmpleado.createMany({ data: empleados });
+    await prisma.tHContrato.createMany({ data: contratos });
+  }
+}
+
+async function prepararPeriodo() {
+  const { anio, mes, quincena } = PERIODO_BENCHMARK;
+  const existente = await prisma.tHPeriodoNomina.findFirst({ where: { anio, mes, quincena } });
+  if (existente) {
+    await prisma.tHPeriodoNomina.update({ where: { id: existente.id }, data: { estado: 'ABIERTO' } });
+    return existente.id;
+  }
+
+  const periodo = await prisma.tHPeriodoNomina.create({
+    data: {
+      anio,
+      mes,
+      quincena,
+      fechaInicio: new Date(`${anio}-01-01T00:00:00.000Z`),
+      fechaFin: new Date(`${anio}-01-15T00:00:00.000Z`),
+      fechaPago: new Date(`${anio}-01-16T00:00:00.000Z`),
+      observaciones: 'Periodo de benchmark',
+    },
+  });
+  return periodo.id;
+}
+
+async function limpiarNomina(periodoId) {
+  await prisma.tHNominaDetalle.deleteMany({ where: { periodoId } });
+  await prisma.tHPeriodoNomina.delete({ where: { id: periodoId } });
+  await prisma.tHContrato.deleteMany({ where: { numeroContrato: { startsWith: PREFIJO_DOCUMENTO } } });
+  const { count } = await prisma.tHEmpleado.deleteMany({ where: { documento: { startsWith: PREFIJO_DOCUMENTO } } });
+  await prisma.tHCargo.deleteMany({ where: { codigo: CODIGO_CARGO } });
+  console.log(`  ${count} empleados de benchmark eliminados`);
+}
+
+async function medir(nombre, fn) {
+  const inicio = process.hrtime.bigint();
+  const resultado = await fn();
+  const ms = Number(process.hrtime.bigint() - inicio) / 1e6;
+  console.log(`  ${nombre.padEnd(28)} ${(ms / 1000).toFixed(2)}s`);
+  return resultado;
+}
+
+async function benchmarkNomina(cantidad, { limpiar = false } = {}) {
+  console.log(`=== Benchmark procesamiento de nómina (${cantidad} empleados) ===\n`);
+  await seedEmpleadosNomina(cantidad);
+  const periodoId = await prepararPeriodo();
+
+  try {
+    console.log('');
+    const periodo = await medir('procesarNomina', () =>
+      nominaService.procesarNomina(periodoId, null, { reiniciar: true })
+    );
+    const { resumen } = await medir('getResumenPeriodo', () => nominaService.getResumenPeriodo(periodoId));
+
+    console.log(`\n  detalles:      ${periodo.detalles.length}`);
+    console.log(`  empleados:     ${resumen.empleados}`);
+    console.log(`  neto a pagar:  ${resumen.netoPagar.toLocaleString('es-CO')}`);
+    console.log(`  costo total:   ${resumen.costoTotal.toLocaleString('es-CO')}`);
+
+    // Los totales guardados deben coincidir con la suma de los detalles
+    const suma = await prisma.tHNominaDetalle.aggregate({ where: { periodoId }, _sum: { netoPagar: true } });
+    if (Number(suma._sum.netoPagar) !== resumen.netoPagar) {
+      throw new Error(`Totales desalineados: ${suma._sum.netoPagar} en detalles vs ${resumen.netoPagar} en el periodo`);
+    }
+    console.log('  totales del periodo = suma de detalles ✓');
+  } finally {
+    if (limpiar) await limpiarNomina(periodoId);
+  }
+}
+
+if (require.main === module) {
+  const args = process.argv.slice(2);
+  const cantidad = parseInt(args.find(a => !a.startsWith('--')) || EMPLEADOS_DEFAULT, 10);
+  benchmarkNomina(cantidad, { limpiar: args.includes('--limpiar') })
+    .catch((err) => {
+      console.error('\nError en el benchmark de nómina:', err);
+      process.exitCode = 1;
+    })
+    .finally(() => prisma.$disconnect());
+}
+
+module.exports = { benchmarkNomina, seedEmpleadosNomina, PREFIJO_DOCUMENTO };
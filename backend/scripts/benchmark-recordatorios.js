@@ -0,0 +1,132 @@
+/**
+ * Benchmark del despacho de recordatorios de citas: siembra citas programadas para dentro
+ * de 7 y 4 días y corre procesarRecordatorios contra el proveedor de email falso
+ *
+ * Uso:
+ *   node scripts/fake-email-provider.js --puerto 4010 &
+ *   RESEND_BASE_URL=http://127.0.0.1:4010 RESEND_API_KEY=re_falsa \
+ *     node scripts/benchmark-recordatorios.js [citas] [--limpiar]
+ *
+ *   --limpiar  elimina las citas y pacientes sintéticos al terminar
+ *
+ * Se niega a correr sin RESEND_BASE_URL para no mandar correos reales. Las citas llevan
+ * MOTIVO_CITA y la corrida se limita a ellas, así que las citas reales no se tocan. Al
+ * terminar imprime una línea "RESULTADO {json}" que lee backend_test_recordatorios.py.
+ */
+const prisma = require('../db/prisma');
+const { procesarRecordatorios } = require('../cron/recordatoriosCitas');
+
+const CITAS_DEFAULT = 2000;
+const LOTE = 1000;
+const MOTIVO_CITA = 'Benchmark recordatorios';
+const cedulaBenchmark = (indice) => `95${String(indice).padStart(8, '0')}`;
+
+function fechaEnDias(dias) {
+  // Igual que el cron: medianoche local + n días
+  const fecha = new Date();
+  fecha.setHours(0, 0, 0, 0);
+  fecha.setDate(fecha.getDate() + dias);
+  return fecha;
+}
+
+async function obtenerPacientes(cantidad) {
+  for (let desde = 0; desde < cantidad; desde += LOTE) {
+    const data = [];
+    for (let i = desde; i < Math.min(desde + LOTE, cantidad); i++) {
+      data.push({
+        nombre: 'Paciente',
+        apellido: `Recordatorio ${i}`,
+        tipoDocumento: 'CC',
+        cedula: cedulaBenchmark(i),
+        email: `bench.recordatorio.${i}@example.com`,
+      });
+    }
+    await prisma.paciente.createMany({ data, skipDuplicates: true });
+  }
+
+  const pacientes = await prisma.paciente.findMany({
+    where: { cedula: { in: Array.from({ length: cantidad }, (_, i) => cedulaBenchmark(i)) } },
+    select: { id: true },
+  });
+  return pacientes.map(p => p.id);
+}
+
+/**
+ * Deja exactamente `cantidad` citas de benchmark pendientes de recordatorio, mitad a 7
+ * días y mitad a 4 días
+ */
+async function seedCitasRecordatorio(cantidad) {
+  await prisma.cita.deleteMany({ where: { motivo: MOTIVO_CITA } });
+  const pacientes = await obtenerPacientes(cantidad);
+  const fechas = [fechaEnDias(7), fechaEnDias(4)];
+
+  for (let desde = 0; desde < cantidad; desde += LOTE) {
+    const data = [];
+    for (let i = desde; i < Math.min(desde + LOTE, cantidad); i++) {
+      data.push({
+        pacienteId: pacientes[i % pacientes.length],
+        fecha: fechas[i % 2],
+        hora: new Date(Date.UTC(1970, 0, 1, 7 + (i % 10), (i % 2) * 30)),
+        motivo: MOTIVO_CITA,
+        estado: 'Programada',
+      });
+    }
+    await prisma.cita.createMany({ data });
+  }
+  console.log(`  ${cantidad} citas sembradas (${Math.ceil(cantidad / 2)} a 7 días, ${Math.floor(cantidad / 2)} a 4 días)`);
+}
+
+async function limpiarRecordatorios(cantidad) {
+  const { count } = await prisma.cita.deleteMany({ where: { motivo: MOTIVO_CITA } });
+  await prisma.paciente.deleteMany({
+    where: { cedula: { in: Array.from({ length: cantidad }, (_, i) => cedulaBenchmark(i)) } },
+  });
+  console.log(`  ${count} citas de benchmark eliminadas`);
+}
+
+async function benchmarkRecordatorios(cantidad, { limpiar = false } = {}) {
+  if (!process.env.RESEND_BASE_URL) {
+    throw new Error('Defina RESEND_BASE_URL apuntando a scripts/fake-email-provider.js para no enviar correos reales');
+  }
+
+  console.log(`=== Benchmark despacho de recordatorios (${cantidad} citas) ===\n`);
+  await seedCitasRecordatorio(cantidad);
+  const filtro = { motivo: MOTIVO_CITA };
+
+  try {
+    const inicio = process.hrtime.bigint();
+    const corrida = await procesarRecordatorios({ filtro });
+    const ms = Number(process.hrtime.bigint() - inicio) / 1e6;
+
+    // Una segunda corrida no debe reenviar nada: las banderas ya quedaron marcadas
+    const repeticion = await procesarRecordatorios({ filtro });
+    const pendientes = await prisma.cita.count({
+      where: { ...filtro, recordatorio7Dias: false, recordatorio4Dias: false },
+    });
+
+    const enviados = corrida.enviados7Dias + corrida.enviados4Dias;
+    console.log(`\n  enviados:     ${enviados} (7 días ${corrida.enviados7Dias}, 4 días ${corrida.enviados4Dias})`);
+    console.log(`  fallidos:     ${corrida.fallidos}`);
+    console.log(`  lotes:        ${corrida.lotes}, reintentos: ${corrida.reintentos}`);
+    console.log(`  duración:     ${(ms / 1000).toFixed(2)}s (${(enviados / (ms / 1000)).toFixed(0)} recordatorios/s)`);
+    console.log(`  repetición:   ${repeticion.enviados7Dias + repeticion.enviados4Dias} enviados`);
+    console.log(`  sin marcar:   ${pendientes}`);
+
+    console.log(`RESULTADO ${JSON.stringify({ citas: cantidad, duracionMs: ms, corrida, repeticion, pendientes })}`);
+  } finally {
+    if (limpiar) await limpiarRecordatorios(cantidad);
+  }
+}
+
+if (require.main === module) {
+  const args = process.argv.slice(2);
+  const cantidad = parseInt(args.find(a => !a.startsWith('--')) || CITAS_DEFAULT, 10);
+  benchmarkRecordatorios(cantidad, { limpiar: args.includes('--limpiar') })
+    .catch((err) => {
+      console.error('\nError en el benchmark de recordatorios:', err);
+      process.exitCode = 1;
+    })
+    .finally(() => prisma.$disconnect());
+}
+
+module.exports = { benchmarkRecordatorios, seedCitasRecordatorio, MOTIVO_CITA };
@@ -0,0 +1,192 @@
+/**
+ * Benchmark de la exportación RIPS por streaming: siembra un mes de facturas sintéticas
+ * y mide tiempo y memoria pico de exportarRIPS (y opcionalmente de generarRIPS)
+ *
+ * Uso: node scripts/benchmark-rips.js [facturas] [--legacy] [--limpiar]
+ *
+ *   --legacy   también ejecuta generarRIPS (todo en memoria) sobre las mismas facturas
+ *   --limpiar  elimina los datos sintéticos al terminar
+ *
+ * Las facturas van numeradas con PREFIJO_FACTURA y emitidas en MES_BENCHMARK; si ya
+ * existen solo se completan las faltantes. Cada factura lleva una consulta (con su cita)
+ * y un ítem "Otro", y los pacientes se repiten para que la deduplicación de usuarios
+ * también quede medida.
+ */
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { randomUUID } = require('crypto');
+const prisma = require('../db/prisma');
+const exportadorRIPS = require('../services/exportadores/exportadorRIPS.service');
+
+const FACTURAS_DEFAULT = 20000;
+const PACIENTES = 2000;
+const LOTE = 2000;
+const PREFIJO_FACTURA = 'BENCH-RIPS-';
+const MOTIVO_CITA = 'Benchmark RIPS';
+const MES_BENCHMARK = { desde: '2025-01-01', hasta: '2025-01-31' };
+const MUESTREO_MEMORIA_MS = 20;
+
+async function obtenerPacientes() {
+  const data = Array.from({ length: PACIENTES }, (_, i) => ({
+    nombre: 'Paciente',
+    apellido: `RIPS ${i}`,
+    tipoDocumento: 'CC',
+    cedula: `96${String(i).padStart(8, '0')}`,
+    genero: i % 2 ? 'Femenino' : 'Masculino',
+  }));
+  await prisma.paciente.createMany({ data, skipDuplicates: true });
+
+  const pacientes = await prisma.paciente.findMany({
+    where: { cedula: { in: data.map(p => p.cedula) } },
+    select: { id: true },
+  });
+  return pacientes.map(p => p.id);
+}
+
+async function seedFacturasRIPS(cantidad) {
+  const existentes = await prisma.factura.count({ where: { numero: { startsWith: PREFIJO_FACTURA } } });
+  if (existentes >= cantidad) {
+    console.log(`  Reutilizando ${existentes} facturas de benchmark`);
+    return;
+  }
+
+  console.log(`  Sembrando ${cantidad - existentes} facturas en ${MES_BENCHMARK.desde.slice(0, 7)}...`);
+  const pacientes = await obtenerPacientes();
+  const inicioMes = new Date(`${MES_BENCHMARK.desde}T00:00:00.000Z`).getTime();
+
+  for (let desde = existentes; desde < cantidad; desde += LOTE) {
+    const citas = [];
+    const facturas = [];
+    const items = [];
+
+    for (let i = desde; i < Math.min(desde + LOTE, cantidad); i++) {
+      const pacienteId = pacientes[i % pacientes.length];
+      // Repartidas en 30 días, entre 08:00 y 18:00
+      const fecha = new Date(inicioMes + (i % 30) * 86400000 + (8 + (i % 10)) * 3600000);
+      const citaId = randomUUID();
+      const facturaId = randomUUID();
+
+      citas.push({
+        id: citaId,
+        pacienteId,
+        motivo: MOTIVO_CITA,
+        fecha,
+        hora: fecha,
+        costo: 80000,
+        estado: 'Completada',
+      });
+      facturas.push({
+        id: facturaId,
+        numero: `${PREFIJO_FACTURA}${String(i).padStart(7, '0')}`,
+        pacienteId,
+        estado: 'Pagada',
+        subtotal: 95000,
+        total: 95000,
+        saldoPendiente: 0,
+        cubiertoPorEPS: i % 3 === 0,
+        epsAutorizacion: i % 3 === 0 ? `AUT-${i}` : null,
+        fechaEmision: fecha,
+      });
+      items.push(
+        { facturaId, tipo: 'Consulta', descripcion: 'Consulta medicina general', precioUnitario: 80000, subtotal: 80000, citaId },
+        { facturaId, tipo: 'Otro', descripcion: 'Insumos de consulta', precioUnitario: 15000, subtotal: 15000 },
+      );
+    }
+
+    await prisma.cita.createMany({ data: citas });
+    await prisma.factura.createMany({ data: facturas });
+    await prisma.facturaItem.createMany({ data: items });
+  }
+}
+
+async function limpiarFacturasRIPS() {
+  const { count } = await prisma.factura.deleteMany({ where: { numero: { startsWith: PREFIJO_FACTURA } } });
+  await prisma.cita.deleteMany({ where: { motivo: MOTIVO_CITA } });
+  console.log(`  ${count} facturas de benchmark eliminadas`);
+}
+
+/**
+ * Ejecuta fn muestreando la memoria del proceso; devuelve tiempo y picos en MB
+ */
+async function medir(nombre, fn) {
+  if (global.gc) global.gc();
+  const base = process.memoryUsage();
+  const pico = { rss: base.rss, heapUsed: base.heapUsed };
+  const muestrear = () => {
+    const { rss, heapUsed } = process.memoryUsage();
+    pico.rss = Math.max(pico.rss, rss);
+    pico.heapUsed = Math.max(pico.heapUsed, heapUsed);
+  };
+  const intervalo = setInterval(muestrear, MUESTREO_MEMORIA_MS);
+
+  const inicio = process.hrtime.bigint();
+  try {
+    const resultado = await fn(muestrear);
+    muestrear();
+    const ms = Number(process.hrtime.bigint() - inicio) / 1e6;
+    const mb = bytes => (bytes / 1024 / 1024).toFixed(1);
+    console.log(`\n  ${nombre}`);
+    console.log(`    tiempo:        ${(ms / 1000).toFixed(2)}s`);
+    console.log(`    RSS pico:      ${mb(pico.rss)} MB (inicio ${mb(base.rss)} MB)`);
+    console.log(`    heap pico:     ${mb(pico.heapUsed)} MB (inicio ${mb(base.heapUsed)} MB)`);
+    return resultado;
+  } finally {
+    clearInterval(intervalo);
+  }
+}
+
+async function benchmarkRIPS(cantidad, { legacy = false, limpiar = false } = {}) {
+  console.log(`=== Benchmark exportación RIPS (${cantidad} facturas) ===\n`);
+  await seedFacturasRIPS(cantidad);
+
+  const archivo = path.join(os.tmpdir(), `RIPS-benchmark-${Date.now()}.json`);
+  try {
+    const resumen = await medir('exportarRIPS (streaming por lotes)', (muestrear) =>
+      exportadorRIPS.exportarRIPS(
+        { fecha_desde: MES_BENCHMARK.desde, fecha_hasta: MES_BENCHMARK.hasta },
+        fs.createWriteStream(archivo),
+        {
+          onProgreso: ({ fase, procesadas, total }) => {
+            muestrear();
+            process.stdout.write(`\r    ${fase}: ${procesadas}/${total} facturas`);
+          },
+        }
+      )
+    );
+    console.log(`    archivo:       ${archivo} (${(fs.statSync(archivo).size / 1024 / 1024).toFixed(1)} MB)`);
+    console.log(`    facturas:      ${resumen.facturas}, usuarios: ${resumen.usuarios}`);
+    console.log(`    registros:     ${JSON.stringify(resumen.registros)}`);
+
+    // Verificar que el documento generado sea JSON válido
+    JSON.parse(fs.readFileSync(archivo, 'utf8'));
+    console.log('    JSON válido ✓');
+
+    if (legacy) {
+      const ids = (await prisma.factura.findMany({
+        where: exportadorRIPS._wherePeriodo({ fecha_desde: MES_BENCHMARK.desde, fecha_hasta: MES_BENCHMARK.hasta }),
+        select: { id: true },
+      })).map(f => f.id);
+      await medir('generarRIPS (todo en memoria)', async () => {
+        const rips = await exportadorRIPS.generarRIPS(ids);
+        return JSON.stringify(rips).length;
+      });
+    }
+  } finally {
+    fs.rmSync(archivo, { force: true });
+    if (limpiar) await limpiarFacturasRIPS();
+  }
+}
+
+if (require.main === module) {
+  const args = process.argv.slice(2);
+  const cantidad = parseInt(args.find(a => !a.startsWith('--')) || FACTURAS_DEFAULT, 10);
+  benchmarkRIPS(cantidad, { legacy: args.includes('--legacy'), limpiar: args.includes('--limpiar') })
+    .catch((err) => {
+      console.error('\nError en el benchmark RIPS:', err);
+      process.exitCode = 1;
+    })
+    .finally(() => prisma.$disconnect());
+}
+
+module.exports = { benchmarkRIPS, seedFacturasRIPS, PREFIJO_FACTURA };
@@ -0,0 +1,129 @@
+/**
+ * Proveedor de email falso compatible con la API de Resend, para probar envíos sin
+ * mandar correos reales
+ *
+ * Uso: node scripts/fake-email-provider.js [--puerto 4010] [--latencia 50] [--fallos 0.1]
+ *
+ *   --puerto    puerto HTTP (default FAKE_EMAIL_PUERTO o 4010)
+ *   --latencia  milisegundos que tarda cada respuesta
+ *   --fallos    fracción de solicitudes que responden 429/500 (errores transitorios)
+ *
+ * El backend lo usa con RESEND_BASE_URL=http://127.0.0.1:4010 y cualquier RESEND_API_KEY.
+ *
+ * Endpoints:
+ *   POST   /emails         un email, como la API de Resend
+ *   POST   /emails/batch   hasta 100 emails
+ *   GET    /stats          solicitudes, emails aceptados, fallos inyectados y destinatarios
+ *                          que recibieron más de un email del mismo asunto
+ *   DELETE /stats          reinicia los contadores
+ */
+const http = require('http');
+const { randomUUID } = require('crypto');
+
+const MAXIMO_LOTE = 100;
+
+function leerOpcion(args, nombre, valorDefault) {
+  const i = args.indexOf(`--${nombre}`);
+  return i >= 0 && args[i + 1] !== undefined ? args[i + 1] : valorDefault;
+}
+
+function crearProveedor({ latenciaMs = 0, tasaFallos = 0 } = {}) {
+  let stats;
+  let entregas;
+
+  const reiniciar = () => {
+    stats = { solicitudes: 0, lotes: 0, emails: 0, fallosInyectados: 0, rechazados: 0 };
+    // "destinatario|asunto" -> veces entregado, para detectar recordatorios duplicados
+    entregas = new Map();
+  };
+  reiniciar();
+
+  const responder = (res, status, cuerpo) => {
+    res.writeHead(status, { 'Content-Type': 'application/json' });
+    res.end(JSON.stringify(cuerpo));
+  };
+
+  const aceptar = (email) => {
+    const destinatarios = Array.isArray(email.to) ? email.to : [email.to];
+    for (const to of destinatarios) {
+      const clave = `${to}|${email.subject}`;
+      entregas.set(clave, (entregas.get(clave) || 0) + 1);
+    }
+    stats.emails++;
+    return { id: randomUUID() };
+  };
+
+  const valido = email => email && email.from && email.to && email.subject && (email.html || email.text);
+
+  const manejar = async (req, res, cuerpo) => {
+    if (req.url === '/stats' && req.method === 'GET') {
+      const duplicados = [...entregas.values()].filter(veces => veces > 1).length;
+      return responder(res, 200, { ...stats, destinatarios: entregas.size, duplicados });
+    }
+    if (req.url === '/stats' && req.method === 'DELETE') {
+      reiniciar();
+      return responder(res, 200, { ok: true });
+    }
+    if (req.method !== 'POST' || !['/emails', '/emails/batch'].includes(req.url)) {
+      return responder(res, 404, { statusCode: 404, name: 'not_found', message: 'Ruta no encontrada' });
+    }
+
+    stats.solicitudes++;
+    if (latenciaMs > 0) await new Promise(resolve => setTimeout(resolve, latenciaMs));
+
+    if (Math.random() < tasaFallos) {
+      stats.fallosInyectados++;
+      const status = Math.random() < 0.5 ? 429 : 500;
+      return responder(res, status, {
+        statusCode: status,
+        name: status === 429 ? 'rate_limit_exceeded' : 'internal_server_error',
+        message: 'Fallo inyectado por el proveedor falso',
+      });
+    }
+
+    let payload;
+    try {
+      payload = JSON.parse(cuerpo || 'null');
+    } catch {
+      return responder(res, 400, { statusCode: 400, name: 'validation_error', message: 'JSON inválido' });
+    }
+
+    if (req.url === '/emails/batch') {
+      if (!Array.isArray(payload) || payload.length === 0 || payload.length > MAXIMO_LOTE || !payload.every(valido)) {
+        stats.rechazados++;
+        return responder(res, 422, { statusCode: 422, name: 'validation_error', message: 'Lote inválido' });
+      }
+      stats.lotes++;
+      return responder(res, 200, { data: payload.map(aceptar) });
+    }
+
+    if (!valido(payload)) {
+      stats.rechazados++;
+      return responder(res, 422, { statusCode: 422, name: 'validation_error', message: 'Email inválido' });
+    }
+    return responder(res, 200, aceptar(payload));
+  };
+
+  return http.createServer((req, res) => {
+    const partes = [];
+    req.on('data', parte => partes.push(parte));
+    req.on('end', () => {
+      manejar(req, res, Buffer.concat(partes).toString('utf8')).catch((err) => {
+        responder(res, 500, { statusCode: 500, name: 'internal_server_error', message: err.message });
+      });
+    });
+  });
+}
+
+if (require.main === module) {
+  const args = process.argv.slice(2);
+  const puerto = parseInt(leerOpcion(args, 'puerto', process.env.FAKE_EMAIL_PUERTO || '4010'), 10);
+  const latenciaMs = parseInt(leerOpcion(args, 'latencia', '0'), 10);
+  const tasaFallos = parseFloat(leerOpcion(args, 'fallos', '0'));
+
+  crearProveedor({ latenciaMs, tasaFallos }).listen(puerto, '127.0.0.1', () => {
+    console.log(`Proveedor de email falso en http://127.0.0.1:${puerto} (latencia ${latenciaMs}ms, fallos ${tasaFallos})`);
+  });
+}
+
+module.exports = { crearProveedor };
@@ -2,10 +2,9 @@
  * Script para optimizar firmas y sellos existentes en la base de datos
  * Reduce el tamaño de las imágenes para mejorar rendimiento de PDF
  */
-const { PrismaClient } = require('@prisma/client');
+const prisma = require('../db/prisma');
 const { resizeBase64Image } = require('../utils/upload');
 
-const prisma = new PrismaClient();
 
 async function optimizeFirmas() {
   console.log('=== Iniciando optimización de firmas y sellos ===\n');
@@ -0,0 +1,112 @@
+/**
+ * Script para sembrar un año de facturas y citas sintéticas para el benchmark de /dashboard/stats
+ *
+ * Uso: node scripts/seed-dashboard-benchmark.js [dias]
+ *
+ * Si los datos de benchmark ya existen no vuelve a sembrarlos. Los rollups diarios se
+ * actualizan solos por los triggers de facturas y citas.
+ */
+const prisma = require('../db/prisma');
+
+const DIAS_DEFAULT = 365;
+const FACTURAS_POR_DIA = 150;
+const CITAS_POR_DIA = 200;
+const PACIENTES = 200;
+const LOTE = 5000;
+const PREFIJO_FACTURA = 'BENCH-DASH-F-';
+const MOTIVO_CITA = 'Benchmark dashboard';
+
+const ESTADOS_FACTURA = ['Pagada', 'Pagada', 'Pagada', 'Pendiente', 'Parcial', 'Cancelada', 'Vencida'];
+const ESTADOS_CITA = ['Completada', 'Completada', 'Completada', 'Programada', 'Confirmada', 'Cancelada', 'NoAsistio'];
+
+async function obtenerPacientes() {
+  const data = Array.from({ length: PACIENTES }, (_, i) => ({
+    nombre: 'Paciente',
+    apellido: `Dashboard ${i}`,
+    tipoDocumento: 'CC',
+    cedula: `98${String(i).padStart(8, '0')}`,
+  }));
+  await prisma.paciente.createMany({ data, skipDuplicates: true });
+
+  const pacientes = await prisma.paciente.findMany({
+    where: { cedula: { in: data.map(p => p.cedula) } },
+    select: { id: true },
+  });
+  return pacientes.map(p => p.id);
+}
+
+async function insertarEnLotes(modelo, total, generar) {
+  for (let desde = 0; desde < total; desde += LOTE) {
+    const data = [];
+    for (let i = desde; i < Math.min(desde + LOTE, total); i++) data.push(generar(i));
+    await prisma[modelo].createMany({ data, skipDuplicates: true });
+  }
+}
+
+async function seedDashboardBenchmark(dias) {
+  console.log(`=== Sembrando ${dias} días de facturas y citas para el dashboard ===\n`);
+  const inicio = Date.now();
+
+  const pacientes = await obtenerPacientes();
+  const doctores = (await prisma.usuario.findMany({
+    where: { rol: { in: ['Doctor', 'DOCTOR'] } },
+    select: { id: true },
+    take: 20,
+  })).map(d => d.id);
+
+  const hoy = new Date();
+  hoy.setUTCHours(12, 0, 0, 0);
+  const diaDe = (indice, porDia) => new Date(hoy.getTime() - Math.floor(indice / porDia) * 24 * 60 * 60 * 1000);
+
+  const totalFacturas = dias * FACTURAS_POR_DIA;
+  const facturasExistentes = await prisma.factura.count({ where: { numero: { startsWith: PREFIJO_FACTURA } } });
+  if (facturasExistentes >= totalFacturas) {
+    console.log(`  Reutilizando ${facturasExistentes} facturas`);
+  } else {
+    await insertarEnLotes('factura', totalFacturas, (i) => {
+      const total = 50000 + (i % 40) * 12500;
+      const estado = ESTADOS_FACTURA[i % ESTADOS_FACTURA.length];
+      const fechaEmision = diaDe(i, FACTURAS_POR_DIA);
+      fechaEmision.setUTCMinutes((i % FACTURAS_POR_DIA) * 4);
+      return {
+        numero: `${PREFIJO_FACTURA}${String(i).padStart(7, '0')}`,
+        pacienteId: pacientes[i % pacientes.length],
+        estado,
+        subtotal: total,
+        total,
+        saldoPendiente: estado === 'Pendiente' || estado === 'Vencida' ? total : estado === 'Parcial' ? total / 2 : 0,
+        fechaEmision,
+      };
+    });
+    console.log(`  ${totalFacturas} facturas`);
+  }
+
+  const totalCitas = dias * CITAS_POR_DIA;
+  const citasExistentes = await prisma.cita.count({ where: { motivo: MOTIVO_CITA } });
+  if (citasExistentes >= totalCitas) {
+    console.log(`  Reutilizando ${citasExistentes} citas`);
+  } else {
+    await insertarEnLotes('cita', totalCitas, (i) => ({
+      pacienteId: pacientes[i % pacientes.length],
+      doctorId: doctores.length ? doctores[i % doctores.length] : null,
+      fecha: diaDe(i, CITAS_POR_DIA),
+      motivo: MOTIVO_CITA,
+      estado: ESTADOS_CITA[i % ESTADOS_CITA.length],
+    }));
+    console.log(`  ${totalCitas} citas`);
+  }
+
+  console.log(`\n✓ Datos de benchmark listos en ${((Date.now() - inicio) / 1000).toFixed(1)}s`);
+}
+
+if (require.main === module) {
+  const dias = parseInt(process.argv[2] || DIAS_DEFAULT, 10);
+  seedDashboardBenchmark(dias)
+    .catch((err) => {
+      console.error('Error sembrando datos del dashboard:', err);
+      process.exitCode = 1;
+    })
+    .finally(() => prisma.$disconnect());
+}
+
+module.exports = { seedDashboardBenchmark };
@@ -0,0 +1,77 @@
+/**
+ * Script para sembrar pacientes sintéticos para el benchmark de /pacientes/search
+ *
+ * Uso: node scripts/seed-pacientes-benchmark.js [cantidad]
+ *
+ * Las cédulas son deterministas (99 + índice de 8 dígitos), así que volver a ejecutarlo
+ * solo completa los faltantes (createMany con skipDuplicates).
+ */
+const prisma = require('../db/prisma');
+
+const CANTIDAD_DEFAULT = 500000;
+const LOTE = 5000;
+
+const NOMBRES = [
+  'María', 'José', 'Luis', 'Ana', 'Juan', 'Carlos', 'Sofía', 'Andrés', 'Valentina', 'Jesús',
+  'Camila', 'Sebastián', 'Isabella', 'Mateo', 'Lucía', 'Martín', 'Daniela', 'Nicolás', 'Mariana', 'Julián',
+  'Ángela', 'Óscar', 'Paula', 'Héctor', 'Natalia', 'Ramón', 'Gabriela', 'Iván', 'Carolina', 'Tomás',
+];
+
+const APELLIDOS = [
+  'Gómez', 'Rodríguez', 'Martínez', 'García', 'López', 'González', 'Hernández', 'Pérez', 'Sánchez', 'Ramírez',
+  'Torres', 'Díaz', 'Vargas', 'Moreno', 'Jiménez', 'Rojas', 'Muñoz', 'Castro', 'Ortiz', 'Suárez',
+  'Gutiérrez', 'Álvarez', 'Romero', 'Valencia', 'Restrepo', 'Cárdenas', 'Ríos', 'Mejía', 'Ospina', 'Peña',
+];
+
+const TIPOS_DOCUMENTO = ['CC', 'CC', 'CC', 'TI', 'CE'];
+
+const cedulaBenchmark = (indice) => `99${String(indice).padStart(8, '0')}`;
+
+function pacienteSintetico(indice) {
+  const nombre = NOMBRES[indice % NOMBRES.length];
+  const apellido1 = APELLIDOS[Math.floor(indice / NOMBRES.length) % APELLIDOS.length];
+  const apellido2 = APELLIDOS[Math.floor(indice / (NOMBRES.length * APELLIDOS.length)) % APELLIDOS.length];
+
+  return {
+    nombre,
+    apellido: `${apellido1} ${apellido2}`,
+    tipoDocumento: TIPOS_DOCUMENTO[indice % TIPOS_DOCUMENTO.length],
+    cedula: cedulaBenchmark(indice),
+    email: `paciente${indice}@benchmark.local`,
+    telefono: `300${String(indice).padStart(7, '0')}`,
+    genero: indice % 2 === 0 ? 'Femenino' : 'Masculino',
+  };
+}
+
+async function seedPacientesBenchmark(cantidad) {
+  console.log(`=== Sembrando ${cantidad} pacientes de benchmark ===\n`);
+  const inicio = Date.now();
+  let creados = 0;
+
+  for (let desde = 0; desde < cantidad; desde += LOTE) {
+    const hasta = Math.min(desde + LOTE, cantidad);
+    const data = [];
+    for (let i = desde; i < hasta; i++) data.push(pacienteSintetico(i));
+
+    const { count } = await prisma.paciente.createMany({ data, skipDuplicates: true });
+    creados += count;
+
+    if ((hasta / LOTE) % 20 === 0 || hasta === cantidad) {
+      console.log(`  ${hasta}/${cantidad} procesados (${creados} nuevos)`);
+    }
+  }
+
+  console.log(`\n✓ ${creados} pacientes creados en ${((Date.now() - inicio) / 1000).toFixed(1)}s`);
+}
+
+if (require.main === module) {
+  const cantidad = parseInt(process.argv[2] || CANTIDAD_DEFAULT, 10);
+  seedPacientesBenchmark(cantidad)
+    .catch((err) => {
+      console.error('Error sembrando pacientes:', err);
+      process.exitCode = 1;
+    })
+    .finally(() => prisma.$disconnect());
+}
+
+module.exports = { seedPacientesBenchmark, cedulaBenchmark };
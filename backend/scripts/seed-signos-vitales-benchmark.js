@@ -0,0 +1,82 @@
+/**
+ * Script para sembrar un paciente crónico con muchos signos vitales, para comparar la
+ * paginación por offset y por cursor de /signos-vitales
+ *
+ * Uso: node scripts/seed-signos-vitales-benchmark.js [cantidad]
+ *
+ * El paciente tiene cédula fija (CEDULA_BENCHMARK). Si ya tiene registros solo se
+ * completan los faltantes. Los registros van de a dos por minuto para que el
+ * desempate por id del ordenamiento también quede cubierto.
+ */
+const prisma = require('../db/prisma');
+
+const CANTIDAD_DEFAULT = 100000;
+const LOTE = 5000;
+const CEDULA_BENCHMARK = '9700000000';
+
+async function obtenerPaciente() {
+  return prisma.paciente.upsert({
+    where: { cedula: CEDULA_BENCHMARK },
+    update: {},
+    create: {
+      nombre: 'Paciente',
+      apellido: 'Crónico Benchmark',
+      tipoDocumento: 'CC',
+      cedula: CEDULA_BENCHMARK,
+    },
+    select: { id: true },
+  });
+}
+
+function signoSintetico(indice, pacienteId, registradoPor, base) {
+  return {
+    pacienteId,
+    registradoPor,
+    fechaRegistro: new Date(base - Math.floor(indice / 2) * 60 * 1000),
+    temperatura: 36 + (indice % 20) / 10,
+    presionSistolica: 110 + (indice % 40),
+    presionDiastolica: 70 + (indice % 20),
+    frecuenciaCardiaca: 60 + (indice % 50),
+    frecuenciaRespiratoria: 12 + (indice % 10),
+    saturacionOxigeno: 92 + (indice % 8),
+  };
+}
+
+async function seedSignosVitalesBenchmark(cantidad) {
+  console.log(`=== Sembrando ${cantidad} signos vitales de benchmark ===\n`);
+  const inicio = Date.now();
+
+  const paciente = await obtenerPaciente();
+  const registrador = await prisma.usuario.findFirst({ select: { id: true }, orderBy: { createdAt: 'asc' } });
+  if (!registrador) throw new Error('No hay usuarios para registrar los signos vitales');
+
+  const existentes = await prisma.signoVital.count({ where: { pacienteId: paciente.id } });
+  if (existentes >= cantidad) {
+    console.log(`  Reutilizando ${existentes} registros del paciente ${paciente.id}`);
+    return paciente.id;
+  }
+
+  const base = Date.now();
+  for (let desde = existentes; desde < cantidad; desde += LOTE) {
+    const data = [];
+    for (let i = desde; i < Math.min(desde + LOTE, cantidad); i++) {
+      data.push(signoSintetico(i, paciente.id, registrador.id, base));
+    }
+    await prisma.signoVital.createMany({ data });
+  }
+
+  console.log(`\n✓ ${cantidad - existentes} signos vitales creados en ${((Date.now() - inicio) / 1000).toFixed(1)}s para el paciente ${paciente.id}`);
+  return paciente.id;
+}
+
+if (require.main === module) {
+  const cantidad = parseInt(process.argv[2] || CANTIDAD_DEFAULT, 10);
+  seedSignosVitalesBenchmark(cantidad)
+    .catch((err) => {
+      console.error('Error sembrando signos vitales:', err);
+      process.exitCode = 1;
+    })
+    .finally(() => prisma.$disconnect());
+}
+
+module.exports = { seedSignosVitalesBenchmark, CEDULA_BENCHMARK };
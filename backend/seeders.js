@@ -3,10 +3,9 @@
  * Ejecutar con: node seeders.js
  */
 require('dotenv').config();
-const { PrismaClient } = require('@prisma/client');
+const prisma = require('./db/prisma');
 const bcrypt = require('bcryptjs');
 const crypto = require("crypto");
-const prisma = new PrismaClient();
 const calidadSeeders = require('./seeders/calidadSeeders');
 
 async function clearDatabase() {
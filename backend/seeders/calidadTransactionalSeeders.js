@@ -6,9 +6,8 @@
  * Ejecutar con: node seeders/calidadTransactionalSeeders.js
  */
 require('dotenv').config({ path: '../.env' });
-const { PrismaClient } = require('@prisma/client');
+const prisma = require('../db/prisma');
 const { fakerES: faker } = require('@faker-js/faker'); // Usar locale español
-const prisma = new PrismaClient();
 
 // ==========================================
 // HELPERS
@@ -5,8 +5,7 @@
  * Ejecutar con: node seeders/cie10.seeder.js
  */
 
-const { PrismaClient } = require('@prisma/client');
-const prisma = new PrismaClient();
+const prisma = require('../db/prisma');
 
 // Códigos CIE-10 más comunes organizados por capítulo
 const CIE10_CODIGOS = [
@@ -1,5 +1,4 @@
-const { PrismaClient } = require('@prisma/client');
-const prisma = new PrismaClient();
+const prisma = require('../db/prisma');
 
 async function seedFormatosTemplates() {
   console.log('Seeding Formatos Templates...');
@@ -9,8 +9,7 @@
  * - Resolucion 1401/2007 (Investigacion accidentes)
  */
 
-const { PrismaClient } = require('@prisma/client');
-const prisma = new PrismaClient();
+const prisma = require('../db/prisma');
 
 // ============ FACTORES DE RIESGO (GTC 45) ============
 const factoresRiesgo = [
@@ -472,6 +472,16 @@ async function seedTalentoHumano() {
     // Crear detalles para el último periodo cerrado
     const ultimoPeriodoCerrado = periodosNomina.find(p => p.estado === 'CERRADO');
     if (ultimoPeriodoCerrado) {
+      // Totales del periodo (los lee getResumenPeriodo), igual que los acumula procesarNomina
+      const totales = {
+        totalDevengado: 0,
+        totalDeducciones: 0,
+        netoPagar: 0,
+        aportesEmpresa: 0,
+        provisiones: 0,
+        empleadosProcesados: 0,
+      };
+
       for (const emp of empleadosActivos) {
         const contrato = contratos.find(c => c.empleadoId === emp.id);
         if (!contrato) continue;
@@ -483,28 +493,44 @@ async function seedTalentoHumano() {
         const pensionEmpleado = salarioBase * 0.04;
         const totalDeducciones = saludEmpleado + pensionEmpleado;
 
+        const detalle = {
+          salarioBase,
+          auxTransporte,
+          totalDevengado,
+          saludEmpleado,
+          pensionEmpleado,
+          totalDeducciones,
+          netoPagar: totalDevengado - totalDeducciones,
+          saludEmpresa: salarioBase * 0.085,
+          pensionEmpresa: salarioBase * 0.12,
+          arl: salarioBase * 0.00522,
+          cajaCompensacion: salarioBase * 0.04,
+          cesantias: totalDevengado * 0.0833,
+          intCesantias: totalDevengado * 0.0833 * 0.12,
+          prima: totalDevengado * 0.0833,
+          vacacionesProv: salarioBase * 0.0417,
+        };
+
         await prisma.tHNominaDetalle.create({
           data: {
             periodoId: ultimoPeriodoCerrado.id,
             empleadoId: emp.id,
-            salarioBase,
-            auxTransporte,
-            totalDevengado,
-            saludEmpleado,
-            pensionEmpleado,
-            totalDeducciones,
-            netoPagar: totalDevengado - totalDeducciones,
-            saludEmpresa: salarioBase * 0.085,
-            pensionEmpresa: salarioBase * 0.12,
-            arl: salarioBase * 0.00522,
-            cajaCompensacion: salarioBase * 0.04,
-            cesantias: totalDevengado * 0.0833,
-            intCesantias: totalDevengado * 0.0833 * 0.12,
-            prima: totalDevengado * 0.0833,
-            vacacionesProv: salarioBase * 0.0417,
+            ...detalle,
           }
         });
+
+        totales.totalDevengado += detalle.totalDevengado;
+        totales.totalDeducciones += detalle.totalDeducciones;
+        totales.netoPagar += detalle.netoPagar;
+        totales.aportesEmpresa += detalle.saludEmpresa + detalle.pensionEmpresa + detalle.arl + detalle.cajaCompensacion;
+        totales.provisiones += detalle.cesantias + detalle.intCesantias + detalle.prima + detalle.vacacionesProv;
+        totales.empleadosProcesados++;
       }
+
+      await prisma.tHPeriodoNomina.update({
+        where: { id: ultimoPeriodoCerrado.id },
+        data: totales,
+      });
       console.log(`   ✅ Detalles de nómina creados para ${empleadosActivos.length} empleados`);
     }
 
@@ -5,158 +5,33 @@ const { serve } = require('@hono/node-server');
 const { serveStatic } = require('@hono/node-server/serve-static');
 const { cors } = require('hono/cors');
 const { swaggerUI } = require('@hono/swagger-ui');
-const swaggerSpec = require('./config/swagger');
 const prisma = require('./db/prisma');
-
-// Importar rutas
-const auth = require('./routes/auth');
-const pacientes = require('./routes/pacientes');
-const citas = require('./routes/citas.routes');
-const agenda = require('./routes/agenda');
-const departamentos = require('./routes/departamentos');
-const especialidades = require('./routes/especialidades');
-const usuarios = require('./routes/usuarios');
-const roles = require('./routes/roles');
-const permissions = require('./routes/permissions');
-const audit = require('./routes/audit');
-const doctores = require('./routes/doctores');
-const categoriaExamen = require('./routes/categoriaExamen');
-const examenProcedimiento = require('./routes/examenProcedimiento');
-const categoriaProducto = require('./routes/categoriaProducto');
-const etiquetaProducto = require('./routes/etiquetaProducto');
-const productos = require('./routes/productos');
-const documentosPaciente = require('./routes/documentosPaciente');
-// Rutas de hospitalización
-const unidad = require('./routes/unidad');
-const habitacion = require('./routes/habitacion');
-const cama = require('./routes/cama');
-const admision = require('./routes/admision');
-const turnoCaja = require('./routes/turno-caja');
-const movimiento = require('./routes/movimiento');
-// Rutas de facturación y órdenes
-const ordenesMedicas = require('./routes/ordenesMedicas');
-const ordenesMedicamentos = require('./routes/ordenesMedicamentos');
-const facturas = require('./routes/facturas');
-const paquetesHospitalizacion = require('./routes/paquetesHospitalizacion');
-// Rutas de HCE
-const evoluciones = require('./routes/evoluciones');
-const signosVitales = require('./routes/signosVitales');
-const diagnosticos = require('./routes/diagnosticos');
-const alertas = require('./routes/alertas');
-const auditoria = require('./routes/auditoria');
-const hce = require('./routes/hce');
-// Rutas de egresos
-const egresos = require('./routes/egresos');
-// Rutas de disponibilidad
-const disponibilidad = require('./routes/disponibilidad');
-// Rutas de interconsultas
-const interconsultas = require('./routes/interconsulta');
-// Rutas de procedimientos
-const procedimientos = require('./routes/procedimiento');
-// Rutas de prescripción médica (usa modelo Producto como vademécum)
-const prescripciones = require('./routes/prescripciones');
-const administraciones = require('./routes/administraciones');
-// Rutas de consultas
-const consultas = require('./routes/consultas');
-// Rutas de urgencias
-const urgencias = require('./routes/urgencias');
-// Rutas de asignaciones de enfermería
-const asignacionesEnfermeria = require('./routes/asignacionesEnfermeria');
-// Rutas de notas de enfermería
-const notasEnfermeria = require('./routes/notasEnfermeria');
-const glucometrias = require('./routes/glucometrias');
-const balanceLiquidos = require('./routes/balanceLiquidos');
-const drogueria = require('./routes/drogueria');
-const transfusiones = require('./routes/transfusiones');
-const plantillasNotas = require('./routes/plantillasNotas');
-const plantillasDoctor = require('./routes/plantillasDoctor');
-const plantillasPlanes = require('./routes/plantillas-planes');
-const dashboard = require('./routes/dashboard');
-// Rutas de Calidad IPS
-const habilitacion = require('./routes/habilitacion');
-const pamec = require('./routes/pamec');
-const eventosAdversos = require('./routes/eventosAdversos');
-const seguridadPaciente = require('./routes/seguridadPaciente');
-const indicadoresSIC = require('./routes/indicadoresSIC');
-const pqrs = require('./routes/pqrs');
-const comites = require('./routes/comites');
-const vigilanciaSalud = require('./routes/vigilanciaSalud');
-const documentosCalidad = require('./routes/documentosCalidad');
-const planesAccion = require('./routes/planesAccion');
-const acreditacion = require('./routes/acreditacion');
-const quirofano = require('./routes/quirofano');
-const imagenologia = require('./routes/imagenologia');
-const reportes = require('./routes/reportes');
-const miaPass = require('./routes/miaPass');
-const formularioMiaPass = require('./routes/formularioMiaPass');
-const publicaciones = require('./routes/publicaciones');
-const tickets = require('./routes/tickets');
-const ordenesTienda = require('./routes/ordenesTienda');
-// Trabaja con nosotros - Candidatos de talento humano
-const candidatos = require('./routes/candidatos');
-// Calidad 2.0 - Sistema de Gestión de Calidad Mejorado
-const calidad2 = require('./routes/calidad2');
-// Catálogos oficiales (CUPS, CIE-10, CIE-11)
-const catalogos = require('./routes/catalogos');
-// Antecedentes médicos estructurados
-const antecedentes = require('./routes/antecedentes');
-// Incapacidades, Certificados y Seguimientos
-const incapacidades = require('./routes/incapacidades');
-const certificados = require('./routes/certificados');
-const seguimientos = require('./routes/seguimientos');
-// MCP - Herramientas para agentes de IA (n8n, WhatsApp, etc.)
-const mcp = require('./routes/mcp');
-// AI Assistant - Asistente IA médico para consultas
-const aiAssistant = require('./routes/ai-assistant');
-// HCE Analyzer - Analizador de historias clínicas externas con IA
-const hceAnalyzer = require('./routes/hce-analyzer');
-// Talento Humano - Módulo completo de RRHH con IA
-const talentoHumano = require('./routes/talento-humano');
-// SST - Seguridad y Salud en el Trabajo (Decreto 1072/2015, Res. 0312/2019)
-const sst = require('./routes/sst');
-// Alertas y Notificaciones por Email (Resend)
-const alertasNotificaciones = require('./routes/alertas-notificaciones');
-// Rutas públicas y pagos (ePayco)
-const publicRoutes = require('./routes/public');
-const payments = require('./routes/payments');
-// Documentos legales para pacientes (términos, privacidad)
-const documentosLegales = require('./routes/documentos-legales');
-// Solicitudes de Historia Clínica (admin)
-const solicitudesHC = require('./routes/solicitudes-hc');
-// Tipos de Usuario y Convenios (configuración)
-const tipoUsuarioConvenio = require('./routes/tipoUsuarioConvenio');
-// API v1 para frontend usuario (Front_Usuario_ClinicaMia)
-const apiV1 = require('./routes/api-v1');
-// Sistema de Reservas Temporales de Horarios
-const reservas = require('./routes/reservas');
-// Sistema de Bloqueos de Agenda (vacaciones, permisos, etc.)
-const bloqueos = require('./routes/bloqueos');
-// Encuestas de Satisfacción Post-Consulta
-const encuestaSatisfaccion = require('./routes/encuestaSatisfaccion');
-// Siigo - Facturación Electrónica y Contabilidad
-const siigoRoutes = require('./routes/siigo');
-const compras = require('./routes/compras');
-const contabilidad = require('./routes/contabilidad');
-const bancos = require('./routes/bancos');
-const activosFijos = require('./routes/activos-fijos');
-const dashboardFinanciero = require('./routes/dashboard-financiero');
-// Cron Jobs
-const limpiarReservasJob = require('./cron/limpiarReservas');
-const depreciacionJob = require('./cron/depreciacion');
-const siigoSyncJob = require('./cron/siigoSync');
-const { initMiaPassExpirationCron } = require('./cron/miaPassExpiration');
-const verificarPagosJob = require('./cron/verificarPagos');
-const { initRecordatoriosCitasCron } = require('./cron/recordatoriosCitas');
+const { getPoolMetrics } = require('./db/pool');
+const consultas = require('./db/consultas');
+const { medirConsultas } = require('./middleware/consultas');
+const arranque = require('./utils/arranque');
+
+// Registro de rutas (carga perezosa / por grupos, ver routes/index.js)
+const registroRutas = require('./routes');
+// Cron Jobs (solo en el proceso líder)
+const cronJobs = require('./cron');
+const liderCron = require('./services/liderCron.service');
+const permisoCache = require('./services/permisoCache.service');
+const auditQueue = require('./services/auditQueue.service');
+const pdfRenderService = require('./services/pdfRender.service');
 
 const app = new Hono();
 
 app.use('*', logger());
+// Consultas de Prisma por petición: cabecera Server-Timing y avisos de presupuesto / N+1
+app.use('*', medirConsultas());
 
 // CORS - Allow all origins for local network access
 app.use('/*', cors({
   origin: '*',
   allowMethods: ['GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'OPTIONS'],
-  allowHeaders: ['Content-Type', 'Authorization', 'X-Requested-With'],
+  allowHeaders: ['Content-Type', 'Authorization', 'X-Requested-With', 'If-None-Match', 'If-Modified-Since'],
+  exposeHeaders: ['ETag', 'Last-Modified', 'Server-Timing'],
   credentials: true,
   maxAge: 86400, // 24 hours
 }));
@@ -164,9 +39,9 @@ app.use('/*', cors({
 // Servir archivos estáticos (uploads de doctores, etc.)
 app.use('/uploads/*', serveStatic({ root: './public' }));
 
-// Swagger Documentation
+// Swagger Documentation (la especificación se genera con la primera petición: recorre todas las rutas)
 app.get('/swagger.json', (c) => {
-  return c.json(swaggerSpec);
+  return c.json(require('./config/swagger'));
 });
 app.get('/api-docs', swaggerUI({ url: '/swagger.json' }));
 
@@ -247,164 +122,34 @@ app.get('/', (c) => {
 app.get('/health', async (c) => {
   try {
     await prisma.$queryRaw`SELECT 1`;
-    return c.json({ status: 'ok', database: 'connected', orm: 'prisma' });
+    return c.json({
+      status: 'ok',
+      database: 'connected',
+      orm: 'prisma',
+      pool: await getPoolMetrics(prisma),
+      cache: { permisos: permisoCache.getStats() },
+      auditQueue: auditQueue.getStats(),
+      pdf: pdfRenderService.getStats(),
+      cron: liderCron.getStats(),
+      arranque: arranque.getStats(),
+      rutas: registroRutas.getStats(),
+    });
   } catch (error) {
     return c.json({ status: 'error', database: 'disconnected' }, 500);
   }
 });
 
-// Rutas públicas (sin autenticación)
-app.route('/public', publicRoutes);
-app.route('/payments', payments);
-app.route('/documentos-legales', documentosLegales);
-
-// API v1 para frontend usuario (Front_Usuario_ClinicaMia)
-// Estas rutas siguen el esquema OpenAPI esperado por el frontend
-app.route('/api/v1', apiV1);
-
-// MCP - Herramientas para agentes de IA (n8n, WhatsApp, etc.)
-// Endpoints: GET /tools, POST /tools/:name, POST /batch
-app.route('/api/v1/mcp', mcp);
-
-// Montar rutas
-app.route('/auth', auth);
-app.route('/drogueria', drogueria);
-app.route('/pacientes', pacientes);
-app.route('/citas', citas);
-app.route('/agenda', agenda);
-app.route('/reservas', reservas);
-app.route('/bloqueos', bloqueos);
-app.route('/encuestas-satisfaccion', encuestaSatisfaccion);
-app.route('/departamentos', departamentos);
-app.route('/especialidades', especialidades);
-app.route('/usuarios', usuarios);
-app.route('/roles', roles);
-app.route('/permissions', permissions);
-app.route('/audit', audit);
-app.route('/doctores', doctores);
-app.route('/categorias-examenes', categoriaExamen);
-app.route('/examenes-procedimientos', examenProcedimiento);
-app.route('/categorias-productos', categoriaProducto);
-app.route('/etiquetas-productos', etiquetaProducto);
-app.route('/productos', productos);
-app.route('/documentos-paciente', documentosPaciente);
-// Rutas de hospitalización
-app.route('/unidades', unidad);
-app.route('/habitaciones', habitacion);
-app.route('/camas', cama);
-app.route('/admisiones', admision);
-app.route('/turno-caja', turnoCaja);
-app.route('/movimientos', movimiento);
-// Rutas de facturación y órdenes
-app.route('/ordenes-medicas', ordenesMedicas);
-app.route('/ordenes-medicamentos', ordenesMedicamentos);
-app.route('/facturas', facturas);
-app.route('/paquetes-hospitalizacion', paquetesHospitalizacion);
-// Rutas de HCE
-app.route('/evoluciones', evoluciones);
-app.route('/signos-vitales', signosVitales);
-app.route('/diagnosticos', diagnosticos);
-app.route('/alertas', alertas);
-app.route('/auditoria', auditoria);
-app.route('/hce', hce);
-// Rutas de egresos
-app.route('/egresos', egresos);
-// Rutas de disponibilidad
-app.route('/disponibilidad', disponibilidad);
-// Rutas de interconsultas
-app.route('/interconsultas', interconsultas);
-// Rutas de procedimientos
-app.route('/procedimientos', procedimientos);
-// Rutas de prescripción médica (medicamentos = productos)
-app.route('/prescripciones', prescripciones);
-app.route('/administraciones', administraciones);
-// Rutas de consultas
-app.route('/consultas', consultas);
-// Rutas de urgencias
-app.route('/urgencias', urgencias);
-// Rutas de asignaciones de enfermería
-app.route('/asignaciones-enfermeria', asignacionesEnfermeria);
-// Rutas de notas de enfermería
-app.route('/notas-enfermeria', notasEnfermeria);
-app.route('/glucometrias', glucometrias);
-app.route('/balance-liquidos', balanceLiquidos);
-app.route('/transfusiones', transfusiones);
-app.route('/plantillas-notas', plantillasNotas);
-app.route('/plantillas-doctor', plantillasDoctor);
-app.route('/plantillas-planes', plantillasPlanes);
-app.route('/dashboard', dashboard);
-// Rutas de Calidad IPS - Sistema de Gestión de Calidad
-app.route('/habilitacion', habilitacion);
-app.route('/pamec', pamec);
-app.route('/eventos-adversos', eventosAdversos);
-app.route('/seguridad-paciente', seguridadPaciente);
-app.route('/indicadores-sic', indicadoresSIC);
-app.route('/pqrs', pqrs);
-app.route('/comites', comites);
-app.route('/vigilancia-salud', vigilanciaSalud);
-app.route('/documentos-calidad', documentosCalidad);
-app.route('/planes-accion', planesAccion);
-app.route('/acreditacion', acreditacion);
-app.route('/quirofanos', quirofano);
-app.route('/imagenologia', imagenologia);
-app.route('/reportes', reportes);
-app.route('/mia-pass', miaPass);
-app.route('/formulario-mia-pass', formularioMiaPass);
-app.route('/publicaciones', publicaciones);
-app.route('/tickets', tickets);
-app.route('/ordenes-tienda', ordenesTienda);
-// Trabaja con nosotros - Candidatos de talento humano
-app.route('/candidates', candidatos);
-// Calidad 2.0 - Sistema de Gestión de Calidad Mejorado
-app.route('/calidad2', calidad2);
-app.route('/catalogos', catalogos);
-app.route('/antecedentes', antecedentes);
-app.route('/incapacidades', incapacidades);
-app.route('/certificados', certificados);
-app.route('/seguimientos', seguimientos);
-// AI Assistant - Asistente IA médico para consultas
-app.route('/ai-assistant', aiAssistant);
-// HCE Analyzer - Analizador de historias clínicas externas con IA
-app.route('/hce-analyzer', hceAnalyzer);
-// Talento Humano - Módulo completo de RRHH con IA
-app.route('/talento-humano', talentoHumano);
-// SST - Seguridad y Salud en el Trabajo (Decreto 1072/2015, Res. 0312/2019)
-app.route('/sst', sst);
-// Alertas y Notificaciones por Email
-app.route('/alertas-notificaciones', alertasNotificaciones);
-// Notificaciones específicas para doctores
-const notificacionesDoctor = require('./routes/notificaciones-doctor');
-app.route('/notificaciones-doctor', notificacionesDoctor);
-// Siigo - Facturación Electrónica DIAN y Contabilidad
-app.route('/siigo', siigoRoutes);
-// Compras - Proveedores, Órdenes de Compra, Cuentas por Pagar
-app.route('/compras', compras);
-// Contabilidad - Asientos, Reportes, Centros de Costo, Nómina
-app.route('/contabilidad', contabilidad);
-// Bancos - Cuentas, Movimientos, Conciliación, Tributario
-app.route('/bancos', bancos);
-// Activos Fijos - Equipos médicos, Depreciación, Mantenimientos
-app.route('/activos-fijos', activosFijos);
-// Dashboard Financiero - KPIs, Tendencias, Reportes
-app.route('/dashboard-financiero', dashboardFinanciero);
-// Solicitudes de Historia Clínica (gestión admin)
-app.route('/solicitudes-hc', solicitudesHC);
-// Tipos de Usuario y Convenios (configuración)
-app.route('/tipos-usuario-convenio', tipoUsuarioConvenio);
+// Reporte de consultas por ruta (promedio / máximo, peticiones sobre presupuesto, posibles N+1)
+app.get('/health/consultas', (c) => c.json(consultas.getReporte()));
 
-app.notFound((c) => {
+// Rutas de los módulos: se montan según RUTAS_GRUPOS / RUTAS_CARGA (routes/index.js)
+const rutaNoEncontrada = (c) => {
   console.log(`[404] Not Found: ${c.req.method} ${c.req.url}`);
   return c.json({ success: false, message: `Ruta no encontrada: ${c.req.url}` }, 404);
-});
+};
+registroRutas.montar(app, { notFound: rutaNoEncontrada });
 
-// ==========================================
-// INICIALIZAR CRON JOBS
-// ==========================================
-if (process.env.NODE_ENV !== 'test') {
-  // Cron job para alertas de documentos legales (diario a las 8:00 AM)
-  require('./jobs/alertasDocumentosLegales.job');
-  console.log('✓ Cron jobs inicializados');
-}
+app.notFound(rutaNoEncontrada);
 
 // Inicializar servidor
 const PORT = process.env.PORT || 4000;
@@ -412,26 +157,55 @@ const HOST = process.env.HOST || '0.0.0.0';
 
 console.log(`🚀 Servidor Hono.js con Prisma iniciado en ${HOST}:${PORT}`);
 
-// Iniciar cron jobs
-limpiarReservasJob.iniciar();
-depreciacionJob.iniciar();
-siigoSyncJob.start();
-initMiaPassExpirationCron();
-verificarPagosJob.iniciar();
-initRecordatoriosCitasCron();
+// Canal de invalidación del cache de permisos entre instancias
+permisoCache.iniciar();
 
-// Auto-inicializar conexión Siigo
-const siigoService = require('./services/siigo/siigo.service');
-siigoService.autoInitialize().catch(err => {
-  console.error('[Siigo] Error en auto-inicialización:', err.message);
-});
+// Auto-inicializar conexión Siigo (solo si la instancia sirve el grupo financiero)
+if (registroRutas.grupos.includes('financiero')) {
+  require('./services/siigo/siigo.service').autoInitialize().catch(err => {
+    console.error('[Siigo] Error en auto-inicialización:', err.message);
+  });
+}
 
 if (require.main === module) {
-  serve({
+  const server = serve({
     fetch: app.fetch,
     port: PORT,
     hostname: HOST,
+  }, () => {
+    const { listoMs, rssMb, heapMb, modulos } = arranque.marcarListo();
+    const rutas = registroRutas.getStats();
+    console.log(`[Arranque] Escuchando en ${listoMs}ms, RSS ${rssMb}MB, heap ${heapMb}MB, ${modulos} módulos; ` +
+      `rutas ${rutas.cargadas}/${rutas.montadas} cargadas (carga ${rutas.modo}, grupos ${rutas.grupos.join(',')})`);
+    if (rutas.modo === 'diferida') {
+      registroRutas.precargar().then(() => {
+        const precarga = registroRutas.getStats();
+        console.log(`[Arranque] Precarga de ${precarga.cargadas} routers en ${precarga.cargaMs}ms, RSS ${arranque.getStats().actual.rssMb}MB`);
+      });
+    }
   });
+
+  // Cron jobs: corren solo en el proceso que tiene el lock de líder (ver cluster.js).
+  // CRON_HABILITADO=false deja la instancia fuera de la elección (p. ej. nodos solo HTTP)
+  if (process.env.CRON_HABILITADO !== 'false') {
+    liderCron.iniciar({ alGanar: cronJobs.iniciar, alPerder: cronJobs.pausar });
+  }
+
+  // Apagado ordenado: dejar de aceptar conexiones y esperar las peticiones en curso, soltar
+  // el liderazgo de los cron jobs, vaciar la cola de auditoría y cerrar los workers de PDF.
+  // Pasado APAGADO_MS se sale igualmente (conexiones SSE o keep-alive colgadas)
+  const APAGADO_MS = parseInt(process.env.APAGADO_MS || '25000', 10);
+  const apagar = (signal) => {
+    console.log(`[Server] ${signal} recibido, cerrando...`);
+    setTimeout(() => process.exit(0), APAGADO_MS).unref();
+    const http = new Promise(resolve => server.close(resolve));
+    if (server.closeIdleConnections) server.closeIdleConnections();
+    Promise.all([http, liderCron.detener(), auditQueue.cerrar(), pdfRenderService.cerrar()])
+      .catch(err => console.error('[AuditQueue] Error en flush final:', err.message))
+      .finally(() => process.exit(0));
+  };
+  process.once('SIGTERM', apagar);
+  process.once('SIGINT', apagar);
 }
 
 module.exports = app;
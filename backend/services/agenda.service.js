@@ -1,11 +1,10 @@
 /**
  * Servicio de Agenda - Manejo de bloques horarios
  */
-const { PrismaClient } = require('@prisma/client');
+const prisma = require('../db/prisma');
 const { NotFoundError, ValidationError } = require('../utils/errors');
 const { bloqueoService } = require('./bloqueo.service');
-
-const prisma = new PrismaClient();
+const { huellaDeModelos } = require('../utils/huella');
 
 /**
  * Generar bloques horarios para un doctor en una fecha específica
@@ -263,18 +262,13 @@ async function generarBloques(doctorId, fecha) {
 }
 
 /**
- * Obtener citas del día con filtros
+ * Filtro de citas de un día, opcionalmente de un doctor
  * @param {string} fecha - Fecha en formato YYYY-MM-DD
  * @param {string} doctorId - ID del registro doctor (tabla doctores), opcional
  */
-async function obtenerCitasPorFiltros(fecha, doctorId = null) {
+async function filtroCitasDelDia(fecha, doctorId = null) {
   // Crear fecha sin conversión de timezone
-  const fechaSimple = new Date(fecha + 'T00:00:00.000Z');
-  
-  const where = {
-    fecha: fechaSimple,
-    estado: { notIn: ['Cancelada'] }
-  };
+  const where = { fecha: new Date(fecha + 'T00:00:00.000Z') };
 
   // Si se proporciona doctorId, primero obtener el usuarioId
   if (doctorId) {
@@ -288,6 +282,29 @@ async function obtenerCitasPorFiltros(fecha, doctorId = null) {
     }
   }
 
+  return where;
+}
+
+/**
+ * Huella de la agenda del día para GET condicional
+ * Incluye las canceladas: cancelar una cita también debe invalidar la agenda
+ */
+async function obtenerHuellaCitas(fecha, doctorId = null) {
+  const where = await filtroCitasDelDia(fecha, doctorId);
+  return huellaDeModelos([{ modelo: 'cita', where }]);
+}
+
+/**
+ * Obtener citas del día con filtros
+ * @param {string} fecha - Fecha en formato YYYY-MM-DD
+ * @param {string} doctorId - ID del registro doctor (tabla doctores), opcional
+ */
+async function obtenerCitasPorFiltros(fecha, doctorId = null) {
+  const where = {
+    ...(await filtroCitasDelDia(fecha, doctorId)),
+    estado: { notIn: ['Cancelada'] }
+  };
+
   const citas = await prisma.cita.findMany({
     where,
     include: {
@@ -347,5 +364,6 @@ async function obtenerDoctoresActivos() {
 module.exports = {
   generarBloques,
   obtenerCitasPorFiltros,
+  obtenerHuellaCitas,
   obtenerDoctoresActivos
 };
@@ -3,10 +3,62 @@
  * Gestiona la configuración, programación y envío de alertas
  */
 
+const os = require('os');
 const prisma = require('../db/prisma');
 const emailService = require('./email.service');
 const { ValidationError, NotFoundError } = require('../utils/errors');
 
+// Cola de alertas programadas: filas por reclamo, duración del arriendo, errores antes de
+// pasar a la cola de descarte y loops de procesamiento por instancia
+const LOTE_ALERTAS = parseInt(process.env.ALERTAS_LOTE || '100', 10);
+const ARRIENDO_MS = parseInt(process.env.ALERTAS_ARRIENDO_MS || '300000', 10);
+const MAX_INTENTOS = parseInt(process.env.ALERTAS_MAX_INTENTOS || '5', 10);
+const WORKERS_ALERTAS = parseInt(process.env.ALERTAS_WORKERS || '2', 10);
+// Espera antes de reintentar una alerta que falló (se duplica en cada intento)
+const ESPERA_REINTENTO_MS = 60000;
+
+// Carga por lote de los datos de referencia que usan las plantillas: [id, datos][]
+const CARGADORES_REFERENCIA = {
+  DOCUMENTO_SST: async (ids) => {
+    const docs = await prisma.sSTDocumentoSST.findMany({
+      where: { id: { in: ids } },
+      select: { id: true, nombre: true, codigo: true, fechaVencimiento: true }
+    });
+    return docs.map(doc => [doc.id, { ...doc }]);
+  },
+
+  EXAMEN_MEDICO: async (ids) => {
+    const examenes = await prisma.sSTExamenMedico.findMany({
+      where: { id: { in: ids } },
+      include: {
+        empleado: { select: { id: true, nombre: true, apellido: true } }
+      }
+    });
+    return examenes.map(examen => [examen.id, {
+      nombreExamen: examen.nombreExamen,
+      empleado: `${examen.empleado.nombre} ${examen.empleado.apellido}`,
+      empleadoId: examen.empleadoId,
+      fechaVencimiento: examen.fechaVencimiento,
+      fechaProgramada: examen.fechaProgramada?.toLocaleDateString('es-CO')
+    }]);
+  },
+
+  CONTRATO: async (ids) => {
+    const contratos = await prisma.tHContrato.findMany({
+      where: { id: { in: ids } },
+      include: {
+        empleado: { select: { id: true, nombre: true, apellido: true } }
+      }
+    });
+    return contratos.map(contrato => [contrato.id, {
+      empleado: `${contrato.empleado.nombre} ${contrato.empleado.apellido}`,
+      empleadoId: contrato.empleadoId,
+      fechaFin: contrato.fechaFin?.toLocaleDateString('es-CO'),
+      fechaVencimiento: contrato.fechaFin
+    }]);
+  }
+};
+
 // Templates por defecto para cada tipo de alerta
 const TEMPLATES_DEFAULT = {
   DOCUMENTO_VENCIMIENTO: {
@@ -211,27 +263,8 @@ class AlertaService {
   /**
    * Enviar alerta inmediata
    */
-  async enviarAlerta({ tipoAlerta, referenciaId, referenciaTipo, datos = {} }) {
-    // Buscar configuración
-    const config = await prisma.alertaConfiguracion.findFirst({
-      where: { tipoAlerta, activo: true },
-      include: {
-        destinatarios: {
-          where: { activo: true },
-          include: {
-            empleado: { select: { email: true } },
-            cargo: {
-              include: {
-                empleados: {
-                  where: { estado: 'ACTIVO' },
-                  select: { email: true }
-                }
-              }
-            }
-          }
-        }
-      }
-    });
+  async enviarAlerta({ tipoAlerta, referenciaId, referenciaTipo, datos = {} }, contexto = null) {
+    const config = await this._obtenerConfiguracion(tipoAlerta, contexto);
 
     if (!config) {
       console.log(`[Alerta] No hay configuración activa para ${tipoAlerta}`);
@@ -239,7 +272,7 @@ class AlertaService {
     }
 
     // Resolver emails de destinatarios
-    const emails = await this._resolverEmails(config.destinatarios, datos);
+    const emails = await this._resolverEmails(config.destinatarios, datos, contexto);
     if (emails.length === 0) {
       console.log(`[Alerta] No hay destinatarios para ${tipoAlerta}`);
       return { success: false, error: 'Sin destinatarios' };
@@ -286,7 +319,7 @@ class AlertaService {
       }
     });
 
-    return { success: result.success, historialId: historial.id, emails };
+    return { success: result.success, historialId: historial.id, emails, error: result.error };
   }
 
   /**
@@ -344,60 +377,170 @@ class AlertaService {
     return { programadas };
   }
 
+  // ============ COLA DE ALERTAS PROGRAMADAS ============
+
   /**
-   * Procesar alertas programadas pendientes
-   * Ejecutar como tarea programada (cron)
+   * Reclamar un lote de alertas vencidas para este worker
+   *
+   * FOR UPDATE SKIP LOCKED hace que dos workers nunca tomen la misma fila; el arriendo
+   * (bloqueada_hasta) devuelve la fila a la cola si el worker muere antes de terminarla.
+   * Cada reclamo cuenta como intento.
    */
-  async procesarAlertasPendientes() {
+  async reclamarAlertas(workerId, limite = LOTE_ALERTAS) {
     const ahora = new Date();
+    const arriendo = new Date(ahora.getTime() + ARRIENDO_MS);
+
+    return prisma.$queryRaw`
+      UPDATE alerta_programadas
+      SET bloqueada_por = ${workerId},
+          bloqueada_hasta = ${arriendo},
+          intentos = intentos + 1
+      WHERE id IN (
+        SELECT id FROM alerta_programadas
+        WHERE procesada = false
+          AND fallida_en IS NULL
+          AND fecha_programada <= ${ahora}
+          AND (bloqueada_hasta IS NULL OR bloqueada_hasta < ${ahora})
+        ORDER BY fecha_programada
+        LIMIT ${limite}
+        FOR UPDATE SKIP LOCKED
+      )
+      RETURNING id, tipo_alerta::text AS "tipoAlerta", referencia_id AS "referenciaId",
+                referencia_tipo AS "referenciaTipo", dias_restantes AS "diasRestantes", intentos
+    `;
+  }
 
-    // Obtener alertas que deben procesarse
-    const alertas = await prisma.alertaProgramada.findMany({
-      where: {
-        procesada: false,
-        fechaProgramada: { lte: ahora }
-      },
-      take: 100,
-      orderBy: { fechaProgramada: 'asc' }
-    });
+  /**
+   * Procesar un lote de alertas programadas pendientes
+   * Reclama hasta ALERTAS_LOTE filas, así que varias instancias pueden llamarlo a la vez.
+   * El envío es al menos una vez: si el worker muere tras enviar y antes de marcar el
+   * lote, esas alertas se reenvían al vencer el arriendo.
+   */
+  async procesarAlertasPendientes({ workerId = this._workerId(0), limite = LOTE_ALERTAS } = {}) {
+    const alertas = await this.reclamarAlertas(workerId, limite);
+    const resultados = { reclamadas: alertas.length, procesadas: 0, exitosas: 0, fallidas: 0, descartadas: 0 };
+    if (alertas.length === 0) return resultados;
+
+    let datosPorAlerta;
+    try {
+      datosPorAlerta = await this._cargarDatosReferencia(alertas);
+    } catch (error) {
+      console.error(`[Alerta] Error cargando referencias de ${alertas.length} alertas:`, error.message);
+      for (const alerta of alertas) {
+        if (await this._liberarAlerta(alerta, workerId, error)) resultados.descartadas++;
+        resultados.fallidas++;
+      }
+      return resultados;
+    }
 
-    const resultados = { procesadas: 0, exitosas: 0, fallidas: 0 };
+    // Configuraciones y destinatarios resueltos una vez por lote
+    const contexto = { configuraciones: new Map(), emails: new Map() };
+    const terminadas = [];
 
     for (const alerta of alertas) {
       try {
-        // Obtener datos del item referenciado
-        const datos = await this._obtenerDatosReferencia(alerta.referenciaTipo, alerta.referenciaId);
+        // Reclamada más veces de las permitidas: el worker murió con ella en cada intento
+        if (alerta.intentos > MAX_INTENTOS) {
+          throw new Error('Arriendo vencido en todos los intentos');
+        }
 
+        const datos = datosPorAlerta.get(alerta.id);
         if (datos) {
-          datos.diasRestantes = alerta.diasRestantes;
-
           const result = await this.enviarAlerta({
             tipoAlerta: alerta.tipoAlerta,
             referenciaId: alerta.referenciaId,
             referenciaTipo: alerta.referenciaTipo,
-            datos
-          });
+            datos: { ...datos, diasRestantes: alerta.diasRestantes }
+          }, contexto);
+
+          // El proveedor rechazó el envío (p. ej. 5xx de Resend): reintento con espera como
+          // cualquier otro error. Sin configuración o sin destinatarios no hay nada que reintentar
+          if (!result.success && result.historialId) {
+            throw new Error(result.error || 'El proveedor de email rechazó el envío');
+          }
 
           if (result.success) resultados.exitosas++;
           else resultados.fallidas++;
         }
 
-        // Marcar como procesada
-        await prisma.alertaProgramada.update({
-          where: { id: alerta.id },
-          data: { procesada: true, fechaProcesada: new Date() }
-        });
-
+        terminadas.push(alerta.id);
         resultados.procesadas++;
       } catch (error) {
         console.error(`[Alerta] Error procesando alerta ${alerta.id}:`, error.message);
+        if (await this._liberarAlerta(alerta, workerId, error)) resultados.descartadas++;
         resultados.fallidas++;
       }
     }
 
+    if (terminadas.length > 0) {
+      await prisma.alertaProgramada.updateMany({
+        where: { id: { in: terminadas }, bloqueadaPor: workerId },
+        data: { procesada: true, fechaProcesada: new Date(), bloqueadaPor: null, bloqueadaHasta: null, ultimoError: null }
+      });
+    }
+
     return resultados;
   }
 
+  /**
+   * Procesar la cola hasta vaciarla con `workers` loops en paralelo
+   * Cada loop reclama sus propios lotes; varias instancias pueden drenar a la vez.
+   */
+  async drenarAlertasPendientes({ workers = WORKERS_ALERTAS, limite = LOTE_ALERTAS } = {}) {
+    const totales = { lotes: 0, reclamadas: 0, procesadas: 0, exitosas: 0, fallidas: 0, descartadas: 0 };
+
+    const loop = async (indice) => {
+      const workerId = this._workerId(indice);
+      for (;;) {
+        const resultado = await this.procesarAlertasPendientes({ workerId, limite });
+        if (resultado.reclamadas === 0) break;
+        totales.lotes++;
+        for (const clave of ['reclamadas', 'procesadas', 'exitosas', 'fallidas', 'descartadas']) totales[clave] += resultado[clave];
+        // Lote incompleto: la cola quedó vacía (lo liberado con espera no está listo aún)
+        if (resultado.reclamadas < limite) break;
+      }
+    };
+
+    await Promise.all(Array.from({ length: Math.max(1, workers) }, (_, i) => loop(i)));
+    return totales;
+  }
+
+  /**
+   * Alertas en la cola de descarte (fallaron ALERTAS_MAX_INTENTOS veces)
+   */
+  async getAlertasDescartadas({ page = 1, limit = 20 } = {}) {
+    const where = { fallidaEn: { not: null } };
+
+    const [data, total] = await Promise.all([
+      prisma.alertaProgramada.findMany({
+        where,
+        orderBy: { fallidaEn: 'desc' },
+        skip: (page - 1) * limit,
+        take: limit
+      }),
+      prisma.alertaProgramada.count({ where })
+    ]);
+
+    return {
+      data,
+      pagination: { page, limit, total, totalPages: Math.ceil(total / limit) }
+    };
+  }
+
+  /**
+   * Devolver una alerta descartada a la cola
+   */
+  async reencolarAlerta(id) {
+    const alerta = await prisma.alertaProgramada.findUnique({ where: { id } });
+    if (!alerta) throw new NotFoundError('Alerta programada no encontrada');
+    if (!alerta.fallidaEn) throw new ValidationError('La alerta no está en la cola de descarte');
+
+    return prisma.alertaProgramada.update({
+      where: { id },
+      data: { fallidaEn: null, intentos: 0, ultimoError: null, bloqueadaHasta: null, bloqueadaPor: null }
+    });
+  }
+
   // ============ HISTORIAL ============
 
   /**
@@ -506,7 +649,48 @@ class AlertaService {
     }
   }
 
-  async _resolverEmails(destinatarios, datos = {}) {
+  async _obtenerConfiguracion(tipoAlerta, contexto = null) {
+    if (contexto?.configuraciones.has(tipoAlerta)) return contexto.configuraciones.get(tipoAlerta);
+
+    const config = await prisma.alertaConfiguracion.findFirst({
+      where: { tipoAlerta, activo: true },
+      include: {
+        destinatarios: {
+          where: { activo: true },
+          include: {
+            empleado: { select: { email: true } },
+            cargo: {
+              include: {
+                empleados: {
+                  where: { estado: 'ACTIVO' },
+                  select: { email: true }
+                }
+              }
+            }
+          }
+        }
+      }
+    });
+
+    if (contexto) contexto.configuraciones.set(tipoAlerta, config);
+    return config;
+  }
+
+  /**
+   * Con contexto, las búsquedas de responsables y jefes se reutilizan dentro del lote
+   */
+  async _resolverEmails(destinatarios, datos = {}, contexto = null) {
+    if (contexto) {
+      const buscar = (clave, consulta) => {
+        if (!contexto.emails.has(clave)) contexto.emails.set(clave, consulta());
+        return contexto.emails.get(clave);
+      };
+      return this._resolverEmailsCon(destinatarios, datos, buscar);
+    }
+    return this._resolverEmailsCon(destinatarios, datos, (clave, consulta) => consulta());
+  }
+
+  async _resolverEmailsCon(destinatarios, datos, buscar) {
     const emails = new Set();
 
     for (const dest of destinatarios) {
@@ -529,33 +713,33 @@ class AlertaService {
 
         case 'RESPONSABLE_SST':
           // Buscar responsable SST (cargo con código RESP_SST o similar)
-          const respSST = await prisma.tHEmpleado.findFirst({
+          const respSST = await buscar('RESPONSABLE_SST', () => prisma.tHEmpleado.findFirst({
             where: {
               estado: 'ACTIVO',
               cargo: { codigo: { contains: 'SST', mode: 'insensitive' } }
             },
             select: { email: true }
-          });
+          }));
           if (respSST?.email) emails.add(respSST.email);
           break;
 
         case 'RESPONSABLE_RRHH':
-          const respRRHH = await prisma.tHEmpleado.findFirst({
+          const respRRHH = await buscar('RESPONSABLE_RRHH', () => prisma.tHEmpleado.findFirst({
             where: {
               estado: 'ACTIVO',
               cargo: { codigo: { contains: 'RRHH', mode: 'insensitive' } }
             },
             select: { email: true }
-          });
+          }));
           if (respRRHH?.email) emails.add(respRRHH.email);
           break;
 
         case 'JEFE_DIRECTO':
           if (datos.empleadoId) {
-            const empleado = await prisma.tHEmpleado.findUnique({
+            const empleado = await buscar(`JEFE_DIRECTO:${datos.empleadoId}`, () => prisma.tHEmpleado.findUnique({
               where: { id: datos.empleadoId },
               include: { jefeDirecto: { select: { email: true } } }
-            });
+            }));
             if (empleado?.jefeDirecto?.email) emails.add(empleado.jefeDirecto.email);
           }
           break;
@@ -574,47 +758,55 @@ class AlertaService {
     return result;
   }
 
-  async _obtenerDatosReferencia(referenciaTipo, referenciaId) {
-    switch (referenciaTipo) {
-      case 'DOCUMENTO_SST':
-        const doc = await prisma.sSTDocumentoSST.findUnique({
-          where: { id: referenciaId },
-          select: { id: true, nombre: true, codigo: true, fechaVencimiento: true }
-        });
-        return doc ? { ...doc, fechaVencimiento: doc.fechaVencimiento } : null;
+  /**
+   * Datos de referencia de un lote de alertas: una consulta por referenciaTipo
+   * @returns {Promise<Map<string, object>>} alerta.id -> datos (sin entrada si la referencia no existe)
+   */
+  async _cargarDatosReferencia(alertas) {
+    const idsPorTipo = new Map();
+    for (const alerta of alertas) {
+      if (!CARGADORES_REFERENCIA[alerta.referenciaTipo]) continue;
+      if (!idsPorTipo.has(alerta.referenciaTipo)) idsPorTipo.set(alerta.referenciaTipo, new Set());
+      idsPorTipo.get(alerta.referenciaTipo).add(alerta.referenciaId);
+    }
 
-      case 'EXAMEN_MEDICO':
-        const examen = await prisma.sSTExamenMedico.findUnique({
-          where: { id: referenciaId },
-          include: {
-            empleado: { select: { id: true, nombre: true, apellido: true } }
-          }
-        });
-        return examen ? {
-          nombreExamen: examen.nombreExamen,
-          empleado: `${examen.empleado.nombre} ${examen.empleado.apellido}`,
-          empleadoId: examen.empleadoId,
-          fechaVencimiento: examen.fechaVencimiento,
-          fechaProgramada: examen.fechaProgramada?.toLocaleDateString('es-CO')
-        } : null;
-
-      case 'CONTRATO':
-        const contrato = await prisma.tHContrato.findUnique({
-          where: { id: referenciaId },
-          include: {
-            empleado: { select: { id: true, nombre: true, apellido: true } }
-          }
-        });
-        return contrato ? {
-          empleado: `${contrato.empleado.nombre} ${contrato.empleado.apellido}`,
-          empleadoId: contrato.empleadoId,
-          fechaFin: contrato.fechaFin?.toLocaleDateString('es-CO'),
-          fechaVencimiento: contrato.fechaFin
-        } : null;
-
-      default:
-        return null;
+    const referencias = new Map();
+    await Promise.all([...idsPorTipo].map(async ([tipo, ids]) => {
+      for (const [id, datos] of await CARGADORES_REFERENCIA[tipo]([...ids])) {
+        referencias.set(`${tipo}:${id}`, datos);
+      }
+    }));
+
+    const datosPorAlerta = new Map();
+    for (const alerta of alertas) {
+      const datos = referencias.get(`${alerta.referenciaTipo}:${alerta.referenciaId}`);
+      if (datos) datosPorAlerta.set(alerta.id, datos);
     }
+    return datosPorAlerta;
+  }
+
+  /**
+   * Devolver una alerta a la cola con espera exponencial, o descartarla tras MAX_INTENTOS
+   * @returns {Promise<boolean>} true si quedó descartada
+   */
+  async _liberarAlerta(alerta, workerId, error) {
+    const descartar = alerta.intentos >= MAX_INTENTOS;
+    await prisma.alertaProgramada.updateMany({
+      where: { id: alerta.id, bloqueadaPor: workerId },
+      data: {
+        bloqueadaPor: null,
+        // bloqueada_hasta también sirve de "no antes de" para el siguiente intento
+        bloqueadaHasta: descartar ? null : new Date(Date.now() + ESPERA_REINTENTO_MS * 2 ** Math.max(0, alerta.intentos - 1)),
+        ultimoError: String(error.message).slice(0, 1000),
+        fallidaEn: descartar ? new Date() : null
+      }
+    });
+    if (descartar) console.error(`[Alerta] Alerta ${alerta.id} descartada tras ${alerta.intentos} intentos`);
+    return descartar;
+  }
+
+  _workerId(indice) {
+    return `${os.hostname()}:${process.pid}:${indice}`;
   }
 }
 
@@ -3,55 +3,45 @@
  */
 const prisma = require('../db/prisma');
 const { ValidationError, NotFoundError } = require('../utils/errors');
+const { paginar } = require('../utils/pagination');
 const auditoriaService = require('./auditoria.service');
+const { huellaDeModelos } = require('../utils/huella');
 
 class AlertaClinicaService {
   /**
    * Obtener alertas con filtros
+   * Paginación por page/limit o por cursor sobre (fecha, id), ver utils/pagination
    */
-  async getAll({ page = 1, limit = 50, paciente_id, activa, tipo_alerta, severidad }) {
-    const skip = (parseInt(page) - 1) * parseInt(limit);
-
+  async getAll({ page, limit, cursor, con_total, paciente_id, activa, tipo_alerta, severidad }) {
     const where = {};
     if (paciente_id) where.pacienteId = paciente_id;
     if (activa !== undefined) where.activa = activa === 'true';
     if (tipo_alerta) where.tipoAlerta = tipo_alerta;
     if (severidad) where.severidad = severidad;
 
-    const [alertas, total] = await Promise.all([
-      prisma.alertaClinica.findMany({
-        where,
-        skip,
-        take: parseInt(limit),
-        orderBy: { fechaAlerta: 'desc' },
-        include: {
-          paciente: {
-            select: {
-              id: true,
-              nombre: true,
-              apellido: true,
-            },
+    const { items, pagination } = await paginar(prisma.alertaClinica, {
+      where,
+      campoFecha: 'fechaAlerta',
+      query: { page, limit, cursor, con_total },
+      limitePorDefecto: 50,
+      include: {
+        paciente: {
+          select: {
+            id: true,
+            nombre: true,
+            apellido: true,
           },
-          reconocedor: {
-            select: {
-              nombre: true,
-              apellido: true,
-            },
+        },
+        reconocedor: {
+          select: {
+            nombre: true,
+            apellido: true,
           },
         },
-      }),
-      prisma.alertaClinica.count({ where }),
-    ]);
-
-    return {
-      alertas,
-      pagination: {
-        page: parseInt(page),
-        limit: parseInt(limit),
-        total,
-        totalPages: Math.ceil(total / parseInt(limit)),
       },
-    };
+    });
+
+    return { alertas: items, pagination };
   }
 
   /**
@@ -169,6 +159,19 @@ class AlertaClinicaService {
     return alertas;
   }
 
+  /**
+   * Huella de las alertas activas de un paciente para GET condicional
+   *
+   * Las alertas no tienen updatedAt: solo se crean, se reconocen (activa = false)
+   * o se eliminan, así que bastan el conteo de activas y las fechas de alta/reconocimiento.
+   */
+  async getHuellaActivas(pacienteId) {
+    return huellaDeModelos([
+      { modelo: 'alertaClinica', where: { pacienteId, activa: true }, campos: ['createdAt'] },
+      { modelo: 'alertaClinica', where: { pacienteId }, campos: ['createdAt', 'fechaReconocimiento'] },
+    ]);
+  }
+
   /**
    * Eliminar alerta
    */
@@ -1,4 +1,5 @@
 const prisma = require('../db/prisma');
+const auditQueue = require('./auditQueue.service');
 
 class AuditService {
   /**
@@ -14,16 +15,15 @@ class AuditService {
    */
   async log({ userId, action, resource, resourceId, details, ipAddress, userAgent }) {
     try {
-      await prisma.auditLog.create({
-        data: {
-          userId,
-          action,
-          resource,
-          resourceId,
-          details,
-          ipAddress,
-          userAgent
-        }
+      // Escritura diferida en lote (ver auditQueue.service)
+      await auditQueue.enqueue({
+        userId,
+        action,
+        resource,
+        resourceId,
+        details,
+        ipAddress,
+        userAgent
       });
     } catch (error) {
       console.error('Error logging audit:', error);
@@ -0,0 +1,246 @@
+/**
+ * Cola de escritura asíncrona para audit_logs
+ *
+ * Los registros de auditoría se encolan en memoria y se insertan en lote con
+ * createMany cuando la cola alcanza AUDIT_BATCH_SIZE o cada AUDIT_FLUSH_MS, de modo
+ * que las escrituras auditadas no esperan un INSERT adicional.
+ *
+ * - Backpressure: si la cola supera AUDIT_MAX_QUEUE, enqueue() devuelve una promesa
+ *   que se resuelve tras el siguiente flush; quien la espere se frena.
+ * - Si la BD no está disponible, el lote se guarda en AUDIT_SPILL_DIR (JSONL) y se
+ *   reintenta en el siguiente flush exitoso. Las líneas ilegibles se apartan en
+ *   *.rechazados para revisión manual.
+ * - cerrar() vacía la cola antes de apagar el proceso.
+ */
+const fs = require('fs');
+const path = require('path');
+const prisma = require('../db/prisma');
+
+const BATCH_SIZE = parseInt(process.env.AUDIT_BATCH_SIZE || '200', 10);
+const FLUSH_INTERVAL_MS = parseInt(process.env.AUDIT_FLUSH_MS || '1000', 10);
+const MAX_QUEUE = parseInt(process.env.AUDIT_MAX_QUEUE || '10000', 10);
+const SPILL_DIR = process.env.AUDIT_SPILL_DIR || path.join(__dirname, '..', 'logs', 'audit-spill');
+
+// audit-<ts>-<pid>.jsonl.<pid que lo reproduce>.procesando
+const PROCESANDO_REGEX = /^(.+\.jsonl)\.(\d+)\.procesando$/;
+
+/**
+ * ¿Sigue vivo el proceso? (EPERM: existe pero es de otro usuario)
+ */
+function procesoVivo(pid) {
+  try {
+    process.kill(pid, 0);
+    return true;
+  } catch (err) {
+    return err.code === 'EPERM';
+  }
+}
+
+class AuditQueueService {
+  constructor() {
+    this.cola = [];
+    this.esperando = [];
+    this.flushEnCurso = null;
+    this.timer = null;
+    this.cerrado = false;
+    this.stats = { encolados: 0, escritos: 0, lotes: 0, derramados: 0, recuperados: 0, errores: 0 };
+  }
+
+  /**
+   * Encolar un registro de auditoría (mismos campos que AuditLog)
+   *
+   * @returns {Promise<void>} Resuelta de inmediato salvo que la cola esté llena
+   */
+  enqueue(registro) {
+    this.cola.push({ ...registro, createdAt: registro.createdAt || new Date() });
+    this.stats.encolados++;
+
+    if (this.cerrado) {
+      return this.flush();
+    }
+
+    this.programar();
+
+    if (this.cola.length >= BATCH_SIZE) {
+      this.flush();
+    }
+
+    if (this.cola.length >= MAX_QUEUE) {
+      return new Promise(resolve => this.esperando.push(resolve));
+    }
+
+    return Promise.resolve();
+  }
+
+  programar() {
+    if (this.timer) return;
+    this.timer = setTimeout(() => {
+      this.timer = null;
+      this.flush();
+    }, FLUSH_INTERVAL_MS);
+    this.timer.unref();
+  }
+
+  /**
+   * Escribir todo lo encolado en lotes de BATCH_SIZE
+   */
+  flush() {
+    if (this.flushEnCurso) return this.flushEnCurso;
+
+    this.flushEnCurso = (async () => {
+      try {
+        let bdDisponible = true;
+        while (this.cola.length > 0) {
+          const lote = this.cola.splice(0, BATCH_SIZE);
+          bdDisponible = (await this.escribirLote(lote)) && bdDisponible;
+        }
+        this.liberarEsperando();
+        if (bdDisponible) await this.recuperarDerramados();
+      } finally {
+        this.flushEnCurso = null;
+      }
+    })();
+
+    return this.flushEnCurso;
+  }
+
+  async escribirLote(lote) {
+    try {
+      await prisma.auditLog.createMany({ data: lote });
+      this.stats.escritos += lote.length;
+      this.stats.lotes++;
+      return true;
+    } catch (err) {
+      this.stats.errores++;
+      console.error(`[AuditQueue] Error escribiendo ${lote.length} registros, guardando en disco:`, err.message);
+      this.derramar(lote);
+      return false;
+    }
+  }
+
+  liberarEsperando() {
+    const esperando = this.esperando;
+    this.esperando = [];
+    esperando.forEach(resolve => resolve());
+  }
+
+  /**
+   * Guardar un lote en disco para reintentarlo más tarde
+   */
+  derramar(lote) {
+    try {
+      fs.mkdirSync(SPILL_DIR, { recursive: true });
+      const archivo = path.join(SPILL_DIR, `audit-${Date.now()}-${process.pid}.jsonl`);
+      fs.appendFileSync(archivo, lote.map(r => JSON.stringify(r)).join('\n') + '\n');
+      this.stats.derramados += lote.length;
+    } catch (err) {
+      console.error(`[AuditQueue] No se pudo guardar en disco, se pierden ${lote.length} registros:`, err.message);
+    }
+  }
+
+  /**
+   * Archivos por reinsertar: los .jsonl y los .procesando que dejó un proceso caído a
+   * mitad de la recuperación (o este mismo, si reinició con el mismo PID)
+   */
+  archivosDerramados() {
+    const archivos = [];
+    for (const nombre of fs.readdirSync(SPILL_DIR).sort()) {
+      if (nombre.endsWith('.jsonl')) {
+        archivos.push({ actual: nombre, original: nombre });
+        continue;
+      }
+
+      const huerfano = PROCESANDO_REGEX.exec(nombre);
+      const pid = huerfano && parseInt(huerfano[2], 10);
+      if (huerfano && (pid === process.pid || !procesoVivo(pid))) {
+        archivos.push({ actual: nombre, original: huerfano[1] });
+      }
+    }
+    return archivos;
+  }
+
+  /**
+   * Leer un archivo derramado; las líneas que no son JSON válido se apartan en
+   * <archivo>.rechazados en lugar de detener la recuperación
+   */
+  leerDerramado(procesando, archivo) {
+    const registros = [];
+    const rechazadas = [];
+
+    for (const linea of fs.readFileSync(procesando, 'utf8').split('\n').filter(Boolean)) {
+      try {
+        const registro = JSON.parse(linea);
+        registros.push({ ...registro, createdAt: new Date(registro.createdAt) });
+      } catch (err) {
+        rechazadas.push(linea);
+      }
+    }
+
+    if (rechazadas.length > 0) {
+      console.error(`[AuditQueue] ${rechazadas.length} líneas ilegibles en ${path.basename(archivo)}, apartadas en .rechazados`);
+      fs.appendFileSync(`${archivo}.rechazados`, rechazadas.join('\n') + '\n');
+    }
+
+    return registros;
+  }
+
+  /**
+   * Reinsertar los lotes guardados en disco
+   */
+  async recuperarDerramados() {
+    let archivos;
+    try {
+      archivos = this.archivosDerramados();
+    } catch (err) {
+      return;
+    }
+
+    for (const { actual, original } of archivos) {
+      const archivo = path.join(SPILL_DIR, original);
+      const procesando = `${archivo}.${process.pid}.procesando`;
+      try {
+        // Renombrar primero para que otra instancia no lo reprocese
+        fs.renameSync(path.join(SPILL_DIR, actual), procesando);
+      } catch (err) {
+        continue;
+      }
+
+      const registros = this.leerDerramado(procesando, archivo);
+
+      let insertados = 0;
+      try {
+        while (insertados < registros.length) {
+          const lote = registros.slice(insertados, insertados + BATCH_SIZE);
+          await prisma.auditLog.createMany({ data: lote });
+          insertados += lote.length;
+          this.stats.recuperados += lote.length;
+        }
+        fs.unlinkSync(procesando);
+      } catch (err) {
+        // La BD sigue sin estar disponible: conservar solo lo pendiente para el próximo intento
+        const pendientes = registros.slice(insertados).map(r => JSON.stringify(r)).join('\n') + '\n';
+        fs.writeFileSync(archivo, pendientes);
+        fs.unlinkSync(procesando);
+        return;
+      }
+    }
+  }
+
+  /**
+   * Vaciar la cola antes de apagar el proceso
+   */
+  async cerrar() {
+    this.cerrado = true;
+    if (this.timer) {
+      clearTimeout(this.timer);
+      this.timer = null;
+    }
+    await this.flush();
+  }
+
+  getStats() {
+    return { ...this.stats, pendientes: this.cola.length };
+  }
+}
+
+module.exports = new AuditQueueService();
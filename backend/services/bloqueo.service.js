@@ -9,6 +9,7 @@
  * - Modo solo emergencias
  */
 const prisma = require('../db/prisma');
+const disponibilidadCache = require('./disponibilidadCache.service');
 const { ValidationError, NotFoundError } = require('../utils/errors');
 const { z } = require('zod');
 
@@ -145,6 +146,8 @@ class BloqueoService {
       }
     });
 
+    disponibilidadCache.invalidarDoctor(bloqueo.doctorId);
+
     return bloqueo;
   }
 
@@ -243,6 +246,8 @@ class BloqueoService {
       }
     });
 
+    disponibilidadCache.invalidarDoctor(bloqueoExistente.doctorId);
+
     return bloqueo;
   }
 
@@ -260,6 +265,8 @@ class BloqueoService {
       data: { activo: false }
     });
 
+    disponibilidadCache.invalidarDoctor(bloqueo.doctorId);
+
     return bloqueo;
   }
 
@@ -269,12 +276,14 @@ class BloqueoService {
    * @param {string} bloqueoId - ID del bloqueo
    */
   async eliminarBloqueo(bloqueoId) {
-    await this.obtenerPorId(bloqueoId);
+    const bloqueo = await this.obtenerPorId(bloqueoId);
 
     await prisma.bloqueoAgenda.delete({
       where: { id: bloqueoId }
     });
 
+    disponibilidadCache.invalidarDoctor(bloqueo.doctorId);
+
     return { message: 'Bloqueo eliminado exitosamente' };
   }
 
@@ -4,8 +4,16 @@
 const prisma = require('../db/prisma');
 const { validateRequired } = require('../utils/validators');
 const { ValidationError, NotFoundError } = require('../utils/errors');
+const { huellaCatalogoExamenes } = require('../utils/huella');
 
 class CategoriaExamenService {
+  /**
+   * Huella del catálogo de exámenes para GET condicional
+   */
+  async getHuella() {
+    return huellaCatalogoExamenes();
+  }
+
   /**
    * Obtener todas las categorías
    */
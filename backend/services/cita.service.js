@@ -14,6 +14,7 @@ const { ValidationError, NotFoundError } = require('../utils/errors');
 const { createCitaSchema, updateCitaSchema } = require('../validators/cita.schema');
 const { addMinutes, isBefore, isAfter, isEqual } = require('date-fns');
 const disponibilidadService = require('./disponibilidad.service');
+const disponibilidadCache = require('./disponibilidadCache.service');
 const { parseSimpleDate, duracionValida } = require('../utils/date');
 const emailService = require('./email.service');
 
@@ -322,7 +323,10 @@ class CitaService {
       const resultado = await prisma.$transaction(async (tx) => {
         // Validar disponibilidad DENTRO de la transacción (excepto emergencias)
         if (!esEmergencia && validatedData.doctor_id && validatedData.fecha && validatedData.hora) {
-          // Usar consulta directa para verificar conflictos con lock implícito
+          // Serializar con otras reservas del mismo doctor y día (también las de otras
+          // instancias y las de disponibilidadService.conHorarioReservado)
+          await disponibilidadService.bloquearAgendaDia(tx, validatedData.doctor_id, validatedData.fecha);
+
           const citasConflicto = await tx.cita.findMany({
             where: {
               doctorId: validatedData.doctor_id,
@@ -439,6 +443,9 @@ class CitaService {
         return cita;
       });
 
+      // Ocupar el slot en el cache de disponibilidad
+      disponibilidadCache.actualizarCita(null, resultado);
+
       // Enviar correo de confirmación de cita (fuera de la transacción)
       try {
         // Obtener datos completos para el email
@@ -637,6 +644,9 @@ class CitaService {
         return cita;
       });
 
+      // Liberar el slot anterior y ocupar el nuevo en el cache de disponibilidad
+      disponibilidadCache.actualizarCita(citaExistente, resultado);
+
       return resultado;
     } catch (error) {
       // Manejar error de constraint único
@@ -653,13 +663,15 @@ class CitaService {
    * Cancelar una cita
    */
   async cancel(id) {
-    await this.getById(id);
+    const citaExistente = await this.getById(id);
 
     const cita = await prisma.cita.update({
       where: { id },
       data: { estado: 'Cancelada' },
     });
 
+    disponibilidadCache.actualizarCita(citaExistente, cita);
+
     return cita;
   }
 
@@ -874,6 +886,8 @@ class CitaService {
       },
     });
 
+    disponibilidadCache.actualizarCita(cita, citaActualizada);
+
     return citaActualizada;
   }
 
@@ -1001,6 +1015,8 @@ class CitaService {
       }
     });
 
+    disponibilidadCache.actualizarCita(cita, citaActualizada);
+
     // Enviar correo de confirmación de reprogramación
     try {
       await emailService.sendAppointmentRescheduled({
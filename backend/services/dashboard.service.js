@@ -1,11 +1,15 @@
 const prisma = require('../db/prisma');
 const { startOfDay, endOfDay, subDays, startOfMonth, endOfMonth, format, subMonths, parseISO } = require('date-fns');
 
-const getDashboardStats = async (period = 'month', customStartDate = null, customEndDate = null) => {
-  const today = new Date();
+const CACHE_TTL_MS = parseInt(process.env.DASHBOARD_CACHE_TTL_MS || '30000', 10);
+const cache = new Map();
+
+/**
+ * Rango de fechas del periodo solicitado
+ */
+const calcularRango = (period, customStartDate, customEndDate, today = new Date()) => {
   let startDate, endDate;
 
-  // Definir rango de fechas
   if (period === 'custom' && customStartDate && customEndDate) {
     startDate = startOfDay(parseISO(customStartDate));
     endDate = endOfDay(parseISO(customEndDate));
@@ -21,6 +25,19 @@ const getDashboardStats = async (period = 'month', customStartDate = null, custo
     endDate = endOfMonth(today);
   }
 
+  return { startDate, endDate };
+};
+
+/**
+ * Estadísticas calculadas directamente sobre las tablas fuente
+ *
+ * Referencia para validar los rollups (GET /dashboard/stats?source=live).
+ */
+const getDashboardStatsLive = async (period = 'month', customStartDate = null, customEndDate = null) => {
+  const today = new Date();
+  // Definir rango de fechas
+  const { startDate, endDate } = calcularRango(period, customStartDate, customEndDate, today);
+
   // --- SECCIÓN 1: KPIs GENERALES Y COMPARATIVAS ---
   const [
     totalPacientes,
@@ -187,6 +204,173 @@ const getDashboardStats = async (period = 'month', customStartDate = null, custo
   };
 };
 
+/**
+ * Estadísticas del dashboard a partir de los rollups diarios
+ *
+ * Ingresos, citas y stock bajo se leen de dashboard_ingresos_diarios,
+ * dashboard_citas_diarias y dashboard_stock_bajo (pocas filas por periodo); el
+ * resultado se guarda en memoria por DASHBOARD_CACHE_TTL_MS.
+ */
+const getDashboardStats = async (period = 'month', customStartDate = null, customEndDate = null) => {
+  const key = `${period}|${customStartDate || ''}|${customEndDate || ''}`;
+  const entrada = cache.get(key);
+  if (entrada && entrada.expiraEn > Date.now()) {
+    return entrada.valor;
+  }
+
+  const valor = await calcularDesdeRollups(period, customStartDate, customEndDate);
+  if (CACHE_TTL_MS > 0) {
+    cache.set(key, { valor, expiraEn: Date.now() + CACHE_TTL_MS });
+  }
+  return valor;
+};
+
+const calcularDesdeRollups = async (period, customStartDate, customEndDate) => {
+  const today = new Date();
+  const { startDate, endDate } = calcularRango(period, customStartDate, customEndDate, today);
+  // Los rollups usan fechas calendario; @db.Date se compara con medianoche UTC
+  const desde = new Date(format(startDate, 'yyyy-MM-dd'));
+  const hasta = new Date(format(endDate, 'yyyy-MM-dd'));
+  const inicioTendencia = format(startOfMonth(subMonths(today, 5)), 'yyyy-MM-dd');
+  const finTendencia = format(endOfMonth(today), 'yyyy-MM-dd');
+
+  const [
+    totalPacientes,
+    admisionesActivas,
+    ingresosPeriodo,
+    ingresosMensuales,
+    citasPorEstado,
+    topDoctores,
+    lowStock,
+    ingresosPorMetodo,
+    carteraPendiente,
+    expiringSoon,
+    topDiagnosticos
+  ] = await Promise.all([
+    prisma.paciente.count({ where: { estado: 'Activo' } }),
+    prisma.admision.count({ where: { estado: 'Activa' } }),
+    prisma.dashboardIngresoDiario.aggregate({
+      _sum: { total: true },
+      where: { fecha: { gte: desde, lte: hasta } }
+    }),
+    prisma.$queryRaw`
+      SELECT to_char(fecha, 'YYYY-MM') AS mes, SUM(total) AS total
+      FROM dashboard_ingresos_diarios
+      WHERE fecha BETWEEN ${inicioTendencia}::date AND ${finTendencia}::date
+      GROUP BY 1
+    `,
+    prisma.dashboardCitaDiaria.groupBy({
+      by: ['estado'],
+      _sum: { cantidad: true },
+      where: { fecha: { gte: desde, lte: hasta } }
+    }),
+    prisma.dashboardCitaDiaria.groupBy({
+      by: ['doctorId'],
+      _sum: { cantidad: true },
+      where: {
+        fecha: { gte: desde, lte: hasta },
+        estado: 'Completada',
+        doctorId: { not: '' }
+      },
+      orderBy: { _sum: { cantidad: 'desc' } },
+      take: 5
+    }),
+    prisma.dashboardStockBajo.findMany({
+      take: 5,
+      orderBy: { cantidadTotal: 'asc' },
+      select: { nombre: true, cantidadTotal: true, cantidadMinAlerta: true }
+    }),
+    prisma.pago.groupBy({
+      by: ['metodoPago'],
+      _sum: { monto: true },
+      where: { fechaPago: { gte: startDate, lte: endDate } }
+    }),
+    prisma.factura.aggregate({
+      _sum: { saldoPendiente: true },
+      where: { saldoPendiente: { gt: 0 } }
+    }),
+    prisma.producto.findMany({
+      where: {
+        fechaVencimiento: { lte: new Date(new Date().setDate(new Date().getDate() + 30)) },
+        activo: true
+      },
+      take: 5,
+      select: { nombre: true, fechaVencimiento: true }
+    }),
+    prisma.diagnosticoHCE.groupBy({
+      by: ['codigoCIE11', 'descripcionCIE11'],
+      _count: { id: true },
+      where: { fechaDiagnostico: { gte: startDate, lte: endDate } },
+      orderBy: { _count: { id: 'desc' } },
+      take: 5
+    })
+  ]);
+
+  const citasStatus = citasPorEstado
+    .map(c => ({ name: c.estado, value: c._sum.cantidad || 0 }))
+    .filter(c => c.value > 0);
+  const citasCanceladas = citasStatus.find(c => c.name === 'Cancelada')?.value || 0;
+  const citasPeriodo = citasStatus.reduce((suma, c) => suma + c.value, 0) - citasCanceladas;
+
+  const porMes = new Map(ingresosMensuales.map(m => [m.mes, m.total]));
+  const revenueTrend = Array.from({ length: 6 }, (_, i) => {
+    const d = subMonths(today, 5 - i);
+    return { date: format(d, 'MMM yyyy'), value: porMes.get(format(d, 'yyyy-MM')) || 0 };
+  });
+
+  // Un solo query para los nombres de los doctores
+  const doctores = await prisma.usuario.findMany({
+    where: { id: { in: topDoctores.map(d => d.doctorId) } },
+    select: { id: true, nombre: true, apellido: true }
+  });
+  const doctoresPorId = new Map(doctores.map(d => [d.id, d]));
+
+  return {
+    period: { start: startDate, end: endDate },
+    kpis: {
+      totalPacientes,
+      citasPeriodo,
+      ingresosPeriodo: ingresosPeriodo._sum.total || 0,
+      admisionesActivas,
+      tasaCancelacion: citasPeriodo > 0 ? ((citasCanceladas / (citasPeriodo + citasCanceladas)) * 100).toFixed(1) : 0,
+      carteraPendiente: carteraPendiente._sum.saldoPendiente || 0
+    },
+    financial: {
+      revenueTrend,
+      ingresosPorMetodo: ingresosPorMetodo.map(i => ({ name: i.metodoPago, value: i._sum.monto || 0 }))
+    },
+    operational: {
+      topDoctores: topDoctores.map((d) => {
+        const doctor = doctoresPorId.get(d.doctorId);
+        return {
+          name: `Dr. ${doctor?.nombre || ''} ${doctor?.apellido || ''}`,
+          value: d._sum.cantidad
+        };
+      }),
+      citasStatus
+    },
+    inventory: {
+      lowStock,
+      expiringSoon
+    },
+    clinical: {
+      topDiagnosticos: topDiagnosticos.map(d => ({
+        code: d.codigoCIE11,
+        name: d.descripcionCIE11,
+        value: d._count.id
+      }))
+    }
+  };
+};
+
+/**
+ * Vaciar el cache (p. ej. después de reconciliar los rollups)
+ */
+const limpiarCache = () => cache.clear();
+
 module.exports = {
-  getDashboardStats
+  getDashboardStats,
+  getDashboardStatsLive,
+  limpiarCache
 };
+
@@ -0,0 +1,68 @@
+/**
+ * Mantenimiento de los rollups diarios del dashboard
+ *
+ * dashboard_ingresos_diarios y dashboard_citas_diarias se actualizan en línea por
+ * triggers sobre facturas y citas (ver migración add_dashboard_rollups). Este
+ * servicio los recalcula por completo desde las tablas fuente (job nocturno) y
+ * refresca el snapshot de productos con stock bajo.
+ */
+const prisma = require('../db/prisma');
+
+class DashboardRollupService {
+  /**
+   * Recalcular los rollups desde facturas y citas
+   *
+   * El lock SHARE ROW EXCLUSIVE bloquea los triggers mientras se reemplazan las filas,
+   * de modo que ninguna escritura concurrente queda contada dos veces ni se pierde.
+   *
+   * @returns {Promise<{dias: number, filasCitas: number, stockBajo: number}>}
+   */
+  async reconciliar() {
+    const [dias, filasCitas] = await prisma.$transaction(async (tx) => {
+      await tx.$executeRaw`LOCK TABLE dashboard_ingresos_diarios, dashboard_citas_diarias IN SHARE ROW EXCLUSIVE MODE`;
+
+      await tx.$executeRaw`DELETE FROM dashboard_ingresos_diarios`;
+      const ingresos = await tx.$executeRaw`
+        INSERT INTO dashboard_ingresos_diarios (fecha, total, facturas)
+        SELECT dashboard_dia(fecha_emision), SUM(total), COUNT(*)
+        FROM facturas
+        WHERE estado <> 'Cancelada'
+        GROUP BY 1
+      `;
+
+      await tx.$executeRaw`DELETE FROM dashboard_citas_diarias`;
+      const citas = await tx.$executeRaw`
+        INSERT INTO dashboard_citas_diarias (fecha, estado, doctor_id, cantidad)
+        SELECT fecha, estado::text, COALESCE(doctor_id::text, ''), COUNT(*)
+        FROM citas
+        WHERE fecha IS NOT NULL
+        GROUP BY 1, 2, 3
+      `;
+
+      return [ingresos, citas];
+    }, { timeout: 120000 });
+
+    const stockBajo = await this.refrescarStockBajo();
+    return { dias, filasCitas, stockBajo };
+  }
+
+  /**
+   * Reemplazar el snapshot de productos activos con stock en o bajo el mínimo
+   *
+   * @returns {Promise<number>} Productos en el snapshot
+   */
+  async refrescarStockBajo() {
+    const [, insertados] = await prisma.$transaction([
+      prisma.$executeRaw`DELETE FROM dashboard_stock_bajo`,
+      prisma.$executeRaw`
+        INSERT INTO dashboard_stock_bajo (producto_id, nombre, cantidad_total, cantidad_min_alerta)
+        SELECT id, nombre, cantidad_total, cantidad_min_alerta
+        FROM productos
+        WHERE activo = true AND cantidad_total <= cantidad_min_alerta
+      `,
+    ]);
+    return insertados;
+  }
+}
+
+module.exports = new DashboardRollupService();
@@ -3,56 +3,45 @@
  */
 const prisma = require('../db/prisma');
 const { ValidationError, NotFoundError } = require('../utils/errors');
+const { paginar } = require('../utils/pagination');
 const auditoriaService = require('./auditoria.service');
 
 class DiagnosticoHCEService {
   /**
    * Obtener diagnósticos con filtros
+   * Paginación por page/limit o por cursor sobre (fecha, id), ver utils/pagination
    */
-  async getAll({ page = 1, limit = 50, paciente_id, estado, es_diferencial }) {
-    const skip = (parseInt(page) - 1) * parseInt(limit);
-
+  async getAll({ page, limit, cursor, con_total, paciente_id, estado, es_diferencial }) {
     const where = {};
     if (paciente_id) where.pacienteId = paciente_id;
     if (estado) where.estadoDiagnostico = estado;
     if (es_diferencial !== undefined) where.esDiferencial = es_diferencial === 'true';
 
-    const [diagnosticos, total] = await Promise.all([
-      prisma.diagnosticoHCE.findMany({
-        where,
-        skip,
-        take: parseInt(limit),
-        orderBy: { fechaDiagnostico: 'desc' },
-        include: {
-          paciente: {
-            select: {
-              id: true,
-              nombre: true,
-              apellido: true,
-            },
+    const { items, pagination } = await paginar(prisma.diagnosticoHCE, {
+      where,
+      campoFecha: 'fechaDiagnostico',
+      query: { page, limit, cursor, con_total },
+      limitePorDefecto: 50,
+      include: {
+        paciente: {
+          select: {
+            id: true,
+            nombre: true,
+            apellido: true,
           },
-          doctor: {
-            select: {
-              id: true,
-              nombre: true,
-              apellido: true,
-            },
+        },
+        doctor: {
+          select: {
+            id: true,
+            nombre: true,
+            apellido: true,
           },
-          evolucion: true,
         },
-      }),
-      prisma.diagnosticoHCE.count({ where }),
-    ]);
-
-    return {
-      diagnosticos,
-      pagination: {
-        page: parseInt(page),
-        limit: parseInt(limit),
-        total,
-        totalPages: Math.ceil(total / parseInt(limit)),
+        evolucion: true,
       },
-    };
+    });
+
+    return { diagnosticos: items, pagination };
   }
 
   /**
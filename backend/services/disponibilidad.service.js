@@ -15,14 +15,21 @@
 const prisma = require('../db/prisma');
 const { ValidationError, NotFoundError } = require('../utils/errors');
 const { bloqueoService } = require('./bloqueo.service');
+const { parseSimpleDate, todayString, nowColombia } = require('../utils/date');
+const disponibilidadCache = require('./disponibilidadCache.service');
+
+// Máximo de días que puede abarcar una búsqueda multi-doctor
+const MAX_DIAS_BUSQUEDA = 31;
 
 class DisponibilidadService {
   /**
    * Obtener disponibilidad de un doctor para una fecha específica
+   *
+   * @param {object} [db=prisma] - Cliente o transacción con la que leer citas y reservas
    */
-  async getDisponibilidad(doctorId, fecha, excludeCitaId = null) {
+  async getDisponibilidad(doctorId, fecha, excludeCitaId = null, db = prisma) {
     // Obtener información del doctor con sus horarios y especialidades
-    const usuario = await prisma.usuario.findUnique({
+    const usuario = await db.usuario.findUnique({
       where: { id: doctorId },
       include: {
         doctor: {
@@ -78,16 +85,9 @@ class DisponibilidadService {
 
     // Parsear la fecha
     const fechaObj = new Date(fecha + 'T00:00:00');
-    const fechaKey = fecha; // YYYY-MM-DD
-    const diaSemana = fechaObj.getDay().toString(); // 0 (Domingo) - 6 (Sábado)
 
     // Obtener bloques de horario configurados para esa fecha
-    // Prioridad: Fecha específica > Día de la semana recurrente
-    let bloquesDelDia = horarios[fechaKey];
-
-    if (!bloquesDelDia) {
-      bloquesDelDia = horarios[diaSemana] || [];
-    }
+    const bloquesDelDia = this.getBloquesDelDia(horarios, fecha);
 
     if (bloquesDelDia.length === 0) {
       return {
@@ -128,7 +128,7 @@ class DisponibilidadService {
       whereCitas.id = { not: excludeCitaId };
     }
 
-    const citasOcupadas = await prisma.cita.findMany({
+    const citasOcupadas = await db.cita.findMany({
       where: whereCitas,
       select: {
         hora: true,
@@ -136,7 +136,7 @@ class DisponibilidadService {
     });
 
     // Obtener reservas temporales activas (otros usuarios reservando)
-    const reservasActivas = await prisma.reservaHorario.findMany({
+    const reservasActivas = await db.reservaHorario.findMany({
       where: {
         doctorId,
         fecha: fechaObj,
@@ -171,6 +171,215 @@ class DisponibilidadService {
     };
   }
 
+  /**
+   * Obtener los bloques de horario configurados para una fecha
+   * Prioridad: Fecha específica > Día de la semana recurrente
+   *
+   * @param {Object} horarios - JSON de horarios del doctor
+   * @param {string} fecha - Fecha en formato YYYY-MM-DD
+   */
+  getBloquesDelDia(horarios, fecha) {
+    if (!horarios) return [];
+
+    if (horarios[fecha]) {
+      return horarios[fecha];
+    }
+
+    const diaSemana = new Date(fecha + 'T00:00:00').getDay().toString(); // 0 (Domingo) - 6 (Sábado)
+    return horarios[diaSemana] || [];
+  }
+
+  /**
+   * Buscar los primeros horarios libres entre todos los doctores de una especialidad
+   *
+   * En lugar de llamar getDisponibilidad por cada doctor y cada día, carga doctores,
+   * citas, reservas y bloqueos del rango completo en 4 consultas y genera los slots
+   * en memoria con la misma lógica de generarSlotsDisponibles.
+   *
+   * @param {Object} params
+   * @param {string} params.especialidadId - ID de la especialidad
+   * @param {string} params.fechaInicio - Fecha inicial (YYYY-MM-DD)
+   * @param {string} params.fechaFin - Fecha final inclusive (YYYY-MM-DD)
+   * @param {string} [params.horaDesde] - Inicio de la ventana horaria (HH:MM)
+   * @param {string} [params.horaHasta] - Fin de la ventana horaria (HH:MM)
+   * @param {number} [params.limite] - Número máximo de slots a retornar
+   */
+  async buscarPrimerosDisponibles({ especialidadId, fechaInicio, fechaFin, horaDesde = null, horaHasta = null, limite = 10 }) {
+    if (!especialidadId) {
+      throw new ValidationError('El parámetro especialidad_id es requerido');
+    }
+
+    const fechas = this.rangoFechas(fechaInicio, fechaFin);
+    if (fechas.length === 0) {
+      throw new ValidationError('Rango de fechas inválido');
+    }
+    if (fechas.length > MAX_DIAS_BUSQUEDA) {
+      throw new ValidationError(`El rango de búsqueda no puede superar ${MAX_DIAS_BUSQUEDA} días`);
+    }
+
+    const ventanaDesde = horaDesde ? this.timeToMinutes(horaDesde) : 0;
+    const ventanaHasta = horaHasta ? this.timeToMinutes(horaHasta) : 24 * 60;
+
+    // 1. Doctores activos de la especialidad con sus horarios
+    const usuarios = await prisma.usuario.findMany({
+      where: {
+        rol: 'DOCTOR',
+        activo: true,
+        doctor: {
+          especialidades: { some: { especialidadId } },
+        },
+      },
+      select: {
+        id: true,
+        nombre: true,
+        apellido: true,
+        doctor: {
+          select: {
+            horarios: true,
+            especialidades: {
+              select: { especialidad: { select: { duracionMinutos: true } } },
+            },
+          },
+        },
+      },
+    });
+
+    const doctores = usuarios.filter(u => u.doctor?.horarios);
+    const doctorIds = doctores.map(d => d.id);
+
+    if (doctorIds.length === 0) {
+      return { fechaInicio: fechas[0], fechaFin: fechas[fechas.length - 1], doctores_evaluados: 0, slots: [] };
+    }
+
+    const desde = new Date(fechas[0] + 'T00:00:00');
+    const hasta = new Date(fechas[fechas.length - 1] + 'T00:00:00');
+
+    // 2-4. Citas, reservas y bloqueos de todos los doctores en el rango
+    const [citas, reservas, bloqueos] = await Promise.all([
+      prisma.cita.findMany({
+        where: {
+          doctorId: { in: doctorIds },
+          fecha: { gte: desde, lte: hasta },
+          estado: { notIn: ['Cancelada', 'NoAsistio'] },
+        },
+        select: { doctorId: true, fecha: true, hora: true },
+      }),
+      prisma.reservaHorario.findMany({
+        where: {
+          doctorId: { in: doctorIds },
+          fecha: { gte: desde, lte: hasta },
+          estado: 'RESERVADO',
+          expiresAt: { gt: new Date() },
+        },
+        select: { doctorId: true, fecha: true, horaInicio: true, horaFin: true },
+      }),
+      prisma.bloqueoAgenda.findMany({
+        where: {
+          doctorId: { in: doctorIds },
+          activo: true,
+          fechaInicio: { lte: parseSimpleDate(fechas[fechas.length - 1]) },
+          fechaFin: { gte: parseSimpleDate(fechas[0]) },
+        },
+      }),
+    ]);
+
+    const citasPorDia = this.agruparPorDoctorYFecha(citas);
+    const reservasPorDia = this.agruparPorDoctorYFecha(reservas);
+
+    const slots = [];
+
+    for (const fecha of fechas) {
+      for (const doctor of doctores) {
+        const bloquesDelDia = this.getBloquesDelDia(doctor.doctor.horarios, fecha);
+        if (bloquesDelDia.length === 0) continue;
+
+        const bloqueosDelDia = bloqueos.filter(b =>
+          b.doctorId === doctor.id &&
+          this.fechaKey(b.fechaInicio) <= fecha &&
+          this.fechaKey(b.fechaFin) >= fecha
+        );
+        if (bloqueosDelDia.some(b => !b.horaInicio || !b.horaFin)) continue;
+
+        const key = `${doctor.id}|${fecha}`;
+        const duracionSlot = doctor.doctor.especialidades[0]?.especialidad?.duracionMinutos || 30;
+
+        const slotsDoctor = this.generarSlotsDisponibles(
+          bloquesDelDia,
+          citasPorDia.get(key) || [],
+          fecha,
+          duracionSlot,
+          reservasPorDia.get(key) || [],
+          bloqueosDelDia
+        );
+
+        for (const slot of slotsDoctor) {
+          if (!slot.disponible) continue;
+          const inicio = this.timeToMinutes(slot.hora_inicio);
+          if (inicio < ventanaDesde || this.timeToMinutes(slot.hora_fin) > ventanaHasta) continue;
+
+          slots.push({
+            doctor_id: doctor.id,
+            doctor_nombre: `${doctor.nombre} ${doctor.apellido}`.trim(),
+            fecha,
+            hora_inicio: slot.hora_inicio,
+            hora_fin: slot.hora_fin,
+          });
+        }
+      }
+
+      // Los días se recorren en orden: si ya hay suficientes slots, los días siguientes no mejoran el resultado
+      if (slots.length >= limite) break;
+    }
+
+    slots.sort((a, b) =>
+      a.fecha.localeCompare(b.fecha) ||
+      a.hora_inicio.localeCompare(b.hora_inicio) ||
+      a.doctor_nombre.localeCompare(b.doctor_nombre)
+    );
+
+    return {
+      fechaInicio: fechas[0],
+      fechaFin: fechas[fechas.length - 1],
+      doctores_evaluados: doctores.length,
+      slots: slots.slice(0, limite),
+    };
+  }
+
+  /**
+   * Lista de fechas YYYY-MM-DD entre dos fechas (inclusive)
+   */
+  rangoFechas(fechaInicio, fechaFin) {
+    const inicio = parseSimpleDate(fechaInicio);
+    const fin = parseSimpleDate(fechaFin || fechaInicio);
+    if (!inicio || !fin || fin < inicio) return [];
+
+    const fechas = [];
+    for (let d = new Date(inicio); d <= fin && fechas.length <= MAX_DIAS_BUSQUEDA; d.setUTCDate(d.getUTCDate() + 1)) {
+      fechas.push(d.toISOString().split('T')[0]);
+    }
+    return fechas;
+  }
+
+  /**
+   * Convertir un DateTime de columna @db.Date a clave YYYY-MM-DD
+   */
+  fechaKey(fecha) {
+    return fecha instanceof Date ? fecha.toISOString().split('T')[0] : String(fecha).split('T')[0];
+  }
+
+  /**
+   * Agrupar filas con doctorId y fecha en un Map "doctorId|YYYY-MM-DD" -> filas
+   */
+  agruparPorDoctorYFecha(filas) {
+    const mapa = new Map();
+    for (const fila of filas) {
+      const key = `${fila.doctorId}|${this.fechaKey(fila.fecha)}`;
+      if (!mapa.has(key)) mapa.set(key, []);
+      mapa.get(key).push(fila);
+    }
+    return mapa;
+  }
+
   /**
    * Generar slots disponibles basados en bloques, citas ocupadas, reservas y bloqueos
    *
@@ -306,11 +515,132 @@ class DisponibilidadService {
     return `${String(hours).padStart(2, '0')}:${String(mins).padStart(2, '0')}`;
   }
 
+  /**
+   * Obtener la ocupación de un doctor/día desde el cache, construyéndola desde BD si no existe
+   */
+  async obtenerOcupacionDia(doctorId, fecha) {
+    const enCache = disponibilidadCache.get(doctorId, fecha);
+    if (enCache) return enCache;
+
+    const usuario = await prisma.usuario.findUnique({
+      where: { id: doctorId },
+      select: {
+        rol: true,
+        activo: true,
+        doctor: {
+          select: {
+            horarios: true,
+            especialidades: {
+              select: { especialidad: { select: { duracionMinutos: true } } },
+            },
+          },
+        },
+      },
+    });
+
+    if (!usuario || usuario.rol !== 'DOCTOR') {
+      throw new NotFoundError('Doctor no encontrado');
+    }
+
+    if (!usuario.activo) {
+      throw new ValidationError('El doctor no está activo');
+    }
+
+    const horarios = usuario.doctor?.horarios;
+    const bloques = this.getBloquesDelDia(horarios, fecha).map(b => ({
+      inicio: this.timeToMinutes(b.inicio),
+      fin: this.timeToMinutes(b.fin),
+    }));
+
+    if (!horarios || bloques.length === 0) {
+      return disponibilidadCache.set(doctorId, fecha, {
+        horariosConfigurados: !!horarios,
+        bloques: [],
+        duracionSlot: 30,
+        bloqueadoDiaCompleto: false,
+      });
+    }
+
+    const fechaObj = new Date(fecha + 'T00:00:00');
+    const [bloqueosDelDia, citas, reservas] = await Promise.all([
+      bloqueoService.obtenerBloqueosParaFecha(doctorId, fecha),
+      prisma.cita.findMany({
+        where: {
+          doctorId,
+          fecha: fechaObj,
+          estado: { notIn: ['Cancelada', 'NoAsistio'] },
+        },
+        select: { id: true, hora: true },
+      }),
+      prisma.reservaHorario.findMany({
+        where: {
+          doctorId,
+          fecha: fechaObj,
+          estado: 'RESERVADO',
+          expiresAt: { gt: new Date() },
+        },
+        select: { horaInicio: true, horaFin: true, expiresAt: true },
+      }),
+    ]);
+
+    return disponibilidadCache.set(doctorId, fecha, {
+      horariosConfigurados: true,
+      bloques,
+      duracionSlot: usuario.doctor.especialidades[0]?.especialidad?.duracionMinutos || 30,
+      bloqueadoDiaCompleto: bloqueosDelDia.tieneBloqueoDiaCompleto,
+      bloqueosParciales: bloqueosDelDia.bloqueosParciales
+        .filter(b => b.horaInicio && b.horaFin)
+        .map(b => ({ inicio: this.timeToMinutes(b.horaInicio), fin: this.timeToMinutes(b.horaFin) })),
+      citas: citas
+        .filter(c => c.hora)
+        .map(c => ({ id: c.id, inicio: this.timeToMinutes(c.hora) })),
+      reservas: reservas.map(r => ({
+        inicio: this.timeToMinutes(r.horaInicio),
+        fin: this.timeToMinutes(r.horaFin),
+        expiresAt: r.expiresAt.getTime(),
+      })),
+    });
+  }
+
   /**
    * Validar si un doctor está disponible en una fecha/hora específica
+   *
+   * Usa el cache de ocupación por doctor/día; cuando se debe excluir una cita
+   * (reprogramación) recurre al cálculo completo desde BD. El cache es por proceso:
+   * para escribir una cita usar conHorarioReservado.
    */
   async validarDisponibilidad(doctorId, fecha, hora, duracionMinutos = 30, excludeCitaId = null) {
-    const disponibilidad = await this.getDisponibilidad(doctorId, fecha, excludeCitaId);
+    if (excludeCitaId) {
+      return this.validarDisponibilidadDesdeBD(doctorId, fecha, hora, duracionMinutos, excludeCitaId);
+    }
+
+    const ocupacion = await this.obtenerOcupacionDia(doctorId, fecha);
+
+    let minutosAhora = null;
+    if (fecha === todayString()) {
+      const ahoraColombia = nowColombia();
+      minutosAhora = ahoraColombia.getUTCHours() * 60 + ahoraColombia.getUTCMinutes();
+    }
+
+    const resultado = disponibilidadCache.consultar(ocupacion, this.timeToMinutes(hora), duracionMinutos, minutosAhora);
+
+    if (resultado.motivo === 'sin_horarios') {
+      throw new ValidationError('El doctor no tiene horarios configurados para esta fecha');
+    }
+    if (!resultado.disponible) {
+      throw new ValidationError(`El horario seleccionado (${hora}) no está disponible o no tiene duración suficiente.`);
+    }
+
+    return true;
+  }
+
+  /**
+   * Validar disponibilidad recalculando los slots del día desde BD
+   *
+   * @param {object} [db=prisma] - Cliente o transacción con la que leer la agenda
+   */
+  async validarDisponibilidadDesdeBD(doctorId, fecha, hora, duracionMinutos = 30, excludeCitaId = null, db = prisma) {
+    const disponibilidad = await this.getDisponibilidad(doctorId, fecha, excludeCitaId, db);
 
     if (!disponibilidad.horarios_configurados || !disponibilidad.bloques_del_dia) {
       throw new ValidationError('El doctor no tiene horarios configurados para esta fecha');
@@ -356,6 +686,38 @@ class DisponibilidadService {
     return true;
   }
 
+  /**
+   * Serializar las reservas de un doctor en un día entre todas las instancias
+   *
+   * Advisory lock de Postgres ligado a la transacción `tx`: se libera al commit o rollback.
+   * `fecha` en formato YYYY-MM-DD.
+   */
+  async bloquearAgendaDia(tx, doctorId, fecha) {
+    await tx.$executeRaw`SELECT pg_advisory_xact_lock(hashtext(${`agenda:${doctorId}:${fecha}`}))`;
+  }
+
+  /**
+   * Escribir una cita en un horario validado contra la BD, sin carreras entre procesos
+   *
+   * validarDisponibilidad lee el cache de ocupación del proceso, que otra instancia no
+   * invalida; sirve para rechazar rápido pero no para reservar. Aquí, dentro de una
+   * transacción, se toma un advisory lock por doctor y día (el mismo que CitaService.create),
+   * se recalcula la disponibilidad desde la BD y se ejecuta `operacion(tx)`. Otra reserva
+   * del mismo doctor y día espera al commit y ya ve la cita escrita.
+   *
+   * @param {object} horario - { doctorId, fecha, hora, duracionMinutos, excludeCitaId }
+   * @param {function(object): Promise<*>} operacion - Crea o mueve la cita con `tx`
+   * @returns {Promise<*>} Lo que devuelva la operación
+   * @throws {ValidationError} Si el horario ya no está disponible
+   */
+  async conHorarioReservado({ doctorId, fecha, hora, duracionMinutos = 30, excludeCitaId = null }, operacion) {
+    return prisma.$transaction(async (tx) => {
+      await this.bloquearAgendaDia(tx, doctorId, fecha);
+      await this.validarDisponibilidadDesdeBD(doctorId, fecha, hora, duracionMinutos, excludeCitaId, tx);
+      return operacion(tx);
+    });
+  }
+
   /**
    * Obtener semana de disponibilidad (7 días desde una fecha)
    */
@@ -0,0 +1,254 @@
+/**
+ * Cache de ocupación de slots por doctor y día
+ *
+ * Mantiene en memoria, por cada (doctorId, fecha), los slots generados a partir de
+ * los horarios del doctor y un mapa de ocupación por slot:
+ * - citasPorSlot: contador de citas activas que se superponen con cada slot
+ *   (contador en lugar de bit para poder liberar un slot al cancelar sin recalcular)
+ * - bloqueados: bitmap de slots cubiertos por bloqueos parciales
+ * - reservas: reservas temporales con su expiración (se evalúan al consultar)
+ *
+ * Se actualiza de forma incremental al crear/cancelar/reprogramar citas y se invalida
+ * cuando cambian bloqueos, reservas u horarios. Las entradas tienen TTL para acotar
+ * la desactualización frente a escrituras de otras instancias o rutas no instrumentadas.
+ * La validación transaccional de CitaService.create sigue siendo la fuente de verdad.
+ */
+
+const CACHE_TTL_MS = parseInt(process.env.DISPONIBILIDAD_CACHE_TTL_MS || '300000', 10); // 5 minutos
+const CACHE_MAX_ENTRADAS = parseInt(process.env.DISPONIBILIDAD_CACHE_MAX || '5000', 10);
+
+// Duración fija con la que getDisponibilidad considera ocupada una cita
+const DURACION_CITA_OCUPADA = 30;
+
+class DisponibilidadCacheService {
+  constructor() {
+    this.entradas = new Map();
+    this.stats = { hits: 0, misses: 0, actualizaciones: 0, invalidaciones: 0 };
+  }
+
+  clave(doctorId, fecha) {
+    return `${doctorId}|${fecha}`;
+  }
+
+  /**
+   * Obtener la entrada de un doctor/día si existe y no ha expirado
+   */
+  get(doctorId, fecha) {
+    const key = this.clave(doctorId, fecha);
+    const entrada = this.entradas.get(key);
+
+    if (!entrada || Date.now() - entrada.creadoEn > CACHE_TTL_MS) {
+      if (entrada) this.entradas.delete(key);
+      this.stats.misses++;
+      return null;
+    }
+
+    this.stats.hits++;
+    return entrada;
+  }
+
+  /**
+   * Construir y almacenar la entrada de un doctor/día
+   *
+   * @param {Object} datos
+   * @param {boolean} datos.horariosConfigurados - Si el doctor tiene horarios
+   * @param {Array} datos.bloques - Bloques {inicio, fin} del día
+   * @param {number} datos.duracionSlot - Duración de cada slot en minutos
+   * @param {boolean} datos.bloqueadoDiaCompleto - Si existe un bloqueo de día completo
+   * @param {Array} datos.bloqueosParciales - Bloqueos {inicio, fin} en minutos
+   * @param {Array} datos.citas - Citas activas {id, inicio} en minutos
+   * @param {Array} datos.reservas - Reservas {inicio, fin, expiresAt}
+   */
+  set(doctorId, fecha, datos) {
+    const slots = [];
+    datos.bloques.forEach((bloque) => {
+      for (let minutos = bloque.inicio; minutos < bloque.fin; minutos += datos.duracionSlot) {
+        slots.push({ inicio: minutos, fin: minutos + datos.duracionSlot });
+      }
+    });
+
+    const entrada = {
+      creadoEn: Date.now(),
+      horariosConfigurados: datos.horariosConfigurados,
+      bloques: datos.bloques,
+      duracionSlot: datos.duracionSlot,
+      bloqueadoDiaCompleto: datos.bloqueadoDiaCompleto,
+      slots,
+      citasPorSlot: new Uint16Array(slots.length),
+      bloqueados: new Uint8Array(slots.length),
+      citas: new Set(),
+      reservas: datos.reservas || [],
+    };
+
+    for (const bloqueo of datos.bloqueosParciales || []) {
+      this.slotsSuperpuestos(entrada, bloqueo.inicio, bloqueo.fin).forEach(i => { entrada.bloqueados[i] = 1; });
+    }
+
+    for (const cita of datos.citas || []) {
+      this.aplicarCita(entrada, cita.id, cita.inicio, 1);
+    }
+
+    const key = this.clave(doctorId, fecha);
+    this.entradas.delete(key);
+    this.entradas.set(key, entrada);
+
+    // Expulsar la entrada más antigua (Map conserva orden de inserción)
+    if (this.entradas.size > CACHE_MAX_ENTRADAS) {
+      this.entradas.delete(this.entradas.keys().next().value);
+    }
+
+    return entrada;
+  }
+
+  /**
+   * Índices de slots que se superponen con el rango [inicio, fin)
+   */
+  slotsSuperpuestos(entrada, inicio, fin) {
+    const indices = [];
+    let base = 0;
+
+    for (const bloque of entrada.bloques) {
+      const total = Math.ceil((bloque.fin - bloque.inicio) / entrada.duracionSlot);
+      if (total > 0) {
+        const primero = Math.max(0, Math.floor((inicio - bloque.inicio) / entrada.duracionSlot));
+        const ultimo = Math.min(total - 1, Math.ceil((fin - bloque.inicio) / entrada.duracionSlot) - 1);
+        for (let i = primero; i <= ultimo; i++) {
+          const slot = entrada.slots[base + i];
+          if (slot.inicio < fin && slot.fin > inicio) indices.push(base + i);
+        }
+      }
+      base += Math.max(total, 0);
+    }
+
+    return indices;
+  }
+
+  aplicarCita(entrada, citaId, inicio, delta) {
+    if (delta > 0) {
+      if (entrada.citas.has(citaId)) return;
+      entrada.citas.add(citaId);
+    } else {
+      if (!entrada.citas.has(citaId)) return;
+      entrada.citas.delete(citaId);
+    }
+
+    for (const i of this.slotsSuperpuestos(entrada, inicio, inicio + DURACION_CITA_OCUPADA)) {
+      entrada.citasPorSlot[i] = Math.max(0, entrada.citasPorSlot[i] + delta);
+    }
+  }
+
+  /**
+   * Consultar si el rango solicitado está disponible (misma semántica que validarDisponibilidad)
+   *
+   * @returns {{disponible: boolean, motivo: string|null}}
+   */
+  consultar(entrada, horaInicio, duracionMinutos, minutosAhora = null) {
+    if (!entrada.horariosConfigurados || entrada.bloques.length === 0) {
+      return { disponible: false, motivo: 'sin_horarios' };
+    }
+    if (entrada.bloqueadoDiaCompleto) {
+      return { disponible: false, motivo: 'no_disponible' };
+    }
+
+    const horaFin = horaInicio + duracionMinutos;
+    const ahora = Date.now();
+
+    for (const i of this.slotsSuperpuestos(entrada, horaInicio, horaInicio + 1)) {
+      const slot = entrada.slots[i];
+      const cubre = horaInicio >= slot.inicio && horaFin <= slot.fin;
+      const mismoInicio = horaInicio === slot.inicio;
+      if (!cubre && !mismoInicio) continue;
+
+      if (entrada.citasPorSlot[i] > 0 || entrada.bloqueados[i]) continue;
+      if (minutosAhora !== null && slot.inicio <= minutosAhora) continue;
+
+      const reservado = entrada.reservas.some(r =>
+        r.expiresAt > ahora && slot.inicio < r.fin && slot.fin > r.inicio
+      );
+      if (reservado) continue;
+
+      return { disponible: true, motivo: null };
+    }
+
+    return { disponible: false, motivo: 'no_disponible' };
+  }
+
+  /**
+   * Registrar el cambio de una cita: libera su slot anterior y ocupa el nuevo
+   *
+   * @param {Object|null} antes - {id, doctorId, fecha, hora, estado} antes del cambio
+   * @param {Object|null} despues - {id, doctorId, fecha, hora, estado} después del cambio
+   */
+  actualizarCita(antes, despues) {
+    const normalizar = (cita) => {
+      if (!cita || !cita.doctorId || !cita.fecha || !cita.hora) return null;
+      if (['Cancelada', 'NoAsistio'].includes(cita.estado)) return null;
+      return {
+        id: cita.id,
+        key: this.clave(cita.doctorId, toFechaKey(cita.fecha)),
+        inicio: toMinutos(cita.hora),
+      };
+    };
+
+    const previa = normalizar(antes);
+    const nueva = normalizar(despues);
+
+    if (previa) {
+      const entrada = this.entradas.get(previa.key);
+      if (entrada) this.aplicarCita(entrada, previa.id, previa.inicio, -1);
+    }
+    if (nueva) {
+      const entrada = this.entradas.get(nueva.key);
+      if (entrada) this.aplicarCita(entrada, nueva.id, nueva.inicio, 1);
+    }
+
+    this.stats.actualizaciones++;
+  }
+
+  /**
+   * Invalidar un día concreto de un doctor
+   */
+  invalidarDia(doctorId, fecha) {
+    if (!doctorId || !fecha) return;
+    this.entradas.delete(this.clave(doctorId, toFechaKey(fecha)));
+    this.stats.invalidaciones++;
+  }
+
+  /**
+   * Invalidar todos los días cacheados de un doctor (cambios de horario o bloqueos)
+   */
+  invalidarDoctor(doctorId) {
+    if (!doctorId) return;
+    const prefijo = `${doctorId}|`;
+    for (const key of this.entradas.keys()) {
+      if (key.startsWith(prefijo)) this.entradas.delete(key);
+    }
+    this.stats.invalidaciones++;
+  }
+
+  limpiar() {
+    this.entradas.clear();
+  }
+
+  getStats() {
+    return { ...this.stats, entradas: this.entradas.size };
+  }
+}
+
+/**
+ * Convertir fecha (Date de columna @db.Date o string) a YYYY-MM-DD
+ */
+function toFechaKey(fecha) {
+  return fecha instanceof Date ? fecha.toISOString().split('T')[0] : String(fecha).split('T')[0];
+}
+
+/**
+ * Convertir hora (Date de columna @db.Time o "HH:MM") a minutos desde medianoche
+ */
+function toMinutos(hora) {
+  if (hora instanceof Date) return hora.getUTCHours() * 60 + hora.getUTCMinutes();
+  const [h, m] = String(hora).split(':').map(Number);
+  return h * 60 + m;
+}
+
+module.exports = new DisponibilidadCacheService();
@@ -5,6 +5,7 @@ const { ValidationError, NotFoundError, AppError } = require('../utils/errors');
 const { uploadImage, deleteImage, getPublicIdFromUrl, isConfigured: isCloudinaryConfigured } = require('../utils/cloudinary');
 const { saveBase64Image, deleteFile, resizeBase64Image } = require('../utils/upload');
 const emailService = require('./email.service');
+const disponibilidadCache = require('./disponibilidadCache.service');
 
 /**
  * Genera una contraseña segura aleatoria
@@ -519,6 +520,9 @@ class DoctorService {
         }
       });
 
+      // Horarios y especialidades (duración de slot) pueden haber cambiado
+      disponibilidadCache.invalidarDoctor(doctorExiste.usuarioId);
+
       return this.obtenerPorId(id);
     } catch (error) {
       if (error instanceof NotFoundError || error instanceof ValidationError) throw error;
@@ -568,6 +572,8 @@ class DoctorService {
         data: { activo: nuevoEstado }
       });
 
+      disponibilidadCache.invalidarDoctor(doctor.usuarioId);
+
       return {
         id: doctor.id,
         activo: nuevoEstado,
@@ -593,6 +599,8 @@ class DoctorService {
         data: { horarios: horarios || {} }
       });
 
+      disponibilidadCache.invalidarDoctor(doctor.usuarioId);
+
       return this.obtenerPorId(id);
     } catch (error) {
       throw new AppError('Error al actualizar horarios: ' + error.message);
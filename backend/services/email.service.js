@@ -98,7 +98,7 @@ class EmailService {
   /**
    * Envía un email simple
    */
-  async send({ to, subject, html, text, replyTo, fromName }) {
+  async send({ to, subject, html, text, replyTo, fromName, idempotencyKey }) {
     if (!this.isEnabled()) {
       console.warn('[Email] Servicio deshabilitado. Email no enviado:', subject);
       return { success: false, error: 'Servicio de email no configurado' };
@@ -115,7 +115,13 @@ class EmailService {
         html,
         text,
         reply_to: replyTo
-      });
+      }, idempotencyKey ? { idempotencyKey } : undefined);
+
+      // El SDK devuelve los errores de la API en result.error en vez de lanzarlos
+      if (result.error) {
+        console.error('[Email] Error enviando:', result.error.message);
+        return { success: false, id: null, error: result.error.message, statusCode: result.error.statusCode };
+      }
 
       console.log('[Email] Enviado:', subject, 'a', recipients.length, 'destinatarios');
       return { success: true, id: result.data?.id, error: null };
@@ -125,6 +131,44 @@ class EmailService {
     }
   }
 
+  /**
+   * Envía varios emails en una sola llamada a la API (máximo 100 por lote en Resend)
+   * @param {Array<{to, subject, html, text}>} mensajes
+   * @param {Object} [opciones]
+   * @param {string} [opciones.idempotencyKey] - Resend descarta un reenvío con la misma clave (24 h),
+   *   así que reintentar tras un error de red no duplica el lote
+   * @returns {Promise<{success: boolean, ids: string[], error: string|null, statusCode?: number}>}
+   *   statusCode viene de la API; sin statusCode el error fue de red
+   */
+  async sendBatch(mensajes, { fromName, idempotencyKey } = {}) {
+    if (!this.isEnabled()) {
+      console.warn('[Email] Servicio deshabilitado. Lote no enviado:', mensajes.length, 'emails');
+      return { success: false, ids: [], error: 'Servicio de email no configurado' };
+    }
+
+    try {
+      const from = `${fromName || this.fromName} <${this.fromEmail}>`;
+      const { data, error } = await this.resend.batch.send(mensajes.map(({ to, subject, html, text }) => ({
+        from,
+        to: Array.isArray(to) ? to : [to],
+        subject,
+        html,
+        text
+      })), idempotencyKey ? { idempotencyKey } : undefined);
+
+      if (error) {
+        console.error('[Email] Error enviando lote:', error.message);
+        return { success: false, ids: [], error: error.message, statusCode: error.statusCode };
+      }
+
+      console.log('[Email] Lote enviado:', mensajes.length, 'emails');
+      return { success: true, ids: (data?.data || []).map(d => d.id), error: null };
+    } catch (error) {
+      console.error('[Email] Error enviando lote:', error.message);
+      return { success: false, ids: [], error: error.message };
+    }
+  }
+
   /**
    * Envía un email de alerta formateado
    */
@@ -1223,6 +1267,14 @@ Clínica Mía
       return { success: false, error: 'Servicio de email no configurado' };
     }
 
+    return this.send(this.buildAppointmentReminder({ to, paciente, cita, doctor, especialidad, tipoRecordatorio }));
+  }
+
+  /**
+   * Arma el recordatorio de cita sin enviarlo (para sendBatch)
+   * @returns {{to: string, subject: string, html: string, text: string}}
+   */
+  buildAppointmentReminder({ to, paciente, cita, doctor, especialidad, tipoRecordatorio }) {
     const nombrePaciente = `${paciente.nombre} ${paciente.apellido || ''}`.trim();
     const nombreDoctor = doctor ? `Dr. ${doctor.nombre} ${doctor.apellido}`.trim() : 'Por confirmar';
     const frontendUrl = process.env.NEXT_PUBLIC_BASE_URL || 'http://localhost:3001';
@@ -1430,12 +1482,12 @@ Ver tus citas: ${frontendUrl}/perfil/citas
       '3horas': `🔔 ¡Tu cita es HOY a las ${horaFormateada}! - Clínica Mía`
     };
 
-    return this.send({
+    return {
       to,
       subject: subjectMap[tipoRecordatorio] || `Recordatorio de Cita - Clínica Mía`,
       html,
       text
-    });
+    };
   }
 
   /**
@@ -12,6 +12,7 @@ const { ValidationError, AppError } = require('../utils/errors');
 const crypto = require('crypto');
 const epaycoConfig = require('../config/epayco');
 const emailService = require('./email.service');
+const disponibilidadCache = require('./disponibilidadCache.service');
 
 class EpaycoService {
   constructor() {
@@ -435,6 +436,8 @@ class EpaycoService {
           },
         });
 
+        disponibilidadCache.invalidarDia(cita.doctorId, cita.fecha);
+
         // Send payment failed email
         if (cita.paciente?.email) {
           try {
@@ -3,16 +3,16 @@
  */
 const prisma = require('../db/prisma');
 const { ValidationError, NotFoundError } = require('../utils/errors');
+const { paginar } = require('../utils/pagination');
 const firmaDigitalService = require('./firmaDigital.service');
 const auditoriaService = require('./auditoria.service');
 
 class EvolucionClinicaService {
   /**
    * Obtener todas las evoluciones con filtros
+   * Paginación por page/limit o por cursor sobre (fecha, id), ver utils/pagination
    */
-  async getAll({ page = 1, limit = 20, paciente_id, admision_id, doctor_id, cita_id, fecha_desde, fecha_hasta }) {
-    const skip = (parseInt(page) - 1) * parseInt(limit);
-
+  async getAll({ page, limit, cursor, con_total, paciente_id, admision_id, doctor_id, cita_id, fecha_desde, fecha_hasta }) {
     const where = {};
     if (paciente_id) where.pacienteId = paciente_id;
     if (admision_id) where.admisionId = admision_id;
@@ -25,43 +25,32 @@ class EvolucionClinicaService {
       if (fecha_hasta) where.fechaEvolucion.lte = new Date(fecha_hasta);
     }
 
-    const [evoluciones, total] = await Promise.all([
-      prisma.evolucionClinica.findMany({
-        where,
-        skip,
-        take: parseInt(limit),
-        orderBy: { fechaEvolucion: 'desc' },
-        include: {
-          paciente: {
-            select: {
-              id: true,
-              nombre: true,
-              apellido: true,
-              cedula: true,
-            },
+    const { items, pagination } = await paginar(prisma.evolucionClinica, {
+      where,
+      campoFecha: 'fechaEvolucion',
+      query: { page, limit, cursor, con_total },
+      limitePorDefecto: 20,
+      include: {
+        paciente: {
+          select: {
+            id: true,
+            nombre: true,
+            apellido: true,
+            cedula: true,
           },
-          doctor: {
-            select: {
-              id: true,
-              nombre: true,
-              apellido: true,
-            },
+        },
+        doctor: {
+          select: {
+            id: true,
+            nombre: true,
+            apellido: true,
           },
-          diagnosticos: true,
         },
-      }),
-      prisma.evolucionClinica.count({ where }),
-    ]);
-
-    return {
-      evoluciones,
-      pagination: {
-        page: parseInt(page),
-        limit: parseInt(limit),
-        total,
-        totalPages: Math.ceil(total / parseInt(limit)),
+        diagnosticos: true,
       },
-    };
+    });
+
+    return { evoluciones: items, pagination };
   }
 
   /**
@@ -2,8 +2,115 @@
  * Exportador RIPS (Resolución 2275 de 2023)
  * Genera archivos JSON para el Registro Individual de Prestación de Servicios de Salud
  */
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { once } = require('events');
 const prisma = require('../../db/prisma');
-const { NotFoundError } = require('../../utils/errors');
+const { NotFoundError, ValidationError } = require('../../utils/errors');
+
+// Facturas por consulta en la exportación por streaming
+const RIPS_LOTE_FACTURAS = parseInt(process.env.RIPS_LOTE_FACTURAS, 10) || 500;
+
+const SECCIONES_SERVICIOS = [
+  'consultas', 'procedimientos', 'urgencias', 'hospitalizacion', 'recienNacidos', 'medicamentos', 'otrosServicios',
+];
+
+const INCLUDE_FACTURA_RIPS = {
+  paciente: true,
+  items: {
+    include: {
+      cita: {
+        include: {
+          especialidad: true,
+          doctor: true,
+          diagnosticosHCE: { take: 1 } // Intentar obtener diagnóstico asociado
+        }
+      },
+      ordenMedica: {
+        include: {
+          examenProcedimiento: true,
+          doctor: true
+        }
+      },
+      ordenMedicamento: {
+        include: {
+          items: { include: { producto: true } },
+          doctor: true
+        }
+      },
+      admision: {
+        include: {
+          unidad: true,
+          egreso: true
+        }
+      }
+    }
+  }
+};
+
+/**
+ * Escribe respetando backpressure; falla si el destino se cierra (p.ej. el cliente
+ * HTTP abandonó la descarga) en vez de esperar un 'drain' que nunca llega
+ */
+async function escribir(stream, chunk) {
+  if (stream.destroyed) {
+    throw new Error('El destino de la exportación RIPS se cerró antes de terminar');
+  }
+  if (stream.write(chunk)) return;
+
+  await new Promise((resolve, reject) => {
+    const terminar = (err) => {
+      stream.off('drain', alDrenar);
+      stream.off('close', alCerrar);
+      if (err) reject(err); else resolve();
+    };
+    const alDrenar = () => terminar();
+    const alCerrar = () => terminar(new Error('El destino de la exportación RIPS se cerró antes de terminar'));
+    stream.on('drain', alDrenar);
+    stream.on('close', alCerrar);
+  });
+}
+
+/**
+ * Un archivo temporal por sección: los registros se agregan a medida que se procesan
+ * las facturas y al final se copian, en el orden de la estructura RIPS, a la salida.
+ */
+class SpoolSecciones {
+  constructor(directorio, secciones) {
+    this.archivos = {};
+    this.conteos = {};
+    for (const seccion of secciones) {
+      const archivo = path.join(directorio, `${seccion}.json`);
+      this.archivos[seccion] = { archivo, stream: fs.createWriteStream(archivo) };
+      this.conteos[seccion] = 0;
+    }
+  }
+
+  async agregar(seccion, registro) {
+    const prefijo = this.conteos[seccion] > 0 ? ',' : '';
+    this.conteos[seccion] += 1;
+    await escribir(this.archivos[seccion].stream, prefijo + JSON.stringify(registro));
+  }
+
+  async cerrar() {
+    await Promise.all(Object.values(this.archivos).map(async ({ stream }) => {
+      if (stream.writableFinished) return;
+      stream.end();
+      await once(stream, 'finish');
+    }));
+  }
+
+  destruir() {
+    for (const { stream } of Object.values(this.archivos)) stream.destroy();
+  }
+
+  async copiar(seccion, destino) {
+    for await (const chunk of fs.createReadStream(this.archivos[seccion].archivo)) {
+      await escribir(destino, chunk);
+    }
+  }
+}
 
 class ExportadorRIPSService {
   constructor() {
@@ -24,38 +131,7 @@ class ExportadorRIPSService {
     // 1. Obtener datos completos de las facturas
     const facturas = await prisma.factura.findMany({
       where: { id: { in: facturaIds } },
-      include: {
-        paciente: true,
-        items: {
-          include: {
-            cita: {
-              include: {
-                especialidad: true,
-                doctor: true,
-                diagnosticosHCE: { take: 1 } // Intentar obtener diagnóstico asociado
-              }
-            },
-            ordenMedica: {
-              include: {
-                examenProcedimiento: true,
-                doctor: true
-              }
-            },
-            ordenMedicamento: {
-              include: {
-                items: { include: { producto: true } },
-                doctor: true
-              }
-            },
-            admision: {
-              include: {
-                unidad: true,
-                egreso: true
-              }
-            }
-          }
-        }
-      }
+      include: INCLUDE_FACTURA_RIPS
     });
 
     if (!facturas || facturas.length === 0) {
@@ -64,13 +140,7 @@ class ExportadorRIPSService {
 
     // 2. Construir estructuras de datos RIPS
     const usuarios = new Map(); // Para evitar duplicados (US)
-    const consultas = []; // AC
-    const procedimientos = []; // AP
-    const urgencias = []; // AU
-    const hospitalizacion = []; // AH
-    const recienNacidos = []; // AN
-    const medicamentos = []; // AM
-    const otrosServicios = []; // AT
+    const servicios = Object.fromEntries(SECCIONES_SERVICIOS.map(seccion => [seccion, []]));
 
     // 3. Procesar cada factura
     for (const factura of facturas) {
@@ -80,36 +150,9 @@ class ExportadorRIPSService {
       }
 
       // 3.2 Procesar Items de la factura
-      for (const item of factura.items) {
-        // Consultas (AC)
-        if (item.tipo === 'Consulta' && item.cita) {
-          consultas.push(this._mapConsulta(item, factura));
-        }
-        
-        // Procedimientos (AP)
-        else if (item.tipo === 'OrdenMedica' && item.ordenMedica) {
-          procedimientos.push(this._mapProcedimiento(item, factura));
-        }
-        
-        // Medicamentos (AM)
-        else if (item.tipo === 'OrdenMedicamento' && item.ordenMedicamento) {
-          const meds = this._mapMedicamentos(item, factura);
-          medicamentos.push(...meds);
-        }
-
-        // Hospitalización (AH)
-        else if (item.tipo === 'Hospitalizacion' && item.admision) {
-          hospitalizacion.push(this._mapHospitalizacion(item, factura));
-        }
-        
-        // Otros Servicios (AT) - Si no cae en los anteriores
-        else if (item.tipo === 'Otro') {
-          otrosServicios.push(this._mapOtroServicio(item, factura));
-        }
+      for (const [seccion, registro] of this._serviciosFactura(factura)) {
+        servicios[seccion].push(registro);
       }
-      
-      // Urgencias (AU) - Buscar si hay atenciones de urgencia vinculadas al paciente en fechas cercanas
-      // Nota: Esto requeriría lógica adicional si la factura agrupa urgencias
     }
 
     // 4. Construir objeto final JSON (Estructura Res. 2275)
@@ -119,20 +162,194 @@ class ExportadorRIPSService {
       "tipoNota": null,
       "numNota": null,
       "usuarios": Array.from(usuarios.values()),
-      "servicios": {
-        "consultas": consultas.length > 0 ? consultas : undefined,
-        "procedimientos": procedimientos.length > 0 ? procedimientos : undefined,
-        "urgencias": urgencias.length > 0 ? urgencias : undefined,
-        "hospitalizacion": hospitalizacion.length > 0 ? hospitalizacion : undefined,
-        "recienNacidos": recienNacidos.length > 0 ? recienNacidos : undefined,
-        "medicamentos": medicamentos.length > 0 ? medicamentos : undefined,
-        "otrosServicios": otrosServicios.length > 0 ? otrosServicios : undefined
-      }
+      "servicios": Object.fromEntries(
+        SECCIONES_SERVICIOS.map(seccion => [seccion, servicios[seccion].length > 0 ? servicios[seccion] : undefined])
+      )
     };
 
     return ripsData;
   }
 
+  /**
+   * Exportar RIPS por streaming hacia un Writable (archivo o respuesta HTTP)
+   *
+   * Recorre las facturas en lotes de RIPS_LOTE_FACTURAS ordenadas por id; cada lote se
+   * mapea y se descarta, y sus registros van a un archivo temporal por sección. Al final
+   * se escribe el documento (misma estructura que generarRIPS) copiando las secciones
+   * en orden, así la memoria no depende del número de facturas. Cierra el destino.
+   *
+   * @param {object} criterio - { factura_ids } o { fecha_desde, fecha_hasta, cubierto_por_eps }
+   * @param {import('stream').Writable} destino
+   * @param {object} [opciones]
+   * @param {(progreso: {fase: string, procesadas: number, total: number}) => void} [opciones.onProgreso]
+   * @returns {Promise<{facturas: number, usuarios: number, registros: object}>}
+   */
+  async exportarRIPS(criterio, destino, { onProgreso } = {}) {
+    const total = await this._totalFacturas(criterio);
+    if (total === 0) {
+      throw new NotFoundError('No se encontraron facturas para el criterio indicado');
+    }
+
+    const directorio = await fs.promises.mkdtemp(path.join(os.tmpdir(), 'rips-'));
+    const spool = new SpoolSecciones(directorio, ['usuarios', ...SECCIONES_SERVICIOS]);
+    // Solo ids: lo mínimo para no repetir usuarios entre lotes
+    const pacientesVistos = new Set();
+    let numFactura = null;
+    let procesadas = 0;
+
+    try {
+      for await (const facturas of this._lotesFacturas(criterio)) {
+        for (const factura of facturas) {
+          if (numFactura === null) numFactura = factura.numero;
+
+          if (!pacientesVistos.has(factura.paciente.id)) {
+            pacientesVistos.add(factura.paciente.id);
+            await spool.agregar('usuarios', this._mapUsuario(factura.paciente));
+          }
+
+          for (const [seccion, registro] of this._serviciosFactura(factura)) {
+            await spool.agregar(seccion, registro);
+          }
+        }
+
+        procesadas += facturas.length;
+        if (onProgreso) onProgreso({ fase: 'facturas', procesadas, total });
+      }
+
+      if (procesadas === 0) {
+        throw new NotFoundError('No se encontraron las facturas solicitadas');
+      }
+
+      await spool.cerrar();
+
+      const encabezado = {
+        numDocumentoIdObligado: this.nitIPS,
+        numFactura,
+        tipoNota: null,
+        numNota: null,
+      };
+      await escribir(destino, `${JSON.stringify(encabezado).slice(0, -1)},"usuarios":[`);
+      await spool.copiar('usuarios', destino);
+      await escribir(destino, '],"servicios":{');
+
+      const conRegistros = SECCIONES_SERVICIOS.filter(seccion => spool.conteos[seccion] > 0);
+      for (const [indice, seccion] of conRegistros.entries()) {
+        await escribir(destino, `${indice > 0 ? ',' : ''}"${seccion}":[`);
+        await spool.copiar(seccion, destino);
+        await escribir(destino, ']');
+      }
+      await escribir(destino, '}}');
+      destino.end();
+      await once(destino, 'finish');
+
+      if (onProgreso) onProgreso({ fase: 'completado', procesadas, total });
+
+      return { facturas: procesadas, usuarios: pacientesVistos.size, registros: { ...spool.conteos } };
+    } catch (err) {
+      spool.destruir();
+      throw err;
+    } finally {
+      await fs.promises.rm(directorio, { recursive: true, force: true });
+    }
+  }
+
+  /**
+   * Lotes de facturas con el árbol completo de relaciones que usan los mappers
+   */
+  async *_lotesFacturas(criterio) {
+    if (criterio.factura_ids) {
+      // Ids explícitos: se parte la lista (evita miles de parámetros en un IN)
+      const ids = [...new Set(criterio.factura_ids)].sort();
+      for (let desde = 0; desde < ids.length; desde += RIPS_LOTE_FACTURAS) {
+        yield prisma.factura.findMany({
+          where: { id: { in: ids.slice(desde, desde + RIPS_LOTE_FACTURAS) } },
+          include: INCLUDE_FACTURA_RIPS,
+          orderBy: { id: 'asc' },
+        });
+      }
+      return;
+    }
+
+    const where = this._wherePeriodo(criterio);
+    let ultimoId = null;
+    while (true) {
+      const facturas = await prisma.factura.findMany({
+        where: ultimoId ? { ...where, id: { gt: ultimoId } } : where,
+        include: INCLUDE_FACTURA_RIPS,
+        orderBy: { id: 'asc' },
+        take: RIPS_LOTE_FACTURAS,
+      });
+      if (facturas.length === 0) return;
+      yield facturas;
+      if (facturas.length < RIPS_LOTE_FACTURAS) return;
+      ultimoId = facturas[facturas.length - 1].id;
+    }
+  }
+
+  async _totalFacturas(criterio) {
+    if (criterio.factura_ids) {
+      if (criterio.factura_ids.length === 0) {
+        throw new ValidationError('Debe proporcionar al menos una factura para generar RIPS');
+      }
+      return new Set(criterio.factura_ids).size;
+    }
+    return prisma.factura.count({ where: this._wherePeriodo(criterio) });
+  }
+
+  /**
+   * Facturas emitidas en el periodo (fechas YYYY-MM-DD inclusivas), sin anuladas
+   */
+  _wherePeriodo({ fecha_desde, fecha_hasta, cubierto_por_eps }) {
+    if (!fecha_desde || !fecha_hasta) {
+      throw new ValidationError('Debe indicar factura_ids o el periodo (fecha_desde y fecha_hasta)');
+    }
+    const hasta = new Date(`${fecha_hasta}T00:00:00.000Z`);
+    hasta.setUTCDate(hasta.getUTCDate() + 1);
+
+    return {
+      fechaEmision: { gte: new Date(`${fecha_desde}T00:00:00.000Z`), lt: hasta },
+      estado: { not: 'Cancelada' },
+      ...(cubierto_por_eps !== undefined && { cubiertoPorEPS: cubierto_por_eps }),
+    };
+  }
+
+  /**
+   * Registros de servicios (sección RIPS, registro) de los ítems de una factura
+   */
+  *_serviciosFactura(factura) {
+    for (const item of factura.items) {
+      // Consultas (AC)
+      if (item.tipo === 'Consulta' && item.cita) {
+        yield ['consultas', this._mapConsulta(item, factura)];
+      }
+
+      // Procedimientos (AP)
+      else if (item.tipo === 'OrdenMedica' && item.ordenMedica) {
+        yield ['procedimientos', this._mapProcedimiento(item, factura)];
+      }
+
+      // Medicamentos (AM)
+      else if (item.tipo === 'OrdenMedicamento' && item.ordenMedicamento) {
+        for (const medicamento of this._mapMedicamentos(item, factura)) {
+          yield ['medicamentos', medicamento];
+        }
+      }
+
+      // Hospitalización (AH)
+      else if (item.tipo === 'Hospitalizacion' && item.admision) {
+        yield ['hospitalizacion', this._mapHospitalizacion(item, factura)];
+      }
+
+      // Otros Servicios (AT) - Si no cae en los anteriores
+      else if (item.tipo === 'Otro') {
+        yield ['otrosServicios', this._mapOtroServicio(item, factura)];
+      }
+    }
+
+    // Urgencias (AU) - Buscar si hay atenciones de urgencia vinculadas al paciente en fechas cercanas
+    // Nota: Esto requeriría lógica adicional si la factura agrupa urgencias
+  }
+
   // --- Mappers Auxiliares (Simplificados para demostración) ---
 
   _mapUsuario(paciente) {
@@ -185,7 +402,7 @@ class ExportadorRIPSService {
       "fechaInicioAtencion": item.createdAt.toISOString(),
       "idMIPRES": null,
       "numAutorizacion": factura.epsAutorizacion || null,
-      "codProcedimiento": item.ordenMedica.examenProcedimiento.codigoCUPS || "902210", // Default Hemograma
+      "codProcedimiento": item.ordenMedica.examenProcedimiento?.codigoCUPS || "902210", // Default Hemograma
       "viaIngresoServicioSalud": "01", // Ambulatorio
       "modalidadGrupoServicioTecSal": "01",
       "grupoServicios": "02", // Apoyo diagnóstico
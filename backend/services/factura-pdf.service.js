@@ -2,14 +2,26 @@
  * Servicio de generación de PDF para Facturas
  */
 const PDFDocument = require('pdfkit');
+const pdfRenderService = require('./pdfRender.service');
 
 class FacturaPDFService {
   /**
-   * Genera el PDF de una factura
+   * Genera el PDF de una factura (en el pool de PDFs, con cache por contenido)
    * @param {Object} factura - Datos de la factura con paciente, items y pagos
    * @returns {Promise<Buffer>} Buffer del PDF generado
    */
   async generarPDF(factura) {
+    return pdfRenderService.renderizar('factura', factura);
+  }
+
+  /**
+   * Dibuja el PDF de una factura ya consultada (se ejecuta en el worker de PDFs)
+   * @param {Object} factura - Datos de la factura con paciente, items y pagos
+   * @param {Object} [contexto]
+   * @param {Date} [contexto.generadoEn] - Fecha de generación que se imprime
+   * @returns {Promise<Buffer>} Buffer del PDF generado
+   */
+  async renderizarPDF(factura, { generadoEn = new Date() } = {}) {
     return new Promise((resolve, reject) => {
       try {
         const doc = new PDFDocument({
@@ -35,7 +47,7 @@ class FacturaPDFService {
         this.generarTablaItems(doc, factura);
         this.generarTotales(doc, factura);
         this.generarHistorialPagos(doc, factura);
-        this.generarPiePagina(doc, factura);
+        this.generarPiePagina(doc, factura, generadoEn);
 
         doc.end();
       } catch (error) {
@@ -378,7 +390,7 @@ class FacturaPDFService {
   /**
    * Genera el pie de página
    */
-  generarPiePagina(doc, factura) {
+  generarPiePagina(doc, factura, generadoEn) {
     const pageHeight = doc.page.height;
 
     // Observaciones
@@ -410,7 +422,7 @@ class FacturaPDFService {
       .fillColor('#9CA3AF')
       .text('Este documento es una factura de venta de servicios médicos.', 50, pageHeight - 70, { align: 'center', width: 512 })
       .text('Clínica Mía - Todos los derechos reservados', 50, pageHeight - 58, { align: 'center', width: 512 })
-      .text(`Generado el ${new Date().toLocaleString('es-CO')}`, 50, pageHeight - 46, { align: 'center', width: 512 });
+      .text(`Generado el ${generadoEn.toLocaleString('es-CO')}`, 50, pageHeight - 46, { align: 'center', width: 512 });
   }
 
   /**
@@ -21,6 +21,7 @@
 const PDFDocument = require('pdfkit');
 const prisma = require('../db/prisma');
 const { NotFoundError } = require('../utils/errors');
+const pdfRenderService = require('./pdfRender.service');
 const path = require('path');
 const fs = require('fs');
 
@@ -332,6 +333,19 @@ class HCEPdfService {
 
     console.log(`[PDF] Generando HCE para paciente ${pacienteId}${rangoTexto} - Evoluciones: ${datos.evoluciones.length}, Signos Vitales: ${datos.signosVitales.length}, Diagnósticos: ${datos.diagnosticos.length}`);
 
+    // El dibujo se hace en el pool de PDFs; si los registros no cambiaron se sirve del cache
+    return pdfRenderService.renderizar('hce', datos);
+  }
+
+  /**
+   * Dibujar el PDF de la HCE a partir de obtenerDatosCompletos (se ejecuta en el worker de PDFs)
+   * @param {Object} datos - Datos completos de la HCE
+   * @param {Object} [contexto]
+   * @param {Date} [contexto.generadoEn] - Fecha de generación que se imprime
+   * @returns {Promise<Buffer>}
+   */
+  async renderizarPDF(datosHCE, { generadoEn = new Date() } = {}) {
+    const datos = { ...datosHCE, fechaGeneracion: generadoEn };
     const doc = new PDFDocument({
       size: 'LETTER',
       margins: this.margins,
@@ -343,7 +357,7 @@ class HCEPdfService {
         Keywords: 'historia clínica, HCE, salud, Colombia, confidencial',
         Creator: 'Sistema HCE - Clínica Mía',
         Producer: 'PDFKit - Node.js',
-        CreationDate: new Date(),
+        CreationDate: generadoEn,
       },
     });
 
@@ -621,7 +635,6 @@ class HCEPdfService {
         farmacologicos: antecedentesFarmacologicos,
         ginecoObstetrico: antecedenteGinecoObstetrico,
       },
-      fechaGeneracion: new Date(),
       institucion: this.institucion,
       // Rango de fechas si se filtró
       rangoFechas: tieneRango ? { desde: fechaDesde, hasta: fechaHasta } : null,
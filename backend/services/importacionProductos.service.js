@@ -0,0 +1,315 @@
+/**
+ * Importación CSV de productos en streaming
+ *
+ * El archivo recibido se guarda en disco (PRODUCTOS_IMPORT_DIR) y se procesa como
+ * un trabajo identificado por jobId:
+ *
+ * - El CSV se lee con un parser en streaming (utils/csv), sin cargarlo en memoria.
+ * - Las filas se escriben en lotes de PRODUCTOS_IMPORT_BATCH con un único
+ *   INSERT ... ON CONFLICT (sku) DO UPDATE por lote, dentro de una transacción que
+ *   también avanza el progreso del trabajo.
+ * - Si el proceso se interrumpe, reanudar() continúa desde la última fila confirmada.
+ */
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+const { Readable } = require('stream');
+const { pipeline } = require('stream/promises');
+const prisma = require('../db/prisma');
+const { ValidationError, NotFoundError, AppError } = require('../utils/errors');
+const { parseCSV, registroVacio } = require('../utils/csv');
+const interaccionesService = require('./interaccionesMedicamentos.service');
+
+const BATCH_SIZE = parseInt(process.env.PRODUCTOS_IMPORT_BATCH || '1000', 10);
+const IMPORT_DIR = process.env.PRODUCTOS_IMPORT_DIR || path.join(__dirname, '..', 'uploads', 'importaciones');
+const MAX_ERRORES_DETALLE = 100;
+// Un trabajo "procesando" sin avances en este tiempo se considera huérfano y puede reanudarse
+const TRABAJO_HUERFANO_MS = 2 * 60 * 1000;
+
+const ESTADOS_REANUDABLES = ['pendiente', 'error'];
+
+// Primer valor no vacío entre columnas alternativas
+const primero = (...valores) => valores.find(v => v !== undefined && v !== null && v !== '');
+
+const numero = (valor, parser, defecto) => (valor === undefined ? defecto : parser(valor));
+
+const rssMb = () => Math.round((process.memoryUsage().rss / 1024 / 1024) * 10) / 10;
+
+/**
+ * Convertir una fila del CSV (columnas en minúscula) en las columnas de productos
+ */
+function mapearFila(data, categoriaId, skuPorDefecto) {
+  const fila = {
+    nombre: (data.nombre || data.producto || 'Sin Nombre').trim().toUpperCase(),
+    sku: data.sku || data.codigo || skuPorDefecto,
+    categoria_id: categoriaId,
+    principio_activo: data.principio_activo || data.principioactivo || null,
+    codigo_atc: data.codigo_atc || data.atc || null,
+    cum: data.cum || null,
+    concentracion: data.concentracion || null,
+    presentacion: data.presentacion || data.forma_farmaceutica || null,
+    laboratorio: data.laboratorio || null,
+    registro_sanitario: data.registro_sanitario || data.invima || null,
+    precio_venta: numero(primero(data.precio_venta, data.precio), parseFloat, 0),
+    cantidad_total: numero(primero(data.cantidad, data.stock), v => parseInt(v, 10), 0),
+    cantidad_min_alerta: numero(primero(data.stock_minimo), v => parseInt(v, 10), 5),
+  };
+
+  if (Number.isNaN(fila.precio_venta)) throw new Error(`Precio inválido: ${primero(data.precio_venta, data.precio)}`);
+  if (Number.isNaN(fila.cantidad_total)) throw new Error(`Cantidad inválida: ${primero(data.cantidad, data.stock)}`);
+  if (Number.isNaN(fila.cantidad_min_alerta)) throw new Error(`Stock mínimo inválido: ${data.stock_minimo}`);
+
+  return fila;
+}
+
+/**
+ * Formatear un trabajo para la respuesta (BigInt -> Number y porcentaje)
+ */
+function formatearTrabajo(job) {
+  const bytesTotales = Number(job.bytesTotales);
+  const bytesProcesados = Number(job.bytesProcesados);
+  return {
+    ...job,
+    bytesTotales,
+    bytesProcesados,
+    porcentaje: bytesTotales ? Math.min(100, Math.round((bytesProcesados / bytesTotales) * 1000) / 10) : 0,
+  };
+}
+
+class ImportacionProductosService {
+  constructor() {
+    this.enCurso = new Map();
+  }
+
+  /**
+   * Crear un trabajo a partir de un stream (body de la request, archivo, etc.)
+   */
+  async crearDesdeStream(stream, { categoriaId = null, usuarioId = null, nombreArchivo = null } = {}) {
+    const categoria = await this.resolverCategoria(categoriaId);
+
+    const id = crypto.randomUUID();
+    fs.mkdirSync(IMPORT_DIR, { recursive: true });
+    const archivo = path.join(IMPORT_DIR, `${id}.csv`);
+    await pipeline(stream, fs.createWriteStream(archivo));
+
+    const { size } = fs.statSync(archivo);
+    if (!size) {
+      fs.unlinkSync(archivo);
+      throw new ValidationError('Contenido CSV es requerido');
+    }
+
+    return prisma.importacionProducto.create({
+      data: { id, archivo, nombreArchivo, categoriaId: categoria, usuarioId, bytesTotales: size },
+    });
+  }
+
+  /**
+   * Crear un trabajo a partir del CSV como texto
+   */
+  async crearDesdeTexto(csv, opciones) {
+    return this.crearDesdeStream(Readable.from([csv]), opciones);
+  }
+
+  /**
+   * Categoría destino: la indicada o "Importados" (se crea si no existe)
+   */
+  async resolverCategoria(categoriaId) {
+    if (categoriaId) {
+      const categoria = await prisma.categoriaProducto.findUnique({ where: { id: categoriaId }, select: { id: true } });
+      if (!categoria) throw new ValidationError('Categoría no encontrada');
+      return categoria.id;
+    }
+
+    const cat = await prisma.categoriaProducto.findFirst({ where: { nombre: 'Importados' } });
+    if (cat) return cat.id;
+    const nueva = await prisma.categoriaProducto.create({ data: { nombre: 'Importados', color: '#10b981' } });
+    return nueva.id;
+  }
+
+  async getById(id) {
+    const job = await prisma.importacionProducto.findUnique({ where: { id } });
+    if (!job) throw new NotFoundError('Importación no encontrada');
+    return formatearTrabajo(job);
+  }
+
+  /**
+   * Procesar el trabajo en segundo plano; devuelve la promesa del procesamiento
+   */
+  iniciar(id) {
+    if (this.enCurso.has(id)) return this.enCurso.get(id);
+
+    const promesa = this.procesar(id).finally(() => this.enCurso.delete(id));
+    this.enCurso.set(id, promesa);
+    return promesa;
+  }
+
+  /**
+   * Reanudar un trabajo interrumpido desde la última fila confirmada
+   */
+  async reanudar(id) {
+    const job = await this.getById(id);
+    if (job.estado === 'completado') throw new ValidationError('La importación ya fue completada');
+    if (this.enCurso.has(id)) return job;
+    if (job.estado === 'procesando' && Date.now() - new Date(job.updatedAt).getTime() < TRABAJO_HUERFANO_MS) {
+      throw new ValidationError('La importación está en proceso');
+    }
+    if (!fs.existsSync(job.archivo)) {
+      throw new AppError('El archivo de la importación ya no está disponible', 410);
+    }
+    this.iniciar(id).catch(() => {});
+    return job;
+  }
+
+  async procesar(id) {
+    const reclamado = await prisma.importacionProducto.updateMany({
+      where: {
+        id,
+        OR: [
+          { estado: { in: ESTADOS_REANUDABLES } },
+          { estado: 'procesando', updatedAt: { lt: new Date(Date.now() - TRABAJO_HUERFANO_MS) } },
+        ],
+      },
+      data: { estado: 'procesando', mensajeError: null },
+    });
+    if (reclamado.count === 0) {
+      throw new ValidationError('La importación ya está en proceso o fue completada');
+    }
+
+    const job = await prisma.importacionProducto.findUnique({ where: { id } });
+    if (!job.iniciadoEn) {
+      await prisma.importacionProducto.update({ where: { id }, data: { iniciadoEn: new Date() } });
+    }
+
+    const estado = {
+      job,
+      errores: Array.isArray(job.erroresDetalle) ? job.erroresDetalle : [],
+      rssPico: Math.max(job.rssPicoMb || 0, rssMb()),
+    };
+
+    try {
+      let header = null;
+      let fila = 0;
+      let lote = [];
+
+      const fuente = fs.createReadStream(job.archivo, { encoding: 'utf8', highWaterMark: 64 * 1024 });
+      for await (const { campos, bytes } of parseCSV(fuente)) {
+        if (!header) {
+          header = campos.map(h => h.trim().toLowerCase());
+          continue;
+        }
+        if (registroVacio(campos)) continue;
+
+        fila++;
+        if (fila <= job.filasProcesadas) continue;
+
+        lote.push({ fila, campos });
+        if (lote.length >= BATCH_SIZE) {
+          await this.escribirLote(estado, header, lote, bytes);
+          lote = [];
+        }
+      }
+
+      await this.escribirLote(estado, header, lote, Number(job.bytesTotales));
+
+      const final = await prisma.importacionProducto.update({
+        where: { id },
+        data: { estado: 'completado', finalizadoEn: new Date(), rssPicoMb: estado.rssPico },
+      });
+      fs.promises.unlink(job.archivo).catch(() => {});
+      // Los principios activos importados pueden formar pares nuevos en el índice
+      interaccionesService.programarReconstruccion();
+      return formatearTrabajo(final);
+    } catch (err) {
+      console.error(`[ImportacionProductos] Error en importación ${id}:`, err.message);
+      await prisma.importacionProducto.update({
+        where: { id },
+        data: { estado: 'error', mensajeError: err.message, rssPicoMb: estado.rssPico },
+      }).catch(() => {});
+      throw err;
+    }
+  }
+
+  /**
+   * Escribir un lote de filas y avanzar el progreso en la misma transacción
+   */
+  async escribirLote(estado, header, lote, bytes) {
+    const { job } = estado;
+    const porSku = new Map();
+    let errores = 0;
+
+    for (const { fila, campos } of lote) {
+      try {
+        const data = {};
+        header.forEach((key, index) => {
+          data[key] = campos[index] !== undefined ? campos[index].trim() : undefined;
+        });
+        const producto = mapearFila(data, job.categoriaId, `CSV-${job.id.slice(0, 8)}-${fila}`);
+        // Un SKU repetido dentro del lote se aplica una sola vez (gana la última fila)
+        porSku.delete(producto.sku);
+        porSku.set(producto.sku, producto);
+      } catch (err) {
+        errores++;
+        if (estado.errores.length < MAX_ERRORES_DETALLE) {
+          estado.errores.push({ fila, error: err.message });
+        }
+      }
+    }
+
+    const productos = [...porSku.values()];
+    const duplicados = lote.length - errores - productos.length;
+    const ultimaFila = lote.length ? lote[lote.length - 1].fila : job.filasProcesadas;
+
+    await prisma.$transaction(async (tx) => {
+      const resultado = productos.length ? await tx.$queryRaw`
+        INSERT INTO productos (
+          id, nombre, sku, categoria_id, principio_activo, codigo_atc, cum, concentracion,
+          presentacion, laboratorio, registro_sanitario, precio_venta, cantidad_total,
+          cantidad_min_alerta, activo, created_at, updated_at
+        )
+        SELECT
+          gen_random_uuid()::text, r.nombre, r.sku, r.categoria_id, r.principio_activo, r.codigo_atc, r.cum,
+          r.concentracion, r.presentacion, r.laboratorio, r.registro_sanitario, r.precio_venta,
+          r.cantidad_total, r.cantidad_min_alerta, true, NOW(), NOW()
+        FROM jsonb_to_recordset(${JSON.stringify(productos)}::jsonb) AS r(
+          nombre text, sku text, categoria_id text, principio_activo text, codigo_atc text, cum text,
+          concentracion text, presentacion text, laboratorio text, registro_sanitario text,
+          precio_venta double precision, cantidad_total integer, cantidad_min_alerta integer
+        )
+        ON CONFLICT (sku) DO UPDATE SET
+          nombre = EXCLUDED.nombre,
+          categoria_id = EXCLUDED.categoria_id,
+          principio_activo = EXCLUDED.principio_activo,
+          codigo_atc = EXCLUDED.codigo_atc,
+          cum = EXCLUDED.cum,
+          concentracion = EXCLUDED.concentracion,
+          presentacion = EXCLUDED.presentacion,
+          laboratorio = EXCLUDED.laboratorio,
+          registro_sanitario = EXCLUDED.registro_sanitario,
+          precio_venta = EXCLUDED.precio_venta,
+          cantidad_total = EXCLUDED.cantidad_total,
+          cantidad_min_alerta = EXCLUDED.cantidad_min_alerta,
+          activo = true,
+          updated_at = NOW()
+        RETURNING (xmax = 0) AS creado
+      ` : [];
+
+      const creados = resultado.filter(r => r.creado).length;
+      estado.rssPico = Math.max(estado.rssPico, rssMb());
+
+      estado.job = await tx.importacionProducto.update({
+        where: { id: job.id },
+        data: {
+          filasProcesadas: ultimaFila,
+          bytesProcesados: bytes,
+          creados: { increment: creados },
+          actualizados: { increment: resultado.length - creados + duplicados },
+          errores: { increment: errores },
+          erroresDetalle: estado.errores,
+          rssPicoMb: estado.rssPico,
+        },
+      });
+    }, { timeout: 60000 });
+  }
+}
+
+module.exports = new ImportacionProductosService();
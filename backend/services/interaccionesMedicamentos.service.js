@@ -0,0 +1,300 @@
+/**
+ * Índice de interacciones medicamentosas por principio activo
+ *
+ * verificarInteracciones comparaba cada par de medicamentos de la prescripción buscando
+ * el principio activo de uno dentro de la descripción del otro, en cada llamada. El
+ * índice hace ese trabajo una sola vez sobre el catálogo:
+ *
+ * - Cada producto cuya descripción menciona interacciones aporta filas
+ *   (principioA, principioB, severidad) a interacciones_medicamentos. Los principios se
+ *   normalizan (sin tildes, minúsculas) y el par se guarda en orden alfabético; un
+ *   principio compuesto ("losartán + hidroclorotiazida") aporta cada componente.
+ * - La severidad se deduce de la frase de la descripción que nombra al otro principio.
+ * - reconstruir() recalcula todo el índice; crear o editar un producto reindexa solo ese
+ *   producto, salvo que cambie su principio activo (puede aparecer en descripciones de
+ *   otros) o se importe el catálogo, que programan una reconstrucción completa.
+ * - Las consultas usan una copia en memoria (Map por par), recargada cada
+ *   INTERACCIONES_CACHE_MS o cuando el índice cambia en esta instancia, así que revisar
+ *   una prescripción de n medicamentos son n·(n-1)/2 búsquedas en el Map.
+ */
+const prisma = require('../db/prisma');
+const { removeAccents } = require('../utils/validators');
+
+const CACHE_MS = parseInt(process.env.INTERACCIONES_CACHE_MS || '300000', 10);
+// Espera antes de una reconstrucción programada, para agrupar cambios seguidos
+const ESPERA_RECONSTRUCCION_MS = 5000;
+
+// De menor a mayor; el índice de cada una sirve para ordenar alertas
+const SEVERIDADES = ['LEVE', 'MODERADA', 'GRAVE', 'CONTRAINDICADA'];
+const PATRONES_SEVERIDAD = [
+  [/contraindica/, 'CONTRAINDICADA'],
+  [/\b(grave|severa|peligros|mortal|fatal|toxicidad)/, 'GRAVE'],
+  [/moderad|precaucion|vigilar|monitor/, 'MODERADA'],
+];
+const MARCA_INTERACCION = 'interacc';
+const LONGITUD_MINIMA_PRINCIPIO = 3;
+
+const rango = severidad => SEVERIDADES.indexOf(severidad);
+
+class InteraccionesMedicamentosService {
+  constructor() {
+    this.indice = null;
+    this.cargadoEn = 0;
+    this.carga = null;
+    this.version = 0;
+    this.timerReconstruccion = null;
+    this.indiceVerificado = false;
+  }
+
+  /**
+   * Texto en minúsculas, sin tildes y con espacios simples
+   */
+  normalizarTexto(texto) {
+    if (!texto) return '';
+    return removeAccents(String(texto)).toLowerCase().replace(/\s+/g, ' ').trim();
+  }
+
+  /**
+   * Componentes normalizados de un principio activo ("A + B", "A, B", "A y B")
+   */
+  componentesPrincipio(principioActivo) {
+    return this.normalizarTexto(principioActivo)
+      .split(/\s*(?:\+|,|;|\/|\by\b)\s*/)
+      .map(c => c.trim())
+      .filter(c => c.length >= LONGITUD_MINIMA_PRINCIPIO);
+  }
+
+  /**
+   * Claves con las que un producto entra al índice: sus principios, o su nombre si no
+   * tiene principio activo registrado
+   */
+  clavesProducto(producto) {
+    const componentes = this.componentesPrincipio(producto.principioActivo);
+    if (componentes.length) return componentes;
+    const nombre = this.normalizarTexto(producto.nombre);
+    return nombre ? [nombre] : [];
+  }
+
+  clavePar(a, b) {
+    return a < b ? `${a}|${b}` : `${b}|${a}`;
+  }
+
+  severidadDeTexto(texto) {
+    const encontrado = PATRONES_SEVERIDAD.find(([patron]) => patron.test(texto));
+    return encontrado ? encontrado[1] : 'LEVE';
+  }
+
+  /**
+   * Filas del índice que aporta la descripción de un producto
+   *
+   * @param {object} producto - { id, nombre, principioActivo, descripcion }
+   * @param {string[]} componentesCatalogo - Principios normalizados conocidos
+   */
+  calcularInteraccionesProducto(producto, componentesCatalogo) {
+    const texto = this.normalizarTexto(producto.descripcion);
+    if (!texto.includes(MARCA_INTERACCION)) return [];
+
+    const propios = this.clavesProducto(producto);
+    if (!propios.length) return [];
+
+    const frases = producto.descripcion
+      .split(/[.;\n]+/)
+      .map(frase => ({ original: frase.trim(), normalizada: this.normalizarTexto(frase) }))
+      .filter(frase => frase.normalizada);
+
+    const filas = new Map();
+    for (const componente of componentesCatalogo) {
+      if (propios.includes(componente) || !texto.includes(componente)) continue;
+
+      const frase = frases.find(f => f.normalizada.includes(componente));
+      const severidad = this.severidadDeTexto(frase ? frase.normalizada : texto);
+
+      for (const propio of propios) {
+        const [principioA, principioB] = propio < componente ? [propio, componente] : [componente, propio];
+        filas.set(`${principioA}|${principioB}`, {
+          productoId: producto.id,
+          principioA,
+          principioB,
+          severidad,
+          detalle: frase ? frase.original.slice(0, 500) : null,
+        });
+      }
+    }
+    return [...filas.values()];
+  }
+
+  /**
+   * Principios activos normalizados presentes en el catálogo
+   */
+  async componentesCatalogo() {
+    const filas = await prisma.producto.findMany({
+      where: { principioActivo: { not: null } },
+      distinct: ['principioActivo'],
+      select: { principioActivo: true },
+    });
+    return [...new Set(filas.flatMap(f => this.componentesPrincipio(f.principioActivo)))];
+  }
+
+  productosConInteracciones(where = {}) {
+    return prisma.producto.findMany({
+      where: { ...where, descripcion: { contains: MARCA_INTERACCION, mode: 'insensitive' } },
+      select: { id: true, nombre: true, principioActivo: true, descripcion: true },
+    });
+  }
+
+  /**
+   * Reconstruir el índice completo desde el catálogo
+   *
+   * @returns {Promise<{productos: number, interacciones: number, duracionMs: number}>}
+   */
+  async reconstruir() {
+    const inicio = Date.now();
+    const [componentes, productos] = await Promise.all([
+      this.componentesCatalogo(),
+      this.productosConInteracciones(),
+    ]);
+
+    const filas = productos.flatMap(p => this.calcularInteraccionesProducto(p, componentes));
+
+    await prisma.$transaction([
+      prisma.interaccionMedicamento.deleteMany({}),
+      prisma.interaccionMedicamento.createMany({ data: filas, skipDuplicates: true }),
+    ]);
+    this.invalidar();
+
+    return { productos: productos.length, interacciones: filas.length, duracionMs: Date.now() - inicio };
+  }
+
+  /**
+   * Actualizar el índice tras crear o editar un producto
+   *
+   * @param {string} productoId
+   * @param {object} [opciones]
+   * @param {boolean} [opciones.principioCambio] - El principio activo es nuevo o cambió
+   */
+  async reindexarProducto(productoId, { principioCambio = false } = {}) {
+    if (principioCambio) {
+      // Otras descripciones pueden nombrar el principio nuevo: reconstruir todo
+      this.programarReconstruccion();
+      return;
+    }
+
+    const [componentes, productos] = await Promise.all([
+      this.componentesCatalogo(),
+      this.productosConInteracciones({ id: productoId }),
+    ]);
+    const filas = productos.flatMap(p => this.calcularInteraccionesProducto(p, componentes));
+
+    await prisma.$transaction([
+      prisma.interaccionMedicamento.deleteMany({ where: { productoId } }),
+      prisma.interaccionMedicamento.createMany({ data: filas, skipDuplicates: true }),
+    ]);
+    this.invalidar();
+  }
+
+  /**
+   * Reconstruir el índice en segundo plano (agrupa cambios seguidos)
+   */
+  programarReconstruccion() {
+    if (this.timerReconstruccion) return;
+    this.timerReconstruccion = setTimeout(() => {
+      this.timerReconstruccion = null;
+      this.reconstruir()
+        .then(r => console.log(`[Interacciones] Índice reconstruido: ${r.interacciones} interacciones de ${r.productos} productos en ${r.duracionMs}ms`))
+        .catch(err => console.error('[Interacciones] Error reconstruyendo índice:', err.message));
+    }, ESPERA_RECONSTRUCCION_MS);
+    this.timerReconstruccion.unref();
+  }
+
+  invalidar() {
+    this.version++;
+    this.indice = null;
+  }
+
+  /**
+   * Índice en memoria: Map "principioA|principioB" -> { severidad, detalle }
+   */
+  async obtenerIndice() {
+    if (this.indice && Date.now() - this.cargadoEn < CACHE_MS) return this.indice;
+    if (!this.carga) {
+      this.carga = this.cargarIndice().finally(() => { this.carga = null; });
+    }
+    return this.carga;
+  }
+
+  async cargarIndice() {
+    const version = this.version;
+    const filas = await prisma.interaccionMedicamento.findMany({
+      select: { principioA: true, principioB: true, severidad: true, detalle: true },
+    });
+
+    // Índice vacío (p.ej. recién migrado): construirlo una vez antes de responder
+    if (!filas.length && !this.indiceVerificado) {
+      this.indiceVerificado = true;
+      const { interacciones } = await this.reconstruir();
+      if (interacciones > 0) return this.cargarIndice();
+    }
+    this.indiceVerificado = true;
+
+    // Varios productos pueden declarar el mismo par: se conserva el más severo
+    const indice = new Map();
+    for (const fila of filas) {
+      const clave = `${fila.principioA}|${fila.principioB}`;
+      const actual = indice.get(clave);
+      if (!actual || rango(fila.severidad) > rango(actual.severidad)) {
+        indice.set(clave, { severidad: fila.severidad, detalle: fila.detalle });
+      }
+    }
+
+    // Si el índice cambió mientras se cargaba, no guardar una copia vieja
+    if (version === this.version) {
+      this.indice = indice;
+      this.cargadoEn = Date.now();
+    }
+    return indice;
+  }
+
+  /**
+   * Interacciones entre los medicamentos indicados, de mayor a menor severidad
+   *
+   * @param {Array<{id, nombre, principioActivo}>} medicamentos
+   */
+  async buscar(medicamentos) {
+    const indice = await this.obtenerIndice();
+    const claves = medicamentos.map(m => this.clavesProducto(m));
+    const alertas = [];
+
+    for (let i = 0; i < medicamentos.length; i++) {
+      for (let j = i + 1; j < medicamentos.length; j++) {
+        let interaccion = null;
+        for (const a of claves[i]) {
+          for (const b of claves[j]) {
+            if (a === b) continue;
+            const encontrada = indice.get(this.clavePar(a, b));
+            if (encontrada && (!interaccion || rango(encontrada.severidad) > rango(interaccion.severidad))) {
+              interaccion = encontrada;
+            }
+          }
+        }
+        if (!interaccion) continue;
+
+        const med1 = medicamentos[i];
+        const med2 = medicamentos[j];
+        alertas.push({
+          tipo: 'interaccion',
+          medicamento1: med1.nombre,
+          medicamento2: med2.nombre,
+          medicamento1Id: med1.id,
+          medicamento2Id: med2.id,
+          severidad: interaccion.severidad,
+          detalle: interaccion.detalle,
+          mensaje: `Posible interacción entre ${med1.nombre} y ${med2.nombre}`,
+        });
+      }
+    }
+
+    return alertas.sort((a, b) => rango(b.severidad) - rango(a.severidad));
+  }
+}
+
+module.exports = new InteraccionesMedicamentosService();
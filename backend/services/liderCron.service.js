@@ -0,0 +1,155 @@
+/**
+ * Elección de líder para los cron jobs
+ *
+ * Con varios procesos del backend (cluster.js, réplicas) los cron jobs deben correr en
+ * uno solo. Cada proceso intenta tomar un advisory lock de Postgres con
+ * pg_try_advisory_xact_lock dentro de una transacción interactiva que se mantiene
+ * abierta mientras sea líder: el lock vive en esa conexión, así que si el proceso
+ * muere o pierde la base de datos Postgres lo libera y otro proceso lo toma en su
+ * siguiente intento. El líder hace un SELECT 1 cada LIDER_INTERVALO_MS sobre la
+ * transacción; si falla deja de ser líder y pausa sus cron jobs, por lo que dos
+ * procesos pueden solaparse como mucho un intervalo.
+ *
+ * El líder ocupa una conexión del pool de forma permanente y renueva la transacción
+ * cada LIDER_MANDATO_MS (el timeout de las transacciones interactivas de Prisma).
+ */
+const os = require('os');
+const prisma = require('../db/prisma');
+
+const CLAVE = process.env.LIDER_CLAVE || 'clinica-mia:cron';
+const INTERVALO_MS = parseInt(process.env.LIDER_INTERVALO_MS || '15000', 10);
+const MANDATO_MS = parseInt(process.env.LIDER_MANDATO_MS || String(6 * 60 * 60 * 1000), 10);
+
+class LiderCronService {
+  constructor() {
+    this.activo = false;
+    this.esLider = false;
+    this.desde = null;
+    this.alGanar = null;
+    this.alPerder = null;
+    this.mandato = null;
+    this.temporizador = null;
+    this.despertar = null;
+    this.stats = { intentos: 0, mandatos: 0, errores: 0, ultimoError: null };
+  }
+
+  /**
+   * Empezar a competir por el liderazgo
+   *
+   * @param {Object} opciones
+   * @param {Function} opciones.alGanar - Se llama al tomar el lock (iniciar/reanudar cron jobs)
+   * @param {Function} opciones.alPerder - Se llama al soltarlo o perderlo (pausar cron jobs)
+   */
+  iniciar({ alGanar, alPerder } = {}) {
+    if (this.activo) return this;
+
+    this.activo = true;
+    this.alGanar = alGanar || (() => {});
+    this.alPerder = alPerder || (() => {});
+    this.intentar();
+    console.log(`[Lider] Proceso ${os.hostname()}:${process.pid} compitiendo por el lock "${CLAVE}" (intervalo ${INTERVALO_MS}ms)`);
+    return this;
+  }
+
+  /**
+   * Un intento de tomar el lock; si lo consigue lo sostiene hasta perderlo o detener()
+   */
+  intentar() {
+    this.temporizador = null;
+    if (!this.activo || this.mandato) return this.mandato;
+
+    this.stats.intentos++;
+    this.mandato = prisma.$transaction(async (tx) => {
+      const [{ adquirido }] = await tx.$queryRaw`SELECT pg_try_advisory_xact_lock(hashtext(${CLAVE})) AS adquirido`;
+      if (!adquirido) return false;
+
+      await this._sostener(tx);
+      return true;
+    }, { maxWait: INTERVALO_MS, timeout: MANDATO_MS })
+      .catch((error) => {
+        this.stats.errores++;
+        this.stats.ultimoError = error.message;
+        console.error('[Lider] Error sosteniendo el lock:', error.message);
+        return false;
+      })
+      .then(async (renovar) => {
+        await this._perder();
+        this.mandato = null;
+        // Al cumplir el mandato se reintenta de inmediato para no ceder el lock sin motivo
+        if (this.activo) this._programar(renovar ? 0 : INTERVALO_MS);
+      });
+
+    return this.mandato;
+  }
+
+  /**
+   * Dejar de competir y soltar el lock (apagado ordenado)
+   */
+  async detener() {
+    this.activo = false;
+    if (this.temporizador) {
+      clearTimeout(this.temporizador);
+      this.temporizador = null;
+    }
+    if (this.despertar) this.despertar();
+    if (this.mandato) await this.mandato;
+  }
+
+  getStats() {
+    return {
+      lider: this.esLider,
+      desde: this.desde,
+      pid: process.pid,
+      ...this.stats,
+    };
+  }
+
+  async _sostener(tx) {
+    const fin = Date.now() + MANDATO_MS - 2 * INTERVALO_MS;
+    this.esLider = true;
+    this.desde = new Date();
+    this.stats.mandatos++;
+    console.log(`[Lider] Proceso ${process.pid} es el líder de los cron jobs`);
+    await this.alGanar();
+
+    while (this.activo && Date.now() < fin) {
+      await this._esperar(INTERVALO_MS);
+      if (!this.activo) break;
+      await tx.$queryRaw`SELECT 1`;
+    }
+  }
+
+  async _perder() {
+    if (!this.esLider) return;
+
+    this.esLider = false;
+    this.desde = null;
+    console.log(`[Lider] Proceso ${process.pid} deja de ser líder`);
+    try {
+      await this.alPerder();
+    } catch (error) {
+      console.error('[Lider] Error pausando los cron jobs:', error.message);
+    }
+  }
+
+  _esperar(ms) {
+    return new Promise((resolve) => {
+      const timer = setTimeout(() => {
+        this.despertar = null;
+        resolve();
+      }, ms);
+      this.despertar = () => {
+        clearTimeout(timer);
+        this.despertar = null;
+        resolve();
+      };
+    });
+  }
+
+  _programar(ms) {
+    this.temporizador = setTimeout(() => this.intentar(), ms);
+    this.temporizador.unref();
+  }
+}
+
+module.exports = new LiderCronService();
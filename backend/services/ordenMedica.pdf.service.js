@@ -6,6 +6,7 @@
 
 const PDFDocument = require('pdfkit');
 const prisma = require('../db/prisma');
+const pdfRenderService = require('./pdfRender.service');
 const { format } = require('date-fns');
 const path = require('path');
 const fs = require('fs');
@@ -307,7 +308,7 @@ class OrdenMedicaPdfService {
   }
 
   /**
-   * Generar PDF de una orden médica
+   * Generar PDF de una orden médica (en el pool de PDFs, con cache por contenido)
    */
   async generarOrdenPdf(ordenId) {
     console.log('[PDF Service] Buscando orden:', ordenId);
@@ -339,6 +340,15 @@ class OrdenMedicaPdfService {
 
     console.log('[PDF Service] Generando PDF para:', orden.id);
 
+    return pdfRenderService.renderizar('ordenMedica', orden);
+  }
+
+  /**
+   * Dibujar el PDF de una orden médica ya consultada (se ejecuta en el worker de PDFs)
+   * @param {Object} [contexto]
+   * @param {Date} [contexto.generadoEn] - Fecha de generación que se imprime
+   */
+  async renderizarOrdenPdf(orden, { generadoEn = new Date() } = {}) {
     // Parsear información de kit/prescripción si existe
     const kitInfo = this._parseKitInfo(orden.observaciones);
 
@@ -517,7 +527,7 @@ class OrdenMedicaPdfService {
            .moveTo(leftX, footerY).lineTo(leftX + contentW, footerY).stroke();
 
         doc.fontSize(7).font('Helvetica').fillColor(this.colors.textMuted)
-           .text(`Documento generado el ${formatDate(new Date(), "dd/MM/yyyy 'a las' HH:mm")} | Este documento es válido únicamente con firma y sello del médico tratante.`,
+           .text(`Documento generado el ${formatDate(generadoEn, "dd/MM/yyyy 'a las' HH:mm")} | Este documento es válido únicamente con firma y sello del médico tratante.`,
                  leftX, footerY + 5, { width: contentW, align: 'center', lineBreak: false });
         doc.text(`${this.institucion.nombre} | NIT: ${this.institucion.nit} | ${this.institucion.direccion}, ${this.institucion.ciudad}`,
                  leftX, footerY + 15, { width: contentW, align: 'center', lineBreak: false });
@@ -1,8 +1,27 @@
 /**
  * Service de órdenes médicas
  */
+const crypto = require('crypto');
 const prisma = require('../db/prisma');
 const { ValidationError, NotFoundError } = require('../utils/errors');
+const auditService = require('./audit.service');
+
+// Una corrida del analizador cabe en un lote; más que esto se parte en varios envíos
+const LOTE_RESULTADOS_MAXIMO = parseInt(process.env.ORDENES_LOTE_MAXIMO, 10) || 2000;
+
+// Códigos de violación de constraint único (Prisma y PostgreSQL en consultas raw)
+const PRISMA_UNIQUE_CONSTRAINT_ERROR = 'P2002';
+const PG_UNIQUE_VIOLATION = '23505';
+
+/**
+ * Normaliza resultados a string (se guardan como texto JSON)
+ */
+function serializarResultados(resultados) {
+  if (typeof resultados === 'object' && resultados !== null) {
+    return JSON.stringify(resultados);
+  }
+  return resultados;
+}
 
 class OrdenMedicaService {
   /**
@@ -276,17 +295,11 @@ class OrdenMedicaService {
   async completar(id, data, ejecutadoPorId) {
     await this.getById(id);
 
-    // Ensure resultados is stored as a string if it's an object
-    let resultados = data.resultados;
-    if (typeof resultados === 'object' && resultados !== null) {
-      resultados = JSON.stringify(resultados);
-    }
-
     const orden = await prisma.ordenMedica.update({
       where: { id },
       data: {
         estado: 'Completada',
-        resultados: resultados,
+        resultados: serializarResultados(data.resultados),
         archivoResultado: data.archivo_resultado || null,
         fechaEjecucion: new Date(),
         ejecutadoPor: ejecutadoPorId,
@@ -300,6 +313,146 @@ class OrdenMedicaService {
     return orden;
   }
 
+  /**
+   * Completar varias órdenes en una sola transacción (corrida de un analizador)
+   *
+   * Cada ítem obtiene su propio estado y los ítems inválidos no abortan el lote:
+   * - completada: resultados registrados
+   * - duplicada: la clave de idempotencia ya completó esa orden (no se reaplica)
+   * - no_encontrada: la orden no existe
+   * - error: ítem inválido, orden cancelada u otra orden ya usa la clave
+   *
+   * Las órdenes válidas se actualizan con un único UPDATE ... FROM jsonb_to_recordset
+   * y el lote deja una sola entrada de auditoría.
+   *
+   * @param {Array<{orden_id: string, resultados: object|string, archivo_resultado?: string, clave_idempotencia?: string}>} items
+   * @param {string} ejecutadoPorId
+   * @param {{ipAddress?: string, userAgent?: string}} contexto
+   */
+  async completarLote(items, ejecutadoPorId, contexto = {}) {
+    if (!Array.isArray(items) || items.length === 0) {
+      throw new ValidationError('items debe ser un arreglo con al menos un resultado');
+    }
+    if (items.length > LOTE_RESULTADOS_MAXIMO) {
+      throw new ValidationError(`El lote admite máximo ${LOTE_RESULTADOS_MAXIMO} resultados`);
+    }
+
+    const loteId = crypto.randomUUID();
+    const resultados = items.map((item, indice) => ({
+      indice,
+      orden_id: item?.orden_id ?? null,
+      clave_idempotencia: item?.clave_idempotencia ?? null,
+      estado: null,
+    }));
+
+    // Validación sin base de datos y repetidos dentro del mismo lote
+    const candidatos = [];
+    const ordenesVistas = new Set();
+    const clavesVistas = new Set();
+    items.forEach((item, indice) => {
+      const resultado = resultados[indice];
+      const clave = item?.clave_idempotencia || null;
+
+      if (!item || typeof item.orden_id !== 'string' || !item.orden_id) {
+        Object.assign(resultado, { estado: 'error', mensaje: 'orden_id es requerido' });
+      } else if (item.resultados === undefined || item.resultados === null || item.resultados === '') {
+        Object.assign(resultado, { estado: 'error', mensaje: 'resultados es requerido' });
+      } else if (clave && clavesVistas.has(clave)) {
+        resultado.estado = 'duplicada';
+      } else if (ordenesVistas.has(item.orden_id)) {
+        Object.assign(resultado, { estado: 'error', mensaje: 'La orden aparece más de una vez en el lote' });
+      } else {
+        ordenesVistas.add(item.orden_id);
+        if (clave) clavesVistas.add(clave);
+        candidatos.push({ item, clave, resultado });
+      }
+    });
+
+    try {
+      await prisma.$transaction(async (tx) => {
+        const claves = candidatos.map(c => c.clave).filter(Boolean);
+        const [ordenes, usadas] = await Promise.all([
+          tx.ordenMedica.findMany({
+            where: { id: { in: candidatos.map(c => c.item.orden_id) } },
+            select: { id: true, estado: true },
+          }),
+          claves.length
+            ? tx.ordenMedica.findMany({
+              where: { claveIdempotencia: { in: claves } },
+              select: { id: true, claveIdempotencia: true },
+            })
+            : [],
+        ]);
+        const estadoPorOrden = new Map(ordenes.map(o => [o.id, o.estado]));
+        const ordenPorClave = new Map(usadas.map(o => [o.claveIdempotencia, o.id]));
+
+        const actualizar = [];
+        for (const { item, clave, resultado } of candidatos) {
+          if (clave && ordenPorClave.has(clave)) {
+            if (ordenPorClave.get(clave) === item.orden_id) {
+              resultado.estado = 'duplicada';
+            } else {
+              Object.assign(resultado, { estado: 'error', mensaje: 'La clave de idempotencia ya se usó en otra orden' });
+            }
+          } else if (!estadoPorOrden.has(item.orden_id)) {
+            resultado.estado = 'no_encontrada';
+          } else if (estadoPorOrden.get(item.orden_id) === 'Cancelada') {
+            Object.assign(resultado, { estado: 'error', mensaje: 'La orden está cancelada' });
+          } else {
+            resultado.estado = 'completada';
+            actualizar.push({
+              id: item.orden_id,
+              resultados: serializarResultados(item.resultados),
+              archivo_resultado: item.archivo_resultado || null,
+              clave_idempotencia: clave,
+            });
+          }
+        }
+
+        if (actualizar.length) {
+          await tx.$executeRaw`
+            UPDATE ordenes_medicas AS o SET
+              estado = 'Completada'::"EstadoOrdenMedica",
+              resultados = r.resultados,
+              archivo_resultado = r.archivo_resultado,
+              clave_idempotencia = COALESCE(r.clave_idempotencia, o.clave_idempotencia),
+              fecha_ejecucion = NOW(),
+              ejecutado_por = ${ejecutadoPorId}::uuid,
+              updated_at = NOW()
+            FROM jsonb_to_recordset(${JSON.stringify(actualizar)}::jsonb) AS r(
+              id text, resultados text, archivo_resultado text, clave_idempotencia text
+            )
+            WHERE o.id = r.id
+          `;
+        }
+      }, { timeout: 60000 });
+    } catch (err) {
+      if (err.code === PRISMA_UNIQUE_CONSTRAINT_ERROR || err.meta?.code === PG_UNIQUE_VIOLATION) {
+        throw new ValidationError('Otro lote está registrando las mismas claves de idempotencia. Intente de nuevo.');
+      }
+      throw err;
+    }
+
+    const resumen = { completada: 0, duplicada: 0, no_encontrada: 0, error: 0 };
+    for (const resultado of resultados) resumen[resultado.estado] += 1;
+
+    await auditService.log({
+      userId: ejecutadoPorId,
+      action: 'COMPLETAR_ORDENES_LOTE',
+      resource: 'OrdenMedica',
+      resourceId: loteId,
+      details: {
+        total: items.length,
+        resumen,
+        ordenesCompletadas: resultados.filter(r => r.estado === 'completada').map(r => r.orden_id),
+      },
+      ipAddress: contexto.ipAddress,
+      userAgent: contexto.userAgent,
+    });
+
+    return { loteId, total: items.length, resumen, resultados };
+  }
+
   /**
    * Cancelar una orden médica
    */
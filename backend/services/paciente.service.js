@@ -6,6 +6,7 @@ const { ValidationError, NotFoundError } = require('../utils/errors');
 const { saveBase64Image, deleteFile } = require('../utils/upload');
 const { hashPassword } = require('../utils/auth');
 const emailService = require('./email.service');
+const { removeAccents, escapeLike } = require('../utils/validators');
 
 // Siigo integration for customer synchronization
 let customerSiigoService = null;
@@ -23,6 +24,30 @@ const getSiigoServices = () => {
   return { customerSiigoService, siigoService };
 };
 
+// Documento con tipo opcional: "1.023.456", "CC 1023456", "TI-1098", "AB123456"
+const DOCUMENTO_REGEX = /^(?:(CC|TI|CE|PA|RC|NIT|NUIP|MS|AS|PE|PT|CD|SC)(?:[\s:.-]+|(?=\d)))?((?=[A-Za-z0-9.\-]*\d)[A-Za-z0-9][A-Za-z0-9.\-]*)$/i;
+
+// Formas en que se guarda cada tipo de documento: la sigla o el nombre del formulario de admisión
+const TIPOS_DOCUMENTO = {
+  CC: ['Cédula de Ciudadanía', 'Cedula de Ciudadania'],
+  TI: ['Tarjeta de Identidad'],
+  CE: ['Cédula de Extranjería', 'Cedula de Extranjeria'],
+  PA: ['Pasaporte'],
+  RC: ['Registro Civil'],
+  MS: ['Menor sin Identificación', 'Menor sin Identificacion'],
+  AS: ['Adulto sin Identificación', 'Adulto sin Identificacion'],
+  CD: ['Carné Diplomático', 'Carne Diplomatico'],
+  SC: ['Salvoconducto'],
+  PE: ['Permiso Especial de Permanencia'],
+};
+
+// Columnas devueltas por la búsqueda rápida (mismos nombres que el select de Prisma)
+const COLUMNAS_BUSQUEDA = `
+  p.id, p.nombre, p.apellido, p.cedula, p.email, p.telefono,
+  p.fecha_nacimiento AS "fechaNacimiento", p.genero, p.eps,
+  p.tipo_sangre AS "tipoSangre", p.tipo_documento AS "tipoDocumento", p.foto_url AS "fotoUrl"
+`;
+
 class PacienteService {
   /**
    * Obtener todos los pacientes con paginación
@@ -364,14 +389,26 @@ class PacienteService {
   }
 
   /**
-   * Búsqueda rápida de pacientes por nombre, cédula o email
+   * Búsqueda rápida de pacientes (admisiones, autocompletado)
+   *
+   * @param {string} query - Documento, correo o nombre ("maria gomez")
+   * @param {Object} options
+   * @param {number} [options.limit=10] - Máximo 50
    */
-  async search(query) {
+  async search(query, { limit = 10 } = {}) {
     if (!query || query.trim().length < 2) {
       return [];
     }
 
     const searchTerm = query.trim();
+    const take = Math.min(Math.max(parseInt(limit) || 10, 1), 50);
+
+    try {
+      return await this.buscarIndexado(searchTerm, take);
+    } catch (e) {
+      // Si la migración de búsqueda no está aplicada (pg_trgm / nombre_completo_normalizado), usar búsqueda estándar
+      console.warn('[Paciente] Busqueda indexada fallo, usando busqueda estandar:', e.message);
+    }
 
     const pacientes = await prisma.paciente.findMany({
       where: {
@@ -383,7 +420,7 @@ class PacienteService {
           { email: { contains: searchTerm, mode: 'insensitive' } },
         ],
       },
-      take: 10,
+      take,
       orderBy: { nombre: 'asc' },
       select: {
         id: true,
@@ -404,6 +441,88 @@ class PacienteService {
     return pacientes;
   }
 
+  /**
+   * Búsqueda sobre índices (ver migración add_paciente_search_index)
+   *
+   * 1. Documento (con tipo opcional): igualdad o prefijo de cédula, exactos primero. El
+   *    tipo acepta la sigla o el nombre guardado; si con el tipo no hay resultados se
+   *    repite sin él (tipos guardados con otra escritura).
+   * 2. Correo (contiene @): prefijo de lower(email).
+   * 3. Nombre: cada palabra debe aparecer en el nombre completo normalizado (trigramas),
+   *    ordenado por prefijo del nombre completo y luego por similitud de palabra.
+   */
+  async buscarIndexado(searchTerm, take) {
+    const documento = DOCUMENTO_REGEX.exec(searchTerm);
+    if (documento) {
+      const tipo = documento[1] ? documento[1].toUpperCase() : null;
+      const numero = documento[2].replace(/\./g, '');
+      const buscarDocumento = (conTipo) => {
+        const params = [numero, `${escapeLike(numero)}%`, take];
+        let filtroTipo = '';
+        if (conTipo) {
+          params.push(tipo, TIPOS_DOCUMENTO[tipo] || []);
+          filtroTipo = ` AND (upper(p.tipo_documento) = $4 OR p.tipo_documento = ANY($5::text[]))`;
+        }
+
+        return prisma.$queryRawUnsafe(`
+          SELECT ${COLUMNAS_BUSQUEDA}
+          FROM pacientes p
+          WHERE p.activo = true
+            AND (p.cedula = $1 OR p.cedula LIKE $2)${filtroTipo}
+          ORDER BY (p.cedula = $1) DESC, p.cedula ASC
+          LIMIT $3
+        `, ...params);
+      };
+
+      let pacientes = await buscarDocumento(Boolean(tipo));
+      if (pacientes.length === 0 && tipo) {
+        pacientes = await buscarDocumento(false);
+      }
+
+      // Un término alfanumérico sin coincidencias de documento puede ser parte de un nombre
+      if (pacientes.length > 0 || /^[\d.]+$/.test(documento[2])) return pacientes;
+    }
+
+    if (searchTerm.includes('@')) {
+      return prisma.$queryRawUnsafe(`
+        SELECT ${COLUMNAS_BUSQUEDA}
+        FROM pacientes p
+        WHERE p.activo = true AND lower(p.email) LIKE $1
+        ORDER BY lower(p.email) ASC
+        LIMIT $2
+      `, `${escapeLike(searchTerm.toLowerCase())}%`, take);
+    }
+
+    const normalizado = removeAccents(searchTerm).toLowerCase().replace(/\s+/g, ' ');
+    const palabras = normalizado.split(' ');
+    const params = [];
+    let condiciones;
+
+    if (palabras.every(palabra => palabra.length < 3)) {
+      // Palabras de menos de 3 letras no usan el índice de trigramas: buscar por prefijo
+      params.push(`${escapeLike(normalizado)}%`);
+      condiciones = 'p.nombre_completo_normalizado LIKE $1';
+    } else {
+      condiciones = palabras.map((palabra) => {
+        params.push(`%${escapeLike(palabra)}%`);
+        return `p.nombre_completo_normalizado LIKE $${params.length}`;
+      }).join(' AND ');
+    }
+
+    const n = params.length;
+    return prisma.$queryRawUnsafe(`
+      SELECT ${COLUMNAS_BUSQUEDA}
+      FROM pacientes p
+      WHERE p.activo = true AND ${condiciones}
+      ORDER BY
+        (p.nombre_completo_normalizado LIKE $${n + 1}) DESC,
+        word_similarity($${n + 2}, p.nombre_completo_normalizado) DESC,
+        p.nombre ASC,
+        p.apellido ASC
+      LIMIT $${n + 3}
+    `, ...params, `${escapeLike(normalizado)}%`, normalizado, take);
+  }
+
   /**
    * Activar o inactivar un paciente
    */
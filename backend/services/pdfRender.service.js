@@ -0,0 +1,304 @@
+/**
+ * Renderizado de PDFs en un pool de worker_threads con cache en disco
+ *
+ * Los servicios de PDF consultan los datos en el hilo principal (Prisma) y delegan aquí
+ * el dibujo con PDFKit, que es CPU puro y con historias largas bloqueaba el event loop
+ * durante segundos.
+ *
+ * - Pool de PDF_WORKERS hilos creados bajo demanda; las tareas esperan en una cola FIFO
+ *   de hasta PDF_COLA_MAXIMA (503 si se llena) y cada una tiene PDF_TIMEOUT_MS.
+ * - Cache: el PDF se guarda en PDF_CACHE_DIR bajo el sha256 de (tipo, plantilla, datos
+ *   fuente). Si los registros no cambiaron se sirve el archivo sin renderizar; la
+ *   versión de la plantilla es el hash del archivo del servicio, así que un despliegue
+ *   con cambios de diseño invalida lo anterior. Las entradas caducan a las
+ *   PDF_CACHE_HORAS (0 desactiva el cache). La fecha de generación impresa es la del
+ *   render, así que una copia servida del cache muestra cuándo se creó esa entrada.
+ * - Peticiones simultáneas del mismo PDF comparten un único renderizado.
+ * - PDF_WORKERS=0 renderiza en el hilo principal (útil en desarrollo y pruebas).
+ */
+const crypto = require('crypto');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { Worker } = require('worker_threads');
+const { AppError } = require('../utils/errors');
+const { obtenerRenderizador, versionPlantilla, aClonable } = require('../workers/renderizadores');
+
+const WORKERS = process.env.PDF_WORKERS !== undefined
+  ? parseInt(process.env.PDF_WORKERS, 10)
+  : Math.max(1, Math.min(4, os.cpus().length - 1));
+const COLA_MAXIMA = parseInt(process.env.PDF_COLA_MAXIMA || '50', 10);
+const TIMEOUT_MS = parseInt(process.env.PDF_TIMEOUT_MS || '120000', 10);
+const CACHE_DIR = process.env.PDF_CACHE_DIR || path.join(__dirname, '..', 'uploads', 'pdf-cache');
+const CACHE_HORAS = parseFloat(process.env.PDF_CACHE_HORAS || '24');
+const CACHE_TTL_MS = CACHE_HORAS * 60 * 60 * 1000;
+const BARRIDO_CACHE_MS = 60 * 60 * 1000;
+const RUTA_WORKER = path.join(__dirname, '..', 'workers', 'pdfRender.worker.js');
+
+class PdfRenderService {
+  constructor() {
+    this.workers = [];
+    this.cola = [];
+    this.compartidos = new Map();
+    this.secuencia = 0;
+    this.barrido = null;
+    this.cerrado = false;
+    this.stats = {
+      renderizados: 0, errores: 0, timeouts: 0, rechazados: 0,
+      cacheHits: 0, cacheMisses: 0, compartidos: 0,
+      renderMsTotal: 0, esperaMsTotal: 0,
+    };
+  }
+
+  /**
+   * Obtener el PDF de un tipo a partir de sus datos (del cache o renderizándolo)
+   *
+   * @param {string} tipo - Clave de RENDERIZADORES
+   * @param {object} datos - Lo que recibe el método de renderizado
+   * @param {object} [opciones]
+   * @param {object} [opciones.huella=datos] - Datos fuente para la clave de cache; sin
+   *   valores que cambian en cada llamada (la fecha de generación la pone ejecutar)
+   * @returns {Promise<Buffer>}
+   */
+  renderizar(tipo, datos, { huella = datos } = {}) {
+    const clave = this.claveCache(tipo, huella);
+
+    if (this.compartidos.has(clave)) {
+      this.stats.compartidos++;
+      return this.compartidos.get(clave);
+    }
+
+    const promesa = this.obtenerOGenerar(tipo, datos, clave)
+      .finally(() => this.compartidos.delete(clave));
+    this.compartidos.set(clave, promesa);
+    return promesa;
+  }
+
+  claveCache(tipo, huella) {
+    return crypto.createHash('sha256')
+      .update(tipo)
+      .update(versionPlantilla(tipo))
+      .update(JSON.stringify(huella))
+      .digest('hex');
+  }
+
+  async obtenerOGenerar(tipo, datos, clave) {
+    const archivo = path.join(CACHE_DIR, tipo, `${clave}.pdf`);
+
+    const cacheado = await this.leerCache(archivo);
+    if (cacheado) {
+      this.stats.cacheHits++;
+      return cacheado;
+    }
+    this.stats.cacheMisses++;
+
+    const pdf = await this.ejecutar(tipo, aClonable(datos));
+    await this.guardarCache(archivo, pdf);
+    return pdf;
+  }
+
+  async leerCache(archivo) {
+    if (CACHE_TTL_MS <= 0) return null;
+    try {
+      const { mtimeMs } = await fs.promises.stat(archivo);
+      if (Date.now() - mtimeMs > CACHE_TTL_MS) return null;
+      return await fs.promises.readFile(archivo);
+    } catch (err) {
+      return null;
+    }
+  }
+
+  async guardarCache(archivo, pdf) {
+    if (CACHE_TTL_MS <= 0) return;
+    try {
+      await fs.promises.mkdir(path.dirname(archivo), { recursive: true });
+      // Escribir aparte y renombrar: nunca se sirve un PDF a medio escribir
+      const temporal = `${archivo}.${process.pid}.${crypto.randomBytes(4).toString('hex')}.tmp`;
+      await fs.promises.writeFile(temporal, pdf, { mode: 0o600 });
+      await fs.promises.rename(temporal, archivo);
+      this.programarBarrido();
+    } catch (err) {
+      console.error('[PdfRender] No se pudo guardar el PDF en cache:', err.message);
+    }
+  }
+
+  programarBarrido() {
+    if (this.barrido) return;
+    this.barrido = setInterval(() => {
+      this.limpiarCache().catch(err => console.error('[PdfRender] Error limpiando cache:', err.message));
+    }, BARRIDO_CACHE_MS);
+    this.barrido.unref();
+  }
+
+  /**
+   * Eliminar del disco las entradas caducadas
+   *
+   * @returns {Promise<number>} Archivos eliminados
+   */
+  async limpiarCache() {
+    let eliminados = 0;
+    let tipos;
+    try {
+      tipos = await fs.promises.readdir(CACHE_DIR);
+    } catch (err) {
+      return 0;
+    }
+
+    for (const tipo of tipos) {
+      const directorio = path.join(CACHE_DIR, tipo);
+      const archivos = await fs.promises.readdir(directorio).catch(() => []);
+      for (const nombre of archivos) {
+        const archivo = path.join(directorio, nombre);
+        try {
+          const { mtimeMs } = await fs.promises.stat(archivo);
+          if (Date.now() - mtimeMs > CACHE_TTL_MS) {
+            await fs.promises.unlink(archivo);
+            eliminados++;
+          }
+        } catch (err) {
+          // Otro proceso lo eliminó o renombró
+        }
+      }
+    }
+    return eliminados;
+  }
+
+  /**
+   * Renderizar sin cache: en el pool, o en este hilo si PDF_WORKERS=0
+   *
+   * El renderizador recibe { generadoEn }, la fecha que imprime como generación: la del
+   * render, que es también la de la entrada de cache que sirve las descargas siguientes.
+   */
+  async ejecutar(tipo, datos) {
+    const generadoEn = new Date();
+
+    if (WORKERS <= 0) {
+      const inicio = Date.now();
+      try {
+        const pdf = await obtenerRenderizador(tipo)(datos, { generadoEn });
+        this.stats.renderizados++;
+        this.stats.renderMsTotal += Date.now() - inicio;
+        return pdf;
+      } catch (err) {
+        this.stats.errores++;
+        throw err;
+      }
+    }
+
+    if (this.cerrado) {
+      throw new AppError('El servicio de PDF se está cerrando', 503);
+    }
+    if (this.cola.length >= COLA_MAXIMA) {
+      this.stats.rechazados++;
+      throw new AppError('Hay demasiados PDF en generación, intente de nuevo en unos segundos', 503);
+    }
+
+    return new Promise((resolve, reject) => {
+      this.cola.push({ id: ++this.secuencia, tipo, datos, generadoEn, resolve, reject, encolado: Date.now() });
+      this.despachar();
+    });
+  }
+
+  despachar() {
+    while (this.cola.length > 0) {
+      const entrada = this.workers.find(w => !w.tarea)
+        || (this.workers.length < WORKERS ? this.crearWorker() : null);
+      if (!entrada) return;
+      this.asignar(entrada, this.cola.shift());
+    }
+  }
+
+  crearWorker() {
+    const entrada = { worker: new Worker(RUTA_WORKER), tarea: null, timer: null };
+    entrada.worker.on('message', mensaje => this.alTerminar(entrada, mensaje));
+    entrada.worker.on('error', err => this.retirar(entrada, err));
+    entrada.worker.on('exit', codigo => this.retirar(entrada, new Error(`El worker de PDF terminó con código ${codigo}`)));
+    // Un worker libre no mantiene vivo el proceso; uno ocupado sí (ver asignar)
+    entrada.worker.unref();
+    this.workers.push(entrada);
+    return entrada;
+  }
+
+  asignar(entrada, tarea) {
+    entrada.tarea = tarea;
+    entrada.worker.ref();
+    tarea.inicio = Date.now();
+    this.stats.esperaMsTotal += tarea.inicio - tarea.encolado;
+
+    entrada.timer = setTimeout(() => {
+      this.stats.timeouts++;
+      this.retirar(entrada, new AppError('La generación del PDF excedió el tiempo máximo', 504));
+      entrada.worker.terminate();
+    }, TIMEOUT_MS);
+
+    entrada.worker.postMessage({ id: tarea.id, tipo: tarea.tipo, datos: tarea.datos, generadoEn: tarea.generadoEn });
+  }
+
+  alTerminar(entrada, { id, pdf, error }) {
+    const tarea = entrada.tarea;
+    if (!tarea || tarea.id !== id) return;
+
+    clearTimeout(entrada.timer);
+    entrada.tarea = null;
+    entrada.worker.unref();
+
+    if (error) {
+      this.stats.errores++;
+      tarea.reject(new AppError(error.message, error.statusCode || 500));
+    } else {
+      this.stats.renderizados++;
+      this.stats.renderMsTotal += Date.now() - tarea.inicio;
+      tarea.resolve(Buffer.from(pdf.buffer, pdf.byteOffset, pdf.byteLength));
+    }
+
+    this.despachar();
+  }
+
+  /**
+   * Sacar un worker del pool (error, salida o timeout) y fallar su tarea en curso
+   */
+  retirar(entrada, err) {
+    const indice = this.workers.indexOf(entrada);
+    if (indice === -1) return;
+    this.workers.splice(indice, 1);
+    clearTimeout(entrada.timer);
+
+    if (entrada.tarea) {
+      if (!(err instanceof AppError)) this.stats.errores++;
+      entrada.tarea.reject(err);
+      entrada.tarea = null;
+    }
+
+    // Reemplazarlo si quedaron tareas esperando
+    if (!this.cerrado) this.despachar();
+  }
+
+  /**
+   * Terminar los workers al apagar el proceso
+   */
+  async cerrar() {
+    this.cerrado = true;
+    if (this.barrido) {
+      clearInterval(this.barrido);
+      this.barrido = null;
+    }
+
+    const pendientes = this.cola.splice(0);
+    pendientes.forEach(tarea => tarea.reject(new AppError('El servicio de PDF se está cerrando', 503)));
+
+    await Promise.all(this.workers.map(({ worker }) => worker.terminate()));
+  }
+
+  getStats() {
+    const { renderMsTotal, esperaMsTotal, ...contadores } = this.stats;
+    return {
+      ...contadores,
+      workers: { maximo: WORKERS, activos: this.workers.length, ocupados: this.workers.filter(w => w.tarea).length },
+      enCola: this.cola.length,
+      renderMsPromedio: contadores.renderizados ? Math.round(renderMsTotal / contadores.renderizados) : 0,
+      esperaMsPromedio: contadores.renderizados ? Math.round(esperaMsTotal / contadores.renderizados) : 0,
+    };
+  }
+}
+
+module.exports = new PdfRenderService();
@@ -0,0 +1,179 @@
+/**
+ * Cache en memoria de roles y permisos por usuario
+ *
+ * requirePermission/permissionMiddleware consultan los permisos del usuario en cada
+ * request (userRole -> role -> permissions -> permission). Este cache guarda el
+ * resultado por usuario con TTL y se invalida explícitamente desde RoleService.
+ *
+ * Para despliegues con varias instancias, cada invalidación se registra en la tabla
+ * permisos_invalidaciones y las demás instancias la leen por polling
+ * (PERMISOS_CACHE_SYNC_MS). Una invalidación con usuario_id NULL vacía todo el cache.
+ */
+const prisma = require('../db/prisma');
+
+const CACHE_TTL_MS = parseInt(process.env.PERMISOS_CACHE_TTL_MS || '60000', 10);
+const CACHE_MAX_ENTRADAS = parseInt(process.env.PERMISOS_CACHE_MAX || '10000', 10);
+const SYNC_INTERVAL_MS = parseInt(process.env.PERMISOS_CACHE_SYNC_MS || '5000', 10);
+const RETENCION_EVENTOS_MS = 60 * 60 * 1000; // 1 hora
+
+class PermisoCacheService {
+  constructor() {
+    this.entradas = new Map();
+    this.stats = { hits: 0, misses: 0, invalidaciones: 0, invalidacionesRemotas: 0 };
+    this.ultimoEventoId = null;
+    this.ultimaLimpieza = 0;
+    this.timer = null;
+  }
+
+  get habilitado() {
+    return CACHE_TTL_MS > 0;
+  }
+
+  /**
+   * Obtener roles/permisos del usuario desde el cache o con el loader
+   *
+   * @param {string} userId
+   * @param {Function} cargar - async () => { roles, permissions, expiraEn }
+   */
+  async obtener(userId, cargar) {
+    if (!this.habilitado) {
+      this.stats.misses++;
+      return cargar();
+    }
+
+    const entrada = this.entradas.get(userId);
+    if (entrada && entrada.expiraEn > Date.now()) {
+      this.stats.hits++;
+      return entrada.valor;
+    }
+
+    this.stats.misses++;
+    const version = entrada ? entrada.version : 0;
+    const valor = await cargar();
+
+    // Si se invalidó mientras se cargaba, no guardar un valor posiblemente viejo
+    const actual = this.entradas.get(userId);
+    if (actual && actual.version !== version) return valor;
+
+    // Un rol con expiresAt más cercano que el TTL acota la vida de la entrada
+    let expiraEn = Date.now() + CACHE_TTL_MS;
+    if (valor.expiraEn) expiraEn = Math.min(expiraEn, new Date(valor.expiraEn).getTime());
+
+    this.entradas.delete(userId);
+    this.entradas.set(userId, { valor, expiraEn, version });
+
+    if (this.entradas.size > CACHE_MAX_ENTRADAS) {
+      this.entradas.delete(this.entradas.keys().next().value);
+    }
+
+    return valor;
+  }
+
+  /**
+   * Invalidar el cache de un usuario (cambio de roles asignados)
+   */
+  async invalidarUsuario(userId) {
+    if (!userId) return;
+    this.invalidarLocal(userId);
+    await this.publicar(userId);
+  }
+
+  /**
+   * Invalidar todos los usuarios (cambio de permisos de un rol o eliminación de rol)
+   */
+  async invalidarTodo() {
+    this.invalidarLocal(null);
+    await this.publicar(null);
+  }
+
+  invalidarLocal(userId) {
+    if (userId) {
+      const entrada = this.entradas.get(userId);
+      // Marcar con una versión nueva para descartar cargas en curso
+      this.entradas.set(userId, { valor: null, expiraEn: 0, version: (entrada?.version || 0) + 1 });
+    } else {
+      for (const [key, entrada] of this.entradas) {
+        this.entradas.set(key, { valor: null, expiraEn: 0, version: entrada.version + 1 });
+      }
+    }
+    this.stats.invalidaciones++;
+  }
+
+  /**
+   * Registrar la invalidación para las demás instancias
+   */
+  async publicar(userId) {
+    try {
+      await prisma.permisoInvalidacion.create({ data: { usuarioId: userId } });
+    } catch (err) {
+      console.error('[PermisoCache] Error publicando invalidación:', err.message);
+    }
+  }
+
+  /**
+   * Aplicar invalidaciones registradas por otras instancias desde la última lectura
+   */
+  async sincronizar() {
+    if (this.ultimoEventoId === null) {
+      const ultimo = await prisma.permisoInvalidacion.findFirst({ orderBy: { id: 'desc' }, select: { id: true } });
+      this.ultimoEventoId = ultimo ? ultimo.id : BigInt(0);
+      return;
+    }
+
+    const eventos = await prisma.permisoInvalidacion.findMany({
+      where: { id: { gt: this.ultimoEventoId } },
+      orderBy: { id: 'asc' },
+      select: { id: true, usuarioId: true },
+    });
+
+    for (const evento of eventos) {
+      this.invalidarLocal(evento.usuarioId);
+      this.stats.invalidacionesRemotas++;
+      this.ultimoEventoId = evento.id;
+    }
+
+    if (Date.now() - this.ultimaLimpieza > RETENCION_EVENTOS_MS) {
+      this.ultimaLimpieza = Date.now();
+      await prisma.permisoInvalidacion.deleteMany({
+        where: { createdAt: { lt: new Date(Date.now() - RETENCION_EVENTOS_MS) } },
+      });
+    }
+  }
+
+  /**
+   * Iniciar el polling del canal de invalidaciones
+   */
+  iniciar() {
+    if (this.timer || !this.habilitado) return;
+
+    const ejecutar = () => this.sincronizar().catch((err) => {
+      console.error('[PermisoCache] Error sincronizando invalidaciones:', err.message);
+    });
+
+    ejecutar();
+    this.timer = setInterval(ejecutar, SYNC_INTERVAL_MS);
+    this.timer.unref();
+    console.log(`✓ Cache de permisos iniciado (TTL ${CACHE_TTL_MS}ms, sync ${SYNC_INTERVAL_MS}ms)`);
+  }
+
+  detener() {
+    if (this.timer) clearInterval(this.timer);
+    this.timer = null;
+  }
+
+  limpiar() {
+    this.entradas.clear();
+  }
+
+  getStats() {
+    const total = this.stats.hits + this.stats.misses;
+    return {
+      ...this.stats,
+      hitRate: total ? Math.round((this.stats.hits / total) * 1000) / 1000 : 0,
+      entradas: this.entradas.size,
+      ttlMs: CACHE_TTL_MS,
+    };
+  }
+}
+
+module.exports = new PermisoCacheService();
@@ -4,6 +4,7 @@
 
 const PDFDocument = require('pdfkit');
 const prisma = require('../db/prisma');
+const pdfRenderService = require('./pdfRender.service');
 const { format } = require('date-fns');
 
 // Intentar cargar locale español, fallback a undefined si no está disponible
@@ -16,7 +17,7 @@ try {
 
 class ProcedimientoPdfService {
   /**
-   * Generar PDF de Bitácora Quirúrgica
+   * Generar PDF de Bitácora Quirúrgica (en el pool de PDFs, con cache por contenido)
    */
   async generarBitacoraPdf(procedimientoId) {
     const procedimiento = await prisma.procedimiento.findUnique({
@@ -35,6 +36,15 @@ class ProcedimientoPdfService {
       throw new Error('Procedimiento no encontrado');
     }
 
+    return pdfRenderService.renderizar('procedimientoBitacora', procedimiento);
+  }
+
+  /**
+   * Dibujar la Bitácora Quirúrgica de un procedimiento ya consultado (worker de PDFs)
+   * @param {Object} [contexto]
+   * @param {Date} [contexto.generadoEn] - Fecha de generación que se imprime
+   */
+  async renderizarBitacoraPdf(procedimiento, { generadoEn = new Date() } = {}) {
     const doc = new PDFDocument({ margin: 50, size: 'LETTER' });
     const chunks = [];
 
@@ -132,7 +142,7 @@ class ProcedimientoPdfService {
     }
 
     // Footer
-    this._addFooter(doc, procedimiento);
+    this._addFooter(doc, procedimiento, generadoEn);
 
     doc.end();
 
@@ -144,7 +154,7 @@ class ProcedimientoPdfService {
   }
 
   /**
-   * Generar PDF del Protocolo Quirúrgico (para cirugías completadas)
+   * Generar PDF del Protocolo Quirúrgico (para cirugías completadas, en el pool de PDFs)
    */
   async generarProtocoloPdf(procedimientoId) {
     const procedimiento = await prisma.procedimiento.findUnique({
@@ -167,6 +177,15 @@ class ProcedimientoPdfService {
       throw new Error('El protocolo quirúrgico solo se puede generar para procedimientos completados');
     }
 
+    return pdfRenderService.renderizar('procedimientoProtocolo', procedimiento);
+  }
+
+  /**
+   * Dibujar el Protocolo Quirúrgico de un procedimiento ya consultado (worker de PDFs)
+   * @param {Object} [contexto]
+   * @param {Date} [contexto.generadoEn] - Fecha de generación que se imprime
+   */
+  async renderizarProtocoloPdf(procedimiento, { generadoEn = new Date() } = {}) {
     const doc = new PDFDocument({ margin: 50, size: 'LETTER' });
     const chunks = [];
 
@@ -184,7 +203,7 @@ class ProcedimientoPdfService {
     doc.text(`Nombre Completo: ${paciente.nombre} ${paciente.apellido}`);
     doc.text(`Identificación: ${paciente.tipoDocumento || 'CC'} ${paciente.cedula}`);
     doc.text(`Fecha Nacimiento: ${paciente.fechaNacimiento ? format(new Date(paciente.fechaNacimiento), 'dd/MM/yyyy') : 'N/A'}`);
-    doc.text(`Edad: ${paciente.fechaNacimiento ? this._calcularEdad(paciente.fechaNacimiento) + ' años' : 'N/A'}`);
+    doc.text(`Edad: ${paciente.fechaNacimiento ? this._calcularEdad(paciente.fechaNacimiento, generadoEn) + ' años' : 'N/A'}`);
     doc.text(`Género: ${paciente.genero || 'N/A'}`);
     doc.moveDown();
 
@@ -325,10 +344,10 @@ class ProcedimientoPdfService {
     doc.text('_________________________________');
     const medicoFirma = procedimiento.medicoFirma || procedimiento.medicoResponsable;
     doc.text(`${medicoFirma ? `Dr(a). ${medicoFirma.nombre} ${medicoFirma.apellido}` : 'Médico Responsable'}`);
-    doc.text(`Fecha de Firma: ${procedimiento.fechaFirma ? format(new Date(procedimiento.fechaFirma), 'dd/MM/yyyy HH:mm') : format(new Date(), 'dd/MM/yyyy HH:mm')}`);
+    doc.text(`Fecha de Firma: ${procedimiento.fechaFirma ? format(new Date(procedimiento.fechaFirma), 'dd/MM/yyyy HH:mm') : format(generadoEn, 'dd/MM/yyyy HH:mm')}`);
 
     // Footer
-    this._addFooter(doc, procedimiento);
+    this._addFooter(doc, procedimiento, generadoEn);
 
     doc.end();
 
@@ -349,19 +368,18 @@ class ProcedimientoPdfService {
     doc.moveDown();
   }
 
-  _addFooter(doc, procedimiento) {
+  _addFooter(doc, procedimiento, generadoEn) {
     const bottomY = doc.page.height - 50;
     doc.fontSize(8).font('Helvetica');
     doc.text(
-      `Generado el ${format(new Date(), 'dd/MM/yyyy HH:mm')} - ID: ${procedimiento.id}`,
+      `Generado el ${format(generadoEn, 'dd/MM/yyyy HH:mm')} - ID: ${procedimiento.id}`,
       50,
       bottomY,
       { align: 'center', width: doc.page.width - 100 }
     );
   }
 
-  _calcularEdad(fechaNacimiento) {
-    const hoy = new Date();
+  _calcularEdad(fechaNacimiento, hoy = new Date()) {
     const nacimiento = new Date(fechaNacimiento);
     let edad = hoy.getFullYear() - nacimiento.getFullYear();
     const mes = hoy.getMonth() - nacimiento.getMonth();
@@ -4,7 +4,10 @@
 const prisma = require('../db/prisma');
 const { ValidationError, NotFoundError } = require('../utils/errors');
 const { createProductoSchema, updateProductoSchema } = require('../validators/producto.schema');
-const { removeAccents } = require('../utils/validators');
+const { removeAccents, escapeLike } = require('../utils/validators');
+const importacionProductosService = require('./importacionProductos.service');
+const interaccionesService = require('./interaccionesMedicamentos.service');
+const { huellaDeModelos } = require('../utils/huella');
 
 // Siigo integration for product synchronization
 let productSiigoService = null;
@@ -22,110 +25,92 @@ const getSiigoServices = () => {
   return { productSiigoService, siigoService };
 };
 
+// Términos que parecen códigos (SKU, CUM, código de barras, ATC): sin espacios y con algún dígito
+const CODIGO_REGEX = /^(?=.*\d)[A-Za-z0-9][A-Za-z0-9\-_./]*$/;
+
+const parseBooleanFilter = (valor) => {
+  if (valor === undefined || valor === null || valor === '') return undefined;
+  return valor === 'true' || valor === true;
+};
+
+/**
+ * Agregar los filtros opcionales a una consulta raw, extendiendo la lista de parámetros
+ */
+const buildFiltrosSQL = (filtros, params) => {
+  let sql = '';
+  const columnas = [
+    ['activo', 'p.activo'],
+    ['controlado', 'p.controlado'],
+    ['requiereReceta', 'p.requiere_receta'],
+    ['categoriaId', 'p.categoria_id'],
+  ];
+
+  for (const [campo, columna] of columnas) {
+    if (filtros[campo] === undefined || filtros[campo] === null || filtros[campo] === '') continue;
+    params.push(filtros[campo]);
+    sql += ` AND ${columna} = $${params.length}`;
+  }
+
+  return sql;
+};
+
 class ProductoService {
+  /**
+   * Huella del listado de productos para GET condicional
+   * El listado trae categoría y lotes de cada producto
+   */
+  async getHuella() {
+    return huellaDeModelos([
+      { modelo: 'producto' },
+      { modelo: 'categoriaProducto' },
+      { modelo: 'loteProducto' },
+    ]);
+  }
+
   /**
    * Obtener todos los medicamentos con filtros y búsqueda
    */
-  async getAll({ 
-    page = 1, 
-    limit = 50, 
-    search, 
+  async getAll(params) {
+    const { productos } = await this.buscar(params);
+
+    // Retornar solo el array para mantener compatibilidad con frontend existente
+    // TODO: Migrar a respuesta paginada { data, total } en v2
+    return productos;
+  }
+
+  /**
+   * Buscar medicamentos con filtros, devolviendo la página y el total
+   *
+   * @returns {Promise<{productos: Array, total: number}>}
+   */
+  async buscar({
+    page = 1,
+    limit = 50,
+    search,
     activo,
     controlado,
     requiereReceta,
     categoriaId
   }) {
-    const skip = (parseInt(page) - 1) * parseInt(limit);
+    const take = parseInt(limit);
+    const skip = (parseInt(page) - 1) * take;
+    const filtros = {
+      activo: parseBooleanFilter(activo),
+      controlado: parseBooleanFilter(controlado),
+      requiereReceta: parseBooleanFilter(requiereReceta),
+      categoriaId,
+    };
 
     const where = {};
 
-    // Filtro de búsqueda (nombre, principio activo, ATC, CUM)
-    // Incluye búsqueda normalizada (sin acentos) para mejor experiencia de usuario
+    // Filtro de búsqueda (nombre, principio activo, ATC, CUM, SKU, código de barras)
+    // Insensible a acentos: "acido" encuentra "Ácido"
     if (search) {
-      // Normalizar el término de búsqueda (quitar acentos)
-      const searchNormalized = removeAccents(search).toLowerCase();
-      const searchPattern = `%${searchNormalized}%`;
-
-      // Usar búsqueda SQL raw con unaccent para insensibilidad a acentos
-      // Esto permite buscar "acido" y encontrar "Ácido"
       try {
-        const medicamentos = await prisma.$queryRawUnsafe(`
-          SELECT p.*, c.nombre as categoria_nombre, c.color as categoria_color
-          FROM productos p
-          LEFT JOIN categorias_productos c ON p.categoria_id = c.id
-          WHERE (
-            unaccent(lower(p.nombre)) LIKE $1
-            OR unaccent(lower(COALESCE(p.principio_activo, ''))) LIKE $1
-            OR unaccent(lower(COALESCE(p.descripcion, ''))) LIKE $1
-            OR lower(COALESCE(p.codigo_atc, '')) LIKE $1
-            OR lower(COALESCE(p.cum, '')) LIKE $1
-            OR lower(COALESCE(p.sku, '')) LIKE $1
-          )
-          ORDER BY p.nombre ASC
-          LIMIT $2
-          OFFSET $3
-        `, searchPattern, parseInt(limit), skip);
-
-        // Transformar resultados al formato esperado
-        return medicamentos.map(p => ({
-          id: p.id,
-          nombre: p.nombre,
-          sku: p.sku,
-          codigoBarras: p.codigo_barras,
-          descripcion: p.descripcion,
-          laboratorio: p.laboratorio,
-
-          // Información Farmacológica
-          principioActivo: p.principio_activo,
-          concentracion: p.concentracion,
-          formaFarmaceutica: p.forma_farmaceutica,
-          unidadMedida: p.unidad_medida,
-          viaAdministracion: p.via_administracion,
-          presentacion: p.presentacion,
-          codigoAtc: p.codigo_atc,
-          cum: p.cum,
-          registroSanitario: p.registro_sanitario,
-
-          // Control y Regulación
-          requiereReceta: p.requiere_receta,
-          controlado: p.controlado,
-          tipoControlado: p.tipo_controlado,
-
-          // Almacenamiento
-          temperaturaAlmacenamiento: p.temperatura_almacenamiento,
-          requiereCadenaFrio: p.requiere_cadena_frio,
-          ubicacionAlmacen: p.ubicacion_almacen,
-
-          // Inventario
-          cantidadTotal: p.cantidad_total,
-          cantidadConsumida: p.cantidad_consumida,
-          cantidadMinAlerta: p.cantidad_min_alerta,
-          cantidadMaxAlerta: p.cantidad_max_alerta,
-          lote: p.lote,
-          fechaVencimiento: p.fecha_vencimiento,
-
-          // Precios
-          precioVenta: p.precio_venta ? parseFloat(p.precio_venta) : 0,
-          precioCompra: p.precio_compra ? parseFloat(p.precio_compra) : null,
-          costoPromedio: p.costo_promedio ? parseFloat(p.costo_promedio) : null,
-          margenGanancia: p.margen_ganancia ? parseFloat(p.margen_ganancia) : null,
-
-          // Estado e Integración
-          activo: p.activo,
-          imagenUrl: p.imagen_url,
-          siigoId: p.siigo_id,
-          categoriaId: p.categoria_id,
-          categoria: p.categoria_nombre ? {
-            id: p.categoria_id,
-            nombre: p.categoria_nombre,
-            colorHex: p.categoria_color
-          } : null,
-          createdAt: p.created_at,
-          updatedAt: p.updated_at
-        }));
+        return await this.buscarIndexado(search.trim(), filtros, take, skip);
       } catch (e) {
-        // Si falla la búsqueda con unaccent (extensión no instalada), usar búsqueda estándar
-        console.warn('[Producto] Busqueda con unaccent fallo, usando busqueda estandar:', e.message);
+        // Si la migración de búsqueda no está aplicada (pg_trgm / search_text), usar búsqueda estándar
+        console.warn('[Producto] Busqueda indexada fallo, usando busqueda estandar:', e.message);
 
         where.OR = [
           { nombre: { contains: search, mode: 'insensitive' } },
@@ -138,16 +123,16 @@ class ProductoService {
       }
     }
 
-    if (activo !== undefined) where.activo = activo === 'true' || activo === true;
-    if (controlado !== undefined) where.controlado = controlado === 'true' || controlado === true;
-    if (requiereReceta !== undefined) where.requiereReceta = requiereReceta === 'true' || requiereReceta === true;
+    if (filtros.activo !== undefined) where.activo = filtros.activo;
+    if (filtros.controlado !== undefined) where.controlado = filtros.controlado;
+    if (filtros.requiereReceta !== undefined) where.requiereReceta = filtros.requiereReceta;
     if (categoriaId) where.categoriaId = categoriaId;
 
     const [medicamentos, total] = await Promise.all([
       prisma.producto.findMany({
         where,
         skip,
-        take: parseInt(limit),
+        take,
         orderBy: { nombre: 'asc' },
         include: {
           categoria: true,
@@ -161,54 +146,121 @@ class ProductoService {
       prisma.producto.count({ where }),
     ]);
 
-    // Retornar solo el array para mantener compatibilidad con frontend existente
-    // TODO: Migrar a respuesta paginada { data, total } en v2
-    return medicamentos;
+    return { productos: medicamentos, total };
   }
 
   /**
-   * Obtener estadísticas de productos
+   * Búsqueda sobre la columna normalizada search_text (índice GIN de trigramas)
+   *
+   * 1. Si el término parece un código (sin espacios y con dígitos) se intenta primero
+   *    una coincidencia exacta por SKU, CUM, código de barras o ATC (índices btree).
+   * 2. Si no, LIKE '%término%' sobre search_text, ordenado por coincidencia de prefijo
+   *    en el nombre y luego por similitud de palabra.
    */
-  async getStats() {
-    const [total, activos, inactivos, requierenReceta, todosProductos] = await Promise.all([
-      prisma.producto.count(),
-      prisma.producto.count({ where: { activo: true } }),
-      prisma.producto.count({ where: { activo: false } }),
-      prisma.producto.count({ where: { requiereReceta: true } }),
-      prisma.producto.findMany({
-          select: {
-              cantidadTotal: true,
-              cantidadConsumida: true,
-              cantidadMinAlerta: true,
-              precioVenta: true,
-              activo: true
-          }
-      })
+  async buscarIndexado(search, filtros, take, skip) {
+    if (CODIGO_REGEX.test(search)) {
+      const params = [search];
+      const condiciones = buildFiltrosSQL(filtros, params);
+      const filtroSQL = `(
+          p.sku = $1 OR p.sku = upper($1)
+          OR p.cum = $1
+          OR p.codigo_barras = $1
+          OR p.codigo_atc = upper($1)
+        )${condiciones}`;
+      const n = params.length;
+
+      // Un código ATC puede coincidir con miles de productos: paginar en la BD
+      const [exactos, conteoExactos] = await Promise.all([
+        prisma.$queryRawUnsafe(`
+          SELECT p.*, c.nombre as categoria_nombre, c.color as categoria_color
+          FROM productos p
+          LEFT JOIN categorias_productos c ON p.categoria_id = c.id
+          WHERE ${filtroSQL}
+          ORDER BY p.nombre ASC
+          LIMIT $${n + 1}
+          OFFSET $${n + 2}
+        `, ...params, take, skip),
+        prisma.$queryRawUnsafe(`
+          SELECT COUNT(*)::int AS total
+          FROM productos p
+          WHERE ${filtroSQL}
+        `, ...params),
+      ]);
+
+      const totalExactos = conteoExactos[0]?.total || 0;
+      if (totalExactos > 0) {
+        return {
+          productos: exactos.map(mapRawProducto),
+          total: totalExactos,
+        };
+      }
+    }
+
+    const termino = removeAccents(search).toLowerCase();
+    const terminoLike = escapeLike(termino);
+    const params = [`%${terminoLike}%`];
+    const condiciones = buildFiltrosSQL(filtros, params);
+    const filtroSQL = `p.search_text LIKE $1${condiciones}`;
+
+    const paramsPagina = [...params, `${terminoLike}%`, termino, take, skip];
+    const n = params.length;
+
+    const [medicamentos, conteo] = await Promise.all([
+      prisma.$queryRawUnsafe(`
+        SELECT p.*, c.nombre as categoria_nombre, c.color as categoria_color
+        FROM productos p
+        LEFT JOIN categorias_productos c ON p.categoria_id = c.id
+        WHERE ${filtroSQL}
+        ORDER BY
+          (p.nombre_normalizado LIKE $${n + 1}) DESC,
+          word_similarity($${n + 2}, p.search_text) DESC,
+          p.nombre ASC
+        LIMIT $${n + 3}
+        OFFSET $${n + 4}
+      `, ...paramsPagina),
+      prisma.$queryRawUnsafe(`
+        SELECT COUNT(*)::int AS total
+        FROM productos p
+        WHERE ${filtroSQL}
+      `, ...params),
     ]);
 
-    let bajoStock = 0;
-    let valorInventario = 0;
+    return {
+      productos: medicamentos.map(mapRawProducto),
+      total: conteo[0]?.total || 0,
+    };
+  }
 
-    todosProductos.forEach(p => {
-        if (p.activo) {
-            const disponible = p.cantidadTotal - p.cantidadConsumida;
-            if (disponible < p.cantidadMinAlerta) {
-                bajoStock++;
-            }
-            if (disponible > 0) {
-                valorInventario += (disponible * p.precioVenta);
-            }
-        }
-    });
+  /**
+   * Obtener estadísticas de productos
+   */
+  async getStats() {
+    // Un único recorrido agregado en la BD en lugar de traer todo el inventario a Node
+    const [fila] = await prisma.$queryRaw`
+      SELECT
+        COUNT(*)::int AS total,
+        COUNT(*) FILTER (WHERE activo = true)::int AS activos,
+        COUNT(*) FILTER (WHERE activo = false)::int AS inactivos,
+        COUNT(*) FILTER (WHERE requiere_receta = true)::int AS requieren_receta,
+        COUNT(*) FILTER (
+          WHERE activo = true AND (cantidad_total - cantidad_consumida) < cantidad_min_alerta
+        )::int AS bajo_stock,
+        COALESCE(SUM((cantidad_total - cantidad_consumida) * COALESCE(precio_venta, 0)) FILTER (
+          WHERE activo = true AND (cantidad_total - cantidad_consumida) > 0
+        ), 0)::float8 AS valor_inventario
+      FROM productos
+    `;
+
+    const requierenReceta = fila.requieren_receta;
 
     return {
-      total,
-      activos,
-      inactivos,
-      bajoStock,
+      total: fila.total,
+      activos: fila.activos,
+      inactivos: fila.inactivos,
+      bajoStock: fila.bajo_stock,
       requiereReceta: requierenReceta, // Fixed key name to match frontend expectation (requierenReceta vs requiereReceta)
       requierenReceta, // Keeping both just in case
-      valorInventario
+      valorInventario: fila.valor_inventario
     };
   }
 
@@ -266,6 +318,8 @@ class ProductoService {
       data: validatedData,
     });
 
+    this.reindexarInteraccionesAsync(producto, { principioCambio: Boolean(producto.principioActivo) });
+
     // Sincronizar con Siigo de forma asíncrona
     this.syncProductoConSiigoAsync(producto.id).catch(err => {
       console.error(`[Producto] Error sincronizando producto ${producto.id} con Siigo:`, err.message);
@@ -278,7 +332,7 @@ class ProductoService {
    * Actualizar producto/medicamento
    */
   async update(id, data) {
-    await this.getById(id); // Verificar existencia
+    const anterior = await this.getById(id); // Verificar existencia
 
     // Validar datos con Zod (partial)
     const validatedData = updateProductoSchema.parse(data);
@@ -301,6 +355,11 @@ class ProductoService {
       data: validatedData,
     });
 
+    const principioCambio = (updated.principioActivo || null) !== (anterior.principioActivo || null);
+    if (principioCambio || updated.descripcion !== anterior.descripcion || updated.nombre !== anterior.nombre) {
+      this.reindexarInteraccionesAsync(updated, { principioCambio });
+    }
+
     // Sincronizar con Siigo de forma asíncrona
     this.syncProductoConSiigoAsync(updated.id).catch(err => {
       console.error(`[Producto] Error sincronizando actualización de producto ${updated.id} con Siigo:`, err.message);
@@ -334,6 +393,7 @@ class ProductoService {
 
   /**
    * Verificar interacciones medicamentosas
+   * Consulta el índice por pares de principios activos (ver interaccionesMedicamentos.service)
    */
   async verificarInteracciones(medicamentosIds) {
     const medicamentos = await prisma.producto.findMany({
@@ -344,34 +404,20 @@ class ProductoService {
         id: true,
         nombre: true,
         principioActivo: true,
-        descripcion: true,
       },
     });
 
-    const alertas = [];
-
-    // Verificar interacciones entre los medicamentos
-    for (let i = 0; i < medicamentos.length; i++) {
-      for (let j = i + 1; j < medicamentos.length; j++) {
-        const med1 = medicamentos[i];
-        const med2 = medicamentos[j];
-
-        // Verificar si med1 tiene interacciones con med2 (basado en descripción)
-        if (med1.descripcion && med2.principioActivo) {
-          if (med1.descripcion.toLowerCase().includes('interaccion') &&
-              med1.descripcion.toLowerCase().includes(med2.principioActivo.toLowerCase())) {
-            alertas.push({
-              tipo: 'interaccion',
-              medicamento1: med1.nombre,
-              medicamento2: med2.nombre,
-              mensaje: `Posible interacción entre ${med1.nombre} y ${med2.nombre}`,
-            });
-          }
-        }
-      }
-    }
+    if (medicamentos.length < 2) return [];
+    return interaccionesService.buscar(medicamentos);
+  }
 
-    return alertas;
+  /**
+   * Actualizar el índice de interacciones sin bloquear la operación principal
+   */
+  reindexarInteraccionesAsync(producto, opciones) {
+    interaccionesService.reindexarProducto(producto.id, opciones).catch(err => {
+      console.error(`[Producto] Error actualizando interacciones del producto ${producto.id}:`, err.message);
+    });
   }
 
   /**
@@ -480,82 +526,27 @@ class ProductoService {
       }
     }
 
+    interaccionesService.programarReconstruccion();
     return resultados;
   }
 
   /**
    * Importar medicamentos desde contenido CSV
+   *
+   * Usa el mismo pipeline en streaming que las importaciones por archivo
+   * (ver importacionProductos.service) y espera a que termine.
    */
   async importFromCSV(csvContent, categoriaId = null) {
-    const lines = csvContent.split('\n');
-    const header = lines[0].split(',').map(h => h.trim().toLowerCase());
-    
-    const resultados = {
-      procesados: 0,
-      creados: 0,
-      actualizados: 0,
-      errores: 0
-    };
-
-    // Obtener categoría por defecto si no se pasa una
-    if (!categoriaId) {
-      const cat = await prisma.categoriaProducto.findFirst({ where: { nombre: 'Importados' } });
-      if (cat) categoriaId = cat.id;
-      else {
-        const newCat = await prisma.categoriaProducto.create({
-          data: { nombre: 'Importados', color: '#10b981' }
-        });
-        categoriaId = newCat.id;
-      }
-    }
-
-    for (let i = 1; i < lines.length; i++) {
-      if (!lines[i].trim()) continue;
-      
-      try {
-        resultados.procesados++;
-        const values = lines[i].split(',').map(v => v.trim());
-        const data = {};
-        
-        header.forEach((key, index) => {
-          data[key] = values[index];
-        });
-
-        // Mapeo básico de campos comunes en CSV
-        const sku = data.sku || data.codigo || `CSV-${Date.now()}-${i}`;
-        const finalData = {
-          nombre: (data.nombre || data.producto || 'Sin Nombre').trim().toUpperCase(),
-          sku: sku,
-          categoriaId: categoriaId,
-          principioActivo: data.principio_activo || data.principioactivo || null,
-          codigoAtc: data.codigo_atc || data.atc || null,
-          cum: data.cum || null,
-          concentracion: data.concentracion || null,
-          presentacion: data.presentacion || data.forma_farmaceutica || null,
-          laboratorio: data.laboratorio || null,
-          registroSanitario: data.registro_sanitario || data.invima || null,
-          precioVenta: parseFloat(data.precio_venta || data.precio || 0),
-          cantidadTotal: parseInt(data.cantidad || data.stock || 0),
-          cantidadMinAlerta: parseInt(data.stock_minimo || 5),
-          activo: true
-        };
-
-        const existing = await prisma.producto.findUnique({ where: { sku } });
-
-        if (existing) {
-          await prisma.producto.update({ where: { id: existing.id }, data: finalData });
-          resultados.actualizados++;
-        } else {
-          await prisma.producto.create({ data: finalData });
-          resultados.creados++;
-        }
-      } catch (err) {
-        console.error(`Error en línea ${i}:`, err.message);
-        resultados.errores++;
-      }
-    }
+    const job = await importacionProductosService.crearDesdeTexto(csvContent, { categoriaId });
+    const resultado = await importacionProductosService.iniciar(job.id);
 
-    return resultados;
+    return {
+      jobId: resultado.id,
+      procesados: resultado.filasProcesadas,
+      creados: resultado.creados,
+      actualizados: resultado.actualizados,
+      errores: resultado.errores
+    };
   }
 
   // =============================================
@@ -695,12 +686,11 @@ class ProductoService {
       return { hayAlergias: false, alergias: [] };
     }
 
-    // Normalizar alergias del paciente
-    const alergiasNormalizadas = paciente.alergias
-      .toLowerCase()
+    // Normalizar alergias del paciente (sin tildes, como el índice de interacciones)
+    const alergiasNormalizadas = [...new Set(paciente.alergias
       .split(/[,;]/)
-      .map(a => a.trim())
-      .filter(a => a.length > 0);
+      .map(a => interaccionesService.normalizarTexto(a))
+      .filter(a => a.length > 0))];
 
     if (alergiasNormalizadas.length === 0) {
       return { hayAlergias: false, alergias: [] };
@@ -717,17 +707,16 @@ class ProductoService {
       }
     });
 
-    // Verificar si algún medicamento coincide con las alergias
+    // Verificar si algún medicamento coincide con las alergias: un solo texto normalizado
+    // por medicamento (nombre, principio activo y descripción)
     const alertas = [];
     for (const med of medicamentos) {
-      const nombreLower = (med.nombre || '').toLowerCase();
-      const principioLower = (med.principioActivo || '').toLowerCase();
-      const descripcionLower = (med.descripcion || '').toLowerCase();
+      const texto = [med.nombre, med.principioActivo, med.descripcion]
+        .map(v => interaccionesService.normalizarTexto(v))
+        .join('\n');
 
       for (const alergia of alergiasNormalizadas) {
-        if (nombreLower.includes(alergia) ||
-            principioLower.includes(alergia) ||
-            descripcionLower.includes(alergia)) {
+        if (texto.includes(alergia)) {
           alertas.push({
             medicamentoId: med.id,
             medicamentoNombre: med.nombre,
@@ -745,4 +734,66 @@ class ProductoService {
   }
 }
 
+/**
+ * Transformar una fila raw (snake_case) al formato de Prisma esperado por el frontend
+ */
+function mapRawProducto(p) {
+  return {
+    id: p.id,
+    nombre: p.nombre,
+    sku: p.sku,
+    codigoBarras: p.codigo_barras,
+    descripcion: p.descripcion,
+    laboratorio: p.laboratorio,
+
+    // Información Farmacológica
+    principioActivo: p.principio_activo,
+    concentracion: p.concentracion,
+    formaFarmaceutica: p.forma_farmaceutica,
+    unidadMedida: p.unidad_medida,
+    viaAdministracion: p.via_administracion,
+    presentacion: p.presentacion,
+    codigoAtc: p.codigo_atc,
+    cum: p.cum,
+    registroSanitario: p.registro_sanitario,
+
+    // Control y Regulación
+    requiereReceta: p.requiere_receta,
+    controlado: p.controlado,
+    tipoControlado: p.tipo_controlado,
+
+    // Almacenamiento
+    temperaturaAlmacenamiento: p.temperatura_almacenamiento,
+    requiereCadenaFrio: p.requiere_cadena_frio,
+    ubicacionAlmacen: p.ubicacion_almacen,
+
+    // Inventario
+    cantidadTotal: p.cantidad_total,
+    cantidadConsumida: p.cantidad_consumida,
+    cantidadMinAlerta: p.cantidad_min_alerta,
+    cantidadMaxAlerta: p.cantidad_max_alerta,
+    lote: p.lote,
+    fechaVencimiento: p.fecha_vencimiento,
+
+    // Precios
+    precioVenta: p.precio_venta ? parseFloat(p.precio_venta) : 0,
+    precioCompra: p.precio_compra ? parseFloat(p.precio_compra) : null,
+    costoPromedio: p.costo_promedio ? parseFloat(p.costo_promedio) : null,
+    margenGanancia: p.margen_ganancia ? parseFloat(p.margen_ganancia) : null,
+
+    // Estado e Integración
+    activo: p.activo,
+    imagenUrl: p.imagen_url,
+    siigoId: p.siigo_id,
+    categoriaId: p.categoria_id,
+    categoria: p.categoria_nombre ? {
+      id: p.categoria_id,
+      nombre: p.categoria_nombre,
+      colorHex: p.categoria_color
+    } : null,
+    createdAt: p.created_at,
+    updatedAt: p.updated_at
+  };
+}
+
 module.exports = new ProductoService();
@@ -12,6 +12,7 @@
  * Un cron job limpia las reservas expiradas cada minuto.
  */
 const prisma = require('../db/prisma');
+const disponibilidadCache = require('./disponibilidadCache.service');
 const { ValidationError, NotFoundError } = require('../utils/errors');
 const { addMinutes, isBefore, isAfter } = require('date-fns');
 
@@ -148,6 +149,8 @@ class ReservaService {
         });
       });
 
+      disponibilidadCache.invalidarDia(doctorId, fecha);
+
       return {
         ...reserva,
         expiresIn: RESERVA_EXPIRACION_MINUTOS * 60, // segundos restantes
@@ -224,6 +227,8 @@ class ReservaService {
         return cita;
       });
 
+      disponibilidadCache.invalidarDia(reserva.doctorId, reserva.fecha);
+
       return resultado;
     } catch (error) {
       // Si falla la creación de la cita, la reserva sigue activa
@@ -258,6 +263,8 @@ class ReservaService {
       where: { id: reservaId }
     });
 
+    disponibilidadCache.invalidarDia(reserva.doctorId, reserva.fecha);
+
     return { message: 'Reserva liberada exitosamente' };
   }
 
@@ -372,6 +379,8 @@ class ReservaService {
       data: { expiresAt: nuevoExpiresAt }
     });
 
+    disponibilidadCache.invalidarDia(reserva.doctorId, reserva.fecha);
+
     return {
       ...reservaActualizada,
       expiresIn: minutosExtension * 60,
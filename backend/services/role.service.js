@@ -1,5 +1,6 @@
 const prisma = require('../db/prisma');
 const auditService = require('./audit.service');
+const permisoCache = require('./permisoCache.service');
 
 class RoleService {
   async getAll() {
@@ -93,6 +94,8 @@ class RoleService {
       data: updateData
     });
 
+    await permisoCache.invalidarTodo();
+
     await auditService.log({
       userId: actorId,
       action: 'UPDATE_ROLE',
@@ -119,6 +122,7 @@ class RoleService {
     }
 
     await prisma.role.delete({ where: { id } });
+    await permisoCache.invalidarTodo();
 
     await auditService.log({
       userId: actorId,
@@ -157,6 +161,8 @@ class RoleService {
       });
     }
 
+    await permisoCache.invalidarUsuario(userId);
+
     await auditService.log({
       userId: assignerId,
       action: 'ASSIGN_ROLE',
@@ -181,6 +187,8 @@ class RoleService {
       });
     }
 
+    await permisoCache.invalidarUsuario(userId);
+
     await auditService.log({
       userId: actorId,
       action: 'REMOVE_ROLE',
@@ -217,11 +225,24 @@ class RoleService {
       });
     });
 
+    // Próxima expiración de un rol activo (acota el TTL del cache de permisos)
+    const expiraEn = activeRoles
+      .filter(ur => ur.expiresAt)
+      .reduce((min, ur) => (!min || ur.expiresAt < min ? ur.expiresAt : min), null);
+
     return {
       roles: activeRoles.map(ur => ur.role),
-      permissions: Array.from(permissions)
+      permissions: Array.from(permissions),
+      expiraEn
     };
   }
+
+  /**
+   * Roles y permisos del usuario desde el cache en memoria (usado por los middlewares)
+   */
+  async getUserRolesCached(userId) {
+    return permisoCache.obtener(userId, () => this.getUserRoles(userId));
+  }
 }
 
 module.exports = new RoleService();
@@ -3,15 +3,35 @@
  */
 const prisma = require('../db/prisma');
 const { ValidationError, NotFoundError } = require('../utils/errors');
+const { paginar } = require('../utils/pagination');
 const auditoriaService = require('./auditoria.service');
 
+// Series disponibles para gráficas: tipo -> columnas (campo camelCase, columna SQL)
+const SERIES_SIGNOS = {
+  temperatura: [['temperatura', 'temperatura']],
+  presion: [['presionSistolica', 'presion_sistolica'], ['presionDiastolica', 'presion_diastolica']],
+  frecuenciaCardiaca: [['frecuenciaCardiaca', 'frecuencia_cardiaca']],
+  frecuenciaRespiratoria: [['frecuenciaRespiratoria', 'frecuencia_respiratoria']],
+  saturacionOxigeno: [['saturacionOxigeno', 'saturacion_oxigeno']],
+  peso: [['peso', 'peso']],
+};
+
+// Alias aceptados en ?tipo / ?tipos
+const ALIAS_SERIES = {
+  frecuencia: 'frecuenciaCardiaca',
+  saturacion: 'saturacionOxigeno',
+};
+
+const MAX_PUNTOS_DEFAULT = 300;
+const MAX_PUNTOS_LIMITE = 2000;
+const UNIDADES_RESOLUCION = { m: 60, h: 3600, d: 86400 };
+
 class SignosVitalesService {
   /**
    * Obtener signos vitales con filtros
+   * Paginación por page/limit o por cursor sobre (fecha, id), ver utils/pagination
    */
-  async getAll({ page = 1, limit = 50, paciente_id, admision_id, fecha_desde, fecha_hasta }) {
-    const skip = (parseInt(page) - 1) * parseInt(limit);
-
+  async getAll({ page, limit, cursor, con_total, paciente_id, admision_id, fecha_desde, fecha_hasta }) {
     const where = {};
     if (paciente_id) where.pacienteId = paciente_id;
     if (admision_id) where.admisionId = admision_id;
@@ -24,41 +44,30 @@ class SignosVitalesService {
 
     console.log('[SignosVitales.service] getAll - Where clause:', JSON.stringify(where, null, 2));
 
-    const [signos, total] = await Promise.all([
-      prisma.signoVital.findMany({
-        where,
-        skip,
-        take: parseInt(limit),
-        orderBy: { fechaRegistro: 'desc' },
-        include: {
-          paciente: {
-            select: {
-              id: true,
-              nombre: true,
-              apellido: true,
-            },
+    const { items, pagination } = await paginar(prisma.signoVital, {
+      where,
+      campoFecha: 'fechaRegistro',
+      query: { page, limit, cursor, con_total },
+      limitePorDefecto: 50,
+      include: {
+        paciente: {
+          select: {
+            id: true,
+            nombre: true,
+            apellido: true,
           },
-          registrador: {
-            select: {
-              id: true,
-              nombre: true,
-              apellido: true,
-            },
+        },
+        registrador: {
+          select: {
+            id: true,
+            nombre: true,
+            apellido: true,
           },
         },
-      }),
-      prisma.signoVital.count({ where }),
-    ]);
-
-    return {
-      signos,
-      pagination: {
-        page: parseInt(page),
-        limit: parseInt(limit),
-        total,
-        totalPages: Math.ceil(total / parseInt(limit)),
       },
-    };
+    });
+
+    return { signos: items, pagination };
   }
 
   /**
@@ -234,6 +243,119 @@ class SignosVitalesService {
 
     return signos;
   }
+
+  /**
+   * Obtener series agregadas por intervalos de tiempo (min/avg/max por bucket)
+   *
+   * La agregación se hace en SQL con un único recorrido para todos los tipos,
+   * de modo que el tamaño de la respuesta depende de max_puntos y no del
+   * número de registros (monitores de UCI registran cada pocos minutos).
+   *
+   * @param {string} pacienteId
+   * @param {Object} opciones
+   * @param {string[]} opciones.tipos - Tipos de serie (ver SERIES_SIGNOS)
+   * @param {number} opciones.diasAtras - Ventana de consulta en días
+   * @param {string} [opciones.resolucion] - Tamaño del bucket: '15m', '1h', '1d'
+   * @param {number} [opciones.maxPuntos] - Máximo de puntos por serie
+   */
+  async getSeriesAgregadas(pacienteId, { tipos, diasAtras = 7, resolucion, maxPuntos }) {
+    const tiposNormalizados = normalizarTipos(tipos);
+    const hasta = new Date();
+    const desde = new Date(hasta);
+    desde.setDate(desde.getDate() - diasAtras);
+
+    const bucketSegundos = calcularBucketSegundos(
+      (hasta - desde) / 1000,
+      resolucion,
+      maxPuntos
+    );
+
+    const columnas = tiposNormalizados.flatMap(tipo => SERIES_SIGNOS[tipo]);
+    const agregados = columnas.map(([campo, columna]) => `
+          COUNT(${columna})::int AS "${campo}_n",
+          MIN(${columna})::float8 AS "${campo}_min",
+          AVG(${columna})::float8 AS "${campo}_avg",
+          MAX(${columna})::float8 AS "${campo}_max"`).join(',');
+
+    // Buckets alineados al inicio de la ventana: nunca más de max_puntos por serie
+    const desdeEpoch = Math.floor(desde.getTime() / 1000);
+    const filas = await prisma.$queryRawUnsafe(`
+      SELECT
+        floor((extract(epoch FROM fecha_registro) - $3) / $4)::int AS bucket,${agregados}
+      FROM signos_vitales
+      WHERE paciente_id = $1 AND fecha_registro >= $2 AND fecha_registro <= $5
+      GROUP BY 1
+      ORDER BY 1 ASC
+    `, pacienteId, desde, desdeEpoch, bucketSegundos, hasta);
+
+    const series = {};
+    tiposNormalizados.forEach((tipo) => {
+      const campos = SERIES_SIGNOS[tipo].map(([campo]) => campo);
+      series[tipo] = filas
+        .filter(fila => campos.some(campo => fila[`${campo}_n`] > 0))
+        .map((fila) => {
+          const punto = { fecha: new Date((desdeEpoch + fila.bucket * bucketSegundos) * 1000) };
+          campos.forEach((campo) => {
+            punto[campo] = fila[`${campo}_n`] > 0 ? {
+              min: fila[`${campo}_min`],
+              avg: Math.round(fila[`${campo}_avg`] * 100) / 100,
+              max: fila[`${campo}_max`],
+              n: fila[`${campo}_n`],
+            } : null;
+          });
+          return punto;
+        });
+    });
+
+    return { desde, hasta, bucketSegundos, series };
+  }
+}
+
+/**
+ * Normalizar y validar la lista de tipos solicitados
+ */
+function normalizarTipos(tipos) {
+  const lista = (Array.isArray(tipos) ? tipos : String(tipos || '').split(','))
+    .map(tipo => tipo.trim())
+    .filter(Boolean)
+    .map(tipo => ALIAS_SERIES[tipo] || tipo);
+
+  if (lista.length === 0) {
+    throw new ValidationError('Debe indicar al menos un tipo de signo vital');
+  }
+
+  const invalidos = lista.filter(tipo => !SERIES_SIGNOS[tipo]);
+  if (invalidos.length > 0) {
+    throw new ValidationError(
+      `Tipo de signo vital no soportado: ${invalidos.join(', ')}. Valores permitidos: ${Object.keys(SERIES_SIGNOS).join(', ')}`
+    );
+  }
+
+  return [...new Set(lista)];
+}
+
+/**
+ * Calcular el tamaño del bucket en segundos a partir de la resolución y/o max_puntos
+ * (se usa el mayor de ambos para no exceder max_puntos)
+ */
+function calcularBucketSegundos(ventanaSegundos, resolucion, maxPuntos) {
+  let porResolucion = 0;
+  if (resolucion) {
+    const match = /^(\d+)\s*([mhd])$/.exec(String(resolucion).trim());
+    if (!match || parseInt(match[1], 10) <= 0) {
+      throw new ValidationError('resolucion debe tener el formato <número><m|h|d>, por ejemplo 15m, 1h o 1d');
+    }
+    porResolucion = parseInt(match[1], 10) * UNIDADES_RESOLUCION[match[2]];
+  }
+
+  const puntos = Math.min(
+    Math.max(parseInt(maxPuntos, 10) || MAX_PUNTOS_DEFAULT, 1),
+    MAX_PUNTOS_LIMITE
+  );
+  // floor + 1 garantiza ventana / bucket < puntos, incluso con ventanas exactas
+  const porMaxPuntos = Math.floor(ventanaSegundos / puntos) + 1;
+
+  return Math.max(porResolucion, porMaxPuntos, 60);
 }
 
 module.exports = new SignosVitalesService();
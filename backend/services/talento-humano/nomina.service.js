@@ -21,6 +21,20 @@ const PORCENTAJE_CAJA = NORMATIVA.PARAFISCALES.CAJA_COMPENSACION;
 const PORCENTAJE_SENA = NORMATIVA.PARAFISCALES.SENA;
 const PORCENTAJE_ICBF = NORMATIVA.PARAFISCALES.ICBF;
 
+// Empleados por lote al procesar la nómina
+const LOTE_NOMINA = parseInt(process.env.NOMINA_LOTE || '500', 10);
+const TOTALES_EN_CERO = {
+  totalDevengado: 0,
+  totalDeducciones: 0,
+  netoPagar: 0,
+  aportesEmpresa: 0,
+  provisiones: 0,
+  empleadosProcesados: 0
+};
+
+// Periodos con un procesarNomina en curso en este proceso
+const periodosEnProceso = new Set();
+
 class NominaService {
   /**
    * Listar periodos de nómina
@@ -168,35 +182,99 @@ class NominaService {
 
   /**
    * Procesar nómina del periodo
+   *
+   * Los empleados se recorren por lotes de LOTE_NOMINA ordenados por id. Cada lote se
+   * calcula en memoria y se guarda en una transacción corta: un createMany con sus
+   * detalles y el incremento de los totales del periodo. Si el proceso se interrumpe,
+   * el periodo sigue ABIERTO con los lotes ya guardados y la siguiente llamada continúa
+   * después del último empleado procesado; con reiniciar se descartan y se recalcula
+   * desde cero (p.ej. si cambiaron novedades entre una ejecución y otra).
    */
-  async procesarNomina(periodoId, userId) {
+  async procesarNomina(periodoId, userId, { reiniciar = false } = {}) {
     const periodo = await prisma.tHPeriodoNomina.findUnique({ where: { id: periodoId } });
     if (!periodo) throw new NotFoundError('Periodo no encontrado');
 
     if (periodo.estado !== 'ABIERTO') {
       throw new ValidationError('Solo se pueden procesar periodos abiertos');
     }
+    if (periodosEnProceso.has(periodoId)) {
+      throw new ValidationError('La nómina de este periodo ya se está procesando');
+    }
 
-    // Obtener empleados activos con contrato vigente
-    const empleados = await prisma.tHEmpleado.findMany({
-      where: { estado: 'ACTIVO' },
-      include: {
-        contratos: {
-          where: { estado: 'ACTIVO' },
-          take: 1
-        },
-        cargo: true
+    periodosEnProceso.add(periodoId);
+    try {
+      let cursor = null;
+      if (reiniciar) {
+        await prisma.$transaction([
+          prisma.tHNominaDetalle.deleteMany({ where: { periodoId } }),
+          prisma.tHPeriodoNomina.update({ where: { id: periodoId }, data: TOTALES_EN_CERO })
+        ]);
+      } else {
+        // Retomar una ejecución interrumpida
+        const ultimo = await prisma.tHNominaDetalle.findFirst({
+          where: { periodoId },
+          orderBy: { empleadoId: 'desc' },
+          select: { empleadoId: true }
+        });
+        cursor = ultimo?.empleadoId || null;
       }
-    });
 
-    // Obtener novedades del periodo
+      // Empleados activos con contrato vigente, por lotes
+      for (;;) {
+        const empleados = await prisma.tHEmpleado.findMany({
+          where: { estado: 'ACTIVO', ...(cursor && { id: { gt: cursor } }) },
+          orderBy: { id: 'asc' },
+          take: LOTE_NOMINA,
+          select: {
+            id: true,
+            contratos: {
+              where: { estado: 'ACTIVO' },
+              take: 1,
+              select: { salarioBase: true, auxTransporte: true }
+            },
+            cargo: { select: { nivel: true } }
+          }
+        });
+        if (!empleados.length) break;
+
+        await this.guardarLoteNomina(periodoId, empleados);
+
+        cursor = empleados[empleados.length - 1].id;
+        if (empleados.length < LOTE_NOMINA) break;
+      }
+
+      // Actualizar estado del periodo
+      await prisma.tHPeriodoNomina.update({
+        where: { id: periodoId },
+        data: {
+          estado: 'EN_PROCESO',
+          procesadoPor: userId,
+          fechaProceso: new Date()
+        }
+      });
+    } finally {
+      periodosEnProceso.delete(periodoId);
+    }
+
+    return this.getPeriodo(periodoId);
+  }
+
+  /**
+   * Calcular y guardar un lote de empleados de procesarNomina
+   *
+   * @returns {Promise<number>} Detalles creados
+   */
+  async guardarLoteNomina(periodoId, empleados) {
+    // Novedades del periodo y recurrentes aprobadas de los empleados del lote
     const novedades = await prisma.tHNovedadNomina.findMany({
       where: {
+        empleadoId: { in: empleados.map(e => e.id) },
         OR: [
           { periodoId: periodoId },
           { recurrente: true, estado: 'APROBADO' }
         ]
-      }
+      },
+      select: { empleadoId: true, tipo: true, valor: true, cantidad: true }
     });
 
     const novedadesPorEmpleado = novedades.reduce((acc, n) => {
@@ -205,8 +283,8 @@ class NominaService {
       return acc;
     }, {});
 
-    // Calcular nómina por empleado
     const detalles = [];
+    const totales = { totalDevengado: 0, totalDeducciones: 0, netoPagar: 0, aportesEmpresa: 0, provisiones: 0 };
     for (const empleado of empleados) {
       if (!empleado.contratos.length) continue;
 
@@ -262,25 +340,36 @@ class NominaService {
         prima: detalle.prima,
         vacacionesProv: detalle.vacacionesProv
       });
-    }
 
-    // Eliminar detalles anteriores y crear nuevos
-    await prisma.tHNominaDetalle.deleteMany({ where: { periodoId: periodoId } });
-    if (detalles.length > 0) {
-      await prisma.tHNominaDetalle.createMany({ data: detalles });
+      totales.totalDevengado += detalle.totalDevengado;
+      totales.totalDeducciones += detalle.totalDeducciones;
+      totales.netoPagar += detalle.netoPagar;
+      totales.aportesEmpresa += detalle.saludEmpresa + detalle.pensionEmpresa + detalle.arl +
+        detalle.cajaCompensacion + detalle.sena + detalle.icbf;
+      totales.provisiones += detalle.cesantias + detalle.intCesantias + detalle.prima + detalle.vacacionesProv;
     }
 
-    // Actualizar estado del periodo
-    await prisma.tHPeriodoNomina.update({
-      where: { id: periodoId },
-      data: {
-        estado: 'EN_PROCESO',
-        procesadoPor: userId,
-        fechaProceso: new Date()
-      }
-    });
+    if (!detalles.length) return 0;
+
+    // Detalles y totales en la misma transacción: el periodo nunca queda con totales de
+    // un lote que no se guardó. Un empleado repetido (otra ejecución en paralelo) viola
+    // el único (periodoId, empleadoId) y aborta el lote completo.
+    await prisma.$transaction([
+      prisma.tHNominaDetalle.createMany({ data: detalles }),
+      prisma.tHPeriodoNomina.update({
+        where: { id: periodoId },
+        data: {
+          totalDevengado: { increment: totales.totalDevengado },
+          totalDeducciones: { increment: totales.totalDeducciones },
+          netoPagar: { increment: totales.netoPagar },
+          aportesEmpresa: { increment: totales.aportesEmpresa },
+          provisiones: { increment: totales.provisiones },
+          empleadosProcesados: { increment: detalles.length }
+        }
+      })
+    ]);
 
-    return this.getPeriodo(periodoId);
+    return detalles.length;
   }
 
   /**
@@ -425,44 +514,36 @@ class NominaService {
     return calculosService.calcularRetencionFuente(ibc, deducciones);
   }
 
+  /**
+   * Resumen del periodo a partir de los totales que guarda procesarNomina
+   */
   async getResumenPeriodo(periodoId) {
     const periodo = await prisma.tHPeriodoNomina.findUnique({
       where: { id: periodoId },
-      include: { detalles: true }
+      select: {
+        anio: true,
+        mes: true,
+        quincena: true,
+        estado: true,
+        totalDevengado: true,
+        totalDeducciones: true,
+        netoPagar: true,
+        aportesEmpresa: true,
+        provisiones: true,
+        empleadosProcesados: true
+      }
     });
 
     if (!periodo) throw new NotFoundError('Periodo no encontrado');
 
-    const resumen = periodo.detalles.reduce(
-      (acc, d) => ({
-        totalDevengado: acc.totalDevengado + Number(d.totalDevengado),
-        totalDeducciones: acc.totalDeducciones + Number(d.totalDeducciones),
-        netoPagar: acc.netoPagar + Number(d.netoPagar),
-        aportesEmpresa:
-          acc.aportesEmpresa +
-          Number(d.saludEmpresa) +
-          Number(d.pensionEmpresa) +
-          Number(d.arl) +
-          Number(d.cajaCompensacion) +
-          Number(d.sena) +
-          Number(d.icbf),
-        provisiones:
-          acc.provisiones +
-          Number(d.cesantias) +
-          Number(d.intCesantias) +
-          Number(d.prima) +
-          Number(d.vacacionesProv),
-        empleados: acc.empleados + 1
-      }),
-      {
-        totalDevengado: 0,
-        totalDeducciones: 0,
-        netoPagar: 0,
-        aportesEmpresa: 0,
-        provisiones: 0,
-        empleados: 0
-      }
-    );
+    const resumen = {
+      totalDevengado: Number(periodo.totalDevengado),
+      totalDeducciones: Number(periodo.totalDeducciones),
+      netoPagar: Number(periodo.netoPagar),
+      aportesEmpresa: Number(periodo.aportesEmpresa),
+      provisiones: Number(periodo.provisiones),
+      empleados: periodo.empleadosProcesados
+    };
 
     return {
       periodo: {
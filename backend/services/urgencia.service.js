@@ -2,6 +2,7 @@
  * Servicio de Atenciones de Urgencias
  */
 const prisma = require('../db/prisma');
+const disponibilidadCache = require('./disponibilidadCache.service');
 const { ValidationError, NotFoundError } = require('../utils/errors');
 
 class UrgenciaService {
@@ -279,6 +280,8 @@ class UrgenciaService {
       },
     });
 
+    disponibilidadCache.actualizarCita(null, cita);
+
     // Actualizar atención de urgencias
     const actualizada = await prisma.atencionUrgencia.update({
       where: { id },
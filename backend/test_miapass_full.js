@@ -81,8 +81,7 @@ async function run() {
 
   // *** MANUAL DB LINKING FOR HIERARCHY (To ensure test reliability) ***
   // Since the UI for linking might not be built yet in the standard /usuarios POST
-  const { PrismaClient } = require('@prisma/client');
-  const prisma = new PrismaClient();
+  const prisma = require('./db/prisma');
   await prisma.usuario.update({ where: { id: parentId }, data: { vendedorPadreId: grandParentId } });
   await prisma.usuario.update({ where: { id: sellerId }, data: { vendedorPadreId: parentId } });
   console.log('   ✅ DB Hierarchy Linked: Seller -> Parent -> Grandparent');
@@ -0,0 +1,146 @@
+process.env.ALERTAS_MAX_INTENTOS = '3';
+
+const alertaService = require('../../services/alerta.service');
+
+// Mock db/prisma
+jest.mock('../../db/prisma', () => ({
+  $queryRaw: jest.fn(),
+  alertaProgramada: { updateMany: jest.fn(), findUnique: jest.fn(), update: jest.fn() },
+  alertaConfiguracion: { findFirst: jest.fn() },
+  alertaHistorial: { create: jest.fn(), update: jest.fn() },
+  tHContrato: { findMany: jest.fn() },
+  sSTDocumentoSST: { findMany: jest.fn() },
+  tHEmpleado: { findFirst: jest.fn(), findUnique: jest.fn() },
+}));
+
+// Mock email service
+jest.mock('../../services/email.service', () => ({
+  sendAlert: jest.fn(),
+  isEnabled: jest.fn(() => true),
+}));
+
+const prisma = require('../../db/prisma');
+const emailService = require('../../services/email.service');
+const { ValidationError } = require('../../utils/errors');
+
+const configuracion = {
+  id: 'cfg-1',
+  prioridad: 'MEDIA',
+  asuntoTemplate: 'Contrato de {{empleado}} vence en {{diasRestantes}} días',
+  cuerpoTemplate: '<p>{{empleado}}</p>',
+  destinatarios: [
+    { tipoDestinatario: 'EMAIL_FIJO', email: 'rrhh@example.com' },
+    { tipoDestinatario: 'RESPONSABLE_RRHH' },
+  ],
+};
+
+const alerta = (id, overrides = {}) => ({
+  id,
+  tipoAlerta: 'CONTRATO_VENCIMIENTO',
+  referenciaId: 'contrato-1',
+  referenciaTipo: 'CONTRATO',
+  diasRestantes: 30,
+  intentos: 1,
+  ...overrides,
+});
+
+describe('AlertaService - cola de alertas programadas', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+    prisma.alertaConfiguracion.findFirst.mockResolvedValue(configuracion);
+    prisma.tHEmpleado.findFirst.mockResolvedValue({ email: 'jefe.rrhh@example.com' });
+    prisma.tHContrato.findMany.mockResolvedValue([
+      { id: 'contrato-1', empleadoId: 'e1', fechaFin: null, empleado: { id: 'e1', nombre: 'Ana', apellido: 'Ruiz' } },
+    ]);
+    prisma.alertaHistorial.create.mockResolvedValue({ id: 'h1' });
+    prisma.alertaHistorial.update.mockResolvedValue({});
+    prisma.alertaProgramada.updateMany.mockResolvedValue({ count: 1 });
+    emailService.sendAlert.mockResolvedValue({ success: true, id: 'resend-1', error: null });
+  });
+
+  describe('procesarAlertasPendientes', () => {
+    it('should load references and configuration once per batch and mark the batch processed', async () => {
+      prisma.$queryRaw.mockResolvedValueOnce([
+        alerta('a1', { diasRestantes: 30 }),
+        alerta('a2', { diasRestantes: 15 }),
+        alerta('a3', { referenciaId: 'borrado', referenciaTipo: 'DESCONOCIDO' }),
+      ]);
+
+      const resultado = await alertaService.procesarAlertasPendientes({ workerId: 'w1' });
+
+      expect(resultado).toEqual({ reclamadas: 3, procesadas: 3, exitosas: 2, fallidas: 0, descartadas: 0 });
+      expect(prisma.tHContrato.findMany).toHaveBeenCalledTimes(1);
+      expect(prisma.alertaConfiguracion.findFirst).toHaveBeenCalledTimes(1);
+      expect(prisma.tHEmpleado.findFirst).toHaveBeenCalledTimes(1);
+      expect(emailService.sendAlert).toHaveBeenCalledTimes(2);
+      expect(emailService.sendAlert.mock.calls[1][0].asunto).toBe('Contrato de Ana Ruiz vence en 15 días');
+      expect(prisma.alertaProgramada.updateMany.mock.calls[0][0].where).toEqual({
+        id: { in: ['a1', 'a2', 'a3'] },
+        bloqueadaPor: 'w1',
+      });
+    });
+
+    it('should release a failed alert with backoff and dead-letter it after the last attempt', async () => {
+      prisma.$queryRaw.mockResolvedValueOnce([alerta('a1', { intentos: 1 }), alerta('a2', { intentos: 3 })]);
+      emailService.sendAlert.mockRejectedValue(new Error('SMTP caído'));
+
+      const resultado = await alertaService.procesarAlertasPendientes({ workerId: 'w1' });
+
+      expect(resultado.fallidas).toBe(2);
+      expect(resultado.descartadas).toBe(1);
+
+      const [reintento, descarte] = prisma.alertaProgramada.updateMany.mock.calls.map(([args]) => args);
+      expect(reintento.where).toEqual({ id: 'a1', bloqueadaPor: 'w1' });
+      expect(reintento.data.fallidaEn).toBeNull();
+      expect(reintento.data.bloqueadaHasta > new Date()).toBe(true);
+      expect(descarte.data.ultimoError).toBe('SMTP caído');
+      expect(descarte.data.fallidaEn).toBeTruthy();
+      // Ninguna quedó marcada como procesada
+      expect(prisma.alertaProgramada.updateMany).toHaveBeenCalledTimes(2);
+    });
+
+    it('should release an alert the email provider rejected instead of marking it processed', async () => {
+      prisma.$queryRaw.mockResolvedValueOnce([alerta('a1', { intentos: 1 })]);
+      emailService.sendAlert.mockResolvedValue({ success: false, id: null, error: 'Resend 503' });
+
+      const resultado = await alertaService.procesarAlertasPendientes({ workerId: 'w1' });
+
+      expect(resultado).toEqual({ reclamadas: 1, procesadas: 0, exitosas: 0, fallidas: 1, descartadas: 0 });
+      expect(prisma.alertaProgramada.updateMany).toHaveBeenCalledTimes(1);
+      const [{ where, data }] = prisma.alertaProgramada.updateMany.mock.calls[0];
+      expect(where).toEqual({ id: 'a1', bloqueadaPor: 'w1' });
+      expect(data.ultimoError).toBe('Resend 503');
+      expect(data.procesada).toBeUndefined();
+    });
+
+    it('should return without work when nothing can be claimed', async () => {
+      prisma.$queryRaw.mockResolvedValueOnce([]);
+
+      const resultado = await alertaService.procesarAlertasPendientes({ workerId: 'w1' });
+
+      expect(resultado.reclamadas).toBe(0);
+      expect(prisma.alertaProgramada.updateMany).not.toHaveBeenCalled();
+    });
+  });
+
+  describe('drenarAlertasPendientes', () => {
+    it('should keep claiming until a batch comes back short', async () => {
+      prisma.$queryRaw
+        .mockResolvedValueOnce([alerta('a1'), alerta('a2')])
+        .mockResolvedValueOnce([alerta('a3')]);
+
+      const resultado = await alertaService.drenarAlertasPendientes({ workers: 1, limite: 2 });
+
+      expect(prisma.$queryRaw).toHaveBeenCalledTimes(2);
+      expect(resultado).toEqual(expect.objectContaining({ lotes: 2, reclamadas: 3, exitosas: 3 }));
+    });
+  });
+
+  describe('reencolarAlerta', () => {
+    it('should reject alerts that are not dead-lettered', async () => {
+      prisma.alertaProgramada.findUnique.mockResolvedValue({ id: 'a1', fallidaEn: null });
+
+      await expect(alertaService.reencolarAlerta('a1')).rejects.toThrow(ValidationError);
+    });
+  });
+});
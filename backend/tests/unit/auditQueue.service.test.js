@@ -0,0 +1,90 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+const spillDir = fs.mkdtempSync(path.join(os.tmpdir(), 'audit-spill-'));
+process.env.AUDIT_SPILL_DIR = spillDir;
+
+const auditQueue = require('../../services/auditQueue.service');
+
+jest.mock('../../db/prisma', () => ({
+  auditLog: {
+    createMany: jest.fn(),
+  },
+}));
+
+const prisma = require('../../db/prisma');
+
+describe('AuditQueueService', () => {
+  const registro = (action) => ({ userId: 'user-1', action, resource: 'Role', details: { a: 1 } });
+
+  beforeEach(() => {
+    jest.clearAllMocks();
+    prisma.auditLog.createMany.mockResolvedValue({ count: 0 });
+    fs.readdirSync(spillDir).forEach(f => fs.unlinkSync(path.join(spillDir, f)));
+  });
+
+  it('should not write on enqueue and batch queued entries on flush', async () => {
+    await auditQueue.enqueue(registro('A'));
+    await auditQueue.enqueue(registro('B'));
+
+    expect(prisma.auditLog.createMany).not.toHaveBeenCalled();
+
+    await auditQueue.flush();
+
+    expect(prisma.auditLog.createMany).toHaveBeenCalledTimes(1);
+    const { data } = prisma.auditLog.createMany.mock.calls[0][0];
+    expect(data.map(r => r.action)).toEqual(['A', 'B']);
+    expect(data[0].createdAt instanceof Date).toBe(true);
+  });
+
+  it('should spill to disk when the database fails and replay once it recovers', async () => {
+    prisma.auditLog.createMany.mockRejectedValue(new Error('db down'));
+
+    await auditQueue.enqueue(registro('C'));
+    await auditQueue.flush();
+
+    expect(fs.readdirSync(spillDir)).toHaveLength(1);
+
+    prisma.auditLog.createMany.mockResolvedValue({ count: 1 });
+    await auditQueue.enqueue(registro('D'));
+    await auditQueue.flush();
+
+    const acciones = prisma.auditLog.createMany.mock.calls.flatMap(([arg]) => arg.data.map(r => r.action));
+    expect(acciones).toEqual(['C', 'D', 'C']);
+    expect(fs.readdirSync(spillDir)).toHaveLength(0);
+  });
+
+  it('should replay files left mid-recovery by a dead process but not by a live one', async () => {
+    const linea = (action) => JSON.stringify({ ...registro(action), createdAt: new Date().toISOString() }) + '\n';
+    // PID fuera de rango: proceso inexistente
+    fs.writeFileSync(path.join(spillDir, 'audit-1-10.jsonl.2147483646.procesando'), linea('F'));
+    fs.writeFileSync(path.join(spillDir, `audit-2-10.jsonl.${process.ppid}.procesando`), linea('G'));
+
+    await auditQueue.flush();
+
+    const acciones = prisma.auditLog.createMany.mock.calls.flatMap(([arg]) => arg.data.map(r => r.action));
+    expect(acciones).toEqual(['F']);
+    expect(fs.readdirSync(spillDir)).toEqual([`audit-2-10.jsonl.${process.ppid}.procesando`]);
+  });
+
+  it('should set aside unreadable lines and replay the rest of the file', async () => {
+    const valida = JSON.stringify({ ...registro('H'), createdAt: new Date().toISOString() });
+    fs.writeFileSync(path.join(spillDir, 'audit-3-10.jsonl'), `${valida}\n{"action": "tru\n${valida}\n`);
+
+    await auditQueue.flush();
+
+    const acciones = prisma.auditLog.createMany.mock.calls.flatMap(([arg]) => arg.data.map(r => r.action));
+    expect(acciones).toEqual(['H', 'H']);
+    expect(fs.readdirSync(spillDir)).toEqual(['audit-3-10.jsonl.rechazados']);
+    expect(fs.readFileSync(path.join(spillDir, 'audit-3-10.jsonl.rechazados'), 'utf8')).toBe('{"action": "tru\n');
+  });
+
+  it('should flush pending entries on close', async () => {
+    await auditQueue.enqueue(registro('E'));
+    await auditQueue.cerrar();
+
+    expect(prisma.auditLog.createMany).toHaveBeenCalledTimes(1);
+    expect(auditQueue.getStats().pendientes).toBe(0);
+  });
+});
@@ -29,6 +29,7 @@ const mockPrisma = {
   auditLog: {
     create: jest.fn(),
   },
+  $executeRaw: jest.fn(),
   $transaction: jest.fn((callback) => callback(mockPrisma)),
 };
 
@@ -84,6 +85,8 @@ describe('CitaService', () => {
       expect(result).toHaveProperty('id', 'cita-1');
       expect(prisma.cita.create).toHaveBeenCalled();
       expect(prisma.factura.create).toHaveBeenCalled();
+      // Lock del doctor/día antes de buscar conflictos (serializa entre instancias)
+      expect(prisma.$executeRaw).toHaveBeenCalledTimes(1);
     });
 
     it('should throw validation error if fecha/hora are missing for Programada', async () => {
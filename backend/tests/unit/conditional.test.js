@@ -0,0 +1,121 @@
+const { conditionalGet } = require('../../middleware/conditional');
+const { huellaDeModelos } = require('../../utils/huella');
+
+// Mock db/prisma
+jest.mock('../../db/prisma', () => ({
+  categoriaExamen: { aggregate: jest.fn() },
+  examenProcedimiento: { aggregate: jest.fn() },
+}));
+
+const prisma = require('../../db/prisma');
+
+const crearContexto = (url, cabeceras = {}) => {
+  const c = {
+    req: {
+      url,
+      header: (nombre) => cabeceras[nombre.toLowerCase()],
+    },
+    res: null,
+    body: jest.fn((cuerpo, status, headers) => ({ status, headers })),
+  };
+  return c;
+};
+
+const handler = (c) => async () => {
+  c.res = new Response('{"success":true}', { status: 200 });
+};
+
+describe('conditionalGet', () => {
+  const huella = { version: '3-1700000000000', lastModified: new Date('2026-01-15T10:00:00.500Z') };
+  const middleware = conditionalGet(async () => huella);
+
+  it('should add ETag, Last-Modified and Cache-Control to full responses', async () => {
+    const c = crearContexto('http://localhost/productos?page=1');
+    await middleware(c, handler(c));
+
+    expect(c.res.headers.get('ETag')).toMatch(/^W\/".+"$/);
+    expect(c.res.headers.get('Last-Modified')).toBe('Thu, 15 Jan 2026 10:00:00 GMT');
+    expect(c.res.headers.get('Cache-Control')).toBe('private, no-cache');
+  });
+
+  it('should answer 304 without running the handler when the ETag matches', async () => {
+    const primero = crearContexto('http://localhost/productos?page=1');
+    await middleware(primero, handler(primero));
+    const etag = primero.res.headers.get('ETag');
+
+    const c = crearContexto('http://localhost/productos?page=1', { 'if-none-match': etag });
+    const next = jest.fn();
+    const respuesta = await middleware(c, next);
+
+    expect(next).not.toHaveBeenCalled();
+    expect(respuesta.status).toBe(304);
+    expect(respuesta.headers.ETag).toBe(etag);
+  });
+
+  it('should give each query string its own ETag', async () => {
+    const pagina1 = crearContexto('http://localhost/productos?page=1');
+    const pagina2 = crearContexto('http://localhost/productos?page=2');
+    await middleware(pagina1, handler(pagina1));
+    await middleware(pagina2, handler(pagina2));
+
+    expect(pagina1.res.headers.get('ETag')).not.toBe(pagina2.res.headers.get('ETag'));
+  });
+
+  it('should serve the full response once the fingerprint changes', async () => {
+    const c = crearContexto('http://localhost/productos', { 'if-none-match': 'W/"obsoleto"' });
+    const next = jest.fn(handler(c));
+    await middleware(c, next);
+
+    expect(next).toHaveBeenCalled();
+    expect(c.res.status).toBe(200);
+  });
+
+  it('should honor If-Modified-Since only when no If-None-Match is sent', async () => {
+    const c = crearContexto('http://localhost/productos', { 'if-modified-since': 'Thu, 15 Jan 2026 10:00:00 GMT' });
+    const respuesta = await middleware(c, jest.fn());
+    expect(respuesta.status).toBe(304);
+
+    const conEtag = crearContexto('http://localhost/productos', {
+      'if-modified-since': 'Thu, 15 Jan 2026 10:00:00 GMT',
+      'if-none-match': 'W/"obsoleto"',
+    });
+    const next = jest.fn(handler(conEtag));
+    await middleware(conEtag, next);
+    expect(next).toHaveBeenCalled();
+  });
+
+  it('should fall through to the handler when the fingerprint fails', async () => {
+    const consoleSpy = jest.spyOn(console, 'error').mockImplementation(() => {});
+    const c = crearContexto('http://localhost/productos', { 'if-none-match': '*' });
+    const next = jest.fn(handler(c));
+    await conditionalGet(async () => { throw new Error('db caída'); })(c, next);
+
+    expect(next).toHaveBeenCalled();
+    expect(c.res.headers.get('ETag')).toBeNull();
+    consoleSpy.mockRestore();
+  });
+});
+
+describe('huellaDeModelos', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+  });
+
+  it('should combine counts and latest updates of every model', async () => {
+    prisma.categoriaExamen.aggregate.mockResolvedValue({ _count: { _all: 4 }, _max: { updatedAt: new Date('2026-01-01T00:00:00Z') } });
+    prisma.examenProcedimiento.aggregate.mockResolvedValue({ _count: { _all: 10 }, _max: { updatedAt: new Date('2026-02-01T00:00:00Z') } });
+
+    const resultado = await huellaDeModelos([{ modelo: 'categoriaExamen' }, { modelo: 'examenProcedimiento' }]);
+
+    expect(resultado.version).toBe(`4-${Date.parse('2026-01-01T00:00:00Z')}.10-${Date.parse('2026-02-01T00:00:00Z')}`);
+    expect(resultado.lastModified).toEqual(new Date('2026-02-01T00:00:00Z'));
+  });
+
+  it('should handle empty tables', async () => {
+    prisma.categoriaExamen.aggregate.mockResolvedValue({ _count: { _all: 0 }, _max: { updatedAt: null } });
+
+    const resultado = await huellaDeModelos([{ modelo: 'categoriaExamen' }]);
+
+    expect(resultado).toEqual({ version: '0-0', lastModified: null });
+  });
+});
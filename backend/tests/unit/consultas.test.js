@@ -0,0 +1,70 @@
+const consultas = require('../../db/consultas');
+const { medirConsultas } = require('../../middleware/consultas');
+
+const crearContexto = (method, path) => ({
+  req: { method, path },
+  res: new Response('{"success":true}', { status: 200 }),
+});
+
+describe('Consultas por petición', () => {
+  beforeEach(() => {
+    consultas.reiniciar();
+  });
+
+  it('should count and time the operations registered inside the request context only', async () => {
+    consultas.registrar('Paciente', 'findMany', 10);
+
+    const { resultado, contexto } = await consultas.medir(async () => {
+      expect(consultas.activo()).toBe(true);
+      consultas.registrar('Paciente', 'findMany', 4);
+      await Promise.resolve();
+      consultas.registrar('Cita', 'count', 1.5);
+      return 'listo';
+    });
+
+    expect(resultado).toBe('listo');
+    expect(contexto.consultas).toBe(2);
+    expect(contexto.dbMs).toBeCloseTo(5.5);
+    expect(consultas.activo()).toBe(false);
+  });
+
+  it('should report operations repeated at least the N+1 threshold', async () => {
+    const { contexto } = await consultas.medir(async () => {
+      for (let i = 0; i < 6; i++) consultas.registrar('Producto', 'findUnique', 1);
+      consultas.registrar('Producto', 'findMany', 1);
+    });
+
+    expect(consultas.repetidas(contexto)).toEqual([{ operacion: 'Producto.findUnique', veces: 6 }]);
+  });
+
+  it('should group paths by replacing numeric, UUID and cuid segments', () => {
+    expect(consultas.normalizarRuta('/pacientes/123/citas')).toBe('/pacientes/:id/citas');
+    expect(consultas.normalizarRuta('/citas/6f1c2a3b-1d2e-4f5a-8b9c-0d1e2f3a4b5c')).toBe('/citas/:id');
+    expect(consultas.normalizarRuta('/productos/clx8k2j3h0000abcdefghijkl')).toBe('/productos/:id');
+    expect(consultas.normalizarRuta('/productos/stock-bajo')).toBe('/productos/stock-bajo');
+  });
+
+  it('should add Server-Timing and aggregate the request in the per-route report', async () => {
+    const middleware = medirConsultas();
+
+    for (const consultasPorPeticion of [2, 4]) {
+      const c = crearContexto('GET', '/pacientes/42');
+      await middleware(c, async () => {
+        for (let i = 0; i < consultasPorPeticion; i++) consultas.registrar('Paciente', 'findUnique', 2);
+      });
+      expect(c.res.headers.get('Server-Timing')).toMatch(
+        new RegExp(`^db;dur=[\\d.]+;desc="${consultasPorPeticion} consultas", app;dur=[\\d.]+$`)
+      );
+    }
+
+    const { rutas } = consultas.getReporte();
+    expect(rutas).toHaveLength(1);
+    expect(rutas[0]).toMatchObject({
+      ruta: 'GET /pacientes/:id',
+      peticiones: 2,
+      consultas: { promedio: 3, max: 4 },
+      dbMs: { promedio: 6, max: 8 },
+      excedidas: 0,
+    });
+  });
+});
@@ -0,0 +1,87 @@
+const dashboardService = require('../../services/dashboard.service');
+
+// Mock db/prisma
+jest.mock('../../db/prisma', () => ({
+  $queryRaw: jest.fn(),
+  paciente: { count: jest.fn() },
+  admision: { count: jest.fn() },
+  pago: { groupBy: jest.fn() },
+  factura: { aggregate: jest.fn() },
+  producto: { findMany: jest.fn() },
+  diagnosticoHCE: { groupBy: jest.fn() },
+  usuario: { findMany: jest.fn(), findUnique: jest.fn() },
+  dashboardIngresoDiario: { aggregate: jest.fn() },
+  dashboardCitaDiaria: { groupBy: jest.fn() },
+  dashboardStockBajo: { findMany: jest.fn() },
+}));
+
+const prisma = require('../../db/prisma');
+
+describe('DashboardService.getDashboardStats', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+    dashboardService.limpiarCache();
+
+    prisma.paciente.count.mockResolvedValue(120);
+    prisma.admision.count.mockResolvedValue(3);
+    prisma.dashboardIngresoDiario.aggregate.mockResolvedValue({ _sum: { total: 4500000 } });
+    prisma.$queryRaw.mockResolvedValue([]);
+    prisma.dashboardCitaDiaria.groupBy
+      .mockResolvedValueOnce([
+        { estado: 'Completada', _sum: { cantidad: 30 } },
+        { estado: 'Programada', _sum: { cantidad: 10 } },
+        { estado: 'Cancelada', _sum: { cantidad: 10 } },
+        { estado: 'NoAsistio', _sum: { cantidad: 0 } },
+      ])
+      .mockResolvedValueOnce([
+        { doctorId: 'doc-1', _sum: { cantidad: 20 } },
+        { doctorId: 'doc-2', _sum: { cantidad: 10 } },
+      ]);
+    prisma.dashboardStockBajo.findMany.mockResolvedValue([{ nombre: 'Amoxicilina', cantidadTotal: 2, cantidadMinAlerta: 10 }]);
+    prisma.pago.groupBy.mockResolvedValue([{ metodoPago: 'Efectivo', _sum: { monto: 1000 } }]);
+    prisma.factura.aggregate.mockResolvedValue({ _sum: { saldoPendiente: 250000 } });
+    prisma.producto.findMany.mockResolvedValue([]);
+    prisma.diagnosticoHCE.groupBy.mockResolvedValue([]);
+    prisma.usuario.findMany.mockResolvedValue([
+      { id: 'doc-2', nombre: 'Ana', apellido: 'Ríos' },
+      { id: 'doc-1', nombre: 'Luis', apellido: 'Mejía' },
+    ]);
+  });
+
+  it('should build the dashboard from the daily rollups', async () => {
+    const stats = await dashboardService.getDashboardStats('month');
+
+    expect(stats.kpis).toEqual(expect.objectContaining({
+      totalPacientes: 120,
+      citasPeriodo: 40,
+      ingresosPeriodo: 4500000,
+      tasaCancelacion: '20.0',
+      carteraPendiente: 250000,
+    }));
+    expect(stats.operational.citasStatus).toEqual([
+      { name: 'Completada', value: 30 },
+      { name: 'Programada', value: 10 },
+      { name: 'Cancelada', value: 10 },
+    ]);
+    expect(stats.financial.revenueTrend).toHaveLength(6);
+    expect(stats.inventory.lowStock).toHaveLength(1);
+  });
+
+  it('should resolve top doctor names with a single query', async () => {
+    const stats = await dashboardService.getDashboardStats('month');
+
+    expect(stats.operational.topDoctores).toEqual([
+      { name: 'Dr. Luis Mejía', value: 20 },
+      { name: 'Dr. Ana Ríos', value: 10 },
+    ]);
+    expect(prisma.usuario.findMany).toHaveBeenCalledTimes(1);
+    expect(prisma.usuario.findUnique).not.toHaveBeenCalled();
+  });
+
+  it('should serve repeated requests for the same period from the cache', async () => {
+    await dashboardService.getDashboardStats('month');
+    await dashboardService.getDashboardStats('month');
+
+    expect(prisma.dashboardIngresoDiario.aggregate).toHaveBeenCalledTimes(1);
+  });
+});
@@ -0,0 +1,47 @@
+const { ValidationError } = require('../../utils/errors');
+
+// Mock db/prisma: la transacción recibe el mismo cliente
+const mockPrisma = {
+  $executeRaw: jest.fn(),
+  $transaction: jest.fn((callback) => callback(mockPrisma)),
+};
+jest.mock('../../db/prisma', () => mockPrisma);
+
+const disponibilidadService = require('../../services/disponibilidad.service');
+
+const horario = { doctorId: 'doc-1', fecha: '2026-03-02', hora: '09:00', duracionMinutos: 30 };
+
+describe('DisponibilidadService.conHorarioReservado', () => {
+  let validarDesdeBD;
+
+  beforeEach(() => {
+    jest.clearAllMocks();
+    mockPrisma.$executeRaw.mockResolvedValue(0);
+    validarDesdeBD = jest.spyOn(disponibilidadService, 'validarDisponibilidadDesdeBD');
+  });
+
+  afterEach(() => {
+    validarDesdeBD.mockRestore();
+  });
+
+  it('should lock the doctor day and re-check the slot against the DB before writing', async () => {
+    validarDesdeBD.mockResolvedValue(true);
+    const operacion = jest.fn().mockResolvedValue({ id: 'cita-1' });
+
+    const cita = await disponibilidadService.conHorarioReservado(horario, operacion);
+
+    expect(cita).toEqual({ id: 'cita-1' });
+    expect(mockPrisma.$executeRaw).toHaveBeenCalledTimes(1);
+    expect(mockPrisma.$executeRaw.mock.calls[0].slice(1)).toEqual(['agenda:doc-1:2026-03-02']);
+    expect(validarDesdeBD).toHaveBeenCalledWith('doc-1', '2026-03-02', '09:00', 30, null, mockPrisma);
+    expect(operacion).toHaveBeenCalledWith(mockPrisma);
+  });
+
+  it('should not write when the slot was taken by another instance', async () => {
+    validarDesdeBD.mockRejectedValue(new ValidationError('El horario seleccionado (09:00) no está disponible'));
+    const operacion = jest.fn();
+
+    await expect(disponibilidadService.conHorarioReservado(horario, operacion)).rejects.toThrow(ValidationError);
+    expect(operacion).not.toHaveBeenCalled();
+  });
+});
@@ -0,0 +1,82 @@
+const disponibilidadCache = require('../../services/disponibilidadCache.service');
+
+describe('DisponibilidadCacheService', () => {
+  const doctorId = 'doctor-1';
+  const fecha = '2025-01-20';
+
+  const construir = (overrides = {}) => disponibilidadCache.set(doctorId, fecha, {
+    horariosConfigurados: true,
+    bloques: [{ inicio: 8 * 60, fin: 12 * 60 }],
+    duracionSlot: 20,
+    bloqueadoDiaCompleto: false,
+    bloqueosParciales: [],
+    citas: [],
+    reservas: [],
+    ...overrides,
+  });
+
+  beforeEach(() => {
+    disponibilidadCache.limpiar();
+  });
+
+  it('should mark slots overlapping an existing cita as occupied', () => {
+    const entrada = construir({ citas: [{ id: 'cita-1', inicio: 9 * 60 }] });
+
+    // Una cita ocupa 30 minutos: 09:00-09:20 y 09:20-09:40
+    expect(disponibilidadCache.consultar(entrada, 9 * 60, 20).disponible).toBe(false);
+    expect(disponibilidadCache.consultar(entrada, 9 * 60 + 20, 20).disponible).toBe(false);
+    expect(disponibilidadCache.consultar(entrada, 9 * 60 + 40, 20).disponible).toBe(true);
+  });
+
+  it('should free the slot when a cached cita is cancelled', () => {
+    const entrada = construir({ citas: [{ id: 'cita-1', inicio: 9 * 60 }] });
+    const cita = { id: 'cita-1', doctorId, fecha, hora: '09:00', estado: 'Programada' };
+
+    disponibilidadCache.actualizarCita(cita, { ...cita, estado: 'Cancelada' });
+
+    expect(disponibilidadCache.consultar(entrada, 9 * 60, 20).disponible).toBe(true);
+  });
+
+  it('should move occupancy when a cita is rescheduled', () => {
+    const entrada = construir({ citas: [{ id: 'cita-1', inicio: 9 * 60 }] });
+    const cita = { id: 'cita-1', doctorId, fecha, hora: '09:00', estado: 'Programada' };
+
+    disponibilidadCache.actualizarCita(cita, { ...cita, hora: new Date('1970-01-01T10:00:00.000Z') });
+
+    expect(disponibilidadCache.consultar(entrada, 9 * 60, 20).disponible).toBe(true);
+    expect(disponibilidadCache.consultar(entrada, 10 * 60, 20).disponible).toBe(false);
+  });
+
+  it('should not double count a cita registered twice', () => {
+    const entrada = construir();
+    const cita = { id: 'cita-1', doctorId, fecha, hora: '08:00', estado: 'Programada' };
+
+    disponibilidadCache.actualizarCita(null, cita);
+    disponibilidadCache.actualizarCita(null, cita);
+    disponibilidadCache.actualizarCita(cita, { ...cita, estado: 'Cancelada' });
+
+    expect(disponibilidadCache.consultar(entrada, 8 * 60, 20).disponible).toBe(true);
+  });
+
+  it('should respect partial bloqueos, full-day bloqueos and active reservas', () => {
+    const entrada = construir({
+      bloqueosParciales: [{ inicio: 10 * 60, fin: 10 * 60 + 30 }],
+      reservas: [{ inicio: 11 * 60, fin: 11 * 60 + 20, expiresAt: Date.now() + 60000 }],
+    });
+
+    expect(disponibilidadCache.consultar(entrada, 10 * 60 + 20, 20).disponible).toBe(false);
+    expect(disponibilidadCache.consultar(entrada, 11 * 60, 20).disponible).toBe(false);
+    expect(disponibilidadCache.consultar(entrada, 11 * 60 + 20, 20).disponible).toBe(true);
+
+    const bloqueada = construir({ bloqueadoDiaCompleto: true });
+    expect(disponibilidadCache.consultar(bloqueada, 8 * 60, 20).disponible).toBe(false);
+  });
+
+  it('should report days without schedule and drop invalidated doctors', () => {
+    const sinHorario = construir({ bloques: [] });
+    expect(disponibilidadCache.consultar(sinHorario, 8 * 60, 20).motivo).toBe('sin_horarios');
+
+    disponibilidadCache.invalidarDoctor(doctorId);
+    expect(disponibilidadCache.get(doctorId, fecha)).toBeNull();
+  });
+});
@@ -0,0 +1,115 @@
+const { PassThrough } = require('stream');
+const { NotFoundError, ValidationError } = require('../../utils/errors');
+
+// Lotes pequeños para que las pruebas recorran varias consultas
+process.env.RIPS_LOTE_FACTURAS = '2';
+const exportadorRIPS = require('../../services/exportadores/exportadorRIPS.service');
+
+// Mock db/prisma
+jest.mock('../../db/prisma', () => ({
+  factura: { findMany: jest.fn(), count: jest.fn() },
+}));
+
+const prisma = require('../../db/prisma');
+
+const paciente = (id, cedula) => ({
+  id, cedula, tipoDocumento: 'CC', tipoUsuario: 'Contributivo', genero: 'Femenino', fechaNacimiento: new Date('1990-05-01'),
+});
+
+const factura = (id, pac) => ({
+  id,
+  numero: `F-${id}`,
+  epsAutorizacion: null,
+  paciente: pac,
+  items: [
+    {
+      tipo: 'Consulta',
+      subtotal: '80000',
+      cita: { fecha: new Date('2025-01-10'), hora: new Date('1970-01-01T09:30:00Z') },
+    },
+    { tipo: 'Otro', descripcion: 'Insumos', cantidad: 1, precioUnitario: '15000', subtotal: '15000', createdAt: new Date('2025-01-10') },
+  ],
+});
+
+const p1 = paciente('p1', '100');
+const p2 = paciente('p2', '200');
+const facturas = [factura('a', p1), factura('b', p2), factura('c', p1)];
+
+async function exportar(criterio, opciones) {
+  const destino = new PassThrough();
+  const chunks = [];
+  destino.on('data', chunk => chunks.push(chunk));
+  const resumen = await exportadorRIPS.exportarRIPS(criterio, destino, opciones);
+  return { resumen, json: JSON.parse(Buffer.concat(chunks).toString('utf8')) };
+}
+
+describe('ExportadorRIPS.exportarRIPS', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+  });
+
+  it('should stream the same document generarRIPS builds in memory', async () => {
+    prisma.factura.findMany.mockResolvedValueOnce(facturas);
+    const enMemoria = JSON.parse(JSON.stringify(await exportadorRIPS.generarRIPS(['a', 'b', 'c'])));
+
+    prisma.factura.findMany
+      .mockResolvedValueOnce(facturas.slice(0, 2))
+      .mockResolvedValueOnce(facturas.slice(2));
+    const { json, resumen } = await exportar({ factura_ids: ['c', 'a', 'b'] });
+
+    expect(json).toEqual(enMemoria);
+    expect(resumen).toEqual(expect.objectContaining({ facturas: 3, usuarios: 2 }));
+    expect(resumen.registros).toEqual(expect.objectContaining({ consultas: 3, otrosServicios: 3, medicamentos: 0 }));
+  });
+
+  it('should split explicit ids into sorted chunks', async () => {
+    prisma.factura.findMany.mockResolvedValueOnce(facturas.slice(0, 2)).mockResolvedValueOnce(facturas.slice(2));
+
+    await exportar({ factura_ids: ['c', 'b', 'a', 'a'] });
+
+    const lotes = prisma.factura.findMany.mock.calls.map(([args]) => args.where.id.in);
+    expect(lotes).toEqual([['a', 'b'], ['c']]);
+  });
+
+  it('should page a period by id and report progress per chunk', async () => {
+    prisma.factura.count.mockResolvedValue(3);
+    prisma.factura.findMany.mockResolvedValueOnce(facturas.slice(0, 2)).mockResolvedValueOnce(facturas.slice(2));
+    const progreso = [];
+
+    const { json } = await exportar(
+      { fecha_desde: '2025-01-01', fecha_hasta: '2025-01-31' },
+      { onProgreso: p => progreso.push(p) }
+    );
+
+    const [primera, segunda] = prisma.factura.findMany.mock.calls.map(([args]) => args);
+    expect(primera.where.id).toBeUndefined();
+    expect(primera.where.estado).toEqual({ not: 'Cancelada' });
+    expect(primera.where.fechaEmision.lt).toEqual(new Date('2025-02-01T00:00:00.000Z'));
+    expect(segunda.where.id).toEqual({ gt: 'b' });
+    expect(progreso).toEqual([
+      { fase: 'facturas', procesadas: 2, total: 3 },
+      { fase: 'facturas', procesadas: 3, total: 3 },
+      { fase: 'completado', procesadas: 3, total: 3 },
+    ]);
+    expect(json.numFactura).toBe('F-a');
+  });
+
+  it('should omit empty service sections like generarRIPS', async () => {
+    prisma.factura.findMany.mockResolvedValueOnce([{ ...facturas[0], items: [facturas[0].items[1]] }]);
+
+    const { json } = await exportar({ factura_ids: ['a'] });
+
+    expect(Object.keys(json.servicios)).toEqual(['otrosServicios']);
+  });
+
+  it('should fail with NotFoundError when no invoice exists', async () => {
+    prisma.factura.findMany.mockResolvedValueOnce([]);
+
+    await expect(exportar({ factura_ids: ['x'] })).rejects.toThrow(NotFoundError);
+  });
+
+  it('should require ids or a full period', async () => {
+    await expect(exportar({ fecha_desde: '2025-01-01' })).rejects.toThrow(ValidationError);
+    expect(prisma.factura.findMany).not.toHaveBeenCalled();
+  });
+});
@@ -0,0 +1,144 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+process.env.PRODUCTOS_IMPORT_BATCH = '2';
+process.env.PRODUCTOS_IMPORT_DIR = fs.mkdtempSync(path.join(os.tmpdir(), 'importaciones-'));
+
+const importacionService = require('../../services/importacionProductos.service');
+const { parseCSV } = require('../../utils/csv');
+const { ValidationError } = require('../../utils/errors');
+
+// Mock db/prisma
+jest.mock('../../db/prisma', () => ({
+  $transaction: jest.fn(),
+  $queryRaw: jest.fn(),
+  categoriaProducto: {
+    findUnique: jest.fn(),
+    findFirst: jest.fn(),
+    create: jest.fn(),
+  },
+  importacionProducto: {
+    create: jest.fn(),
+    findUnique: jest.fn(),
+    update: jest.fn(),
+    updateMany: jest.fn(),
+  },
+}));
+
+jest.mock('../../services/interaccionesMedicamentos.service', () => ({
+  programarReconstruccion: jest.fn(),
+}));
+
+const prisma = require('../../db/prisma');
+
+const leerTodo = async (texto, chunk = 7) => {
+  const chunks = [];
+  for (let i = 0; i < texto.length; i += chunk) chunks.push(texto.slice(i, i + chunk));
+  const registros = [];
+  for await (const { campos } of parseCSV(chunks)) registros.push(campos);
+  return registros;
+};
+
+const crearArchivo = (contenido) => {
+  const archivo = path.join(process.env.PRODUCTOS_IMPORT_DIR, `test-${Date.now()}-${Math.random()}.csv`);
+  fs.writeFileSync(archivo, contenido);
+  return archivo;
+};
+
+const trabajo = (archivo, extra = {}) => ({
+  id: 'job-12345678',
+  estado: 'procesando',
+  archivo,
+  categoriaId: 'cat-1',
+  bytesTotales: BigInt(fs.statSync(archivo).size),
+  bytesProcesados: BigInt(0),
+  filasProcesadas: 0,
+  creados: 0,
+  actualizados: 0,
+  errores: 0,
+  erroresDetalle: null,
+  rssPicoMb: null,
+  iniciadoEn: new Date(),
+  ...extra,
+});
+
+// Filas enviadas al INSERT en cada llamada a $queryRaw
+const lotesEscritos = () => prisma.$queryRaw.mock.calls.map(call => JSON.parse(call[1]));
+
+describe('parseCSV', () => {
+  it('should handle quoted commas, escaped quotes and line breaks across chunks', async () => {
+    const registros = await leerTodo('sku,nombre\r\nA1,"Acetaminofén, 500 mg"\r\nA2,"Jarabe ""infantil""\nfresa"\r\n');
+
+    expect(registros).toEqual([
+      ['sku', 'nombre'],
+      ['A1', 'Acetaminofén, 500 mg'],
+      ['A2', 'Jarabe "infantil"\nfresa'],
+    ]);
+  });
+
+  it('should strip the BOM and detect semicolon-delimited files', async () => {
+    const registros = await leerTodo('\uFEFFsku;precio\nA1;1,5');
+
+    expect(registros).toEqual([['sku', 'precio'], ['A1', '1,5']]);
+  });
+});
+
+describe('ImportacionProductosService', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+    prisma.$transaction.mockImplementation((fn) => fn(prisma));
+    prisma.importacionProducto.updateMany.mockResolvedValue({ count: 1 });
+    prisma.importacionProducto.update.mockImplementation(({ data }) => Promise.resolve({ id: 'job-12345678', bytesTotales: BigInt(0), bytesProcesados: BigInt(0), ...data }));
+  });
+
+  it('should upsert rows in batches and advance progress in the same transaction', async () => {
+    const archivo = crearArchivo('sku,nombre,precio_venta\nA1,uno,10\nA2,dos,20\nA3,tres,30\n');
+    prisma.importacionProducto.findUnique.mockResolvedValue(trabajo(archivo));
+    prisma.$queryRaw
+      .mockResolvedValueOnce([{ creado: true }, { creado: false }])
+      .mockResolvedValueOnce([{ creado: true }]);
+
+    await importacionService.procesar('job-12345678');
+
+    expect(lotesEscritos().map(lote => lote.map(p => p.sku))).toEqual([['A1', 'A2'], ['A3']]);
+    expect(lotesEscritos()[0][0]).toEqual(expect.objectContaining({ nombre: 'UNO', categoria_id: 'cat-1', precio_venta: 10 }));
+
+    const progreso = prisma.importacionProducto.update.mock.calls.map(call => call[0].data).filter(d => d.filasProcesadas);
+    expect(progreso[0]).toEqual(expect.objectContaining({ filasProcesadas: 2, creados: { increment: 1 }, actualizados: { increment: 1 } }));
+    expect(progreso[1]).toEqual(expect.objectContaining({ filasProcesadas: 3, creados: { increment: 1 } }));
+    expect(prisma.importacionProducto.update).toHaveBeenCalledWith(expect.objectContaining({
+      data: expect.objectContaining({ estado: 'completado' })
+    }));
+  });
+
+  it('should resume after the last committed row', async () => {
+    const archivo = crearArchivo('sku,nombre\nA1,uno\nA2,dos\nA3,tres\n');
+    prisma.importacionProducto.findUnique.mockResolvedValue(trabajo(archivo, { filasProcesadas: 2 }));
+    prisma.$queryRaw.mockResolvedValue([{ creado: true }]);
+
+    await importacionService.procesar('job-12345678');
+
+    expect(lotesEscritos().map(lote => lote.map(p => p.sku))).toEqual([['A3']]);
+  });
+
+  it('should record invalid rows as errors without failing the batch', async () => {
+    const archivo = crearArchivo('sku,nombre,precio\nA1,uno,abc\nA2,dos,5\n');
+    prisma.importacionProducto.findUnique.mockResolvedValue(trabajo(archivo));
+    prisma.$queryRaw.mockResolvedValue([{ creado: true }]);
+
+    await importacionService.procesar('job-12345678');
+
+    expect(lotesEscritos()).toEqual([[expect.objectContaining({ sku: 'A2', precio_venta: 5 })]]);
+    expect(prisma.importacionProducto.update).toHaveBeenCalledWith(expect.objectContaining({
+      data: expect.objectContaining({ errores: { increment: 1 }, erroresDetalle: [{ fila: 1, error: 'Precio inválido: abc' }] })
+    }));
+  });
+
+  it('should refuse to process a job already claimed by another worker', async () => {
+    prisma.importacionProducto.updateMany.mockResolvedValue({ count: 0 });
+
+    await expect(importacionService.procesar('job-12345678')).rejects.toThrow(ValidationError);
+    expect(prisma.$queryRaw).not.toHaveBeenCalled();
+  });
+});
@@ -0,0 +1,132 @@
+const interaccionesService = require('../../services/interaccionesMedicamentos.service');
+
+// Mock db/prisma
+jest.mock('../../db/prisma', () => ({
+  producto: { findMany: jest.fn() },
+  interaccionMedicamento: { findMany: jest.fn(), deleteMany: jest.fn(), createMany: jest.fn() },
+  $transaction: jest.fn(operaciones => Promise.all(operaciones)),
+}));
+
+const prisma = require('../../db/prisma');
+
+const warfarina = {
+  id: 'w',
+  nombre: 'Coumadin 5 mg',
+  principioActivo: 'Warfarina',
+  descripcion: 'Anticoagulante oral. Interacción grave con ácido acetilsalicílico por riesgo de sangrado. Vigilar INR si se usa con Omeprazol.',
+};
+
+const catalogo = [
+  { principioActivo: 'Warfarina' },
+  { principioActivo: 'Ácido Acetilsalicílico' },
+  { principioActivo: 'omeprazol' },
+  { principioActivo: 'Losartán + Hidroclorotiazida' },
+];
+
+describe('InteraccionesMedicamentosService', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+    interaccionesService.invalidar();
+  });
+
+  describe('calcularInteraccionesProducto', () => {
+    it('should key pairs by normalized, sorted active ingredients with sentence severity', () => {
+      const filas = interaccionesService.calcularInteraccionesProducto(
+        warfarina,
+        ['warfarina', 'acido acetilsalicilico', 'omeprazol', 'losartan']
+      );
+
+      expect(filas).toEqual([
+        expect.objectContaining({ principioA: 'acido acetilsalicilico', principioB: 'warfarina', severidad: 'GRAVE' }),
+        expect.objectContaining({ principioA: 'omeprazol', principioB: 'warfarina', severidad: 'MODERADA' }),
+      ]);
+      expect(filas[0].detalle).toBe('Interacción grave con ácido acetilsalicílico por riesgo de sangrado');
+    });
+
+    it('should ignore descriptions that do not mention interactions', () => {
+      const filas = interaccionesService.calcularInteraccionesProducto(
+        { ...warfarina, descripcion: 'Tomar con omeprazol' },
+        ['omeprazol']
+      );
+
+      expect(filas).toEqual([]);
+    });
+
+    it('should split combined active ingredients', () => {
+      expect(interaccionesService.componentesPrincipio('Losartán + Hidroclorotiazida')).toEqual(['losartan', 'hidroclorotiazida']);
+      expect(interaccionesService.componentesPrincipio('Amoxicilina y Ácido Clavulánico')).toEqual(['amoxicilina', 'acido clavulanico']);
+    });
+  });
+
+  describe('reconstruir', () => {
+    it('should replace the index in one transaction', async () => {
+      prisma.producto.findMany
+        .mockResolvedValueOnce(catalogo)
+        .mockResolvedValueOnce([warfarina]);
+      prisma.interaccionMedicamento.deleteMany.mockResolvedValue({ count: 5 });
+      prisma.interaccionMedicamento.createMany.mockResolvedValue({ count: 2 });
+
+      const resultado = await interaccionesService.reconstruir();
+
+      expect(resultado).toEqual(expect.objectContaining({ productos: 1, interacciones: 2 }));
+      expect(prisma.$transaction).toHaveBeenCalledTimes(1);
+      expect(prisma.interaccionMedicamento.deleteMany).toHaveBeenCalledWith({});
+      expect(prisma.interaccionMedicamento.createMany.mock.calls[0][0].data).toHaveLength(2);
+    });
+  });
+
+  describe('buscar', () => {
+    const indice = [
+      { principioA: 'acido acetilsalicilico', principioB: 'warfarina', severidad: 'GRAVE', detalle: 'sangrado' },
+      { principioA: 'omeprazol', principioB: 'warfarina', severidad: 'MODERADA', detalle: 'INR' },
+      { principioA: 'omeprazol', principioB: 'warfarina', severidad: 'LEVE', detalle: 'otro producto' },
+    ];
+
+    it('should report indexed pairs sorted by severity', async () => {
+      prisma.interaccionMedicamento.findMany.mockResolvedValue(indice);
+
+      const alertas = await interaccionesService.buscar([
+        { id: '1', nombre: 'Omeprazol 20 mg', principioActivo: 'Omeprazol' },
+        { id: '2', nombre: 'Coumadin', principioActivo: 'Warfarina' },
+        { id: '3', nombre: 'Aspirina', principioActivo: 'Ácido acetilsalicílico' },
+        { id: '4', nombre: 'Loratadina', principioActivo: 'Loratadina' },
+      ]);
+
+      expect(alertas.map(a => [a.medicamento1, a.medicamento2, a.severidad])).toEqual([
+        ['Coumadin', 'Aspirina', 'GRAVE'],
+        ['Omeprazol 20 mg', 'Coumadin', 'MODERADA'],
+      ]);
+    });
+
+    it('should load the index once and reload it after invalidation', async () => {
+      prisma.interaccionMedicamento.findMany.mockResolvedValue(indice);
+      const medicamentos = [
+        { id: '1', nombre: 'Omeprazol', principioActivo: 'omeprazol' },
+        { id: '2', nombre: 'Coumadin', principioActivo: 'warfarina' },
+      ];
+
+      await interaccionesService.buscar(medicamentos);
+      await interaccionesService.buscar(medicamentos);
+      expect(prisma.interaccionMedicamento.findMany).toHaveBeenCalledTimes(1);
+
+      interaccionesService.invalidar();
+      await interaccionesService.buscar(medicamentos);
+      expect(prisma.interaccionMedicamento.findMany).toHaveBeenCalledTimes(2);
+    });
+
+    it('should build an empty index once before the first lookup', async () => {
+      interaccionesService.indiceVerificado = false;
+      prisma.interaccionMedicamento.findMany.mockResolvedValueOnce([]).mockResolvedValueOnce(indice);
+      prisma.producto.findMany.mockResolvedValueOnce(catalogo).mockResolvedValueOnce([warfarina]);
+      prisma.interaccionMedicamento.createMany.mockResolvedValue({ count: 2 });
+
+      const alertas = await interaccionesService.buscar([
+        { id: '1', nombre: 'Aspirina', principioActivo: 'acido acetilsalicilico' },
+        { id: '2', nombre: 'Coumadin', principioActivo: 'warfarina' },
+      ]);
+
+      expect(prisma.$transaction).toHaveBeenCalledTimes(1);
+      expect(alertas).toHaveLength(1);
+    });
+  });
+});
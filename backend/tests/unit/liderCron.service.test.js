@@ -0,0 +1,73 @@
+process.env.LIDER_INTERVALO_MS = '10';
+
+const liderCron = require('../../services/liderCron.service');
+
+// Mock db/prisma: la transacción interactiva ejecuta el callback con el mismo cliente
+jest.mock('../../db/prisma', () => {
+  const cliente = { $queryRaw: jest.fn() };
+  cliente.$transaction = jest.fn((fn) => fn(cliente));
+  return cliente;
+});
+
+const prisma = require('../../db/prisma');
+
+const esperar = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+describe('LiderCronService', () => {
+  let alGanar;
+  let alPerder;
+
+  beforeEach(() => {
+    jest.clearAllMocks();
+    alGanar = jest.fn();
+    alPerder = jest.fn();
+  });
+
+  afterEach(async () => {
+    await liderCron.detener();
+  });
+
+  it('should start the cron jobs when the lock is acquired and pause them on detener', async () => {
+    prisma.$queryRaw.mockResolvedValue([{ adquirido: true }]);
+
+    liderCron.iniciar({ alGanar, alPerder });
+    await esperar(35);
+
+    expect(alGanar).toHaveBeenCalledTimes(1);
+    expect(liderCron.getStats().lider).toBe(true);
+    // Lock + heartbeats sobre la misma transacción
+    expect(prisma.$transaction).toHaveBeenCalledTimes(1);
+    expect(prisma.$queryRaw.mock.calls.length).toBeGreaterThan(1);
+
+    await liderCron.detener();
+
+    expect(alPerder).toHaveBeenCalledTimes(1);
+    expect(liderCron.getStats().lider).toBe(false);
+  });
+
+  it('should keep retrying without starting the jobs while another process holds the lock', async () => {
+    prisma.$queryRaw.mockResolvedValue([{ adquirido: false }]);
+
+    liderCron.iniciar({ alGanar, alPerder });
+    await esperar(35);
+
+    expect(alGanar).not.toHaveBeenCalled();
+    expect(prisma.$transaction.mock.calls.length).toBeGreaterThan(1);
+    expect(liderCron.getStats().lider).toBe(false);
+  });
+
+  it('should pause the jobs when the heartbeat fails', async () => {
+    prisma.$queryRaw
+      .mockResolvedValueOnce([{ adquirido: true }])
+      .mockRejectedValueOnce(new Error('Connection terminated'))
+      .mockResolvedValue([{ adquirido: false }]);
+
+    liderCron.iniciar({ alGanar, alPerder });
+    await esperar(35);
+
+    expect(alGanar).toHaveBeenCalledTimes(1);
+    expect(alPerder).toHaveBeenCalledTimes(1);
+    expect(liderCron.getStats().lider).toBe(false);
+    expect(liderCron.getStats().ultimoError).toBe('Connection terminated');
+  });
+});
@@ -0,0 +1,98 @@
+const ordenMedicaService = require('../../services/ordenMedica.service');
+const { ValidationError } = require('../../utils/errors');
+
+// Mock db/prisma
+jest.mock('../../db/prisma', () => {
+  const mPrisma = {
+    ordenMedica: { findMany: jest.fn() },
+    $executeRaw: jest.fn(),
+    $transaction: jest.fn((callback) => callback(mPrisma)),
+  };
+  return mPrisma;
+});
+
+jest.mock('../../services/audit.service', () => ({
+  log: jest.fn(),
+}));
+
+const prisma = require('../../db/prisma');
+const auditService = require('../../services/audit.service');
+
+const resultado = { Hemoglobina: { valor: '14.5', unidad: 'g/dL' } };
+
+describe('OrdenMedicaService.completarLote', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+    prisma.$executeRaw.mockResolvedValue(0);
+  });
+
+  it('should complete valid orders with one UPDATE and report per-item status', async () => {
+    prisma.ordenMedica.findMany
+      .mockResolvedValueOnce([
+        { id: 'o1', estado: 'Pendiente' },
+        { id: 'o2', estado: 'EnProceso' },
+        { id: 'o4', estado: 'Cancelada' },
+      ])
+      .mockResolvedValueOnce([]);
+
+    const lote = await ordenMedicaService.completarLote([
+      { orden_id: 'o1', resultados: resultado, clave_idempotencia: 'run1-1' },
+      { orden_id: 'o2', resultados: resultado, clave_idempotencia: 'run1-2' },
+      { orden_id: 'o3', resultados: resultado, clave_idempotencia: 'run1-3' },
+      { orden_id: 'o4', resultados: resultado, clave_idempotencia: 'run1-4' },
+      { orden_id: 'o5' },
+    ], 'user-1');
+
+    expect(lote.resultados.map(r => r.estado)).toEqual(['completada', 'completada', 'no_encontrada', 'error', 'error']);
+    expect(lote.resumen).toEqual({ completada: 2, duplicada: 0, no_encontrada: 1, error: 2 });
+    expect(prisma.$executeRaw).toHaveBeenCalledTimes(1);
+  });
+
+  it('should mark replayed idempotency keys as duplicates without writing', async () => {
+    prisma.ordenMedica.findMany
+      .mockResolvedValueOnce([{ id: 'o1', estado: 'Completada' }, { id: 'o2', estado: 'Pendiente' }])
+      .mockResolvedValueOnce([{ id: 'o1', claveIdempotencia: 'run1-1' }, { id: 'o9', claveIdempotencia: 'run1-2' }]);
+
+    const lote = await ordenMedicaService.completarLote([
+      { orden_id: 'o1', resultados: resultado, clave_idempotencia: 'run1-1' },
+      { orden_id: 'o2', resultados: resultado, clave_idempotencia: 'run1-2' },
+    ], 'user-1');
+
+    expect(lote.resultados.map(r => r.estado)).toEqual(['duplicada', 'error']);
+    expect(prisma.$executeRaw).not.toHaveBeenCalled();
+  });
+
+  it('should treat a key repeated inside the batch as a duplicate', async () => {
+    prisma.ordenMedica.findMany
+      .mockResolvedValueOnce([{ id: 'o1', estado: 'Pendiente' }])
+      .mockResolvedValueOnce([]);
+
+    const lote = await ordenMedicaService.completarLote([
+      { orden_id: 'o1', resultados: resultado, clave_idempotencia: 'k' },
+      { orden_id: 'o1', resultados: resultado, clave_idempotencia: 'k' },
+    ], 'user-1');
+
+    expect(lote.resultados.map(r => r.estado)).toEqual(['completada', 'duplicada']);
+  });
+
+  it('should write a single audit entry per batch', async () => {
+    prisma.ordenMedica.findMany
+      .mockResolvedValueOnce([{ id: 'o1', estado: 'Pendiente' }, { id: 'o2', estado: 'Pendiente' }])
+      .mockResolvedValueOnce([]);
+
+    const lote = await ordenMedicaService.completarLote([
+      { orden_id: 'o1', resultados: resultado, clave_idempotencia: 'a' },
+      { orden_id: 'o2', resultados: resultado, clave_idempotencia: 'b' },
+    ], 'user-1');
+
+    expect(auditService.log).toHaveBeenCalledTimes(1);
+    expect(auditService.log).toHaveBeenCalledWith(expect.objectContaining({
+      action: 'COMPLETAR_ORDENES_LOTE',
+      resourceId: lote.loteId,
+    }));
+  });
+
+  it('should reject empty batches', async () => {
+    await expect(ordenMedicaService.completarLote([], 'user-1')).rejects.toThrow(ValidationError);
+  });
+});
@@ -0,0 +1,94 @@
+const pacienteService = require('../../services/paciente.service');
+
+// Mock db/prisma
+jest.mock('../../db/prisma', () => ({
+  $queryRawUnsafe: jest.fn(),
+  paciente: {
+    findMany: jest.fn(),
+  },
+}));
+
+jest.mock('../../services/email.service', () => ({}));
+
+const prisma = require('../../db/prisma');
+
+describe('PacienteService.search', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+  });
+
+  it('should ignore terms shorter than two characters', async () => {
+    const result = await pacienteService.search(' a ');
+
+    expect(result).toEqual([]);
+    expect(prisma.$queryRawUnsafe).not.toHaveBeenCalled();
+  });
+
+  it('should look up documents by exact match or prefix, with an optional document type', async () => {
+    prisma.$queryRawUnsafe.mockResolvedValueOnce([{ id: '1', cedula: '1023456' }]);
+
+    const result = await pacienteService.search('CC 1.023.456');
+
+    expect(result).toEqual([{ id: '1', cedula: '1023456' }]);
+    const [sql, ...params] = prisma.$queryRawUnsafe.mock.calls[0];
+    expect(sql).toContain('p.cedula = $1 OR p.cedula LIKE $2');
+    expect(sql).toContain('upper(p.tipo_documento) = $4 OR p.tipo_documento = ANY($5::text[])');
+    expect(params).toEqual(['1023456', '1023456%', 10, 'CC', ['Cédula de Ciudadanía', 'Cedula de Ciudadania']]);
+  });
+
+  it('should match the long document type name stored by the admission form', async () => {
+    const paciente = { id: '3', cedula: '1023456', tipoDocumento: 'Cédula de Ciudadanía' };
+    prisma.$queryRawUnsafe.mockResolvedValueOnce([paciente]);
+
+    const result = await pacienteService.search('CC 1023456');
+
+    expect(result).toEqual([paciente]);
+    expect(prisma.$queryRawUnsafe.mock.calls[0][5]).toContain(paciente.tipoDocumento);
+  });
+
+  it('should retry without the document type when the typed lookup finds nothing', async () => {
+    const paciente = { id: '4', cedula: '1098765', tipoDocumento: 'T.I.' };
+    prisma.$queryRawUnsafe
+      .mockResolvedValueOnce([])
+      .mockResolvedValueOnce([paciente]);
+
+    const result = await pacienteService.search('TI 1098765');
+
+    expect(result).toEqual([paciente]);
+    expect(prisma.$queryRawUnsafe).toHaveBeenCalledTimes(2);
+    const [sql, ...params] = prisma.$queryRawUnsafe.mock.calls[1];
+    expect(sql).not.toContain('tipo_documento =');
+    expect(params).toEqual(['1098765', '1098765%', 10]);
+  });
+
+  it('should match every word of a full name against the normalized column', async () => {
+    prisma.$queryRawUnsafe.mockResolvedValueOnce([]);
+
+    await pacienteService.search('María  Gómez', { limit: 5 });
+
+    const [sql, ...params] = prisma.$queryRawUnsafe.mock.calls[0];
+    expect(sql).toContain('p.nombre_completo_normalizado LIKE $1 AND p.nombre_completo_normalizado LIKE $2');
+    expect(params).toEqual(['%maria%', '%gomez%', 'maria gomez%', 'maria gomez', 5]);
+  });
+
+  it('should fall back to a name search when an alphanumeric term matches no document', async () => {
+    prisma.$queryRawUnsafe
+      .mockResolvedValueOnce([])
+      .mockResolvedValueOnce([{ id: '2', nombre: 'Test1' }]);
+
+    const result = await pacienteService.search('test1');
+
+    expect(result).toEqual([{ id: '2', nombre: 'Test1' }]);
+    expect(prisma.$queryRawUnsafe).toHaveBeenCalledTimes(2);
+  });
+
+  it('should fall back to Prisma contains when the search index is missing', async () => {
+    prisma.$queryRawUnsafe.mockRejectedValueOnce(new Error('column "nombre_completo_normalizado" does not exist'));
+    prisma.paciente.findMany.mockResolvedValue([{ id: '3', nombre: 'Maria' }]);
+
+    const result = await pacienteService.search('maria');
+
+    expect(result).toEqual([{ id: '3', nombre: 'Maria' }]);
+    expect(prisma.paciente.findMany).toHaveBeenCalledWith(expect.objectContaining({ take: 10 }));
+  });
+});
@@ -0,0 +1,116 @@
+const { paginar, codificarCursor, decodificarCursor } = require('../../utils/pagination');
+const { ValidationError } = require('../../utils/errors');
+
+const fila = (minuto, id) => ({ id, fechaRegistro: new Date(Date.UTC(2026, 0, 1, 8, minuto)) });
+
+const crearDelegate = (filas, total = filas.length) => ({
+  findMany: jest.fn().mockResolvedValue(filas),
+  count: jest.fn().mockResolvedValue(total),
+});
+
+describe('paginar', () => {
+  it('should keep page/limit pagination with total by default', async () => {
+    const delegate = crearDelegate([fila(3, 'c'), fila(2, 'b'), fila(1, 'a')], 7);
+
+    const { items, pagination } = await paginar(delegate, {
+      where: { pacienteId: 'p1' },
+      campoFecha: 'fechaRegistro',
+      query: { page: '2', limit: '2' },
+    });
+
+    expect(delegate.findMany).toHaveBeenCalledWith(expect.objectContaining({
+      where: { pacienteId: 'p1' },
+      skip: 2,
+      take: 3,
+      orderBy: [{ fechaRegistro: 'desc' }, { id: 'desc' }],
+    }));
+    expect(items).toHaveLength(2);
+    expect(pagination).toEqual(expect.objectContaining({ page: 2, limit: 2, total: 7, totalPages: 4, has_more: true }));
+    expect(pagination.next_cursor).toBe(codificarCursor(fila(2, 'b').fechaRegistro, 'b'));
+  });
+
+  it('should clamp invalid limits and pages instead of passing them to Prisma', async () => {
+    const delegate = crearDelegate([]);
+
+    const { items, pagination } = await paginar(delegate, {
+      campoFecha: 'fechaRegistro',
+      query: { limit: '0', page: '-3' },
+    });
+
+    expect(items).toEqual([]);
+    expect(delegate.findMany.mock.calls[0][0]).toEqual(expect.objectContaining({ skip: 0, take: 2 }));
+    expect(pagination).toEqual(expect.objectContaining({ page: 1, limit: 1, has_more: false, next_cursor: null }));
+
+    await paginar(delegate, { campoFecha: 'fechaRegistro', query: { limit: 'abc' }, limitePorDefecto: 20 });
+    await paginar(delegate, { campoFecha: 'fechaRegistro', query: { limit: '100000' } });
+
+    expect(delegate.findMany.mock.calls[1][0].take).toBe(21);
+    expect(delegate.findMany.mock.calls[2][0].take).toBe(201);
+  });
+
+  it('should skip the count query when con_total=false', async () => {
+    const delegate = crearDelegate([fila(1, 'a')]);
+
+    const { pagination } = await paginar(delegate, { campoFecha: 'fechaRegistro', query: { con_total: 'false' } });
+
+    expect(delegate.count).not.toHaveBeenCalled();
+    expect(pagination.total).toBeUndefined();
+    expect(pagination.has_more).toBe(false);
+    expect(pagination.next_cursor).toBeNull();
+  });
+
+  it('should start keyset pagination with an empty cursor and not count by default', async () => {
+    const delegate = crearDelegate([fila(3, 'c'), fila(2, 'b')]);
+
+    const { pagination } = await paginar(delegate, {
+      where: { pacienteId: 'p1' },
+      campoFecha: 'fechaRegistro',
+      query: { cursor: '', limit: '1' },
+    });
+
+    const llamada = delegate.findMany.mock.calls[0][0];
+    expect(llamada.skip).toBeUndefined();
+    expect(llamada.where).toEqual({ pacienteId: 'p1' });
+    expect(delegate.count).not.toHaveBeenCalled();
+    expect(pagination.page).toBeUndefined();
+    expect(pagination.next_cursor).toBe(codificarCursor(fila(3, 'c').fechaRegistro, 'c'));
+  });
+
+  it('should continue after (fecha, id) of the cursor', async () => {
+    const delegate = crearDelegate([]);
+    const ultima = fila(2, 'b');
+
+    await paginar(delegate, {
+      where: { pacienteId: 'p1' },
+      campoFecha: 'fechaRegistro',
+      query: { cursor: codificarCursor(ultima.fechaRegistro, ultima.id) },
+    });
+
+    expect(delegate.findMany.mock.calls[0][0].where).toEqual({
+      AND: [
+        { pacienteId: 'p1' },
+        {
+          OR: [
+            { fechaRegistro: { lt: ultima.fechaRegistro } },
+            { fechaRegistro: ultima.fechaRegistro, id: { lt: 'b' } },
+          ],
+        },
+      ],
+    });
+  });
+
+  it('should reject cursors it did not issue', async () => {
+    const delegate = crearDelegate([]);
+
+    await expect(paginar(delegate, { campoFecha: 'fechaRegistro', query: { cursor: 'no-es-un-cursor' } }))
+      .rejects.toThrow(ValidationError);
+    expect(delegate.findMany).not.toHaveBeenCalled();
+  });
+});
+
+describe('decodificarCursor', () => {
+  it('should round-trip fecha and id', () => {
+    const fecha = new Date('2026-01-01T08:00:00.123Z');
+    expect(decodificarCursor(codificarCursor(fecha, 'abc'))).toEqual({ fecha, id: 'abc' });
+  });
+});
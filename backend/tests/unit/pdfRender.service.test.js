@@ -0,0 +1,93 @@
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+
+// Renderizado en el hilo principal y cache en un directorio temporal
+process.env.PDF_WORKERS = '0';
+process.env.PDF_CACHE_DIR = fs.mkdtempSync(path.join(os.tmpdir(), 'pdf-cache-test-'));
+const pdfRenderService = require('../../services/pdfRender.service');
+
+const mockRenderizar = jest.fn();
+
+jest.mock('../../workers/renderizadores', () => ({
+  obtenerRenderizador: jest.fn(() => mockRenderizar),
+  versionPlantilla: jest.fn(() => 'plantilla-v1'),
+  aClonable: jest.fn(datos => datos),
+}));
+
+const { versionPlantilla } = require('../../workers/renderizadores');
+
+describe('PdfRenderService', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+    versionPlantilla.mockReturnValue('plantilla-v1');
+    mockRenderizar.mockImplementation(async datos => Buffer.from(`%PDF ${datos.id} ${datos.version}`));
+  });
+
+  afterAll(() => {
+    fs.rmSync(process.env.PDF_CACHE_DIR, { recursive: true, force: true });
+  });
+
+  it('should serve unchanged records from the disk cache', async () => {
+    const primero = await pdfRenderService.renderizar('factura', { id: 'f1', version: 1 });
+    const segundo = await pdfRenderService.renderizar('factura', { id: 'f1', version: 1 });
+
+    expect(mockRenderizar).toHaveBeenCalledTimes(1);
+    expect(segundo.equals(primero)).toBe(true);
+    expect(fs.readdirSync(path.join(process.env.PDF_CACHE_DIR, 'factura'))).toHaveLength(1);
+  });
+
+  it('should render again when the source records change', async () => {
+    await pdfRenderService.renderizar('factura', { id: 'f2', version: 1 });
+    const cambiado = await pdfRenderService.renderizar('factura', { id: 'f2', version: 2 });
+
+    expect(mockRenderizar).toHaveBeenCalledTimes(2);
+    expect(cambiado.toString()).toBe('%PDF f2 2');
+  });
+
+  it('should pass the render time so cached copies print when they were generated', async () => {
+    mockRenderizar.mockImplementation(async (datos, { generadoEn }) => Buffer.from(`%PDF ${generadoEn.toISOString()}`));
+
+    const primero = await pdfRenderService.renderizar('ordenMedica', { id: 'o2', version: 1 });
+    const segundo = await pdfRenderService.renderizar('ordenMedica', { id: 'o2', version: 1 });
+
+    expect(mockRenderizar).toHaveBeenCalledTimes(1);
+    expect(mockRenderizar.mock.calls[0][1].generadoEn).toBeInstanceOf(Date);
+    expect(segundo.toString()).toBe(primero.toString());
+  });
+
+  it('should key the cache on huella instead of volatile fields', async () => {
+    await pdfRenderService.renderizar('hce', { id: 'p1', version: 1, generado: 1 }, { huella: { id: 'p1' } });
+    await pdfRenderService.renderizar('hce', { id: 'p1', version: 1, generado: 2 }, { huella: { id: 'p1' } });
+
+    expect(mockRenderizar).toHaveBeenCalledTimes(1);
+  });
+
+  it('should invalidate the cache when the template changes', async () => {
+    await pdfRenderService.renderizar('ordenMedica', { id: 'o1', version: 1 });
+    versionPlantilla.mockReturnValue('plantilla-v2');
+    await pdfRenderService.renderizar('ordenMedica', { id: 'o1', version: 1 });
+
+    expect(mockRenderizar).toHaveBeenCalledTimes(2);
+  });
+
+  it('should share one render between concurrent requests for the same PDF', async () => {
+    const antes = pdfRenderService.getStats().compartidos;
+
+    const pdfs = await Promise.all([1, 2, 3].map(() => pdfRenderService.renderizar('factura', { id: 'f3', version: 1 })));
+
+    expect(mockRenderizar).toHaveBeenCalledTimes(1);
+    expect(pdfs[2].toString()).toBe('%PDF f3 1');
+    expect(pdfRenderService.getStats().compartidos - antes).toBe(2);
+  });
+
+  it('should not cache failed renders', async () => {
+    mockRenderizar.mockRejectedValueOnce(new Error('fallo de PDFKit'));
+
+    await expect(pdfRenderService.renderizar('factura', { id: 'f4', version: 1 })).rejects.toThrow('fallo de PDFKit');
+    const pdf = await pdfRenderService.renderizar('factura', { id: 'f4', version: 1 });
+
+    expect(mockRenderizar).toHaveBeenCalledTimes(2);
+    expect(pdf.toString()).toBe('%PDF f4 1');
+  });
+});
@@ -0,0 +1,92 @@
+const permisoCache = require('../../services/permisoCache.service');
+
+jest.mock('../../db/prisma', () => ({
+  permisoInvalidacion: {
+    create: jest.fn(),
+    findFirst: jest.fn(),
+    findMany: jest.fn(),
+    deleteMany: jest.fn(),
+  },
+}));
+
+const prisma = require('../../db/prisma');
+
+describe('PermisoCacheService', () => {
+  const permisos = { roles: [{ name: 'DOCTOR' }], permissions: ['hce.view'], expiraEn: null };
+
+  beforeEach(() => {
+    jest.clearAllMocks();
+    permisoCache.limpiar();
+    permisoCache.ultimoEventoId = null;
+  });
+
+  it('should load once and serve later requests from cache', async () => {
+    const cargar = jest.fn().mockResolvedValue(permisos);
+    const antes = permisoCache.getStats();
+
+    await permisoCache.obtener('user-1', cargar);
+    const resultado = await permisoCache.obtener('user-1', cargar);
+
+    expect(resultado.permissions).toEqual(['hce.view']);
+    expect(cargar).toHaveBeenCalledTimes(1);
+    expect(permisoCache.getStats().hits - antes.hits).toBe(1);
+    expect(permisoCache.getStats().misses - antes.misses).toBe(1);
+  });
+
+  it('should reload after a user invalidation and publish it for other instances', async () => {
+    const cargar = jest.fn().mockResolvedValue(permisos);
+
+    await permisoCache.obtener('user-1', cargar);
+    await permisoCache.invalidarUsuario('user-1');
+    await permisoCache.obtener('user-1', cargar);
+
+    expect(cargar).toHaveBeenCalledTimes(2);
+    expect(prisma.permisoInvalidacion.create).toHaveBeenCalledWith({ data: { usuarioId: 'user-1' } });
+  });
+
+  it('should not cache a value loaded while the user was being invalidated', async () => {
+    let resolver;
+    const cargaLenta = jest.fn(() => new Promise((resolve) => { resolver = resolve; }));
+    const cargar = jest.fn().mockResolvedValue({ ...permisos, permissions: [] });
+
+    await permisoCache.obtener('user-1', cargar);
+    await permisoCache.invalidarUsuario('user-1');
+    const pendiente = permisoCache.obtener('user-1', cargaLenta);
+    await permisoCache.invalidarUsuario('user-1');
+    resolver(permisos);
+    await pendiente;
+
+    await permisoCache.obtener('user-1', cargar);
+    expect(cargar).toHaveBeenCalledTimes(2);
+  });
+
+  it('should not keep an entry past the expiration of a role', async () => {
+    const cargar = jest.fn().mockResolvedValue({ ...permisos, expiraEn: new Date(Date.now() - 1000) });
+
+    await permisoCache.obtener('user-1', cargar);
+    await permisoCache.obtener('user-1', cargar);
+
+    expect(cargar).toHaveBeenCalledTimes(2);
+  });
+
+  it('should apply invalidations published by other instances', async () => {
+    const cargar = jest.fn().mockResolvedValue(permisos);
+    prisma.permisoInvalidacion.findFirst.mockResolvedValue({ id: BigInt(10) });
+    await permisoCache.sincronizar();
+
+    await permisoCache.obtener('user-1', cargar);
+    await permisoCache.obtener('user-2', cargar);
+
+    prisma.permisoInvalidacion.findMany.mockResolvedValue([{ id: BigInt(11), usuarioId: 'user-1' }]);
+    await permisoCache.sincronizar();
+
+    await permisoCache.obtener('user-1', cargar);
+    await permisoCache.obtener('user-2', cargar);
+
+    expect(cargar).toHaveBeenCalledTimes(3);
+    expect(permisoCache.ultimoEventoId).toBe(BigInt(11));
+    expect(prisma.permisoInvalidacion.findMany).toHaveBeenCalledWith(expect.objectContaining({
+      where: { id: { gt: BigInt(10) } },
+    }));
+  });
+});
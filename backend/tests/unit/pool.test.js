@@ -0,0 +1,53 @@
+const { buildDatabaseUrl, getPoolConfig, getPoolMetrics } = require('../../db/pool');
+
+describe('db/pool', () => {
+  describe('buildDatabaseUrl', () => {
+    it('should add pool settings from the environment without overriding the URL', () => {
+      const url = buildDatabaseUrl('postgresql://u:p@localhost:5432/clinica?connection_limit=5', {
+        DB_POOL_SIZE: '20',
+        DB_POOL_TIMEOUT_S: '15',
+        DB_QUERY_TIMEOUT_S: '30',
+      });
+
+      const config = getPoolConfig(url);
+      expect(config.connectionLimit).toBe(5);
+      expect(config.poolTimeoutS).toBe(15);
+      expect(config.queryTimeoutS).toBe(30);
+    });
+  });
+
+  describe('getPoolMetrics', () => {
+    it('should map Prisma metrics to connection and query figures', async () => {
+      const prisma = {
+        $metrics: {
+          json: jest.fn().mockResolvedValue({
+            counters: [{ key: 'prisma_client_queries_total', value: 42 }],
+            gauges: [
+              { key: 'prisma_pool_connections_open', value: 3 },
+              { key: 'prisma_pool_connections_busy', value: 1 },
+              { key: 'prisma_pool_connections_idle', value: 2 },
+            ],
+            histograms: [
+              { key: 'prisma_client_queries_wait_histogram_ms', value: { sum: 10, count: 4, buckets: [] } },
+            ],
+          }),
+        },
+      };
+
+      const metricas = await getPoolMetrics(prisma, { connectionLimit: 10 });
+
+      expect(metricas.connections).toEqual({ open: 3, busy: 1, idle: 2, opened: 0, closed: 0 });
+      expect(metricas.queries.total).toBe(42);
+      expect(metricas.waitMs).toEqual({ avg: 2.5, count: 4 });
+    });
+
+    it('should report unavailable metrics instead of failing', async () => {
+      const prisma = { $metrics: { json: jest.fn().mockRejectedValue(new Error('metrics preview feature not enabled')) } };
+
+      const metricas = await getPoolMetrics(prisma, { connectionLimit: 10 });
+
+      expect(metricas.metrics).toBeNull();
+      expect(metricas.config.connectionLimit).toBe(10);
+    });
+  });
+});
@@ -4,6 +4,8 @@ const { ZodError } = require('zod');
 
 // Mock db/prisma
 jest.mock('../../db/prisma', () => ({
+  $queryRaw: jest.fn(),
+  $queryRawUnsafe: jest.fn(),
   producto: {
     findUnique: jest.fn(),
     findMany: jest.fn(),
@@ -18,7 +20,15 @@ jest.mock('../../db/prisma', () => ({
   }
 }));
 
+jest.mock('../../services/interaccionesMedicamentos.service', () => ({
+  buscar: jest.fn(),
+  reindexarProducto: jest.fn(() => Promise.resolve()),
+  programarReconstruccion: jest.fn(),
+  normalizarTexto: jest.fn(texto => (texto || '').normalize('NFD').replace(/[\u0300-\u036f]/g, '').toLowerCase().trim()),
+}));
+
 const prisma = require('../../db/prisma');
+const interaccionesService = require('../../services/interaccionesMedicamentos.service');
 
 describe('ProductoService', () => {
   beforeEach(() => {
@@ -45,6 +55,67 @@ describe('ProductoService', () => {
               })
           }));
       });
+
+      it('should resolve code-like terms with an exact match before the trigram search', async () => {
+          prisma.$queryRawUnsafe
+              .mockResolvedValueOnce([
+                  { id: '1', nombre: 'Acetaminofén', codigo_atc: 'N02BE01', precio_venta: '1200' }
+              ])
+              .mockResolvedValueOnce([{ total: 1 }]);
+
+          const result = await productoService.getAll({ search: 'n02be01' });
+
+          expect(result).toHaveLength(1);
+          expect(result[0].codigoAtc).toBe('N02BE01');
+          expect(result[0].precioVenta).toBe(1200);
+          expect(prisma.$queryRawUnsafe).toHaveBeenCalledTimes(2);
+          const [sql, ...params] = prisma.$queryRawUnsafe.mock.calls[0];
+          expect(sql).toContain('p.codigo_atc = upper($1)');
+          expect(sql).toContain('LIMIT $2');
+          expect(params).toEqual(['n02be01', 50, 0]);
+          expect(prisma.producto.findMany).not.toHaveBeenCalled();
+      });
+
+      it('should search the normalized column without accents and apply filters', async () => {
+          prisma.$queryRawUnsafe
+              .mockResolvedValueOnce([{ id: '1', nombre: 'Ácido fólico' }])
+              .mockResolvedValueOnce([{ total: 1 }]);
+
+          const { productos, total } = await productoService.buscar({ search: 'Ácido 5%', activo: 'true' });
+
+          expect(productos[0].nombre).toBe('Ácido fólico');
+          expect(total).toBe(1);
+
+          const [sql, ...params] = prisma.$queryRawUnsafe.mock.calls[0];
+          expect(sql).toContain('p.search_text LIKE $1 AND p.activo = $2');
+          expect(params.slice(0, 3)).toEqual(['%acido 5\\%%', true, 'acido 5\\%%']);
+      });
+  });
+
+  describe('getStats', () => {
+      it('should map the aggregate row without loading products', async () => {
+          prisma.$queryRaw.mockResolvedValue([{
+              total: 3,
+              activos: 2,
+              inactivos: 1,
+              requieren_receta: 1,
+              bajo_stock: 1,
+              valor_inventario: 15000.5
+          }]);
+
+          const stats = await productoService.getStats();
+
+          expect(stats).toEqual({
+              total: 3,
+              activos: 2,
+              inactivos: 1,
+              bajoStock: 1,
+              requiereReceta: 1,
+              requierenReceta: 1,
+              valorInventario: 15000.5
+          });
+          expect(prisma.producto.findMany).not.toHaveBeenCalled();
+      });
   });
 
   describe('create', () => {
@@ -116,15 +187,41 @@ describe('ProductoService', () => {
   });
 
   describe('verificarInteracciones', () => {
-      it('should detect interactions based on description', async () => {
-          prisma.producto.findMany.mockResolvedValue([
-              { id: '1', nombre: 'Med A', descripcion: 'Interaccion con Med B' },
-              { id: '2', nombre: 'Med B', principioActivo: 'Med B' }
-          ]);
+      it('should look up the prescribed products in the interaction index', async () => {
+          const medicamentos = [
+              { id: '1', nombre: 'Med A', principioActivo: 'warfarina' },
+              { id: '2', nombre: 'Med B', principioActivo: 'ibuprofeno' }
+          ];
+          prisma.producto.findMany.mockResolvedValue(medicamentos);
+          interaccionesService.buscar.mockResolvedValue([{ tipo: 'interaccion', severidad: 'GRAVE' }]);
 
           const alertas = await productoService.verificarInteracciones(['1', '2']);
+          expect(interaccionesService.buscar).toHaveBeenCalledWith(medicamentos);
           expect(alertas).toHaveLength(1);
           expect(alertas[0].tipo).toBe('interaccion');
       });
+
+      it('should skip the lookup with fewer than two products', async () => {
+          prisma.producto.findMany.mockResolvedValue([{ id: '1', nombre: 'Med A' }]);
+
+          const alertas = await productoService.verificarInteracciones(['1']);
+          expect(alertas).toEqual([]);
+          expect(interaccionesService.buscar).not.toHaveBeenCalled();
+      });
+  });
+
+  describe('verificarAlergias', () => {
+      it('should match allergies ignoring accents and case', async () => {
+          prisma.paciente.findUnique.mockResolvedValue({ alergias: 'Penicilina; ACIDO ACETILSALICÍLICO' });
+          prisma.producto.findMany.mockResolvedValue([
+              { id: '1', nombre: 'Aspirina', principioActivo: 'Ácido acetilsalicílico', descripcion: null },
+              { id: '2', nombre: 'Loratadina', principioActivo: 'loratadina', descripcion: null }
+          ]);
+
+          const resultado = await productoService.verificarAlergias('pac-1', ['1', '2']);
+          expect(resultado.hayAlergias).toBe(true);
+          expect(resultado.alergias).toHaveLength(1);
+          expect(resultado.alergias[0]).toEqual(expect.objectContaining({ medicamentoId: '1', alergia: 'acido acetilsalicilico' }));
+      });
   });
 });
@@ -0,0 +1,122 @@
+process.env.RECORDATORIOS_LOTE = '2';
+process.env.RECORDATORIOS_REINTENTOS = '2';
+process.env.RECORDATORIOS_ESPERA_MS = '0';
+
+const { procesarRecordatorios } = require('../../cron/recordatoriosCitas');
+
+// Mock db/prisma
+jest.mock('../../db/prisma', () => ({
+  cita: { findMany: jest.fn(), updateMany: jest.fn() },
+  ejecucionRecordatorios: { create: jest.fn() },
+}));
+
+// Mock email service
+jest.mock('../../services/email.service', () => ({
+  isEnabled: jest.fn(() => true),
+  buildAppointmentReminder: jest.fn(({ to, tipoRecordatorio }) => ({ to, subject: tipoRecordatorio, html: '<p></p>', text: '' })),
+  sendBatch: jest.fn(),
+  send: jest.fn(),
+}));
+
+const prisma = require('../../db/prisma');
+const emailService = require('../../services/email.service');
+
+const cita = (id, email = `${id}@example.com`) => ({
+  id,
+  fecha: new Date(),
+  hora: null,
+  paciente: { id: `p-${id}`, nombre: 'Paciente', apellido: id, email },
+  doctor: null,
+  especialidad: null,
+});
+
+describe('procesarRecordatorios', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+    emailService.isEnabled.mockReturnValue(true);
+    prisma.cita.updateMany.mockResolvedValue({ count: 0 });
+    prisma.ejecucionRecordatorios.create.mockResolvedValue({});
+  });
+
+  it('should send each cohort in batches and flag them with updateMany', async () => {
+    prisma.cita.findMany
+      .mockResolvedValueOnce([cita('a'), cita('b'), cita('c')])
+      .mockResolvedValueOnce([cita('d'), cita('e', null)])
+      .mockResolvedValueOnce([]);
+    emailService.sendBatch.mockResolvedValue({ success: true, ids: [] });
+
+    const resultado = await procesarRecordatorios();
+
+    expect(emailService.sendBatch).toHaveBeenCalledTimes(3);
+    expect(prisma.cita.updateMany).toHaveBeenCalledWith({ where: { id: { in: ['a', 'b'] } }, data: { recordatorio7Dias: true } });
+    expect(prisma.cita.updateMany).toHaveBeenCalledWith({ where: { id: { in: ['c'] } }, data: { recordatorio7Dias: true } });
+    expect(prisma.cita.updateMany).toHaveBeenCalledWith({ where: { id: { in: ['d'] } }, data: { recordatorio4Dias: true } });
+    expect(resultado).toEqual(expect.objectContaining({
+      candidatas: 5, sinEmail: 1, enviados7Dias: 3, enviados4Dias: 1, enviados3Horas: 0, fallidos: 0, lotes: 3,
+    }));
+    expect(prisma.ejecucionRecordatorios.create).toHaveBeenCalledTimes(1);
+  });
+
+  it('should retry transient errors with backoff', async () => {
+    prisma.cita.findMany
+      .mockResolvedValueOnce([cita('a')])
+      .mockResolvedValueOnce([])
+      .mockResolvedValueOnce([]);
+    emailService.sendBatch
+      .mockResolvedValueOnce({ success: false, ids: [], error: 'rate limit', statusCode: 429 })
+      .mockResolvedValueOnce({ success: false, ids: [], error: 'socket hang up' })
+      .mockResolvedValueOnce({ success: true, ids: ['x'] });
+
+    const resultado = await procesarRecordatorios();
+
+    expect(emailService.sendBatch).toHaveBeenCalledTimes(3);
+    expect(resultado.enviados7Dias).toBe(1);
+    expect(resultado.reintentos).toBe(2);
+    // Los reintentos reutilizan la clave: Resend no duplica un lote que sí había recibido
+    const claves = emailService.sendBatch.mock.calls.map(([, opciones]) => opciones.idempotencyKey);
+    expect(claves[0]).toMatch(/^recordatorios-7dias-[0-9a-f]{64}$/);
+    expect(new Set(claves).size).toBe(1);
+  });
+
+  it('should leave the batch unflagged once retries are exhausted', async () => {
+    prisma.cita.findMany
+      .mockResolvedValueOnce([cita('a'), cita('b')])
+      .mockResolvedValueOnce([])
+      .mockResolvedValueOnce([]);
+    emailService.sendBatch.mockResolvedValue({ success: false, ids: [], error: 'server error', statusCode: 500 });
+
+    const resultado = await procesarRecordatorios();
+
+    expect(emailService.sendBatch).toHaveBeenCalledTimes(3);
+    expect(prisma.cita.updateMany).not.toHaveBeenCalled();
+    expect(resultado.fallidos).toBe(2);
+    expect(resultado.enviados7Dias).toBe(0);
+  });
+
+  it('should fall back to single sends when the batch is rejected', async () => {
+    prisma.cita.findMany
+      .mockResolvedValueOnce([cita('a'), cita('b', 'no-es-email')])
+      .mockResolvedValueOnce([])
+      .mockResolvedValueOnce([]);
+    emailService.sendBatch.mockResolvedValue({ success: false, ids: [], error: 'invalid to', statusCode: 422 });
+    emailService.send
+      .mockResolvedValueOnce({ success: true, id: '1' })
+      .mockResolvedValueOnce({ success: false, error: 'invalid to', statusCode: 422 });
+
+    const resultado = await procesarRecordatorios();
+
+    expect(emailService.send).toHaveBeenCalledTimes(2);
+    expect(prisma.cita.updateMany).toHaveBeenCalledWith({ where: { id: { in: ['a'] } }, data: { recordatorio7Dias: true } });
+    expect(resultado.enviados7Dias).toBe(1);
+    expect(resultado.fallidos).toBe(1);
+  });
+
+  it('should not query appointments when email is disabled', async () => {
+    emailService.isEnabled.mockReturnValue(false);
+
+    const resultado = await procesarRecordatorios();
+
+    expect(prisma.cita.findMany).not.toHaveBeenCalled();
+    expect(resultado.enviados7Dias).toBe(0);
+  });
+});
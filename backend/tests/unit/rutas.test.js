@@ -0,0 +1,58 @@
+const fs = require('fs');
+const path = require('path');
+const { Hono } = require('hono');
+const registroRutas = require('../../routes');
+const { RUTAS, gruposConfigurados } = require('../../routes');
+
+// Router de prueba en lugar de routes/auth (que carga servicios y prisma)
+jest.mock('../../routes/auth', () => {
+  const { Hono: HonoRouter } = require('hono');
+  const router = new HonoRouter();
+  router.get('/ping', (c) => c.json({ ok: true, path: c.req.path }));
+  return router;
+});
+
+const noEncontrada = (c) => c.json({ success: false, message: 'Ruta no encontrada' }, 404);
+
+const crearApp = (opciones) => {
+  const app = new Hono();
+  registroRutas.montar(app, { notFound: noEncontrada, ...opciones });
+  app.notFound(noEncontrada);
+  return app;
+};
+
+describe('Registro de rutas', () => {
+  it('should point every prefix to an existing route module exactly once', () => {
+    const prefijos = RUTAS.map(ruta => ruta.prefijo);
+    expect(new Set(prefijos).size).toBe(prefijos.length);
+
+    RUTAS.forEach((ruta) => {
+      expect(fs.existsSync(path.join(__dirname, '../../routes', `${ruta.modulo}.js`))).toBe(true);
+    });
+  });
+
+  it('should always include the base group and reject unknown groups', () => {
+    expect(gruposConfigurados('clinico')).toEqual(['base', 'clinico']);
+    expect(gruposConfigurados(undefined)).toContain('calidad');
+    expect(() => gruposConfigurados('clinico,contabilidad')).toThrow('contabilidad');
+  });
+
+  it('should load a router on the first request to its prefix', async () => {
+    const app = crearApp({ grupos: ['base'], modo: 'perezosa' });
+    expect(registroRutas.getStats().cargadas).toBe(0);
+
+    const res = await app.request('/auth/ping');
+
+    expect(res.status).toBe(200);
+    expect(await res.json()).toEqual({ ok: true, path: '/auth/ping' });
+    expect(registroRutas.getStats().cargadas).toBe(1);
+  });
+
+  it('should answer 404 for unknown paths and for groups not mounted in this instance', async () => {
+    const app = crearApp({ grupos: ['base'], modo: 'perezosa' });
+
+    expect((await app.request('/auth/no-existe')).status).toBe(404);
+    expect((await app.request('/calidad2/procesos')).status).toBe(404);
+    expect(registroRutas.getStats().cargadas).toBe(1);
+  });
+});
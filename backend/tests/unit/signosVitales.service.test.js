@@ -0,0 +1,75 @@
+const signosVitalesService = require('../../services/signosVitales.service');
+const { ValidationError } = require('../../utils/errors');
+
+jest.mock('../../db/prisma', () => ({
+  $queryRawUnsafe: jest.fn(),
+  signoVital: {
+    findMany: jest.fn(),
+  },
+}));
+
+jest.mock('../../services/auditoria.service', () => ({
+  registrarAccion: jest.fn(),
+}));
+
+const prisma = require('../../db/prisma');
+
+describe('SignosVitalesService', () => {
+  beforeEach(() => {
+    jest.clearAllMocks();
+  });
+
+  describe('getSeriesAgregadas', () => {
+    it('should aggregate several tipos in one query and split them into series', async () => {
+      prisma.$queryRawUnsafe.mockResolvedValue([
+        {
+          bucket: 0,
+          presionSistolica_n: 2, presionSistolica_min: 110, presionSistolica_avg: 115, presionSistolica_max: 120,
+          presionDiastolica_n: 2, presionDiastolica_min: 70, presionDiastolica_avg: 75, presionDiastolica_max: 80,
+          temperatura_n: 0, temperatura_min: null, temperatura_avg: null, temperatura_max: null,
+        },
+        {
+          bucket: 3,
+          presionSistolica_n: 0, presionSistolica_min: null, presionSistolica_avg: null, presionSistolica_max: null,
+          presionDiastolica_n: 0, presionDiastolica_min: null, presionDiastolica_avg: null, presionDiastolica_max: null,
+          temperatura_n: 1, temperatura_min: 36.5, temperatura_avg: 36.5, temperatura_max: 36.5,
+        },
+      ]);
+
+      const resultado = await signosVitalesService.getSeriesAgregadas('paciente-1', {
+        tipos: 'presion,temperatura',
+        diasAtras: 1,
+        resolucion: '1h',
+      });
+
+      expect(prisma.$queryRawUnsafe).toHaveBeenCalledTimes(1);
+      expect(resultado.bucketSegundos).toBe(3600);
+      expect(resultado.series.presion).toHaveLength(1);
+      expect(resultado.series.presion[0].presionSistolica).toEqual({ min: 110, avg: 115, max: 120, n: 2 });
+      expect(resultado.series.temperatura).toHaveLength(1);
+      expect(resultado.series.temperatura[0].fecha.getTime() - resultado.desde.getTime()).toBeLessThan(3 * 3600 * 1000 + 1000);
+    });
+
+    it('should widen buckets so a series never exceeds max_puntos', async () => {
+      prisma.$queryRawUnsafe.mockResolvedValue([]);
+
+      const resultado = await signosVitalesService.getSeriesAgregadas('paciente-1', {
+        tipos: ['frecuencia'],
+        diasAtras: 30,
+        resolucion: '1m',
+        maxPuntos: 100,
+      });
+
+      expect(Math.ceil((30 * 86400) / resultado.bucketSegundos)).toBeLessThanOrEqual(100);
+      expect(resultado.series).toHaveProperty('frecuenciaCardiaca');
+    });
+
+    it('should reject unknown tipos and malformed resolucion', async () => {
+      await expect(signosVitalesService.getSeriesAgregadas('paciente-1', { tipos: 'glucosa' }))
+        .rejects.toThrow(ValidationError);
+      await expect(signosVitalesService.getSeriesAgregadas('paciente-1', { tipos: 'peso', resolucion: 'hourly' }))
+        .rejects.toThrow(ValidationError);
+      expect(prisma.$queryRawUnsafe).not.toHaveBeenCalled();
+    });
+  });
+});
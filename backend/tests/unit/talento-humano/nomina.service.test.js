@@ -2,6 +2,9 @@
  * Tests para NominaService - Módulo Talento Humano
  */
 const prisma = require('../../../db/prisma');
+
+// Lotes pequeños para que procesarNomina recorra varias consultas
+process.env.NOMINA_LOTE = '2';
 const nominaService = require('../../../services/talento-humano/nomina.service');
 const { ValidationError, NotFoundError } = require('../../../utils/errors');
 
@@ -143,6 +146,12 @@ describe('NominaService', () => {
   });
 
   describe('procesarNomina', () => {
+    const empleado = (id, salarioBase = 2000000) => ({
+      id,
+      contratos: [{ salarioBase, auxTransporte: true }],
+      cargo: null
+    });
+
     it('debe procesar nómina del periodo', async () => {
       const mockPeriodo = { id: '1', estado: 'ABIERTO' };
       const mockEmpleados = [
@@ -156,18 +165,105 @@ describe('NominaService', () => {
       prisma.tHPeriodoNomina.findUnique
         .mockResolvedValueOnce(mockPeriodo)
         .mockResolvedValueOnce({ ...mockPeriodo, estado: 'EN_PROCESO', detalles: [] });
-      prisma.tHEmpleado.findMany.mockResolvedValue(mockEmpleados);
-      prisma.tHNovedadNomina.findMany.mockResolvedValue([]);
-      prisma.tHNominaDetalle.deleteMany.mockResolvedValue({});
+      prisma.tHNominaDetalle.findFirst.mockResolvedValueOnce(null);
+      prisma.tHEmpleado.findMany.mockResolvedValueOnce(mockEmpleados);
+      prisma.tHNovedadNomina.findMany.mockResolvedValueOnce([]);
       prisma.tHNominaDetalle.createMany.mockResolvedValue({ count: 1 });
       prisma.tHPeriodoNomina.update.mockResolvedValue({ ...mockPeriodo, estado: 'EN_PROCESO' });
 
-      const result = await nominaService.procesarNomina('1', 'user-1');
+      await nominaService.procesarNomina('1', 'user-1');
+
+      expect(prisma.tHEmpleado.findMany).toHaveBeenCalledTimes(1);
+      expect(prisma.tHNominaDetalle.deleteMany).not.toHaveBeenCalled();
+      expect(prisma.tHNominaDetalle.createMany).toHaveBeenCalledTimes(1);
+      expect(prisma.tHPeriodoNomina.update).toHaveBeenLastCalledWith({
+        where: { id: '1' },
+        data: expect.objectContaining({ estado: 'EN_PROCESO', procesadoPor: 'user-1' })
+      });
+    });
+
+    it('debe guardar cada lote con sus totales en una transacción', async () => {
+      prisma.tHPeriodoNomina.findUnique
+        .mockResolvedValueOnce({ id: '1', estado: 'ABIERTO' })
+        .mockResolvedValueOnce({ id: '1', estado: 'EN_PROCESO', detalles: [] });
+      prisma.tHNominaDetalle.findFirst.mockResolvedValueOnce(null);
+      prisma.tHEmpleado.findMany
+        .mockResolvedValueOnce([empleado('emp-1'), empleado('emp-2')])
+        .mockResolvedValueOnce([empleado('emp-3', 3000000)]);
+      prisma.tHNovedadNomina.findMany
+        .mockResolvedValueOnce([{ empleadoId: 'emp-2', tipo: 'BONIFICACION', valor: 100000, cantidad: null }])
+        .mockResolvedValueOnce([]);
+      prisma.tHNominaDetalle.createMany.mockResolvedValue({ count: 1 });
+      prisma.tHPeriodoNomina.update.mockResolvedValue({});
+
+      await nominaService.procesarNomina('1', 'user-1');
+
+      const [primera, segunda] = prisma.tHEmpleado.findMany.mock.calls.map(([args]) => args);
+      expect(primera.where).toEqual({ estado: 'ACTIVO' });
+      expect(primera.take).toBe(2);
+      expect(segunda.where).toEqual({ estado: 'ACTIVO', id: { gt: 'emp-2' } });
+      expect(prisma.tHNovedadNomina.findMany.mock.calls[0][0].where.empleadoId).toEqual({ in: ['emp-1', 'emp-2'] });
 
-      expect(prisma.tHEmpleado.findMany).toHaveBeenCalled();
-      expect(prisma.tHNominaDetalle.deleteMany).toHaveBeenCalled();
-      expect(prisma.tHNominaDetalle.createMany).toHaveBeenCalled();
-      expect(prisma.tHPeriodoNomina.update).toHaveBeenCalled();
+      const lotes = prisma.tHNominaDetalle.createMany.mock.calls.map(([args]) => args.data.map(d => d.empleadoId));
+      expect(lotes).toEqual([['emp-1', 'emp-2'], ['emp-3']]);
+
+      const [detalle1, detalle2] = prisma.tHNominaDetalle.createMany.mock.calls[0][0].data;
+      const incremento = prisma.tHPeriodoNomina.update.mock.calls[0][0].data;
+      expect(detalle2.bonificaciones).toBe(100000);
+      expect(incremento.totalDevengado).toEqual({ increment: detalle1.totalDevengado + detalle2.totalDevengado });
+      expect(incremento.empleadosProcesados).toEqual({ increment: 2 });
+      expect(prisma.tHPeriodoNomina.update).toHaveBeenCalledTimes(3);
+    });
+
+    it('debe retomar después del último empleado guardado', async () => {
+      prisma.tHPeriodoNomina.findUnique
+        .mockResolvedValueOnce({ id: '1', estado: 'ABIERTO' })
+        .mockResolvedValueOnce({ id: '1', estado: 'EN_PROCESO', detalles: [] });
+      prisma.tHNominaDetalle.findFirst.mockResolvedValueOnce({ empleadoId: 'emp-2' });
+      prisma.tHEmpleado.findMany.mockResolvedValueOnce([empleado('emp-3')]);
+      prisma.tHNovedadNomina.findMany.mockResolvedValueOnce([]);
+      prisma.tHPeriodoNomina.update.mockResolvedValue({});
+
+      await nominaService.procesarNomina('1', 'user-1');
+
+      expect(prisma.tHEmpleado.findMany.mock.calls[0][0].where.id).toEqual({ gt: 'emp-2' });
+      expect(prisma.tHNominaDetalle.deleteMany).not.toHaveBeenCalled();
+    });
+
+    it('debe descartar lo procesado y los totales al reiniciar', async () => {
+      prisma.tHPeriodoNomina.findUnique
+        .mockResolvedValueOnce({ id: '1', estado: 'ABIERTO' })
+        .mockResolvedValueOnce({ id: '1', estado: 'EN_PROCESO', detalles: [] });
+      prisma.tHNominaDetalle.deleteMany.mockResolvedValue({ count: 2 });
+      prisma.tHEmpleado.findMany.mockResolvedValueOnce([]);
+      prisma.tHPeriodoNomina.update.mockResolvedValue({});
+
+      await nominaService.procesarNomina('1', 'user-1', { reiniciar: true });
+
+      expect(prisma.tHNominaDetalle.deleteMany).toHaveBeenCalledWith({ where: { periodoId: '1' } });
+      expect(prisma.tHPeriodoNomina.update.mock.calls[0][0].data).toEqual(expect.objectContaining({
+        netoPagar: 0,
+        empleadosProcesados: 0
+      }));
+      expect(prisma.tHNominaDetalle.findFirst).not.toHaveBeenCalled();
+      expect(prisma.tHEmpleado.findMany.mock.calls[0][0].where.id).toBeUndefined();
+    });
+
+    it('debe rechazar procesar el mismo periodo dos veces a la vez', async () => {
+      let liberar;
+      prisma.tHPeriodoNomina.findUnique
+        .mockResolvedValueOnce({ id: '1', estado: 'ABIERTO' })
+        .mockResolvedValueOnce({ id: '1', estado: 'ABIERTO' })
+        .mockResolvedValueOnce({ id: '1', estado: 'EN_PROCESO', detalles: [] });
+      prisma.tHNominaDetalle.findFirst.mockReturnValueOnce(new Promise(resolve => { liberar = resolve; }));
+      prisma.tHEmpleado.findMany.mockResolvedValueOnce([]);
+      prisma.tHPeriodoNomina.update.mockResolvedValue({});
+
+      const primera = nominaService.procesarNomina('1', 'user-1');
+      await expect(nominaService.procesarNomina('1', 'user-1')).rejects.toThrow('ya se está procesando');
+
+      liberar(null);
+      await primera;
     });
 
     it('debe lanzar NotFoundError si periodo no existe', async () => {
@@ -395,56 +491,30 @@ describe('NominaService', () => {
   });
 
   describe('getResumenPeriodo', () => {
-    it('debe obtener resumen del periodo', async () => {
+    it('debe obtener resumen del periodo desde los totales guardados', async () => {
       const mockPeriodo = {
-        id: '1',
         anio: 2025,
         mes: 1,
         quincena: 1,
         estado: 'CERRADO',
-        detalles: [
-          {
-            totalDevengado: 2000000,
-            totalDeducciones: 300000,
-            netoPagar: 1700000,
-            saludEmpresa: 170000,
-            pensionEmpresa: 240000,
-            arl: 10000,
-            cajaCompensacion: 80000,
-            sena: 40000,
-            icbf: 60000,
-            cesantias: 166000,
-            intCesantias: 1660,
-            prima: 166000,
-            vacacionesProv: 83000
-          },
-          {
-            totalDevengado: 3000000,
-            totalDeducciones: 450000,
-            netoPagar: 2550000,
-            saludEmpresa: 255000,
-            pensionEmpresa: 360000,
-            arl: 15000,
-            cajaCompensacion: 120000,
-            sena: 60000,
-            icbf: 90000,
-            cesantias: 250000,
-            intCesantias: 2500,
-            prima: 250000,
-            vacacionesProv: 125000
-          }
-        ]
+        totalDevengado: '5000000',
+        totalDeducciones: '750000',
+        netoPagar: '4250000',
+        aportesEmpresa: '1500000',
+        provisiones: '1044160',
+        empleadosProcesados: 2
       };
 
       prisma.tHPeriodoNomina.findUnique.mockResolvedValue(mockPeriodo);
 
       const result = await nominaService.getResumenPeriodo('1');
 
+      expect(prisma.tHPeriodoNomina.findUnique.mock.calls[0][0].include).toBeUndefined();
       expect(result.periodo.anio).toBe(2025);
       expect(result.resumen.empleados).toBe(2);
       expect(result.resumen.totalDevengado).toBe(5000000);
       expect(result.resumen.netoPagar).toBe(4250000);
-      expect(result.resumen.costoTotal).toBeGreaterThan(result.resumen.netoPagar);
+      expect(result.resumen.costoTotal).toBe(4250000 + 1500000 + 1044160);
     });
 
     it('debe lanzar NotFoundError si periodo no existe', async () => {
@@ -0,0 +1,36 @@
+/**
+ * Métricas de arranque del proceso
+ *
+ * Tiempo desde el inicio del proceso hasta que el servidor escucha, memoria base (RSS y
+ * heap) y módulos cargados en ese momento. Se reportan en el log de arranque y en /health.
+ */
+const { performance } = require('perf_hooks');
+
+const MB = 1024 * 1024;
+
+let listo = null;
+
+const memoria = () => {
+  const { rss, heapUsed } = process.memoryUsage();
+  return {
+    rssMb: Math.round((rss / MB) * 10) / 10,
+    heapMb: Math.round((heapUsed / MB) * 10) / 10,
+    modulos: Object.keys(require.cache).length,
+  };
+};
+
+/**
+ * Registrar el momento en que el servidor empieza a escuchar
+ *
+ * @returns {Object} { listoMs, rssMb, heapMb, modulos }
+ */
+function marcarListo() {
+  listo = { listoMs: Math.round(performance.now()), ...memoria() };
+  return listo;
+}
+
+function getStats() {
+  return { ...listo, actual: memoria() };
+}
+
+module.exports = { marcarListo, getStats };
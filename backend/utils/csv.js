@@ -0,0 +1,99 @@
+/**
+ * Parser CSV en streaming (RFC 4180)
+ *
+ * Lee el contenido por chunks y emite un registro (array de campos) a la vez, sin
+ * cargar el archivo completo en memoria. Soporta campos entre comillas con comas,
+ * saltos de línea y comillas escapadas (""), finales de línea CRLF y BOM UTF-8.
+ */
+
+/**
+ * Detectar el delimitador a partir de la primera línea (',' o ';')
+ */
+function detectarDelimitador(linea) {
+  const comas = (linea.match(/,/g) || []).length;
+  const puntoYComa = (linea.match(/;/g) || []).length;
+  return puntoYComa > comas ? ';' : ',';
+}
+
+/**
+ * Recorrer los registros de un stream o iterable de chunks de texto
+ *
+ * @param {AsyncIterable<string|Buffer>|Iterable<string>} fuente - Stream legible o iterable de chunks
+ * @param {Object} options
+ * @param {string} [options.delimitador] - Si se omite se detecta con la primera línea
+ * @yields {{ campos: string[], bytes: number }} Campos del registro y bytes consumidos hasta su final
+ */
+async function* parseCSV(fuente, { delimitador } = {}) {
+  let campo = '';
+  let campos = [];
+  let enComillas = false;
+  let comillaPendiente = false;
+  let primerChunk = true;
+  let bytes = 0;
+  let delim = delimitador;
+
+  const cerrarRegistro = () => {
+    campos.push(campo);
+    const registro = campos;
+    campo = '';
+    campos = [];
+    return registro;
+  };
+
+  for await (const bruto of fuente) {
+    let chunk = typeof bruto === 'string' ? bruto : bruto.toString('utf8');
+    if (primerChunk) {
+      primerChunk = false;
+      if (chunk.charCodeAt(0) === 0xfeff) chunk = chunk.slice(1);
+      if (!delim) delim = detectarDelimitador(chunk.split('\n', 1)[0]);
+    }
+
+    for (let i = 0; i < chunk.length; i++) {
+      const ch = chunk[i];
+      bytes += ch.charCodeAt(0) < 0x80 ? 1 : Buffer.byteLength(ch);
+
+      if (comillaPendiente) {
+        comillaPendiente = false;
+        if (ch === '"') {
+          campo += '"';
+          continue;
+        }
+        enComillas = false;
+      }
+
+      if (enComillas) {
+        if (ch === '"') comillaPendiente = true;
+        else campo += ch;
+        continue;
+      }
+
+      if (ch === '"' && campo === '') {
+        enComillas = true;
+      } else if (ch === delim) {
+        campos.push(campo);
+        campo = '';
+      } else if (ch === '\n') {
+        yield { campos: cerrarRegistro(), bytes };
+      } else if (ch !== '\r') {
+        campo += ch;
+      }
+    }
+  }
+
+  if (campo !== '' || campos.length > 0) {
+    yield { campos: cerrarRegistro(), bytes };
+  }
+}
+
+/**
+ * Verificar si un registro está vacío (línea en blanco)
+ */
+function registroVacio(campos) {
+  return campos.every(c => c.trim() === '');
+}
+
+module.exports = {
+  parseCSV,
+  detectarDelimitador,
+  registroVacio,
+};
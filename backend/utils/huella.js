@@ -0,0 +1,54 @@
+/**
+ * Huellas (fingerprints) baratas de recursos para peticiones condicionales
+ *
+ * Misma idea que CitaService.getScheduleChecksum: cantidad de filas + última
+ * modificación. El conteo detecta borrados e inserciones, el máximo de updatedAt
+ * detecta ediciones.
+ */
+const prisma = require('../db/prisma');
+
+/**
+ * Calcular la huella combinada de varios modelos
+ *
+ * @param {Array<{modelo: string, where?: object, campos?: string[]}>} consultas
+ *   campos son las columnas DateTime cuyo máximo se considera (por defecto updatedAt)
+ * @returns {Promise<{version: string, lastModified: Date|null}>}
+ */
+async function huellaDeModelos(consultas) {
+  const agregados = await Promise.all(consultas.map(({ modelo, where = {}, campos = ['updatedAt'] }) =>
+    prisma[modelo].aggregate({
+      where,
+      _count: { _all: true },
+      _max: Object.fromEntries(campos.map(campo => [campo, true])),
+    })
+  ));
+
+  let lastModified = null;
+  const partes = agregados.map((agregado, i) => {
+    const campos = consultas[i].campos || ['updatedAt'];
+    const marcas = campos.map((campo) => {
+      const valor = agregado._max[campo];
+      if (!valor) return 0;
+      if (!lastModified || valor > lastModified) lastModified = valor;
+      return valor.getTime();
+    });
+    return `${agregado._count._all}-${marcas.join('-')}`;
+  });
+
+  return { version: partes.join('.'), lastModified };
+}
+
+/**
+ * Huella del catálogo de exámenes (categorías + exámenes y procedimientos)
+ *
+ * Compartida por los listados de ambos recursos: cada uno devuelve datos de las dos
+ * tablas, así que un cambio en cualquiera invalida los dos.
+ */
+function huellaCatalogoExamenes() {
+  return huellaDeModelos([
+    { modelo: 'categoriaExamen' },
+    { modelo: 'examenProcedimiento' },
+  ]);
+}
+
+module.exports = { huellaDeModelos, huellaCatalogoExamenes };
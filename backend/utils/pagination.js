@@ -0,0 +1,126 @@
+/**
+ * Paginación de listados: por offset (page/limit) o por cursor (keyset sobre fecha, id)
+ *
+ * Con page/limit la base de datos recorre y descarta todas las filas anteriores
+ * (O(offset)). Con cursor se filtra directamente "después de (fecha, id)" usando el
+ * índice (paciente_id, fecha, id), así que cualquier página cuesta lo mismo.
+ */
+const { ValidationError } = require('./errors');
+
+/**
+ * Cursor opaco a partir de la última fila de una página
+ */
+function codificarCursor(fecha, id) {
+  return Buffer.from(JSON.stringify([new Date(fecha).toISOString(), id])).toString('base64url');
+}
+
+/**
+ * @returns {{fecha: Date, id: string}}
+ * @throws {ValidationError} Si el cursor no fue generado por codificarCursor
+ */
+function decodificarCursor(cursor) {
+  let fecha;
+  let id;
+  try {
+    [fecha, id] = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+  } catch (err) {
+    throw new ValidationError('Cursor de paginación inválido');
+  }
+
+  const fechaCursor = new Date(fecha);
+  if (typeof id !== 'string' || typeof fecha !== 'string' || Number.isNaN(fechaCursor.getTime())) {
+    throw new ValidationError('Cursor de paginación inválido');
+  }
+  return { fecha: fechaCursor, id };
+}
+
+/**
+ * Entero del query string acotado a [minimo, maximo]; porDefecto si falta o no es un número
+ */
+function entero(valor, porDefecto, minimo, maximo) {
+  const numero = parseInt(valor, 10);
+  if (Number.isNaN(numero)) return porDefecto;
+  return Math.min(Math.max(numero, minimo), maximo);
+}
+
+/**
+ * Paginar un modelo ordenado por fecha descendente con desempate por id
+ *
+ * Modos (según el query string):
+ * - cursor presente (vacío para la primera página): keyset, devuelve next_cursor.
+ *   Por defecto no cuenta el total; con_total=true lo pide.
+ * - sin cursor: page/limit como siempre. con_total=false omite el count().
+ *
+ * @param {object} delegate - Delegate de Prisma (prisma.signoVital, ...)
+ * @param {object} opciones
+ * @param {object} opciones.where - Filtros del listado
+ * @param {string} opciones.campoFecha - Campo DateTime de ordenamiento
+ * @param {object} [opciones.include]
+ * @param {object} opciones.query - { page, limit, cursor, con_total }
+ * @param {number} [opciones.limitePorDefecto=50] - Si limit falta o no es un número
+ * @param {number} [opciones.limiteMaximo=200] - limit se acota a 1..limiteMaximo
+ * @returns {Promise<{items: Array, pagination: object}>}
+ */
+async function paginar(delegate, {
+  where = {},
+  campoFecha,
+  include,
+  query = {},
+  limitePorDefecto = 50,
+  limiteMaximo = 200,
+}) {
+  const limit = entero(query.limit, limitePorDefecto, 1, Math.max(limiteMaximo, limitePorDefecto));
+  const porCursor = query.cursor !== undefined;
+  const conTotal = query.con_total !== undefined ? query.con_total !== 'false' : !porCursor;
+  const orderBy = [{ [campoFecha]: 'desc' }, { id: 'desc' }];
+
+  let whereConsulta = where;
+  let skip;
+  let page;
+
+  if (porCursor) {
+    if (query.cursor) {
+      const { fecha, id } = decodificarCursor(query.cursor);
+      const despuesDelCursor = {
+        OR: [
+          { [campoFecha]: { lt: fecha } },
+          { [campoFecha]: fecha, id: { lt: id } },
+        ],
+      };
+      whereConsulta = Object.keys(where).length ? { AND: [where, despuesDelCursor] } : despuesDelCursor;
+    }
+  } else {
+    page = entero(query.page, 1, 1, Number.MAX_SAFE_INTEGER);
+    skip = (page - 1) * limit;
+  }
+
+  // Una fila extra indica si hay página siguiente sin necesidad de contar
+  const [filas, total] = await Promise.all([
+    delegate.findMany({
+      where: whereConsulta,
+      skip,
+      take: limit + 1,
+      orderBy,
+      include,
+    }),
+    conTotal ? delegate.count({ where }) : null,
+  ]);
+
+  const hasMore = filas.length > limit;
+  const items = hasMore ? filas.slice(0, limit) : filas;
+  const ultima = items[items.length - 1];
+  const nextCursor = hasMore ? codificarCursor(ultima[campoFecha], ultima.id) : null;
+
+  const pagination = porCursor
+    ? { limit, has_more: hasMore, next_cursor: nextCursor }
+    : { page, limit, has_more: hasMore, next_cursor: nextCursor };
+
+  if (conTotal) {
+    pagination.total = total;
+    pagination.totalPages = Math.ceil(total / limit);
+  }
+
+  return { items, pagination };
+}
+
+module.exports = { paginar, codificarCursor, decodificarCursor };
@@ -37,10 +37,18 @@ const removeAccents = (str) => {
   return str.normalize('NFD').replace(/[\u0300-\u036f]/g, '');
 };
 
+/**
+ * Escapar comodines de LIKE (%, _ y \) en un término de búsqueda
+ * @param {string} valor - Término ingresado por el usuario
+ * @returns {string} Término seguro para usar dentro de un patrón LIKE
+ */
+const escapeLike = (valor) => valor.replace(/[\\%_]/g, '\\$&');
+
 module.exports = {
   isValidEmail,
   isValidPassword,
   isValidUUID,
   validateRequired,
   removeAccents,
+  escapeLike,
 };
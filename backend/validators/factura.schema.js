@@ -60,6 +60,17 @@ const generateRIPSSchema = z.object({
   factura_ids: z.array(z.string().uuid('ID de factura inválido')).min(1, 'Debe seleccionar al menos una factura'),
 });
 
+// Schema para exportar RIPS por streaming: facturas explícitas o periodo de emisión
+const exportRIPSSchema = z.object({
+  factura_ids: z.array(z.string().uuid('ID de factura inválido')).min(1, 'Debe seleccionar al menos una factura').optional(),
+  fecha_desde: z.string().regex(/^\d{4}-\d{2}-\d{2}$/, 'Formato de fecha inválido (YYYY-MM-DD)').optional(),
+  fecha_hasta: z.string().regex(/^\d{4}-\d{2}-\d{2}$/, 'Formato de fecha inválido (YYYY-MM-DD)').optional(),
+  cubierto_por_eps: z.boolean().optional(),
+}).refine(
+  (data) => data.factura_ids || (data.fecha_desde && data.fecha_hasta),
+  { message: 'Debe indicar factura_ids o el periodo (fecha_desde y fecha_hasta)' }
+);
+
 // Schema para cancelar factura
 const cancelFacturaSchema = z.object({
   observaciones: z.string().min(1, 'Las observaciones son requeridas para cancelar').max(500),
@@ -71,5 +82,6 @@ module.exports = {
   updateFacturaSchema,
   createPagoSchema,
   generateRIPSSchema,
+  exportRIPSSchema,
   cancelFacturaSchema,
 };
@@ -70,9 +70,16 @@ const loteProductoSchema = z.object({
 
 const updateLoteSchema = loteProductoSchema.partial().omit({ productoId: true });
 
+// Schema para verificar interacciones y alergias de una lista de medicamentos
+const verificarInteraccionesSchema = z.object({
+  medicamentosIds: z.array(z.string().min(1)).min(1, 'Debe incluir al menos un medicamento').max(100, 'Máximo 100 medicamentos por verificación'),
+  pacienteId: z.string().uuid('ID de paciente inválido').optional(),
+});
+
 module.exports = {
   createProductoSchema,
   updateProductoSchema,
   loteProductoSchema,
   updateLoteSchema,
+  verificarInteraccionesSchema,
 };
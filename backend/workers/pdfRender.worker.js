@@ -0,0 +1,19 @@
+/**
+ * Worker de renderizado de PDFs (ver services/pdfRender.service.js)
+ *
+ * Recibe { id, tipo, datos, generadoEn } con los datos ya consultados y responde { id, pdf } o
+ * { id, error }. No consulta la base de datos.
+ */
+const { parentPort } = require('worker_threads');
+const { obtenerRenderizador, restaurarBuffers } = require('./renderizadores');
+
+parentPort.on('message', async ({ id, tipo, datos, generadoEn }) => {
+  try {
+    const pdf = await obtenerRenderizador(tipo)(restaurarBuffers(datos), { generadoEn });
+    // Transferir el ArrayBuffer sin copiarlo cuando el Buffer es dueño de todo él
+    const propio = pdf.byteOffset === 0 && pdf.byteLength === pdf.buffer.byteLength;
+    parentPort.postMessage({ id, pdf }, propio ? [pdf.buffer] : []);
+  } catch (err) {
+    parentPort.postMessage({ id, error: { message: err.message, statusCode: err.statusCode } });
+  }
+});
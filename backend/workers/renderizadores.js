@@ -0,0 +1,83 @@
+/**
+ * Renderizadores de PDF disponibles para el pool (services/pdfRender.service.js) y
+ * utilidades para pasar los datos al worker
+ */
+const crypto = require('crypto');
+const fs = require('fs');
+const { Prisma } = require('@prisma/client');
+const { AppError } = require('../utils/errors');
+
+// Tipo de PDF -> método que dibuja a partir de los datos ya consultados
+const RENDERIZADORES = {
+  hce: { modulo: '../services/hce-pdf.service', metodo: 'renderizarPDF' },
+  factura: { modulo: '../services/factura-pdf.service', metodo: 'renderizarPDF' },
+  ordenMedica: { modulo: '../services/ordenMedica.pdf.service', metodo: 'renderizarOrdenPdf' },
+  procedimientoBitacora: { modulo: '../services/procedimiento.pdf.service', metodo: 'renderizarBitacoraPdf' },
+  procedimientoProtocolo: { modulo: '../services/procedimiento.pdf.service', metodo: 'renderizarProtocoloPdf' },
+};
+
+const versionesPlantilla = new Map();
+
+function definicionRenderizador(tipo) {
+  const definicion = RENDERIZADORES[tipo];
+  if (!definicion) {
+    throw new AppError(`Tipo de PDF desconocido: ${tipo}`);
+  }
+  return definicion;
+}
+
+/**
+ * Función (datos, { generadoEn }) => Promise<Buffer> del tipo indicado
+ */
+function obtenerRenderizador(tipo) {
+  const { modulo, metodo } = definicionRenderizador(tipo);
+  const servicio = require(modulo);
+  return (datos, contexto) => servicio[metodo](datos, contexto);
+}
+
+/**
+ * Hash del archivo que contiene la plantilla, calculado una vez por proceso
+ */
+function versionPlantilla(tipo) {
+  if (!versionesPlantilla.has(tipo)) {
+    const archivo = require.resolve(definicionRenderizador(tipo).modulo);
+    versionesPlantilla.set(tipo, crypto.createHash('sha1').update(fs.readFileSync(archivo)).digest('hex'));
+  }
+  return versionesPlantilla.get(tipo);
+}
+
+/**
+ * Copia de los datos apta para postMessage: los Decimal de Prisma pierden sus métodos
+ * al clonarse, así que se pasan como número (igual en modo inline, para que ambos
+ * caminos dibujen lo mismo)
+ */
+function aClonable(valor) {
+  if (valor === null || typeof valor !== 'object') return valor;
+  if (Prisma.Decimal.isDecimal(valor)) return valor.toNumber();
+  if (valor instanceof Date || Buffer.isBuffer(valor)) return valor;
+  if (Array.isArray(valor)) return valor.map(aClonable);
+
+  const copia = {};
+  for (const [clave, v] of Object.entries(valor)) copia[clave] = aClonable(v);
+  return copia;
+}
+
+/**
+ * Los Buffer llegan al worker como Uint8Array; devolverles la API de Buffer
+ */
+function restaurarBuffers(valor) {
+  if (valor === null || typeof valor !== 'object' || valor instanceof Date) return valor;
+  if (valor instanceof Uint8Array) return Buffer.from(valor.buffer, valor.byteOffset, valor.byteLength);
+  if (Array.isArray(valor)) return valor.map(restaurarBuffers);
+
+  for (const clave of Object.keys(valor)) valor[clave] = restaurarBuffers(valor[clave]);
+  return valor;
+}
+
+module.exports = {
+  RENDERIZADORES,
+  obtenerRenderizador,
+  versionPlantilla,
+  aClonable,
+  restaurarBuffers,
+};
@@ -4,21 +4,48 @@ Backend API Testing for Clínica Mía - Exámenes y Procedimientos Module
 Tests the refactored backend endpoints for Categories and Exams/Procedures
 """
 
-import requests
+import argparse
 import json
+import os
+import subprocess
 import sys
-from datetime import datetime
+import time
+from datetime import date, datetime, timedelta
+
+from tests.api_client import (
+    BASE_URL,
+    AuthenticationError,
+    check_invalidation,
+    check_pool_metrics,
+    conditional_snapshot,
+    create_session,
+    get_session,
+    token_cache,
+)
+from tests.cold_start import check_cold_start
+from tests.query_budget import query_tracker
+from tests.load_harness import LoadGenerator, parse_mix, percentile, print_report, write_report
 
 # Configuration
-BASE_URL = "http://localhost:4000"
 TEST_USER = {
     "email": "admin@clinica.com",
     "password": "admin123"
 }
 
+PERMISSION_BENCH_ROUNDS = 30
+AUDIT_BENCH_WRITES = 20
+AUDIT_FLUSH_TIMEOUT_SECONDS = 10
+
+# Dashboard rollups: a year of synthetic facturas/citas seeded by backend/scripts/seed-dashboard-benchmark.js
+DASHBOARD_SEED_DAYS = int(os.environ.get("DASHBOARD_SEED_DAYS", "365"))
+DASHBOARD_BENCH_REPEATS = 15
+DASHBOARD_P95_BUDGET_MS = 100
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
 class BackendTester:
     def __init__(self):
         self.base_url = BASE_URL
+        self.http = get_session()
         self.token = None
         self.headers = {"Content-Type": "application/json"}
         self.test_results = []
@@ -39,31 +66,21 @@ class BackendTester:
         })
 
     def authenticate(self):
-        """Get JWT token for authentication"""
+        """Get JWT token for authentication (shared cache, logs in only on miss or expiry)"""
         try:
             print("\n🔐 Testing Authentication...")
-            
-            response = requests.post(
-                f"{self.base_url}/auth/login",
-                headers=self.headers,
-                json=TEST_USER,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("success") and "token" in data.get("data", {}):
-                    self.token = data["data"]["token"]
-                    self.headers["Authorization"] = f"Bearer {self.token}"
-                    self.log_test("Authentication", True, "Login successful, token obtained")
-                    return True
-                else:
-                    self.log_test("Authentication", False, f"Invalid response format: {data}")
-                    return False
+
+            self.token, cached = token_cache.get_token(self.base_url, TEST_USER, self.http)
+            self.headers["Authorization"] = f"Bearer {self.token}"
+            if cached:
+                self.log_test("Authentication", True, "Reused cached token")
             else:
-                self.log_test("Authentication", False, f"Login failed with status {response.status_code}: {response.text}")
-                return False
-                
+                self.log_test("Authentication", True, "Login successful, token obtained")
+            return True
+
+        except AuthenticationError as e:
+            self.log_test("Authentication", False, str(e))
+            return False
         except Exception as e:
             self.log_test("Authentication", False, f"Authentication error: {str(e)}")
             return False
@@ -73,12 +90,16 @@ class BackendTester:
         try:
             print("\n🏥 Testing Health Check...")
             
-            response = requests.get(f"{self.base_url}/health", timeout=10)
+            response = self.http.get(f"{self.base_url}/health", timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 if data.get("status") == "ok" and data.get("database") == "connected":
                     self.log_test("Health Check", True, "Server and database are healthy")
+                    pool_ok, pool_message = check_pool_metrics(data)
+                    self.log_test("Database Pool Metrics", pool_ok, pool_message)
+                    cold_ok, cold_message = check_cold_start()
+                    self.log_test("Cold Start", cold_ok, cold_message)
                     return True
                 else:
                     self.log_test("Health Check", False, f"Health check failed: {data}")
@@ -97,7 +118,7 @@ class BackendTester:
         
         # Test GET /categorias-examenes (list)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/categorias-examenes",
                 headers=self.headers,
                 timeout=10
@@ -118,6 +139,8 @@ class BackendTester:
         except Exception as e:
             self.log_test("GET Categorías", False, f"GET error: {str(e)}")
 
+        etag = conditional_snapshot(self, "Conditional GET Categorías", "/categorias-examenes")
+
         # Test POST /categorias-examenes (create)
         try:
             categoria_data = {
@@ -126,7 +149,7 @@ class BackendTester:
                 "colorHex": "#FF5733"
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/categorias-examenes",
                 headers=self.headers,
                 json=categoria_data,
@@ -146,10 +169,13 @@ class BackendTester:
         except Exception as e:
             self.log_test("POST Categoría", False, f"POST error: {str(e)}")
 
+        if self.created_categoria_id:
+            etag = check_invalidation(self, "ETag Categorías after POST", "/categorias-examenes", etag)
+
         # Test GET /categorias-examenes/:id (get by ID)
         if self.created_categoria_id:
             try:
-                response = requests.get(
+                response = self.http.get(
                     f"{self.base_url}/categorias-examenes/{self.created_categoria_id}",
                     headers=self.headers,
                     timeout=10
@@ -175,7 +201,7 @@ class BackendTester:
                     "descripcion": "Análisis de laboratorio y pruebas diagnósticas actualizadas"
                 }
                 
-                response = requests.put(
+                response = self.http.put(
                     f"{self.base_url}/categorias-examenes/{self.created_categoria_id}",
                     headers=self.headers,
                     json=update_data,
@@ -194,9 +220,11 @@ class BackendTester:
             except Exception as e:
                 self.log_test("PUT Categoría", False, f"PUT error: {str(e)}")
 
+            check_invalidation(self, "ETag Categorías after PUT", "/categorias-examenes", etag)
+
         # Test GET /categorias-examenes/estadisticas
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/categorias-examenes/estadisticas",
                 headers=self.headers,
                 timeout=10
@@ -224,7 +252,7 @@ class BackendTester:
         
         # Test GET /examenes-procedimientos (list)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/examenes-procedimientos",
                 headers=self.headers,
                 timeout=10
@@ -245,6 +273,8 @@ class BackendTester:
         except Exception as e:
             self.log_test("GET Exámenes", False, f"GET error: {str(e)}")
 
+        etag = conditional_snapshot(self, "Conditional GET Exámenes", "/examenes-procedimientos")
+
         # Test POST /examenes-procedimientos (create)
         try:
             examen_data = {
@@ -258,7 +288,7 @@ class BackendTester:
                 "requiereAyuno": True
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/examenes-procedimientos",
                 headers=self.headers,
                 json=examen_data,
@@ -278,10 +308,13 @@ class BackendTester:
         except Exception as e:
             self.log_test("POST Examen", False, f"POST error: {str(e)}")
 
+        if self.created_examen_id:
+            etag = check_invalidation(self, "ETag Exámenes after POST", "/examenes-procedimientos", etag)
+
         # Test GET /examenes-procedimientos/:id (get by ID)
         if self.created_examen_id:
             try:
-                response = requests.get(
+                response = self.http.get(
                     f"{self.base_url}/examenes-procedimientos/{self.created_examen_id}",
                     headers=self.headers,
                     timeout=10
@@ -308,7 +341,7 @@ class BackendTester:
                     "duracionMinutos": 20
                 }
                 
-                response = requests.put(
+                response = self.http.put(
                     f"{self.base_url}/examenes-procedimientos/{self.created_examen_id}",
                     headers=self.headers,
                     json=update_data,
@@ -327,9 +360,11 @@ class BackendTester:
             except Exception as e:
                 self.log_test("PUT Examen", False, f"PUT error: {str(e)}")
 
+            check_invalidation(self, "ETag Exámenes after PUT", "/examenes-procedimientos", etag)
+
         # Test GET /examenes-procedimientos/estadisticas
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/examenes-procedimientos/estadisticas",
                 headers=self.headers,
                 timeout=10
@@ -354,7 +389,7 @@ class BackendTester:
         # Test DELETE /examenes-procedimientos/:id (delete)
         if self.created_examen_id:
             try:
-                response = requests.delete(
+                response = self.http.delete(
                     f"{self.base_url}/examenes-procedimientos/{self.created_examen_id}",
                     headers=self.headers,
                     timeout=10
@@ -379,7 +414,7 @@ class BackendTester:
         # Test unauthorized access (without token)
         try:
             headers_no_auth = {"Content-Type": "application/json"}
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/categorias-examenes",
                 headers=headers_no_auth,
                 timeout=10
@@ -399,7 +434,7 @@ class BackendTester:
                 "descripcion": "Missing nombre field"
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/categorias-examenes",
                 headers=self.headers,
                 json=invalid_data,
@@ -414,6 +449,234 @@ class BackendTester:
         except Exception as e:
             self.log_test("Invalid Data Handling", False, f"Error testing invalid data: {str(e)}")
 
+    def permission_cache_stats(self):
+        """Permission cache counters reported by /health (None on servers without the cache)"""
+        response = self.http.get(f"{self.base_url}/health", timeout=10)
+        return response.json().get("cache", {}).get("permisos")
+
+    def own_role_assignment(self):
+        """Return (user, role_id, expires_at) for one of the test user's existing role assignments"""
+        response = self.http.get(f"{self.base_url}/auth/me", headers=self.headers, timeout=10)
+        me = response.json()["data"]["user"]
+        user_roles = me.get("userRoles") or []
+        if not user_roles:
+            return me, None, None
+        return me, user_roles[0]["roleId"], user_roles[0].get("expiresAt")
+
+    def audit_total(self, action):
+        response = self.http.get(
+            f"{self.base_url}/audit",
+            headers=self.headers,
+            params={"action": action, "limit": 1},
+            timeout=10
+        )
+        return response.json()["data"]["pagination"]["total"]
+
+    def test_audit_pipeline(self):
+        """Audited writes return before the audit row is written; rows land shortly after"""
+        print("\n📝 Testing Audit Log Pipeline...")
+
+        try:
+            me, role_id, expires_at = self.own_role_assignment()
+            if role_id is None:
+                self.log_test("Audit Pipeline", True, "Skipped: test user has no role assignment to re-assign")
+                return
+
+            before = self.audit_total("ASSIGN_ROLE")
+            latencies = []
+            for _ in range(AUDIT_BENCH_WRITES):
+                started = time.perf_counter()
+                response = self.http.post(
+                    f"{self.base_url}/roles/{role_id}/users",
+                    headers=self.headers,
+                    json={"userId": me["id"], "expiresAt": expires_at},
+                    timeout=10
+                )
+                latencies.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    self.log_test("Audit Pipeline", False, f"Assign role returned {response.status_code}: {response.text}")
+                    return
+            latencies.sort()
+
+            # Rows are written by the background batch flush
+            started = time.perf_counter()
+            written = 0
+            while time.perf_counter() - started < AUDIT_FLUSH_TIMEOUT_SECONDS:
+                written = self.audit_total("ASSIGN_ROLE") - before
+                if written >= AUDIT_BENCH_WRITES:
+                    break
+                time.sleep(0.2)
+            lag = time.perf_counter() - started
+
+            self.log_test(
+                "Audit Pipeline",
+                written >= AUDIT_BENCH_WRITES,
+                f"{AUDIT_BENCH_WRITES} audited writes p50={percentile(latencies, 50):.2f}ms "
+                f"p95={percentile(latencies, 95):.2f}ms; {written} audit rows visible after {lag:.1f}s"
+            )
+        except Exception as e:
+            self.log_test("Audit Pipeline", False, f"Audit pipeline error: {str(e)}")
+
+    def test_permission_cache_overhead(self):
+        """Compare requirePermission cost with a cold (invalidated) and a warm permission cache"""
+        print("\n🔐 Testing Permission Cache Overhead...")
+
+        try:
+            me, role_id, expires_at = self.own_role_assignment()
+            if role_id is None:
+                self.log_test("Permission Cache Overhead", True, "Skipped: test user has no role assignment to re-assign")
+                return
+
+            url = f"{self.base_url}/roles/{role_id}"
+            stats_before = self.permission_cache_stats()
+
+            def timed_get():
+                started = time.perf_counter()
+                result = self.http.get(url, headers=self.headers, timeout=10)
+                elapsed = (time.perf_counter() - started) * 1000
+                if result.status_code != 200:
+                    raise RuntimeError(f"GET {url} returned {result.status_code}: {result.text}")
+                return elapsed
+
+            cold, warm = [], []
+            for _ in range(PERMISSION_BENCH_ROUNDS):
+                # Re-assigning the same role invalidates this user's cached permissions
+                self.http.post(
+                    f"{url}/users",
+                    headers=self.headers,
+                    json={"userId": me["id"], "expiresAt": expires_at},
+                    timeout=10
+                )
+                cold.append(timed_get())
+                warm.append(timed_get())
+
+            cold.sort()
+            warm.sort()
+            cold_p50, warm_p50 = percentile(cold, 50), percentile(warm, 50)
+            print(f"   invalidated cache: p50={cold_p50:.2f}ms p95={percentile(cold, 95):.2f}ms")
+            print(f"   warm cache:        p50={warm_p50:.2f}ms p95={percentile(warm, 95):.2f}ms")
+            print(f"   permission lookup overhead saved per request: {cold_p50 - warm_p50:.2f}ms")
+
+            stats_after = self.permission_cache_stats()
+            if stats_before is None or stats_after is None:
+                self.log_test("Permission Cache Overhead", False, "/health does not report permission cache stats")
+                return
+
+            hits = stats_after["hits"] - stats_before["hits"]
+            misses = stats_after["misses"] - stats_before["misses"]
+            self.log_test(
+                "Permission Cache Overhead",
+                hits >= PERMISSION_BENCH_ROUNDS and misses >= PERMISSION_BENCH_ROUNDS and warm_p50 <= cold_p50,
+                f"warm p50 {warm_p50:.2f}ms vs invalidated p50 {cold_p50:.2f}ms; +{hits} hits / +{misses} misses"
+            )
+        except Exception as e:
+            self.log_test("Permission Cache Overhead", False, f"Permission cache error: {str(e)}")
+
+    def dashboard_stats(self, source="rollup", **params):
+        response = self.http.get(
+            f"{self.base_url}/dashboard/stats",
+            headers=self.headers,
+            params={"source": source, **params},
+            timeout=120
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"/dashboard/stats returned {response.status_code}: {response.text}")
+        return response.json()["data"]
+
+    def dashboard_mismatches(self, live, rollup):
+        """Differences between the live and rollup dashboards in the figures the rollups feed"""
+        diferencias = []
+        for key in ("citasPeriodo", "ingresosPeriodo", "tasaCancelacion"):
+            if abs(float(live["kpis"][key]) - float(rollup["kpis"][key])) > 0.01:
+                diferencias.append(f"kpis.{key}: {live['kpis'][key]} != {rollup['kpis'][key]}")
+        for esperado, obtenido in zip(live["financial"]["revenueTrend"], rollup["financial"]["revenueTrend"]):
+            if abs(float(esperado["value"]) - float(obtenido["value"])) > 0.01:
+                diferencias.append(f"revenueTrend {esperado['date']}: {esperado['value']} != {obtenido['value']}")
+        estados_live = {c["name"]: c["value"] for c in live["operational"]["citasStatus"]}
+        estados_rollup = {c["name"]: c["value"] for c in rollup["operational"]["citasStatus"]}
+        if estados_live != estados_rollup:
+            diferencias.append(f"citasStatus: {estados_live} != {estados_rollup}")
+        top_live = sorted(d["value"] for d in live["operational"]["topDoctores"])
+        top_rollup = sorted(d["value"] for d in rollup["operational"]["topDoctores"])
+        if top_live != top_rollup:
+            diferencias.append(f"topDoctores: {top_live} != {top_rollup}")
+        return diferencias
+
+    def test_dashboard_rollups(self):
+        """Compare live vs rollup /dashboard/stats on DASHBOARD_SEED_DAYS of synthetic data"""
+        print(f"\n📈 Testing Dashboard Rollups ({DASHBOARD_SEED_DAYS} days of data)...")
+
+        try:
+            subprocess.run(
+                ["node", "scripts/seed-dashboard-benchmark.js", str(DASHBOARD_SEED_DAYS)],
+                cwd=BACKEND_DIR,
+                check=True
+            )
+        except Exception as e:
+            self.log_test("Dashboard Seed", False, f"Seed error: {str(e)}")
+            return
+
+        try:
+            # Triggers keep the rollups current; then the nightly reconcile must agree too
+            for etapa in ("triggers", "reconcile"):
+                if etapa == "reconcile":
+                    response = self.http.post(f"{self.base_url}/dashboard/rollups/reconciliar", headers=self.headers, timeout=300)
+                    if response.status_code != 200:
+                        self.log_test("Dashboard Reconcile", False, f"Reconcile failed with status {response.status_code}: {response.text}")
+                        return
+                    self.log_test("Dashboard Reconcile", True, f"Rebuilt {response.json()['data']}")
+
+                diferencias = []
+                for period in ("month", "year"):
+                    live = self.dashboard_stats("live", period=period)
+                    rollup = self.dashboard_stats(period=period)
+                    diferencias += [f"{period} {d}" for d in self.dashboard_mismatches(live, rollup)]
+                self.log_test(
+                    f"Dashboard Parity ({etapa})",
+                    not diferencias,
+                    "Rollups match the live queries" if not diferencias else "; ".join(diferencias[:5])
+                )
+        except Exception as e:
+            self.log_test("Dashboard Parity", False, f"Dashboard error: {str(e)}")
+            return
+
+        def medir(source, params_for):
+            latencias = []
+            for i in range(DASHBOARD_BENCH_REPEATS):
+                started = time.perf_counter()
+                self.dashboard_stats(source, **params_for(i))
+                latencias.append((time.perf_counter() - started) * 1000)
+            latencias.sort()
+            return latencias
+
+        hoy = date.today()
+
+        def rango_distinto(i):
+            # A different custom range per request so the rollup path misses the cache
+            return {
+                "period": "custom",
+                "startDate": (hoy - timedelta(days=365 - i)).isoformat(),
+                "endDate": hoy.isoformat(),
+            }
+
+        try:
+            live = medir("live", rango_distinto)
+            rollup = medir("rollup", rango_distinto)
+            cached = medir("rollup", lambda i: {"period": "year"})
+        except Exception as e:
+            self.log_test("Dashboard Benchmark", False, f"Benchmark error: {str(e)}")
+            return
+
+        for nombre, latencias in (("live", live), ("rollup", rollup), ("rollup cached", cached)):
+            print(f"   {nombre:<14} p50={percentile(latencias, 50):.1f}ms p95={percentile(latencias, 95):.1f}ms")
+
+        live_p95, rollup_p95 = percentile(live, 95), percentile(rollup, 95)
+        self.log_test(
+            "Dashboard Rollup Latency",
+            rollup_p95 < DASHBOARD_P95_BUDGET_MS and rollup_p95 < live_p95,
+            f"rollup p95={rollup_p95:.1f}ms vs live p95={live_p95:.1f}ms (budget {DASHBOARD_P95_BUDGET_MS}ms, cache misses)"
+        )
+
     def cleanup(self):
         """Clean up test data"""
         print("\n🧹 Cleaning up test data...")
@@ -421,7 +684,7 @@ class BackendTester:
         # Delete created category (this will also test DELETE endpoint)
         if self.created_categoria_id:
             try:
-                response = requests.delete(
+                response = self.http.delete(
                     f"{self.base_url}/categorias-examenes/{self.created_categoria_id}",
                     headers=self.headers,
                     timeout=10
@@ -452,8 +715,14 @@ class BackendTester:
         self.test_categorias_endpoints()
         self.test_examenes_endpoints()
         self.test_error_handling()
+        self.test_permission_cache_overhead()
+        self.test_audit_pipeline()
+        self.test_dashboard_rollups()
         self.cleanup()
         
+        for name, ok, message in query_tracker.check():
+            self.log_test(name, ok, message)
+
         # Summary
         print("\n" + "=" * 80)
         print("📊 TEST SUMMARY")
@@ -476,7 +745,83 @@ class BackendTester:
         
         return failed_tests == 0
 
+    def build_load_scenarios(self, session):
+        """Map load scenario names to request callables reusing the functional flows"""
+        scenarios = {
+            "listar_categorias": lambda: session.get(
+                f"{self.base_url}/categorias-examenes", headers=self.headers, timeout=30
+            ),
+            "estadisticas_categorias": lambda: session.get(
+                f"{self.base_url}/categorias-examenes/estadisticas", headers=self.headers, timeout=30
+            ),
+            "listar_examenes": lambda: session.get(
+                f"{self.base_url}/examenes-procedimientos", headers=self.headers, timeout=30
+            ),
+            "estadisticas_examenes": lambda: session.get(
+                f"{self.base_url}/examenes-procedimientos/estadisticas", headers=self.headers, timeout=30
+            ),
+        }
+
+        if self.created_categoria_id:
+            scenarios["obtener_categoria"] = lambda: session.get(
+                f"{self.base_url}/categorias-examenes/{self.created_categoria_id}", headers=self.headers, timeout=30
+            )
+
+        return scenarios
+
+    def run_load_test(self, concurrency=50, duration=30, mix=None, output="load_report_examenes.json"):
+        """Run the concurrent load mode against the Exámenes y Procedimientos endpoints"""
+        print("🚀 Starting Load Test for Clínica Mía - Exámenes y Procedimientos Module")
+        print("=" * 80)
+
+        if not self.test_health_check():
+            print("❌ Health check failed, aborting load test")
+            return False
+
+        if not self.authenticate():
+            print("❌ Authentication failed, aborting load test")
+            return False
+
+        # Seed a category so the by-ID scenario has a target
+        self.test_categorias_endpoints()
+
+        session = create_session(pool_maxsize=concurrency)
+
+        try:
+            scenarios = self.build_load_scenarios(session)
+            weights = parse_mix(mix, list(scenarios.keys()))
+
+            print(f"\n🔥 Generating load: concurrency={concurrency}, duration={duration}s, mix={weights}")
+            generator = LoadGenerator(scenarios, weights=weights, concurrency=concurrency, duration=duration)
+            report = generator.run()
+        finally:
+            session.close()
+            self.cleanup()
+
+        print_report(report)
+        if output:
+            write_report(report, output)
+
+        error_rate = report["total"]["error_rate"]
+        self.log_test("Load Test", error_rate < 0.01,
+                      f"{report['total']['requests']} requests, {report['total']['throughput_rps']:.1f} req/s, "
+                      f"p95 {report['total']['latency_ms']['p95']:.1f}ms, error rate {error_rate * 100:.2f}%")
+        return error_rate < 0.01
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Backend API tests for Exámenes y Procedimientos")
+    parser.add_argument("--load", action="store_true", help="Run the concurrent load mode instead of the functional tests")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent virtual users (load mode)")
+    parser.add_argument("--duration", type=int, default=30, help="Load duration in seconds (load mode)")
+    parser.add_argument("--mix", default=None, help="Request mix as name=weight,... (load mode)")
+    parser.add_argument("--output", default="load_report_examenes.json", help="JSON report path (load mode)")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
     tester = BackendTester()
-    success = tester.run_all_tests()
+    if args.load:
+        success = tester.run_load_test(args.concurrency, args.duration, args.mix, args.output)
+    else:
+        success = tester.run_all_tests()
     sys.exit(0 if success else 1)
\ No newline at end of file
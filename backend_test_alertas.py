@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Backend Testing for Clínica Mía - Scheduled Alert Queue
+Enqueues N due alertaProgramada rows and drains them with 1, 2 and 4 worker
+processes (backend/scripts/alertas-worker.js) sending through the local fake email
+provider. Measures drain time and throughput per worker count and checks that row
+claiming never sends an alert twice
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from tests.fake_email import FakeEmailProvider
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+QUEUE_ALERTS = int(os.environ.get("QUEUE_ALERTS", "50000"))
+QUEUE_WORKER_COUNTS = [1, 2, 4]
+# Emulated Resend API latency per alert email
+FAKE_PROVIDER_LATENCY_MS = 20
+# Throughput with N workers must reach this fraction of N x the single-worker rate
+SCALING_EFFICIENCY_MIN = 0.7
+DRAIN_TIMEOUT_SECONDS = 3600
+
+
+class AlertQueueTester:
+    def __init__(self, alerts=QUEUE_ALERTS, worker_counts=QUEUE_WORKER_COUNTS):
+        self.alerts = alerts
+        self.worker_counts = worker_counts
+        self.provider = FakeEmailProvider(FAKE_PROVIDER_LATENCY_MS)
+        self.test_results = []
+        self.throughputs = {}
+
+    def log_test(self, test_name, success, message, response_data=None):
+        """Log test results"""
+        status = "✅ PASS" if success else "❌ FAIL"
+        print(f"{status} - {test_name}: {message}")
+
+        self.test_results.append({
+            "test": test_name,
+            "success": success,
+            "message": message,
+            "response_data": response_data,
+            "timestamp": datetime.now().isoformat()
+        })
+
+    def node(self, *args, env=None, timeout=600):
+        """Run a backend script and return its RESULTADO json (if any)"""
+        completed = subprocess.run(
+            ["node", *args],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.strip()[-500:] or f"exit code {completed.returncode}")
+        for line in completed.stdout.splitlines():
+            if line.startswith("RESULTADO "):
+                return json.loads(line[len("RESULTADO "):])
+        return None
+
+    def drain(self, workers):
+        """Start `workers` worker processes at once and wait until the queue is empty"""
+        env = self.provider.env(ALERTAS_WORKERS="1")
+        started = time.perf_counter()
+        processes = [
+            subprocess.Popen(
+                ["node", "scripts/alertas-worker.js", "--workers", "1"],
+                cwd=BACKEND_DIR,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+            for _ in range(workers)
+        ]
+
+        results = []
+        for process in processes:
+            stdout, stderr = process.communicate(timeout=DRAIN_TIMEOUT_SECONDS)
+            if process.returncode != 0:
+                raise RuntimeError(stderr.strip()[-500:] or f"worker exit code {process.returncode}")
+            line = next(l for l in stdout.splitlines() if l.startswith("RESULTADO "))
+            results.append(json.loads(line[len("RESULTADO "):]))
+        return time.perf_counter() - started, results
+
+    def test_drain(self, workers):
+        print(f"\n📬 Draining {self.alerts} alerts with {workers} worker(s)...")
+
+        try:
+            self.node("scripts/benchmark-alertas.js", "sembrar", str(self.alerts))
+            self.provider.reset()
+            elapsed, results = self.drain(workers)
+            state = self.node("scripts/benchmark-alertas.js", "verificar")
+            stats = self.provider.stats()
+        except Exception as e:
+            self.log_test(f"Alert Drain x{workers}", False, f"Error: {str(e)}")
+            return
+
+        self.throughputs[workers] = self.alerts / elapsed if elapsed else 0
+        claimed = [r["reclamadas"] for r in results]
+        self.log_test(
+            f"Alert Drain x{workers}",
+            state["pendientes"] == 0 and state["descartadas"] == 0 and state["historial"] == self.alerts,
+            f"{elapsed:.1f}s, {self.throughputs[workers]:.0f} alerts/s; claimed per worker {claimed}; "
+            f"{state['pendientes']} pending, {state['descartadas']} dead-lettered, {state['historial']} sent"
+        )
+        self.log_test(
+            f"Alert No Duplicates x{workers}",
+            state["duplicadas"] == 0 and stats["emails"] == self.alerts,
+            f"{state['duplicadas']} alerts sent twice, provider accepted {stats['emails']} emails"
+        )
+
+    def test_scaling(self):
+        base = self.throughputs.get(1)
+        if not base:
+            return
+        for workers, throughput in sorted(self.throughputs.items()):
+            if workers == 1:
+                continue
+            efficiency = throughput / (base * workers)
+            self.log_test(
+                f"Alert Scaling x{workers}",
+                efficiency >= SCALING_EFFICIENCY_MIN,
+                f"{throughput / base:.2f}x the single-worker rate ({efficiency:.0%} efficiency, min {SCALING_EFFICIENCY_MIN:.0%})"
+            )
+
+    def cleanup(self):
+        print("\n🧹 Cleanup...")
+        try:
+            self.node("scripts/benchmark-alertas.js", "limpiar")
+        except Exception as e:
+            print(f"Cleanup error: {str(e)}")
+
+    def run(self):
+        print(f"\n📮 Starting fake email provider on {self.provider.url}...")
+        try:
+            self.provider.start()
+        except Exception as e:
+            self.log_test("Fake Provider", False, str(e))
+            return False
+
+        try:
+            for workers in self.worker_counts:
+                self.test_drain(workers)
+            self.test_scaling()
+            self.cleanup()
+        finally:
+            self.provider.stop()
+        return bool(self.test_results) and all(result["success"] for result in self.test_results)
+
+    def run_all_tests(self):
+        """Alias used by the combined runner"""
+        return self.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alert queue drain benchmark with 1, 2 and 4 workers")
+    parser.add_argument("--alertas", type=int, default=QUEUE_ALERTS, help="Alerts to enqueue per run")
+    parser.add_argument("--workers", default=",".join(str(w) for w in QUEUE_WORKER_COUNTS), help="Worker counts, e.g. 1,2,4")
+    args = parser.parse_args()
+
+    counts = [int(w) for w in args.workers.split(",") if w.strip()]
+    success = AlertQueueTester(args.alertas, counts).run()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Backend API Testing for Clínica Mía - Full Regression Runner
+Runs every tester suite in one process so they share the pooled HTTP session
+and the cached JWT from tests.api_client
+"""
+
+import argparse
+import sys
+import time
+
+from tests.api_client import close_session, token_cache
+from backend_test import BackendTester
+from backend_test_disponibilidad import DisponibilidadTester
+from backend_test_farmacia import PharmacyBackendTester
+from backend_test_hce import HCEBackendTester
+from backend_test_laboratorio import LaboratoryBackendTester
+from backend_test_recordatorios import RecordatoriosTester
+
+SUITES = {
+    "examenes": BackendTester,
+    "disponibilidad": DisponibilidadTester,
+    "farmacia": PharmacyBackendTester,
+    "hce": HCEBackendTester,
+    "laboratorio": LaboratoryBackendTester,
+    "recordatorios": RecordatoriosTester,
+}
+
+
+def run_suites(names):
+    """Run the selected suites sequentially and print a combined summary"""
+    results = []
+    started = time.perf_counter()
+
+    try:
+        for name in names:
+            print("\n" + "#" * 90)
+            print(f"# SUITE: {name}")
+            print("#" * 90)
+
+            suite_started = time.perf_counter()
+            tester = SUITES[name]()
+            try:
+                success = tester.run_all_tests()
+            except Exception as e:
+                print(f"❌ Suite {name} crashed: {str(e)}")
+                success = False
+            elapsed = time.perf_counter() - suite_started
+
+            passed = sum(1 for result in tester.test_results if result["success"])
+            results.append((name, success, passed, len(tester.test_results), elapsed))
+    finally:
+        close_session()
+
+    total_elapsed = time.perf_counter() - started
+
+    print("\n" + "=" * 90)
+    print("📊 FULL REGRESSION SUMMARY")
+    print("=" * 90)
+    for name, success, passed, total, elapsed in results:
+        status = "✅" if success else "❌"
+        print(f"{status} {name:<16} {passed}/{total} passed in {elapsed:.2f}s")
+    print(f"\n⏱️  Total wall time: {total_elapsed:.2f}s")
+    print(f"🔐 Logins: {token_cache.logins}, cached token reuses: {token_cache.hits}")
+
+    return all(success for _, success, _, _, _ in results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run every backend tester suite in one process")
+    parser.add_argument("suites", nargs="*", help=f"Suites to run (default: all). Options: {', '.join(SUITES)}")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.suites if name not in SUITES]
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(unknown)}")
+
+    success = run_suites(args.suites or list(SUITES.keys()))
+    sys.exit(0 if success else 1)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Backend Testing for Clínica Mía - Cluster Mode
+Starts backend/cluster.js with 1..N HTTP workers and runs the Exámenes load mix
+against each one to measure throughput scaling. Also checks that exactly one worker
+holds the cron leadership and that a rolling restart (SIGHUP) under load drops no
+requests
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from backend_test import BackendTester
+from tests.api_client import create_session
+from tests.cluster_server import ClusterServer
+from tests.load_harness import LoadGenerator, print_report, print_scaling, scaling_summary, write_report
+
+CORES = os.cpu_count() or 1
+CLUSTER_WORKER_COUNTS = sorted({1, 2, 4, CORES})
+CLUSTER_CONCURRENCY = 64
+CLUSTER_DURATION_SECONDS = 20
+# Faster leader heartbeat so failover/restarts settle within the test
+LEADER_INTERVAL_MS = 1000
+LEADER_TIMEOUT_SECONDS = 15
+RESTART_TIMEOUT_SECONDS = 120
+# Throughput with N workers must reach this fraction of N x the single-worker rate
+SCALING_EFFICIENCY_MIN = 0.6
+ROLLING_RESTART_MAX_ERROR_RATE = 0.001
+
+
+class ClusterTester:
+    def __init__(self, worker_counts=CLUSTER_WORKER_COUNTS, concurrency=CLUSTER_CONCURRENCY, duration=CLUSTER_DURATION_SECONDS):
+        self.worker_counts = worker_counts
+        self.concurrency = concurrency
+        self.duration = duration
+        self.test_results = []
+        self.reports = {}
+
+    def log_test(self, test_name, success, message, response_data=None):
+        """Log test results"""
+        status = "✅ PASS" if success else "❌ FAIL"
+        print(f"{status} - {test_name}: {message}")
+
+        self.test_results.append({
+            "test": test_name,
+            "success": success,
+            "message": message,
+            "response_data": response_data,
+            "timestamp": datetime.now().isoformat()
+        })
+
+    def start_load(self, server):
+        """Authenticate against the cluster and build the Exámenes load generator"""
+        client = BackendTester()
+        client.base_url = server.url
+        if not client.authenticate():
+            raise RuntimeError("Authentication against the cluster failed")
+
+        session = create_session(pool_maxsize=self.concurrency)
+        generator = LoadGenerator(
+            client.build_load_scenarios(session),
+            concurrency=self.concurrency,
+            duration=self.duration
+        )
+        return generator, session
+
+    def wait_for(self, condition, timeout):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            result = condition()
+            if result:
+                return result
+            time.sleep(0.5)
+        return None
+
+    def test_leader(self, server, workers):
+        """Exactly one worker runs the cron jobs"""
+        leaders = self.wait_for(lambda: server.leaders() or None, LEADER_TIMEOUT_SECONDS) or set()
+        pids = server.pids()
+        self.log_test(
+            f"Cron Leader x{workers}",
+            len(leaders) == 1,
+            f"{len(leaders)} leader(s) {sorted(leaders)} among {len(pids)} workers seen"
+        )
+
+    def test_throughput(self, server, workers):
+        print(f"\n🔥 Load x{workers} workers: concurrency={self.concurrency}, duration={self.duration}s")
+        generator, session = self.start_load(server)
+        try:
+            report = generator.run()
+        finally:
+            session.close()
+
+        print_report(report)
+        self.reports[workers] = report
+        total = report["total"]
+        self.log_test(
+            f"Cluster Load x{workers}",
+            total["error_rate"] < 0.01,
+            f"{total['throughput_rps']:.1f} req/s, p95 {total['latency_ms']['p95']:.1f}ms, "
+            f"error rate {total['error_rate'] * 100:.2f}%"
+        )
+
+    def test_rolling_restart(self, server, workers):
+        """SIGHUP while under load: every worker is replaced without failed requests"""
+        print(f"\n♻️  Rolling restart of {workers} workers under load...")
+        old_pids = server.pids()
+        generator, session = self.start_load(server)
+        generator.duration = max(self.duration, 30)
+
+        holder = {}
+        runner = threading.Thread(target=lambda: holder.update(report=generator.run()))
+        runner.start()
+        time.sleep(2)
+        server.reload()
+
+        def replaced():
+            pids = server.pids()
+            return pids if len(pids) >= workers and not pids & old_pids else None
+
+        new_pids = self.wait_for(replaced, RESTART_TIMEOUT_SECONDS)
+        runner.join()
+        session.close()
+
+        total = holder["report"]["total"]
+        self.log_test(
+            f"Rolling Restart x{workers}",
+            new_pids is not None and total["error_rate"] <= ROLLING_RESTART_MAX_ERROR_RATE,
+            f"{'all' if new_pids else 'not all'} workers replaced; {total['requests']} requests during restart, "
+            f"{total['errors']} errors ({total['error_rate'] * 100:.3f}%), status codes {total['status_codes']}"
+        )
+        self.test_leader(server, workers)
+
+    def test_scaling(self):
+        summary = scaling_summary(self.reports)
+        print_scaling(summary)
+        for workers, row in summary.items():
+            if workers == 1 or row["efficiency"] is None or workers > CORES:
+                continue
+            self.log_test(
+                f"Cluster Scaling x{workers}",
+                row["efficiency"] >= SCALING_EFFICIENCY_MIN,
+                f"{row['speedup']:.2f}x the single-worker rate ({row['efficiency']:.0%} efficiency, min {SCALING_EFFICIENCY_MIN:.0%})"
+            )
+        return summary
+
+    def run(self, output="load_report_cluster.json"):
+        print(f"🚀 Cluster scaling test: workers {self.worker_counts} on {CORES} cores")
+        for workers in self.worker_counts:
+            print("\n" + "#" * 80)
+            print(f"# {workers} worker(s)")
+            print("#" * 80)
+            try:
+                with ClusterServer(workers, LIDER_INTERVALO_MS=str(LEADER_INTERVAL_MS)) as server:
+                    self.test_leader(server, workers)
+                    self.test_throughput(server, workers)
+                    if workers == max(self.worker_counts) and workers > 1:
+                        self.test_rolling_restart(server, workers)
+            except Exception as e:
+                self.log_test(f"Cluster x{workers}", False, f"Error: {str(e)}")
+
+        summary = self.test_scaling()
+        if output:
+            write_report({"scaling": summary, "reports": self.reports}, output)
+        return bool(self.test_results) and all(result["success"] for result in self.test_results)
+
+    def run_all_tests(self):
+        """Alias used by the combined runner"""
+        return self.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cluster mode throughput scaling, cron leader and rolling restart test")
+    parser.add_argument("--workers", default=",".join(str(w) for w in CLUSTER_WORKER_COUNTS), help="Worker counts, e.g. 1,2,4")
+    parser.add_argument("--concurrency", type=int, default=CLUSTER_CONCURRENCY, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=int, default=CLUSTER_DURATION_SECONDS, help="Load duration per worker count (s)")
+    parser.add_argument("--output", default="load_report_cluster.json", help="JSON report path")
+    args = parser.parse_args()
+
+    counts = sorted({int(w) for w in args.workers.split(",") if w.strip()})
+    success = ClusterTester(counts, args.concurrency, args.duration).run(args.output)
+    sys.exit(0 if success else 1)
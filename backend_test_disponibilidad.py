@@ -4,13 +4,25 @@ Backend API Testing for Clínica Mía - Doctor Availability Module
 Tests the doctor availability endpoints for appointment scheduling
 """
 
-import requests
 import json
 import sys
+import time
 from datetime import datetime, timedelta
 
+from tests.api_client import (
+    BASE_URL,
+    AuthenticationError,
+    check_etag_invalidated,
+    check_not_modified,
+    check_pool_metrics,
+    get_session,
+    token_cache,
+)
+from tests.cold_start import check_cold_start
+from tests.query_budget import query_tracker
+from tests.load_harness import LoadGenerator, print_report
+
 # Configuration
-BASE_URL = "http://localhost:4000"
 TEST_USER = {
     "email": "admin@clinicamia.com",
     "password": "admin123"
@@ -19,10 +31,12 @@ TEST_USER = {
 class DisponibilidadTester:
     def __init__(self):
         self.base_url = BASE_URL
+        self.http = get_session()
         self.token = None
         self.headers = {"Content-Type": "application/json"}
         self.test_results = []
         self.test_doctor_id = None
+        self.test_doctor_usuario_id = None
         self.test_fecha = None
 
     def log_test(self, test_name, success, message, response_data=None):
@@ -39,31 +53,21 @@ class DisponibilidadTester:
         })
 
     def authenticate(self):
-        """Get JWT token for authentication"""
+        """Get JWT token for authentication (shared cache, logs in only on miss or expiry)"""
         try:
             print("\n🔐 Testing Authentication...")
-            
-            response = requests.post(
-                f"{self.base_url}/auth/login",
-                headers=self.headers,
-                json=TEST_USER,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("success") and "token" in data.get("data", {}):
-                    self.token = data["data"]["token"]
-                    self.headers["Authorization"] = f"Bearer {self.token}"
-                    self.log_test("Authentication", True, "Login successful, token obtained")
-                    return True
-                else:
-                    self.log_test("Authentication", False, f"Invalid response format: {data}")
-                    return False
+
+            self.token, cached = token_cache.get_token(self.base_url, TEST_USER, self.http)
+            self.headers["Authorization"] = f"Bearer {self.token}"
+            if cached:
+                self.log_test("Authentication", True, "Reused cached token")
             else:
-                self.log_test("Authentication", False, f"Login failed with status {response.status_code}: {response.text}")
-                return False
-                
+                self.log_test("Authentication", True, "Login successful, token obtained")
+            return True
+
+        except AuthenticationError as e:
+            self.log_test("Authentication", False, str(e))
+            return False
         except Exception as e:
             self.log_test("Authentication", False, f"Authentication error: {str(e)}")
             return False
@@ -73,12 +77,16 @@ class DisponibilidadTester:
         try:
             print("\n🏥 Testing Health Check...")
             
-            response = requests.get(f"{self.base_url}/health", timeout=10)
+            response = self.http.get(f"{self.base_url}/health", timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 if data.get("status") == "ok" and data.get("database") == "connected":
                     self.log_test("Health Check", True, "Server and database are healthy")
+                    pool_ok, pool_message = check_pool_metrics(data)
+                    self.log_test("Database Pool Metrics", pool_ok, pool_message)
+                    cold_ok, cold_message = check_cold_start()
+                    self.log_test("Cold Start", cold_ok, cold_message)
                     return True
                 else:
                     self.log_test("Health Check", False, f"Health check failed: {data}")
@@ -97,7 +105,7 @@ class DisponibilidadTester:
             print("\n👨‍⚕️ Setting up test doctor with schedules...")
             
             # First, try to find existing doctors
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/doctores",
                 headers=self.headers,
                 timeout=10
@@ -111,6 +119,7 @@ class DisponibilidadTester:
                 for doctor in doctors:
                     if doctor.get("horarios"):
                         self.test_doctor_id = doctor["id"]
+                        self.test_doctor_usuario_id = doctor.get("usuarioId")
                         self.log_test("Find Test Doctor", True, f"Found doctor with schedules: {doctor.get('nombre', 'Unknown')} (ID: {self.test_doctor_id})")
                         return True
                 
@@ -118,6 +127,7 @@ class DisponibilidadTester:
                 if doctors:
                     doctor = doctors[0]
                     self.test_doctor_id = doctor["id"]
+                    self.test_doctor_usuario_id = doctor.get("usuarioId")
                     
                     # Set up test date (tomorrow)
                     tomorrow = datetime.now() + timedelta(days=1)
@@ -151,7 +161,7 @@ class DisponibilidadTester:
         
         # Test 1: Valid doctor and date
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/disponibilidad/{self.test_doctor_id}?fecha={self.test_fecha}",
                 headers=self.headers,
                 timeout=10
@@ -178,7 +188,7 @@ class DisponibilidadTester:
 
         # Test 2: Missing fecha parameter
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/disponibilidad/{self.test_doctor_id}",
                 headers=self.headers,
                 timeout=10
@@ -199,7 +209,7 @@ class DisponibilidadTester:
         # Test 3: Invalid doctor ID
         try:
             fake_doctor_id = "00000000-0000-0000-0000-000000000000"
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/disponibilidad/{fake_doctor_id}?fecha={self.test_fecha}",
                 headers=self.headers,
                 timeout=10
@@ -219,7 +229,7 @@ class DisponibilidadTester:
 
         # Test 4: Invalid date format
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/disponibilidad/{self.test_doctor_id}?fecha=invalid-date",
                 headers=self.headers,
                 timeout=10
@@ -255,7 +265,7 @@ class DisponibilidadTester:
                 "duracion_minutos": 30
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/disponibilidad/validar",
                 headers=self.headers,
                 json=valid_data,
@@ -284,7 +294,7 @@ class DisponibilidadTester:
                 # Missing fecha and hora
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/disponibilidad/validar",
                 headers=self.headers,
                 json=invalid_data,
@@ -312,7 +322,7 @@ class DisponibilidadTester:
                 "duracion_minutos": 30
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/disponibilidad/validar",
                 headers=self.headers,
                 json=invalid_doctor_data,
@@ -340,7 +350,7 @@ class DisponibilidadTester:
                 "duracion_minutos": 60  # 1 hour appointment
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/disponibilidad/validar",
                 headers=self.headers,
                 json=duration_data,
@@ -369,7 +379,7 @@ class DisponibilidadTester:
 
         try:
             today = datetime.now().strftime("%Y-%m-%d")
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/disponibilidad/{self.test_doctor_id}/semana?fecha_inicio={today}",
                 headers=self.headers,
                 timeout=10
@@ -391,6 +401,306 @@ class DisponibilidadTester:
         except Exception as e:
             self.log_test("GET Disponibilidad Semana", False, f"Error: {str(e)}")
 
+    def test_buscar_primer_disponible(self):
+        """Benchmark GET /disponibilidad/buscar against the per-doctor, per-day loop"""
+        print("\n🔎 Testing GET /disponibilidad/buscar (multi-doctor search vs per-doctor loop)...")
+
+        dias = 7
+        limite = 10
+
+        try:
+            # Pick a specialty that has at least one active doctor with schedules
+            response = self.http.get(
+                f"{self.base_url}/doctores?activo=true&limit=200",
+                headers=self.headers,
+                timeout=10
+            )
+            if response.status_code != 200:
+                self.log_test("Buscar Disponible - Setup", False, f"Failed to fetch doctors: {response.status_code}")
+                return
+
+            especialidad_id = None
+            for doctor in response.json().get("data", []):
+                if doctor.get("horarios") and doctor.get("especialidadesIds"):
+                    especialidad_id = doctor["especialidadesIds"][0]
+                    break
+
+            if not especialidad_id:
+                self.log_test("Buscar Disponible - Setup", False, "No active doctor with schedules and specialties found")
+                return
+
+            response = self.http.get(
+                f"{self.base_url}/doctores?activo=true&limit=200&especialidadId={especialidad_id}",
+                headers=self.headers,
+                timeout=10
+            )
+            doctor_ids = [d["usuarioId"] for d in response.json().get("data", []) if d.get("horarios")]
+
+            fecha_inicio = datetime.now() + timedelta(days=1)
+            fechas = [(fecha_inicio + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(dias)]
+
+            # New endpoint: one request
+            started = time.perf_counter()
+            response = self.http.get(
+                f"{self.base_url}/disponibilidad/buscar",
+                headers=self.headers,
+                params={
+                    "especialidad_id": especialidad_id,
+                    "fecha_inicio": fechas[0],
+                    "fecha_fin": fechas[-1],
+                    "limite": limite,
+                },
+                timeout=30
+            )
+            search_ms = (time.perf_counter() - started) * 1000
+
+            if response.status_code != 200 or not response.json().get("success"):
+                self.log_test("Buscar Disponible - Endpoint", False, f"Request failed with status {response.status_code}: {response.text}")
+                return
+
+            search_slots = response.json()["data"]["slots"]
+            self.log_test("Buscar Disponible - Endpoint", True,
+                          f"{len(search_slots)} slots across {response.json()['data']['doctores_evaluados']} doctors in {search_ms:.1f}ms")
+
+            # Baseline: the N×D loop the front desk does today
+            started = time.perf_counter()
+            loop_slots = []
+            for doctor_id in doctor_ids:
+                for fecha in fechas:
+                    response = self.http.get(
+                        f"{self.base_url}/disponibilidad/{doctor_id}?fecha={fecha}",
+                        headers=self.headers,
+                        timeout=10
+                    )
+                    if response.status_code != 200:
+                        continue
+                    for slot in response.json()["data"].get("slots_disponibles", []):
+                        if slot.get("disponible"):
+                            loop_slots.append((fecha, slot["hora_inicio"], doctor_id))
+            loop_ms = (time.perf_counter() - started) * 1000
+
+            # Parity: same earliest (fecha, hora) sequence and every returned slot exists in the loop result
+            loop_slots.sort()
+            loop_set = set(loop_slots)
+            expected_times = [(fecha, hora) for fecha, hora, _ in loop_slots[:limite]]
+            search_times = [(slot["fecha"], slot["hora_inicio"]) for slot in search_slots]
+            all_present = all((slot["fecha"], slot["hora_inicio"], slot["doctor_id"]) in loop_set for slot in search_slots)
+
+            if search_times == expected_times and all_present:
+                self.log_test("Buscar Disponible - Parity", True, f"Search matches the per-doctor loop ({len(search_slots)} slots)")
+            else:
+                self.log_test("Buscar Disponible - Parity", False,
+                              f"Mismatch: search={search_times[:5]} loop={expected_times[:5]} all_present={all_present}")
+
+            calls = len(doctor_ids) * len(fechas)
+            speedup = loop_ms / search_ms if search_ms else 0
+            self.log_test("Buscar Disponible - Latency", search_ms < loop_ms,
+                          f"search {search_ms:.1f}ms vs loop {loop_ms:.1f}ms ({calls} calls), speedup x{speedup:.1f}")
+
+        except Exception as e:
+            self.log_test("Buscar Disponible", False, f"Error: {str(e)}")
+
+    def validar_slot(self, doctor_id, fecha, hora, duracion):
+        """POST /disponibilidad/validar and return the `disponible` flag (None on unexpected response)"""
+        response = self.http.post(
+            f"{self.base_url}/disponibilidad/validar",
+            headers=self.headers,
+            json={"doctor_id": doctor_id, "fecha": fecha, "hora": hora, "duracion_minutos": duracion},
+            timeout=10
+        )
+        if response.status_code not in [200, 400]:
+            return None
+        return response.json().get("disponible")
+
+    def test_validar_cache_consistency(self):
+        """Cached /disponibilidad/validar must agree with the full slot computation and follow cita changes"""
+        print("\n🧮 Testing /disponibilidad/validar cache consistency...")
+
+        doctor_id = self.test_doctor_usuario_id
+        if not doctor_id:
+            self.log_test("Validar Cache - Consistency", False, "No test doctor available")
+            return
+
+        fecha = (datetime.now() + timedelta(days=2)).strftime("%Y-%m-%d")
+        created_cita_id = None
+
+        try:
+            response = self.http.get(
+                f"{self.base_url}/disponibilidad/{doctor_id}?fecha={fecha}",
+                headers=self.headers,
+                timeout=10
+            )
+            if response.status_code != 200:
+                self.log_test("Validar Cache - Consistency", False, f"GET disponibilidad failed: {response.status_code}")
+                return
+
+            slots = response.json()["data"].get("slots_disponibles", [])
+            if not slots:
+                self.log_test("Validar Cache - Consistency", True, f"No slots configured for {fecha}, nothing to compare")
+                return
+
+            mismatches = []
+            for slot in slots:
+                inicio = datetime.strptime(slot["hora_inicio"], "%H:%M")
+                duracion = int((datetime.strptime(slot["hora_fin"], "%H:%M") - inicio).total_seconds() // 60)
+                disponible = self.validar_slot(doctor_id, fecha, slot["hora_inicio"], duracion)
+                if disponible != slot["disponible"]:
+                    mismatches.append(f"{slot['hora_inicio']} slot={slot['disponible']} validar={disponible}")
+
+            if mismatches:
+                self.log_test("Validar Cache - Consistency", False, f"{len(mismatches)} mismatches: {mismatches[:5]}")
+            else:
+                self.log_test("Validar Cache - Consistency", True, f"All {len(slots)} slots agree with /validar")
+
+            # Incremental maintenance: booking and cancelling must be reflected immediately
+            libre = next((slot for slot in slots if slot["disponible"]), None)
+            if not libre:
+                return
+
+            response = self.http.get(f"{self.base_url}/pacientes?limit=1", headers=self.headers, timeout=10)
+            pacientes = response.json().get("data", []) if response.status_code == 200 else []
+            if not pacientes:
+                self.log_test("Validar Cache - Incremental", False, "No patient available to book a test cita")
+                return
+
+            response = self.http.post(
+                f"{self.base_url}/citas",
+                headers=self.headers,
+                json={
+                    "paciente_id": pacientes[0]["id"],
+                    "doctor_id": doctor_id,
+                    "fecha": fecha,
+                    "hora": libre["hora_inicio"],
+                    "duracion_minutos": 30,
+                    "costo": 0,
+                    "motivo": "Prueba cache de disponibilidad",
+                },
+                timeout=10
+            )
+            if response.status_code != 201:
+                self.log_test("Validar Cache - Incremental", False, f"Could not create cita: {response.status_code}: {response.text}")
+                return
+            created_cita_id = response.json()["data"]["id"]
+
+            ocupado = self.validar_slot(doctor_id, fecha, libre["hora_inicio"], 30) is False
+
+            self.http.post(f"{self.base_url}/citas/cancelar/{created_cita_id}", headers=self.headers, timeout=10)
+            created_cita_id = None
+            liberado = self.validar_slot(doctor_id, fecha, libre["hora_inicio"], 30) is True
+
+            self.log_test("Validar Cache - Incremental", ocupado and liberado,
+                          f"After create: occupied={ocupado}, after cancel: freed={liberado}")
+
+        except Exception as e:
+            self.log_test("Validar Cache - Consistency", False, f"Error: {str(e)}")
+        finally:
+            if created_cita_id:
+                self.http.post(f"{self.base_url}/citas/cancelar/{created_cita_id}", headers=self.headers, timeout=10)
+
+    def test_agenda_conditional_get(self):
+        """The doctor agenda must answer 304 while unchanged and invalidate on booking and cancelling"""
+        print("\n🗓️ Testing /agenda/citas conditional GET...")
+
+        if not self.test_doctor_id or not self.test_doctor_usuario_id:
+            self.log_test("Agenda ETag - 304", False, "No test doctor available")
+            return
+
+        fecha = (datetime.now() + timedelta(days=3)).strftime("%Y-%m-%d")
+        agenda_url = f"{self.base_url}/agenda/citas"
+        params = {"fecha": fecha, "doctorId": self.test_doctor_id}
+        created_cita_id = None
+
+        try:
+            ok, message, etag = check_not_modified(self.http, agenda_url, self.headers, params=params)
+            self.log_test("Agenda ETag - 304", ok, message)
+            if not ok:
+                return
+
+            response = self.http.get(
+                f"{self.base_url}/disponibilidad/{self.test_doctor_usuario_id}?fecha={fecha}",
+                headers=self.headers,
+                timeout=10
+            )
+            slots = response.json()["data"].get("slots_disponibles", []) if response.status_code == 200 else []
+            libre = next((slot for slot in slots if slot["disponible"]), None)
+            response = self.http.get(f"{self.base_url}/pacientes?limit=1", headers=self.headers, timeout=10)
+            pacientes = response.json().get("data", []) if response.status_code == 200 else []
+            if not libre or not pacientes:
+                self.log_test("Agenda ETag - Invalidation", True, f"No free slot or patient for {fecha}, skipping booking")
+                return
+
+            response = self.http.post(
+                f"{self.base_url}/citas",
+                headers=self.headers,
+                json={
+                    "paciente_id": pacientes[0]["id"],
+                    "doctor_id": self.test_doctor_usuario_id,
+                    "fecha": fecha,
+                    "hora": libre["hora_inicio"],
+                    "duracion_minutos": 30,
+                    "costo": 0,
+                    "motivo": "Prueba ETag de agenda",
+                },
+                timeout=10
+            )
+            if response.status_code != 201:
+                self.log_test("Agenda ETag - Invalidation", False, f"Could not create cita: {response.status_code}: {response.text}")
+                return
+            created_cita_id = response.json()["data"]["id"]
+
+            ok, message, etag = check_etag_invalidated(self.http, agenda_url, self.headers, etag, params=params)
+            self.log_test("Agenda ETag - after POST cita", ok, message)
+
+            self.http.post(f"{self.base_url}/citas/cancelar/{created_cita_id}", headers=self.headers, timeout=10)
+            created_cita_id = None
+            ok, message, _ = check_etag_invalidated(self.http, agenda_url, self.headers, etag, params=params)
+            self.log_test("Agenda ETag - after cancel", ok, message)
+
+        except Exception as e:
+            self.log_test("Agenda ETag - 304", False, f"Error: {str(e)}")
+        finally:
+            if created_cita_id:
+                self.http.post(f"{self.base_url}/citas/cancelar/{created_cita_id}", headers=self.headers, timeout=10)
+
+    def test_validar_throughput(self, concurrency=20, duration=10):
+        """Measure /disponibilidad/validar throughput with the cached slot map"""
+        print("\n⚡ Testing /disponibilidad/validar throughput...")
+
+        doctor_id = self.test_doctor_usuario_id
+        if not doctor_id:
+            self.log_test("Validar Throughput", False, "No test doctor available")
+            return
+
+        fecha = (datetime.now() + timedelta(days=2)).strftime("%Y-%m-%d")
+        horas = [f"{h:02d}:{m:02d}" for h in range(8, 17) for m in (0, 30)]
+        counter = {"i": 0}
+
+        def validar():
+            counter["i"] += 1
+            return self.http.post(
+                f"{self.base_url}/disponibilidad/validar",
+                headers=self.headers,
+                json={"doctor_id": doctor_id, "fecha": fecha, "hora": horas[counter["i"] % len(horas)], "duracion_minutos": 30},
+                timeout=30
+            )
+
+        try:
+            generator = LoadGenerator(
+                {"validar": validar},
+                concurrency=concurrency,
+                duration=duration,
+                ok_status=lambda status: status in (200, 400)
+            )
+            report = generator.run()
+            print_report(report)
+
+            total = report["total"]
+            self.log_test("Validar Throughput", total["error_rate"] == 0,
+                          f"{total['throughput_rps']:.1f} req/s, p50 {total['latency_ms']['p50']:.1f}ms, "
+                          f"p95 {total['latency_ms']['p95']:.1f}ms, errors {total['errors']}")
+        except Exception as e:
+            self.log_test("Validar Throughput", False, f"Error: {str(e)}")
+
     def test_error_handling(self):
         """Test error handling scenarios"""
         print("\n⚠️  Testing Error Handling...")
@@ -398,7 +708,7 @@ class DisponibilidadTester:
         # Test unauthorized access (without token)
         try:
             headers_no_auth = {"Content-Type": "application/json"}
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/disponibilidad/{self.test_doctor_id or 'test'}?fecha=2025-01-15",
                 headers=headers_no_auth,
                 timeout=10
@@ -432,8 +742,15 @@ class DisponibilidadTester:
         self.test_get_disponibilidad_endpoint()
         self.test_post_validar_endpoint()
         self.test_get_semana_endpoint()
+        self.test_buscar_primer_disponible()
+        self.test_validar_cache_consistency()
+        self.test_agenda_conditional_get()
+        self.test_validar_throughput()
         self.test_error_handling()
         
+        for name, ok, message in query_tracker.check():
+            self.log_test(name, ok, message)
+
         # Summary
         print("\n" + "=" * 80)
         print("📊 TEST SUMMARY")
@@ -4,21 +4,88 @@ Backend API Testing for Clínica Mía - Pharmacy Module
 Tests the Hono.js backend endpoints for Pharmacy Products, Categories, and Labels
 """
 
-import requests
 import json
+import os
 import sys
+import time
 from datetime import datetime, timedelta
 
+from tests.api_client import (
+    BASE_URL,
+    AuthenticationError,
+    check_invalidation,
+    check_pool_metrics,
+    conditional_snapshot,
+    get_session,
+    token_cache,
+)
+from tests.cold_start import check_cold_start
+from tests.query_budget import query_tracker
+from tests.load_harness import percentile
+
 # Configuration
-BASE_URL = "http://localhost:4000"
 TEST_USER = {
     "email": "admin@clinica.com",
     "password": "admin123"
 }
 
+# Search benchmark: seeded products are kept between runs (upsert by SKU) in their own category
+SEARCH_SEED_COUNT = int(os.environ.get("FARMACIA_SEARCH_SEED", "50000"))
+SEARCH_SEED_CATEGORY = "Benchmark Búsqueda"
+SEARCH_SEED_SKU_PREFIX = "BENCH-SRCH"
+SEARCH_SEED_CHUNK = 1000
+SEARCH_P95_BUDGET_MS = 50
+SEARCH_BENCH_REPEATS = 20
+
+STATS_SEED_COUNT = int(os.environ.get("FARMACIA_STATS_SEED", "100000"))
+STATS_P95_BUDGET_MS = 100
+STATS_PAGE_SIZE = 5000
+
+# Streaming CSV import: generated rows are upserted by SKU, so reruns update instead of duplicating
+IMPORT_ROW_COUNT = int(os.environ.get("FARMACIA_IMPORT_ROWS", "100000"))
+IMPORT_CATEGORY = "Benchmark Importación"
+IMPORT_SKU_PREFIX = "BENCH-IMP"
+IMPORT_MIN_ROWS_PER_SECOND = int(os.environ.get("FARMACIA_IMPORT_MIN_RPS", "2000"))
+IMPORT_MAX_RSS_MB = int(os.environ.get("FARMACIA_IMPORT_MAX_RSS_MB", "512"))
+IMPORT_TIMEOUT_SECONDS = 600
+
+# Interaction index: synthetic active ingredients that cannot collide with the real catalog
+INTERACTION_CATEGORY = "Benchmark Interacciones"
+INTERACTION_SKU_PREFIX = "BENCH-INT"
+INTERACTION_DRUGS = [
+    # (principio activo, descripción)
+    ("Bencitrolam", "Interacción contraindicada con dexoquinal. Precaución con fumaprazina: vigilar presión arterial."),
+    ("Dexoquinal", "Sin otras interacciones conocidas."),
+    ("Fumaprazina", None),
+    ("Lotecarbam", None),
+]
+INTERACTION_EXPECTED = {
+    frozenset({"Bencitrolam", "Dexoquinal"}): "CONTRAINDICADA",
+    frozenset({"Bencitrolam", "Fumaprazina"}): "MODERADA",
+}
+INTERACTION_LIST_SIZES = (15, 60)
+INTERACTION_REPEATS = 30
+INTERACTION_P95_BUDGET_MS = int(os.environ.get("FARMACIA_INTERACCIONES_P95_MS", "50"))
+
+SEARCH_SEED_DRUGS = [
+    ("Ácido Fólico", "ácido fólico", "B03BB01"),
+    ("Acetaminofén", "paracetamol", "N02BE01"),
+    ("Ibuprofeno", "ibuprofeno", "M01AE01"),
+    ("Amoxicilina", "amoxicilina", "J01CA04"),
+    ("Losartán Potásico", "losartán", "C09CA01"),
+    ("Metformina", "metformina", "A10BA02"),
+    ("Omeprazol", "omeprazol", "A02BC01"),
+    ("Ácido Acetilsalicílico", "ácido acetilsalicílico", "B01AC06"),
+    ("Clorfeniramina", "clorfeniramina", "R06AB04"),
+    ("Diclofenaco Sódico", "diclofenaco", "M01AB05"),
+    ("Loratadina", "loratadina", "R06AX13"),
+    ("Salbutamol", "salbutamol", "R03AC02"),
+]
+
 class PharmacyBackendTester:
     def __init__(self):
         self.base_url = BASE_URL
+        self.http = get_session()
         self.token = None
         self.headers = {"Content-Type": "application/json"}
         self.test_results = []
@@ -40,31 +107,21 @@ class PharmacyBackendTester:
         })
 
     def authenticate(self):
-        """Get JWT token for authentication"""
+        """Get JWT token for authentication (shared cache, logs in only on miss or expiry)"""
         try:
             print("\n🔐 Testing Authentication...")
-            
-            response = requests.post(
-                f"{self.base_url}/auth/login",
-                headers=self.headers,
-                json=TEST_USER,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("success") and "token" in data.get("data", {}):
-                    self.token = data["data"]["token"]
-                    self.headers["Authorization"] = f"Bearer {self.token}"
-                    self.log_test("Authentication", True, "Login successful, token obtained")
-                    return True
-                else:
-                    self.log_test("Authentication", False, f"Invalid response format: {data}")
-                    return False
+
+            self.token, cached = token_cache.get_token(self.base_url, TEST_USER, self.http)
+            self.headers["Authorization"] = f"Bearer {self.token}"
+            if cached:
+                self.log_test("Authentication", True, "Reused cached token")
             else:
-                self.log_test("Authentication", False, f"Login failed with status {response.status_code}: {response.text}")
-                return False
-                
+                self.log_test("Authentication", True, "Login successful, token obtained")
+            return True
+
+        except AuthenticationError as e:
+            self.log_test("Authentication", False, str(e))
+            return False
         except Exception as e:
             self.log_test("Authentication", False, f"Authentication error: {str(e)}")
             return False
@@ -74,12 +131,16 @@ class PharmacyBackendTester:
         try:
             print("\n🏥 Testing Health Check...")
             
-            response = requests.get(f"{self.base_url}/health", timeout=10)
+            response = self.http.get(f"{self.base_url}/health", timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 if data.get("status") == "ok" and data.get("database") == "connected":
                     self.log_test("Health Check", True, "Server and database are healthy")
+                    pool_ok, pool_message = check_pool_metrics(data)
+                    self.log_test("Database Pool Metrics", pool_ok, pool_message)
+                    cold_ok, cold_message = check_cold_start()
+                    self.log_test("Cold Start", cold_ok, cold_message)
                     return True
                 else:
                     self.log_test("Health Check", False, f"Health check failed: {data}")
@@ -98,7 +159,7 @@ class PharmacyBackendTester:
         
         # Test GET /categorias-productos (list)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/categorias-productos",
                 headers=self.headers,
                 timeout=10
@@ -125,7 +186,7 @@ class PharmacyBackendTester:
                 "color": "#10b981"
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/categorias-productos",
                 headers=self.headers,
                 json=categoria_data,
@@ -148,7 +209,7 @@ class PharmacyBackendTester:
         # Test GET /categorias-productos/:id (get by ID)
         if self.created_categoria_id:
             try:
-                response = requests.get(
+                response = self.http.get(
                     f"{self.base_url}/categorias-productos/{self.created_categoria_id}",
                     headers=self.headers,
                     timeout=10
@@ -175,7 +236,7 @@ class PharmacyBackendTester:
                     "color": "#059669"
                 }
                 
-                response = requests.put(
+                response = self.http.put(
                     f"{self.base_url}/categorias-productos/{self.created_categoria_id}",
                     headers=self.headers,
                     json=update_data,
@@ -200,7 +261,7 @@ class PharmacyBackendTester:
         
         # Test GET /etiquetas-productos (list)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/etiquetas-productos",
                 headers=self.headers,
                 timeout=10
@@ -226,7 +287,7 @@ class PharmacyBackendTester:
                 "color": "#ef4444"
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/etiquetas-productos",
                 headers=self.headers,
                 json=etiqueta_data,
@@ -249,7 +310,7 @@ class PharmacyBackendTester:
         # Test GET /etiquetas-productos/:id (get by ID)
         if self.created_etiqueta_id:
             try:
-                response = requests.get(
+                response = self.http.get(
                     f"{self.base_url}/etiquetas-productos/{self.created_etiqueta_id}",
                     headers=self.headers,
                     timeout=10
@@ -275,7 +336,7 @@ class PharmacyBackendTester:
                     "color": "#dc2626"
                 }
                 
-                response = requests.put(
+                response = self.http.put(
                     f"{self.base_url}/etiquetas-productos/{self.created_etiqueta_id}",
                     headers=self.headers,
                     json=update_data,
@@ -300,7 +361,7 @@ class PharmacyBackendTester:
         
         # Test GET /productos (list)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/productos",
                 headers=self.headers,
                 timeout=10
@@ -319,9 +380,11 @@ class PharmacyBackendTester:
         except Exception as e:
             self.log_test("GET Productos", False, f"GET error: {str(e)}")
 
+        etag = conditional_snapshot(self, "Conditional GET Productos", "/productos")
+
         # Test GET /productos/stats (statistics)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/productos/stats",
                 headers=self.headers,
                 timeout=10
@@ -370,7 +433,7 @@ class PharmacyBackendTester:
                     "etiquetasIds": [self.created_etiqueta_id] if self.created_etiqueta_id else []
                 }
                 
-                response = requests.post(
+                response = self.http.post(
                     f"{self.base_url}/productos",
                     headers=self.headers,
                     json=producto_data,
@@ -390,10 +453,13 @@ class PharmacyBackendTester:
             except Exception as e:
                 self.log_test("POST Producto", False, f"POST error: {str(e)}")
 
+        if self.created_producto_id:
+            etag = check_invalidation(self, "ETag Productos after POST", "/productos", etag)
+
         # Test GET /productos/:id (get by ID)
         if self.created_producto_id:
             try:
-                response = requests.get(
+                response = self.http.get(
                     f"{self.base_url}/productos/{self.created_producto_id}",
                     headers=self.headers,
                     timeout=10
@@ -422,7 +488,7 @@ class PharmacyBackendTester:
                     "cantidadTotal": 150
                 }
                 
-                response = requests.put(
+                response = self.http.put(
                     f"{self.base_url}/productos/{self.created_producto_id}",
                     headers=self.headers,
                     json=update_data,
@@ -441,13 +507,15 @@ class PharmacyBackendTester:
             except Exception as e:
                 self.log_test("PUT Producto", False, f"PUT error: {str(e)}")
 
+            check_invalidation(self, "ETag Productos after PUT", "/productos", etag)
+
     def test_search_and_filters(self):
         """Test search and filter functionality"""
         print("\n🔍 Testing Search and Filter Functionality...")
         
         # Test product search
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/productos?search=Acetaminofén",
                 headers=self.headers,
                 timeout=10
@@ -469,7 +537,7 @@ class PharmacyBackendTester:
         # Test category filter
         if self.created_categoria_id:
             try:
-                response = requests.get(
+                response = self.http.get(
                     f"{self.base_url}/productos?categoriaId={self.created_categoria_id}",
                     headers=self.headers,
                     timeout=10
@@ -488,6 +556,410 @@ class PharmacyBackendTester:
             except Exception as e:
                 self.log_test("Category Filter", False, f"Filter error: {str(e)}")
 
+        self.test_search_benchmark()
+
+    def _seed_sku(self, index):
+        return f"{SEARCH_SEED_SKU_PREFIX}-{index:06d}"
+
+    def _seed_row(self, index):
+        nombre, principio, atc = SEARCH_SEED_DRUGS[index % len(SEARCH_SEED_DRUGS)]
+        dosis = (index // len(SEARCH_SEED_DRUGS)) % 50 * 10 + 5
+        cum = f"9{index:08d}-1"
+        return f"{self._seed_sku(index)},{nombre} {dosis} mg,{principio},{atc},{cum},{1000 + index % 9000},{index % 200}"
+
+    def find_or_create_category(self, nombre, descripcion):
+        """Return the product category named `nombre`, creating it if needed"""
+        response = self.http.get(f"{self.base_url}/categorias-productos", headers=self.headers, timeout=10)
+        categorias = response.json().get("data", []) if response.status_code == 200 else []
+        categoria = next((c for c in categorias if c.get("nombre") == nombre), None)
+
+        if categoria is None:
+            response = self.http.post(
+                f"{self.base_url}/categorias-productos",
+                headers=self.headers,
+                json={"nombre": nombre, "descripcion": descripcion, "color": "#64748b"},
+                timeout=10
+            )
+            if response.status_code != 201:
+                raise RuntimeError(f"Could not create benchmark category: {response.status_code} {response.text}")
+            categoria = response.json()["data"]
+        return categoria
+
+    def ensure_seed_products(self, count):
+        """Find or create the benchmark category and top it up to `count` seeded products"""
+        categoria = self.find_or_create_category(SEARCH_SEED_CATEGORY, "Productos sintéticos para benchmark de búsqueda")
+
+        response = self.http.get(
+            f"{self.base_url}/productos?categoriaId={categoria['id']}&limit=1",
+            headers=self.headers,
+            timeout=30
+        )
+        existentes = int(response.headers.get("X-Total-Count", "0"))
+        if existentes >= count:
+            print(f"   Reusing {existentes} seeded products")
+            return categoria["id"]
+
+        print(f"   Seeding {count - existentes} products (found {existentes})...")
+        started = time.perf_counter()
+        header = "sku,nombre,principio_activo,codigo_atc,cum,precio_venta,cantidad"
+        for inicio in range(existentes, count, SEARCH_SEED_CHUNK):
+            fin = min(inicio + SEARCH_SEED_CHUNK, count)
+            csv = "\n".join([header] + [self._seed_row(i) for i in range(inicio, fin)])
+            response = self.http.post(
+                f"{self.base_url}/productos/import-csv",
+                headers=self.headers,
+                json={"csv": csv, "categoriaId": categoria["id"]},
+                timeout=600
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"Seed chunk {inicio}-{fin} failed: {response.status_code} {response.text}")
+        print(f"   Seeded in {time.perf_counter() - started:.1f}s")
+        return categoria["id"]
+
+    def test_search_benchmark(self):
+        """Seed SEARCH_SEED_COUNT products and assert search p95 stays under budget"""
+        print(f"\n⏱️  Testing Product Search Performance ({SEARCH_SEED_COUNT} products)...")
+
+        try:
+            self.ensure_seed_products(SEARCH_SEED_COUNT)
+        except Exception as e:
+            self.log_test("Search Benchmark Seed", False, f"Seed error: {str(e)}")
+            return
+
+        muestra = 1234
+        queries = {
+            "accent_insensitive": "acido folico",
+            "accented": "Acetaminofén",
+            "partial_name": "ibupro",
+            "principio_activo": "losartan",
+            "atc_exact": "n02be01",
+            "cum_exact": f"9{muestra:08d}-1",
+            "sku_exact": self._seed_sku(muestra),
+        }
+
+        # Correctness: accents ignored, exact codes resolve to the seeded product
+        try:
+            response = self.http.get(
+                f"{self.base_url}/productos",
+                headers=self.headers,
+                params={"search": queries["accent_insensitive"], "limit": 5},
+                timeout=10
+            )
+            nombres = [p["nombre"] for p in response.json().get("data", [])]
+            total = int(response.headers.get("X-Total-Count", "0"))
+            ok = response.status_code == 200 and total > 0 and all("FÓLICO" in n.upper() for n in nombres)
+            self.log_test("Search Accent Insensitive", ok, f"'acido folico' matched {total} products, first: {nombres[:2]}")
+
+            for key in ("sku_exact", "cum_exact"):
+                response = self.http.get(
+                    f"{self.base_url}/productos",
+                    headers=self.headers,
+                    params={"search": queries[key]},
+                    timeout=10
+                )
+                productos = response.json().get("data", [])
+                ok = len(productos) == 1 and productos[0]["sku"] == self._seed_sku(muestra)
+                self.log_test(f"Search {key}", ok, f"{queries[key]} -> {[p['sku'] for p in productos]}")
+        except Exception as e:
+            self.log_test("Search Correctness", False, f"Search error: {str(e)}")
+
+        # Latency: warm up once, then SEARCH_BENCH_REPEATS timed requests per query
+        latencias = []
+        por_query = {}
+        for key, termino in queries.items():
+            self.http.get(f"{self.base_url}/productos", headers=self.headers, params={"search": termino}, timeout=10)
+            tiempos = []
+            for _ in range(SEARCH_BENCH_REPEATS):
+                started = time.perf_counter()
+                response = self.http.get(
+                    f"{self.base_url}/productos",
+                    headers=self.headers,
+                    params={"search": termino},
+                    timeout=10
+                )
+                tiempos.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    self.log_test("Search Benchmark", False, f"'{termino}' returned {response.status_code}")
+                    return
+            tiempos.sort()
+            por_query[key] = percentile(tiempos, 95)
+            latencias.extend(tiempos)
+
+        latencias.sort()
+        p95 = percentile(latencias, 95)
+        for key, value in por_query.items():
+            print(f"   {key:<20} p95={value:.1f}ms")
+        self.log_test(
+            "Search Benchmark p95",
+            p95 < SEARCH_P95_BUDGET_MS,
+            f"p95={p95:.1f}ms p50={percentile(latencias, 50):.1f}ms over {len(latencias)} requests (budget {SEARCH_P95_BUDGET_MS}ms)"
+        )
+
+    def ensure_interaction_products(self):
+        """Create or refresh the synthetic products whose descriptions declare interactions"""
+        categoria = self.find_or_create_category(INTERACTION_CATEGORY, "Productos sintéticos para el índice de interacciones")
+        productos = {}
+        for i, (principio, descripcion) in enumerate(INTERACTION_DRUGS):
+            sku = f"{INTERACTION_SKU_PREFIX}-{i:02d}"
+            datos = {
+                "nombre": f"{principio} 10 mg",
+                "categoriaId": categoria["id"],
+                "sku": sku,
+                "principioActivo": principio,
+                "descripcion": descripcion,
+            }
+            response = self.http.get(f"{self.base_url}/productos", headers=self.headers, params={"search": sku}, timeout=10)
+            existente = next((p for p in response.json().get("data", []) if p.get("sku") == sku), None)
+            if existente:
+                response = self.http.put(f"{self.base_url}/productos/{existente['id']}", headers=self.headers, json=datos, timeout=10)
+            else:
+                response = self.http.post(f"{self.base_url}/productos", headers=self.headers, json=datos, timeout=10)
+            if response.status_code not in (200, 201):
+                raise RuntimeError(f"Could not save {sku}: {response.status_code} {response.text}")
+            productos[principio] = response.json()["data"]["id"]
+        return productos
+
+    def _verify_interactions(self, medicamentos_ids):
+        started = time.perf_counter()
+        response = self.http.post(
+            f"{self.base_url}/productos/interacciones/verificar",
+            headers=self.headers,
+            json={"medicamentosIds": medicamentos_ids},
+            timeout=10
+        )
+        elapsed = (time.perf_counter() - started) * 1000
+        if response.status_code != 200:
+            raise RuntimeError(f"verificar returned {response.status_code}: {response.text}")
+        return response.json()["data"]["interacciones"], elapsed
+
+    def test_interaction_index(self):
+        """Interaction index: severities from catalog descriptions and lookup latency for long medication lists"""
+        print("\n💊 Testing Drug Interaction Index...")
+
+        try:
+            productos = self.ensure_interaction_products()
+            response = self.http.post(f"{self.base_url}/productos/interacciones/reconstruir", headers=self.headers, timeout=300)
+            data = response.json().get("data", {})
+            self.log_test(
+                "Rebuild Interaction Index",
+                response.status_code == 200,
+                f"{data.get('interacciones')} interactions from {data.get('productos')} products in {data.get('duracionMs')}ms"
+            )
+        except Exception as e:
+            self.log_test("Interaction Index Seed", False, f"Seed error: {str(e)}")
+            return
+
+        nombres = {producto_id: principio for principio, producto_id in productos.items()}
+        sinteticos = list(productos.values())
+
+        # Correctness: exactly the declared pairs, with their severities, regardless of list order
+        try:
+            for orden in (sinteticos, list(reversed(sinteticos))):
+                interacciones, _ = self._verify_interactions(orden)
+                encontradas = {
+                    frozenset({nombres[i["medicamento1Id"]], nombres[i["medicamento2Id"]]}): i["severidad"]
+                    for i in interacciones
+                }
+                ok = encontradas == INTERACTION_EXPECTED and interacciones[0]["severidad"] == "CONTRAINDICADA"
+                self.log_test(
+                    "Interaction Index Correctness",
+                    ok,
+                    f"{ {' + '.join(sorted(k)): v for k, v in encontradas.items()} }"
+                )
+        except Exception as e:
+            self.log_test("Interaction Index Correctness", False, f"Error: {str(e)}")
+            return
+
+        # Latency: pad the synthetic products with catalog products up to each list size
+        response = self.http.get(
+            f"{self.base_url}/productos",
+            headers=self.headers,
+            params={"limit": max(INTERACTION_LIST_SIZES)},
+            timeout=30
+        )
+        relleno = [p["id"] for p in response.json().get("data", []) if p["id"] not in nombres]
+
+        for size in INTERACTION_LIST_SIZES:
+            lista = (sinteticos + relleno)[:size]
+            try:
+                interacciones, _ = self._verify_interactions(lista)
+                faltantes = [k for k in INTERACTION_EXPECTED if not any(
+                    frozenset({nombres.get(i["medicamento1Id"]), nombres.get(i["medicamento2Id"])}) == k for i in interacciones
+                )]
+                tiempos = sorted(self._verify_interactions(lista)[1] for _ in range(INTERACTION_REPEATS))
+                p95 = percentile(tiempos, 95)
+                self.log_test(
+                    f"Interaction Lookup {len(lista)} drugs",
+                    not faltantes and p95 < INTERACTION_P95_BUDGET_MS,
+                    f"{len(interacciones)} alerts, p95={p95:.1f}ms p50={percentile(tiempos, 50):.1f}ms "
+                    f"(budget {INTERACTION_P95_BUDGET_MS}ms){' missing ' + str(faltantes) if faltantes else ''}"
+                )
+            except Exception as e:
+                self.log_test(f"Interaction Lookup {size} drugs", False, f"Error: {str(e)}")
+
+    def expected_stats_from_catalog(self):
+        """Recompute /productos/stats the way the original findMany + JS loop did"""
+        productos = []
+        page = 1
+        while True:
+            response = self.http.get(
+                f"{self.base_url}/productos",
+                headers=self.headers,
+                params={"limit": STATS_PAGE_SIZE, "page": page},
+                timeout=120
+            )
+            lote = response.json().get("data", [])
+            productos.extend(lote)
+            if len(lote) < STATS_PAGE_SIZE:
+                break
+            page += 1
+
+        expected = {"total": len(productos), "activos": 0, "inactivos": 0, "requierenReceta": 0, "bajoStock": 0, "valorInventario": 0.0}
+        for p in productos:
+            expected["activos" if p["activo"] else "inactivos"] += 1
+            if p["requiereReceta"]:
+                expected["requierenReceta"] += 1
+            if p["activo"]:
+                disponible = p["cantidadTotal"] - p["cantidadConsumida"]
+                if disponible < p["cantidadMinAlerta"]:
+                    expected["bajoStock"] += 1
+                if disponible > 0:
+                    expected["valorInventario"] += disponible * p["precioVenta"]
+        return expected
+
+    def test_stats_endpoint(self):
+        """Check /productos/stats parity with a client-side recomputation and measure latency"""
+        print(f"\n📊 Testing Product Stats ({STATS_SEED_COUNT} products)...")
+
+        try:
+            self.ensure_seed_products(STATS_SEED_COUNT)
+        except Exception as e:
+            self.log_test("Stats Benchmark Seed", False, f"Seed error: {str(e)}")
+            return
+
+        try:
+            response = self.http.get(f"{self.base_url}/productos/stats", headers=self.headers, timeout=30)
+            if response.status_code != 200:
+                self.log_test("GET Productos Stats", False, f"Stats failed with status {response.status_code}: {response.text}")
+                return
+            stats = response.json()["data"]
+            expected = self.expected_stats_from_catalog()
+
+            mismatches = [
+                f"{key}: {stats.get(key)} != {value}"
+                for key, value in expected.items()
+                if key != "valorInventario" and stats.get(key) != value
+            ]
+            if abs(stats.get("valorInventario", 0) - expected["valorInventario"]) > max(1.0, expected["valorInventario"] * 1e-9):
+                mismatches.append(f"valorInventario: {stats.get('valorInventario')} != {expected['valorInventario']}")
+
+            self.log_test(
+                "Stats Parity",
+                not mismatches,
+                "All figures match the catalog" if not mismatches else "; ".join(mismatches)
+            )
+        except Exception as e:
+            self.log_test("Stats Parity", False, f"Stats error: {str(e)}")
+            return
+
+        latencias = []
+        for _ in range(SEARCH_BENCH_REPEATS):
+            started = time.perf_counter()
+            self.http.get(f"{self.base_url}/productos/stats", headers=self.headers, timeout=30)
+            latencias.append((time.perf_counter() - started) * 1000)
+        latencias.sort()
+        p95 = percentile(latencias, 95)
+        self.log_test(
+            "Stats Benchmark p95",
+            p95 < STATS_P95_BUDGET_MS,
+            f"p95={p95:.1f}ms p50={percentile(latencias, 50):.1f}ms over {len(latencias)} requests (budget {STATS_P95_BUDGET_MS}ms)"
+        )
+
+    def _import_csv_chunks(self, count, rows_per_chunk=5000):
+        """Yield a generated supplier price list as encoded CSV chunks, never holding the whole file"""
+        yield "sku,nombre,principio_activo,codigo_atc,cum,precio_venta,cantidad\n".encode("utf-8")
+        for inicio in range(0, count, rows_per_chunk):
+            lineas = []
+            for i in range(inicio, min(inicio + rows_per_chunk, count)):
+                nombre, principio, atc = SEARCH_SEED_DRUGS[i % len(SEARCH_SEED_DRUGS)]
+                # Quoted names with commas and escaped quotes exercise the parser
+                lineas.append(
+                    f'{IMPORT_SKU_PREFIX}-{i:06d},"{nombre} {i % 1000} mg, caja x{i % 30 + 1} ""lote""",'
+                    f'{principio},{atc},8{i:08d}-1,{(i % 900) * 100 + 500},{i % 200}\n'
+                )
+            yield "".join(lineas).encode("utf-8")
+
+    def test_csv_import_streaming(self):
+        """Stream a generated IMPORT_ROW_COUNT-row CSV and assert throughput and server peak RSS"""
+        print(f"\n📥 Testing Streaming CSV Import ({IMPORT_ROW_COUNT} rows)...")
+
+        try:
+            categoria = self.find_or_create_category(IMPORT_CATEGORY, "Productos sintéticos para benchmark de importación")
+            headers = {**self.headers, "Content-Type": "text/csv"}
+            started = time.perf_counter()
+            response = self.http.post(
+                f"{self.base_url}/productos/import-csv",
+                headers=headers,
+                params={"categoriaId": categoria["id"], "nombreArchivo": "benchmark-importacion.csv"},
+                data=self._import_csv_chunks(IMPORT_ROW_COUNT),
+                timeout=IMPORT_TIMEOUT_SECONDS
+            )
+            if response.status_code != 202:
+                self.log_test("CSV Import Start", False, f"Import failed with status {response.status_code}: {response.text}")
+                return
+            job_id = response.json()["data"]["id"]
+            self.log_test("CSV Import Start", True, f"Job {job_id} accepted")
+        except Exception as e:
+            self.log_test("CSV Import Start", False, f"Import error: {str(e)}")
+            return
+
+        job = None
+        deadline = time.time() + IMPORT_TIMEOUT_SECONDS
+        while time.time() < deadline:
+            response = self.http.get(f"{self.base_url}/productos/import-csv/{job_id}", headers=self.headers, timeout=10)
+            job = response.json().get("data") if response.status_code == 200 else None
+            if job and job["estado"] in ("completado", "error"):
+                break
+            time.sleep(1)
+        elapsed = time.perf_counter() - started
+
+        if not job or job["estado"] != "completado":
+            estado = job["estado"] if job else "unknown"
+            self.log_test("CSV Import Completion", False, f"Job {job_id} ended as {estado}: {job and job.get('mensajeError')}")
+            return
+
+        procesadas = job["filasProcesadas"]
+        escritas = job["creados"] + job["actualizados"]
+        self.log_test(
+            "CSV Import Completion",
+            procesadas == IMPORT_ROW_COUNT and escritas == IMPORT_ROW_COUNT and job["errores"] == 0,
+            f"{procesadas} rows processed, {job['creados']} created, {job['actualizados']} updated, {job['errores']} errors"
+        )
+
+        rows_per_second = procesadas / elapsed if elapsed else 0
+        self.log_test(
+            "CSV Import Throughput",
+            rows_per_second >= IMPORT_MIN_ROWS_PER_SECOND,
+            f"{rows_per_second:.0f} rows/s end to end ({elapsed:.1f}s, minimum {IMPORT_MIN_ROWS_PER_SECOND} rows/s)"
+        )
+        self.log_test(
+            "CSV Import Peak RSS",
+            job.get("rssPicoMb") is not None and job["rssPicoMb"] <= IMPORT_MAX_RSS_MB,
+            f"server peak RSS {job.get('rssPicoMb')}MB during import (budget {IMPORT_MAX_RSS_MB}MB)"
+        )
+
+        try:
+            sku = f"{IMPORT_SKU_PREFIX}-{42:06d}"
+            response = self.http.get(f"{self.base_url}/productos", headers=self.headers, params={"search": sku}, timeout=10)
+            producto = next((p for p in response.json().get("data", []) if p["sku"] == sku), None)
+            self.log_test(
+                "CSV Import Quoted Fields",
+                producto is not None and producto["nombre"].endswith(', CAJA X13 "LOTE"'),
+                f"Imported name: {producto['nombre'] if producto else 'not found'}"
+            )
+        except Exception as e:
+            self.log_test("CSV Import Quoted Fields", False, f"Lookup error: {str(e)}")
+
     def test_error_handling(self):
         """Test error handling scenarios"""
         print("\n⚠️  Testing Error Handling...")
@@ -495,7 +967,7 @@ class PharmacyBackendTester:
         # Test unauthorized access (without token)
         try:
             headers_no_auth = {"Content-Type": "application/json"}
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/categorias-productos",
                 headers=headers_no_auth,
                 timeout=10
@@ -515,7 +987,7 @@ class PharmacyBackendTester:
                 "descripcion": "Missing nombre field"
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/categorias-productos",
                 headers=self.headers,
                 json=invalid_data,
@@ -532,7 +1004,7 @@ class PharmacyBackendTester:
 
         # Test non-existent resource
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/productos/non-existent-id",
                 headers=self.headers,
                 timeout=10
@@ -553,7 +1025,7 @@ class PharmacyBackendTester:
         # Delete created product
         if self.created_producto_id:
             try:
-                response = requests.delete(
+                response = self.http.delete(
                     f"{self.base_url}/productos/{self.created_producto_id}",
                     headers=self.headers,
                     timeout=10
@@ -570,7 +1042,7 @@ class PharmacyBackendTester:
         # Delete created label
         if self.created_etiqueta_id:
             try:
-                response = requests.delete(
+                response = self.http.delete(
                     f"{self.base_url}/etiquetas-productos/{self.created_etiqueta_id}",
                     headers=self.headers,
                     timeout=10
@@ -587,7 +1059,7 @@ class PharmacyBackendTester:
         # Delete created category
         if self.created_categoria_id:
             try:
-                response = requests.delete(
+                response = self.http.delete(
                     f"{self.base_url}/categorias-productos/{self.created_categoria_id}",
                     headers=self.headers,
                     timeout=10
@@ -619,9 +1091,15 @@ class PharmacyBackendTester:
         self.test_etiquetas_productos_endpoints()
         self.test_productos_endpoints()
         self.test_search_and_filters()
+        self.test_interaction_index()
+        self.test_stats_endpoint()
+        self.test_csv_import_streaming()
         self.test_error_handling()
         self.cleanup()
         
+        for name, ok, message in query_tracker.check():
+            self.log_test(name, ok, message)
+
         # Summary
         print("\n" + "=" * 80)
         print("📊 TEST SUMMARY")
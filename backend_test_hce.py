@@ -4,22 +4,64 @@ Backend API Testing for Clínica Mía - HCE (Historia Clínica Electrónica) Mod
 Tests the HCE backend endpoints for integration with the new frontend
 """
 
-import requests
 import json
+import os
+import subprocess
 import sys
-from datetime import datetime, timedelta
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 import uuid
 
+from tests.api_client import (
+    BASE_URL,
+    AuthenticationError,
+    check_invalidation,
+    check_pool_metrics,
+    conditional_snapshot,
+    get_session,
+    token_cache,
+)
+from tests.cold_start import check_cold_start
+from tests.query_budget import query_tracker
+from tests.load_harness import percentile
+
 # Configuration
-BASE_URL = "http://localhost:4000"
 TEST_USER = {
     "email": "admin@clinicamia.com",
     "password": "admin123"
 }
 
+# Large vital-signs series: one reading every 15 minutes for 30 days (ICU monitor)
+VITALS_SERIES_DAYS = 30
+VITALS_SEED_COUNT = int(os.environ.get("HCE_VITALS_SEED", str(VITALS_SERIES_DAYS * 96)))
+VITALS_SEED_WORKERS = 8
+VITALS_MAX_POINTS = 200
+VITALS_BENCH_REPEATS = 10
+VITALS_AGG_P95_BUDGET_MS = 150
+
+# Patient lookup benchmark: synthetic patients seeded by backend/scripts/seed-pacientes-benchmark.js
+PATIENT_SEED_COUNT = int(os.environ.get("HCE_PATIENT_SEED", "500000"))
+PATIENT_SEARCH_REPEATS = 10
+PATIENT_SEARCH_P95_BUDGET_MS = 50
+
+# Keyset pagination benchmark: chronic patient seeded by backend/scripts/seed-signos-vitales-benchmark.js
+PAGINATION_SEED_COUNT = int(os.environ.get("HCE_PAGINATION_SEED", "100000"))
+PAGINATION_PAGE_SIZE = 100
+PAGINATION_BENCH_CEDULA = "9700000000"
+PAGINATION_DEEP_PAGES = 50
+# HCE PDFs rendered in the worker pool while an unrelated endpoint is probed
+PDF_CONCURRENT_DOWNLOADS = int(os.environ.get("HCE_PDF_CONCURRENCY", "8"))
+PDF_BASELINE_SECONDS = 3
+PDF_PROBE_INTERVAL_S = 0.05
+PDF_PROBE_P95_BUDGET_MS = 500
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
 class HCEBackendTester:
     def __init__(self):
         self.base_url = BASE_URL
+        self.http = get_session()
         self.token = None
         self.headers = {"Content-Type": "application/json"}
         self.test_results = []
@@ -44,34 +86,23 @@ class HCEBackendTester:
         })
 
     def authenticate(self):
-        """Get JWT token for authentication"""
+        """Get JWT token for authentication (shared cache, logs in only on miss or expiry)"""
         try:
             print("\n🔐 Testing Authentication...")
-            
-            response = requests.post(
-                f"{self.base_url}/auth/login",
-                headers=self.headers,
-                json=TEST_USER,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("success") and "token" in data.get("data", {}):
-                    self.token = data["data"]["token"]
-                    self.headers["Authorization"] = f"Bearer {self.token}"
-                    # Store user ID as profesional_id for testing
-                    if "user" in data.get("data", {}):
-                        self.test_profesional_id = data["data"]["user"]["id"]
-                    self.log_test("Authentication", True, "Login successful, token obtained")
-                    return True
-                else:
-                    self.log_test("Authentication", False, f"Invalid response format: {data}")
-                    return False
+
+            self.token, cached = token_cache.get_token(self.base_url, TEST_USER, self.http)
+            self.headers["Authorization"] = f"Bearer {self.token}"
+            user = token_cache.get_user(self.base_url, TEST_USER) or {}
+            self.test_profesional_id = user.get("id")
+            if cached:
+                self.log_test("Authentication", True, "Reused cached token")
             else:
-                self.log_test("Authentication", False, f"Login failed with status {response.status_code}: {response.text}")
-                return False
-                
+                self.log_test("Authentication", True, "Login successful, token obtained")
+            return True
+
+        except AuthenticationError as e:
+            self.log_test("Authentication", False, str(e))
+            return False
         except Exception as e:
             self.log_test("Authentication", False, f"Authentication error: {str(e)}")
             return False
@@ -81,12 +112,16 @@ class HCEBackendTester:
         try:
             print("\n🏥 Testing Health Check...")
             
-            response = requests.get(f"{self.base_url}/health", timeout=10)
+            response = self.http.get(f"{self.base_url}/health", timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
                 if data.get("status") == "ok" and data.get("database") == "connected":
                     self.log_test("Health Check", True, "Server and database are healthy")
+                    pool_ok, pool_message = check_pool_metrics(data)
+                    self.log_test("Database Pool Metrics", pool_ok, pool_message)
+                    cold_ok, cold_message = check_cold_start()
+                    self.log_test("Cold Start", cold_ok, cold_message)
                     return True
                 else:
                     self.log_test("Health Check", False, f"Health check failed: {data}")
@@ -105,7 +140,7 @@ class HCEBackendTester:
             print("\n👤 Getting Test Patient...")
             
             # First try to search for existing patients
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/pacientes/search?q=test",
                 headers=self.headers,
                 timeout=10
@@ -121,7 +156,7 @@ class HCEBackendTester:
                         return True
             
             # If no patients found, try to get any patient
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/pacientes?limit=1",
                 headers=self.headers,
                 timeout=10
@@ -143,13 +178,109 @@ class HCEBackendTester:
             self.log_test("Get Test Patient", False, f"Error getting test patient: {str(e)}")
             return False
 
+    def _benchmark_cedula(self, indice):
+        """Same deterministic document number as seed-pacientes-benchmark.js"""
+        return f"99{indice:08d}"
+
+    def _normalize(self, texto):
+        return unicodedata.normalize("NFD", texto or "").encode("ascii", "ignore").decode().lower()
+
+    def _search_patients(self, q):
+        response = self.http.get(f"{self.base_url}/pacientes/search", headers=self.headers, params={"q": q}, timeout=30)
+        return response.json().get("data", {}).get("pacientes", []) if response.status_code == 200 else []
+
+    def ensure_benchmark_patients(self):
+        """Seed PATIENT_SEED_COUNT synthetic patients unless the last one already exists"""
+        ultima = self._benchmark_cedula(PATIENT_SEED_COUNT - 1)
+        if any(p["cedula"] == ultima for p in self._search_patients(ultima)):
+            print(f"   Reusing {PATIENT_SEED_COUNT} seeded patients")
+            return
+
+        print(f"   Seeding {PATIENT_SEED_COUNT} patients (backend/scripts/seed-pacientes-benchmark.js)...")
+        started = time.perf_counter()
+        subprocess.run(
+            ["node", "scripts/seed-pacientes-benchmark.js", str(PATIENT_SEED_COUNT)],
+            cwd=BACKEND_DIR,
+            check=True
+        )
+        print(f"   Seeded in {time.perf_counter() - started:.1f}s")
+
+    def test_patient_search_benchmark(self):
+        """Latency of /pacientes/search per lookup path over PATIENT_SEED_COUNT patients"""
+        print(f"\n🔎 Testing Patient Search Performance ({PATIENT_SEED_COUNT} patients)...")
+
+        try:
+            self.ensure_benchmark_patients()
+        except Exception as e:
+            self.log_test("Patient Search Seed", False, f"Seed error: {str(e)}")
+            return
+
+        muestra = 123456
+        cedula = self._benchmark_cedula(muestra)
+        # Admissions types one keystroke at a time; every prefix is a request
+        consultas = {
+            "document_exact": [cedula, f"CC {cedula}"],
+            "document_prefix": [cedula[:k] for k in range(4, len(cedula))],
+            "email_prefix": [f"paciente{muestra}@", f"paciente{muestra}@bench"],
+            "full_name": ["maria gomez"[:k] for k in range(2, len("maria gomez") + 1)],
+            "accented_name": ["Ángela Ríos", "angela rios", "gómez rodríguez"],
+            "get_test_patient": ["test"],
+        }
+
+        latencias_por_tipo = {}
+        for tipo, terminos in consultas.items():
+            latencias = []
+            for termino in terminos:
+                for _ in range(PATIENT_SEARCH_REPEATS):
+                    started = time.perf_counter()
+                    self.http.get(f"{self.base_url}/pacientes/search", headers=self.headers, params={"q": termino}, timeout=30)
+                    latencias.append((time.perf_counter() - started) * 1000)
+            latencias.sort()
+            latencias_por_tipo[tipo] = latencias
+
+        for tipo, latencias in latencias_por_tipo.items():
+            p95 = percentile(latencias, 95)
+            self.log_test(
+                f"Patient Search p95 ({tipo})",
+                p95 < PATIENT_SEARCH_P95_BUDGET_MS,
+                f"p95={p95:.1f}ms p50={percentile(latencias, 50):.1f}ms over {len(latencias)} requests (budget {PATIENT_SEARCH_P95_BUDGET_MS}ms)"
+            )
+
+        try:
+            exactos = self._search_patients(f"CC {cedula}")
+            self.log_test(
+                "Patient Search Exact Document",
+                bool(exactos) and exactos[0]["cedula"] == cedula,
+                f"First result: {exactos[0]['cedula'] if exactos else 'none'}"
+            )
+
+            nombres = self._search_patients("maria gomez")
+            coinciden = all(
+                "maria" in self._normalize(f"{p['nombre']} {p['apellido']}") and "gomez" in self._normalize(f"{p['nombre']} {p['apellido']}")
+                for p in nombres
+            )
+            self.log_test(
+                "Patient Search Full Name",
+                bool(nombres) and coinciden,
+                f"{len(nombres)} results, all containing both words: {coinciden}"
+            )
+
+            acentos = self._search_patients("angela rios")
+            self.log_test(
+                "Patient Search Accent Insensitive",
+                any(p["nombre"] == "Ángela" for p in acentos),
+                f"{len(acentos)} results for 'angela rios'"
+            )
+        except Exception as e:
+            self.log_test("Patient Search Results", False, f"Search error: {str(e)}")
+
     def test_evoluciones_endpoints(self):
         """Test Evoluciones Clínicas SOAP endpoints"""
         print("\n📝 Testing Evoluciones Clínicas SOAP Endpoints...")
         
         # Test GET /evoluciones (list)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/evoluciones?paciente_id={self.test_paciente_id}&limit=100",
                 headers=self.headers,
                 timeout=10
@@ -179,7 +310,7 @@ class HCEBackendTester:
                 "plan": "1. Analgesia con ibuprofeno 400mg c/8h por 5 días. 2. Relajante muscular. 3. Fisioterapia. 4. Control en 1 semana. 5. Rx lumbar si no mejora."
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/evoluciones",
                 headers=self.headers,
                 json=evolucion_data,
@@ -202,7 +333,7 @@ class HCEBackendTester:
         # Test GET /evoluciones/:id (get by ID)
         if self.created_evolucion_id:
             try:
-                response = requests.get(
+                response = self.http.get(
                     f"{self.base_url}/evoluciones/{self.created_evolucion_id}",
                     headers=self.headers,
                     timeout=10
@@ -233,7 +364,7 @@ class HCEBackendTester:
         
         # Test GET /signos-vitales (list)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/signos-vitales?paciente_id={self.test_paciente_id}&limit=100",
                 headers=self.headers,
                 timeout=10
@@ -267,7 +398,7 @@ class HCEBackendTester:
                 "talla": 170
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/signos-vitales",
                 headers=self.headers,
                 json=signos_data,
@@ -294,7 +425,7 @@ class HCEBackendTester:
 
         # Test GET /signos-vitales/grafica/:paciente_id (chart data)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/signos-vitales/grafica/{self.test_paciente_id}?tipo=presion&dias=7",
                 headers=self.headers,
                 timeout=10
@@ -313,13 +444,304 @@ class HCEBackendTester:
         except Exception as e:
             self.log_test("GET Signos Vitales Gráfica", False, f"GET chart error: {str(e)}")
 
+        self.test_signos_vitales_series_grandes()
+
+    def seed_vital_series(self):
+        """Top up the test patient to VITALS_SEED_COUNT readings spread over the chart window"""
+        response = self.http.get(
+            f"{self.base_url}/signos-vitales/grafica/{self.test_paciente_id}?tipo=presion&dias={VITALS_SERIES_DAYS}",
+            headers=self.headers,
+            timeout=60
+        )
+        existentes = len(response.json().get("data", {}).get("datos", [])) if response.status_code == 200 else 0
+        faltantes = VITALS_SEED_COUNT - existentes
+        if faltantes <= 0:
+            return existentes
+
+        print(f"   Seeding {faltantes} vital-sign readings (found {existentes})...")
+        ahora = datetime.now(timezone.utc)
+        paso = timedelta(days=VITALS_SERIES_DAYS) / VITALS_SEED_COUNT
+
+        def registrar(indice):
+            lectura = {
+                "paciente_id": self.test_paciente_id,
+                "presion_sistolica": 105 + indice % 40,
+                "presion_diastolica": 65 + indice % 25,
+                "frecuencia_cardiaca": 60 + indice % 50,
+                "temperatura": round(36.0 + (indice % 20) / 10, 1),
+                "saturacion_oxigeno": 90 + indice % 10,
+                "fecha_registro": (ahora - paso * (indice + 1)).isoformat(),
+            }
+            return self.http.post(f"{self.base_url}/signos-vitales", headers=self.headers, json=lectura, timeout=30).status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=VITALS_SEED_WORKERS) as executor:
+            codigos = list(executor.map(registrar, range(existentes, VITALS_SEED_COUNT)))
+        errores = sum(1 for code in codigos if code != 201)
+        print(f"   Seeded in {time.perf_counter() - started:.1f}s ({errores} errors)")
+        return VITALS_SEED_COUNT - errores
+
+    def _timed_get(self, url, repeats):
+        latencias = []
+        response = None
+        for _ in range(repeats):
+            started = time.perf_counter()
+            response = self.http.get(url, headers=self.headers, timeout=60)
+            latencias.append((time.perf_counter() - started) * 1000)
+        latencias.sort()
+        return response, latencias
+
+    def test_signos_vitales_series_grandes(self):
+        """Compare raw vs aggregated chart payloads on a month of monitor readings"""
+        print(f"\n📉 Testing Signos Vitales Large Series ({VITALS_SEED_COUNT} readings)...")
+
+        try:
+            lecturas = self.seed_vital_series()
+        except Exception as e:
+            self.log_test("Signos Vitales Series Seed", False, f"Seed error: {str(e)}")
+            return
+
+        base = f"{self.base_url}/signos-vitales/grafica/{self.test_paciente_id}"
+        try:
+            raw, raw_lat = self._timed_get(f"{base}?tipo=presion&dias={VITALS_SERIES_DAYS}", VITALS_BENCH_REPEATS)
+            agg, agg_lat = self._timed_get(
+                f"{base}?tipos=presion,temperatura,frecuenciaCardiaca,saturacionOxigeno"
+                f"&dias={VITALS_SERIES_DAYS}&max_puntos={VITALS_MAX_POINTS}",
+                VITALS_BENCH_REPEATS
+            )
+            if raw.status_code != 200 or agg.status_code != 200:
+                self.log_test("Signos Vitales Series", False, f"raw={raw.status_code} agg={agg.status_code}: {agg.text[:200]}")
+                return
+
+            datos = raw.json()["data"]["datos"]
+            series = agg.json()["data"]["series"]
+
+            longitudes = {tipo: len(puntos) for tipo, puntos in series.items()}
+            self.log_test(
+                "Signos Vitales Series max_puntos",
+                len(series) == 4 and all(0 < n <= VITALS_MAX_POINTS for n in longitudes.values()),
+                f"{len(datos)} raw readings -> points per series {longitudes}"
+            )
+
+            # min/max per bucket must preserve the extremes of the raw series
+            sistolicas = [d["presionSistolica"] for d in datos if d.get("presionSistolica") is not None]
+            puntos = [p["presionSistolica"] for p in series["presion"] if p.get("presionSistolica")]
+            extremos_ok = bool(sistolicas) and (
+                min(p["min"] for p in puntos) == min(sistolicas)
+                and max(p["max"] for p in puntos) == max(sistolicas)
+                and sum(p["n"] for p in puntos) == len(sistolicas)
+            )
+            self.log_test(
+                "Signos Vitales Series Extremes",
+                extremos_ok,
+                f"raw min/max {min(sistolicas, default=None)}/{max(sistolicas, default=None)}, "
+                f"{sum(p['n'] for p in puntos)} of {len(sistolicas)} readings aggregated"
+            )
+
+            raw_kb = len(raw.content) / 1024
+            agg_kb = len(agg.content) / 1024
+            self.log_test(
+                "Signos Vitales Series Payload",
+                lecturas < VITALS_MAX_POINTS or agg_kb < raw_kb,
+                f"raw presion {raw_kb:.1f} KB vs aggregated 4 series {agg_kb:.1f} KB"
+            )
+
+            agg_p95 = percentile(agg_lat, 95)
+            self.log_test(
+                "Signos Vitales Series Latency",
+                agg_p95 < VITALS_AGG_P95_BUDGET_MS,
+                f"aggregated p95={agg_p95:.1f}ms (budget {VITALS_AGG_P95_BUDGET_MS}ms), raw p95={percentile(raw_lat, 95):.1f}ms"
+            )
+        except Exception as e:
+            self.log_test("Signos Vitales Series", False, f"Series error: {str(e)}")
+
+    def ensure_pagination_patient(self):
+        """Seed the chronic benchmark patient up to PAGINATION_SEED_COUNT vital signs and return its id"""
+        print(f"   Ensuring {PAGINATION_SEED_COUNT} vital signs (backend/scripts/seed-signos-vitales-benchmark.js)...")
+        started = time.perf_counter()
+        subprocess.run(
+            ["node", "scripts/seed-signos-vitales-benchmark.js", str(PAGINATION_SEED_COUNT)],
+            cwd=BACKEND_DIR,
+            check=True
+        )
+        print(f"   Ready in {time.perf_counter() - started:.1f}s")
+        pacientes = [p for p in self._search_patients(PAGINATION_BENCH_CEDULA) if p["cedula"] == PAGINATION_BENCH_CEDULA]
+        return pacientes[0]["id"] if pacientes else None
+
+    def _page_vital_signs(self, paciente_id, modo):
+        """Walk every page in 'offset' or 'cursor' mode; returns (ids, latencies in request order)"""
+        ids = []
+        latencias = []
+        params = {"paciente_id": paciente_id, "limit": PAGINATION_PAGE_SIZE}
+        if modo == "cursor":
+            params["cursor"] = ""
+        else:
+            params["page"] = 1
+
+        while True:
+            started = time.perf_counter()
+            response = self.http.get(f"{self.base_url}/signos-vitales", headers=self.headers, params=params, timeout=60)
+            latencias.append((time.perf_counter() - started) * 1000)
+            response.raise_for_status()
+            body = response.json()
+            ids.extend(signo["id"] for signo in body["data"])
+
+            pagination = body["pagination"]
+            if not pagination.get("has_more"):
+                return ids, latencias
+            if modo == "cursor":
+                params["cursor"] = pagination["next_cursor"]
+            else:
+                params["page"] += 1
+
+    def test_signos_vitales_pagination_benchmark(self):
+        """Page through PAGINATION_SEED_COUNT vital signs with page/limit and with cursors"""
+        print(f"\n📑 Testing Signos Vitales Pagination ({PAGINATION_SEED_COUNT} readings, {PAGINATION_PAGE_SIZE} per page)...")
+
+        try:
+            paciente_id = self.ensure_pagination_patient()
+        except Exception as e:
+            self.log_test("Pagination Seed", False, f"Seed error: {str(e)}")
+            return
+        if not paciente_id:
+            self.log_test("Pagination Seed", False, f"Benchmark patient {PAGINATION_BENCH_CEDULA} not found")
+            return
+
+        try:
+            offset_ids, offset_lat = self._page_vital_signs(paciente_id, "offset")
+            cursor_ids, cursor_lat = self._page_vital_signs(paciente_id, "cursor")
+        except Exception as e:
+            self.log_test("Pagination Walk", False, f"Paging error: {str(e)}")
+            return
+
+        self.log_test(
+            "Pagination Completeness",
+            len(cursor_ids) == len(set(cursor_ids)) >= PAGINATION_SEED_COUNT,
+            f"cursor: {len(cursor_ids)} rows ({len(set(cursor_ids))} unique), offset: {len(offset_ids)} rows"
+        )
+        self.log_test(
+            "Pagination Stable Order",
+            cursor_ids == offset_ids,
+            "Both modes return the same sequence" if cursor_ids == offset_ids else "Sequences differ between modes"
+        )
+
+        # Deep pages are where OFFSET pays for every skipped row
+        resumen = {}
+        for modo, latencias in (("offset", offset_lat), ("cursor", cursor_lat)):
+            profundas = sorted(latencias[-PAGINATION_DEEP_PAGES:])
+            resumen[modo] = {
+                "total_s": sum(latencias) / 1000,
+                "p50": percentile(sorted(latencias), 50),
+                "deep_p95": percentile(profundas, 95),
+            }
+            self.log_test(
+                f"Pagination Latency ({modo})",
+                True,
+                f"{len(latencias)} pages in {resumen[modo]['total_s']:.1f}s, p50={resumen[modo]['p50']:.1f}ms, "
+                f"last {PAGINATION_DEEP_PAGES} pages p95={resumen[modo]['deep_p95']:.1f}ms"
+            )
+
+        self.log_test(
+            "Pagination Cursor vs Offset",
+            resumen["cursor"]["deep_p95"] < resumen["offset"]["deep_p95"],
+            f"deep-page p95 cursor={resumen['cursor']['deep_p95']:.1f}ms vs offset={resumen['offset']['deep_p95']:.1f}ms, "
+            f"full walk {resumen['cursor']['total_s']:.1f}s vs {resumen['offset']['total_s']:.1f}s"
+        )
+
+    def _download_hce_pdf(self, params=None):
+        started = time.perf_counter()
+        response = self.http.get(
+            f"{self.base_url}/hce/{self.test_paciente_id}/pdf",
+            headers=self.headers,
+            params=params,
+            timeout=300
+        )
+        return response, (time.perf_counter() - started) * 1000
+
+    def _probe_until(self, done):
+        """Sequential GETs on a cheap unrelated endpoint until done() is true; returns (sorted latencies, errors)"""
+        latencias = []
+        errores = 0
+        params = {"paciente_id": self.test_paciente_id, "limit": 5, "cursor": ""}
+        while not done():
+            started = time.perf_counter()
+            response = self.http.get(f"{self.base_url}/signos-vitales", headers=self.headers, params=params, timeout=30)
+            latencias.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errores += 1
+            time.sleep(PDF_PROBE_INTERVAL_S)
+        return sorted(latencias), errores
+
+    def test_pdf_concurrency_benchmark(self):
+        """Download HCE PDFs concurrently and check that unrelated requests keep their latency"""
+        print(f"\n🖨️  Testing HCE PDF Worker Pool ({PDF_CONCURRENT_DOWNLOADS} concurrent downloads)...")
+
+        try:
+            deadline = time.perf_counter() + PDF_BASELINE_SECONDS
+            baseline, _ = self._probe_until(lambda: time.perf_counter() > deadline)
+
+            # Full history: first download renders, the second must come from the cache
+            primera, primera_ms = self._download_hce_pdf()
+            segunda, segunda_ms = self._download_hce_pdf()
+            if primera.status_code != 200 or segunda.status_code != 200:
+                self.log_test("HCE PDF Download", False, f"Status {primera.status_code}/{segunda.status_code}: {primera.text[:200]}")
+                return
+            # The PDF embeds its generation time, so identical bytes mean it was served from the cache
+            self.log_test(
+                "HCE PDF Cache",
+                segunda.content == primera.content,
+                f"{len(primera.content) / 1024:.0f} KB rendered in {primera_ms:.0f}ms, re-download {segunda_ms:.0f}ms "
+                f"({'identical bytes' if segunda.content == primera.content else 'content differs'})"
+            )
+
+            # Distinct date ranges are distinct cache keys: every download is a real render
+            hoy = datetime.now().date()
+            rangos = [
+                {"fechaDesde": (hoy - timedelta(days=dias)).isoformat(), "fechaHasta": hoy.isoformat()}
+                for dias in range(1, PDF_CONCURRENT_DOWNLOADS + 1)
+            ]
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=PDF_CONCURRENT_DOWNLOADS) as executor:
+                futures = [executor.submit(self._download_hce_pdf, rango) for rango in rangos]
+                bajo_carga, probe_errores = self._probe_until(lambda: all(f.done() for f in futures))
+                descargas = [f.result() for f in futures]
+            elapsed = time.perf_counter() - started
+
+            codigos = {}
+            for response, _ in descargas:
+                codigos[response.status_code] = codigos.get(response.status_code, 0) + 1
+            pdf_lat = sorted(ms for _, ms in descargas)
+            self.log_test(
+                "HCE PDF Concurrent Downloads",
+                codigos.get(200, 0) == len(descargas),
+                f"{len(descargas)} PDFs in {elapsed:.1f}s, status {codigos}, "
+                f"p50={percentile(pdf_lat, 50):.0f}ms max={pdf_lat[-1]:.0f}ms"
+            )
+
+            probe_p95 = percentile(bajo_carga, 95)
+            self.log_test(
+                "Unrelated Endpoint Latency During PDFs",
+                probe_errores == 0 and probe_p95 < PDF_PROBE_P95_BUDGET_MS,
+                f"/signos-vitales p95 {percentile(baseline, 95):.1f}ms idle -> {probe_p95:.1f}ms during PDF load "
+                f"({len(bajo_carga)} probes, {probe_errores} errors, budget {PDF_PROBE_P95_BUDGET_MS}ms)"
+            )
+
+            pdf_stats = self.http.get(f"{self.base_url}/health", timeout=10).json().get("pdf")
+            self.log_test(
+                "HCE PDF Pool Stats",
+                bool(pdf_stats) and pdf_stats["cacheHits"] > 0 and pdf_stats["renderizados"] > 0,
+                f"{pdf_stats}"
+            )
+        except Exception as e:
+            self.log_test("HCE PDF Worker Pool", False, f"Benchmark error: {str(e)}")
+
     def test_diagnosticos_endpoints(self):
         """Test Diagnósticos CIE-11 endpoints"""
         print("\n🔬 Testing Diagnósticos CIE-11 Endpoints...")
         
         # Test GET /diagnosticos (list)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/diagnosticos?paciente_id={self.test_paciente_id}&limit=100",
                 headers=self.headers,
                 timeout=10
@@ -350,7 +772,7 @@ class HCEBackendTester:
                 "observaciones": "Paciente con diabetes tipo 2 de reciente diagnóstico. Requiere seguimiento nutricional y control glucémico."
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/diagnosticos",
                 headers=self.headers,
                 json=diagnostico_data,
@@ -374,7 +796,7 @@ class HCEBackendTester:
         # Test GET /diagnosticos/:id (get by ID)
         if self.created_diagnostico_id:
             try:
-                response = requests.get(
+                response = self.http.get(
                     f"{self.base_url}/diagnosticos/{self.created_diagnostico_id}",
                     headers=self.headers,
                     timeout=10
@@ -401,7 +823,7 @@ class HCEBackendTester:
 
         # Test GET /diagnosticos/principal/:paciente_id (get principal diagnosis)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/diagnosticos/principal/{self.test_paciente_id}",
                 headers=self.headers,
                 timeout=10
@@ -429,7 +851,7 @@ class HCEBackendTester:
         
         # Test GET /alertas (list)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/alertas?paciente_id={self.test_paciente_id}&limit=100",
                 headers=self.headers,
                 timeout=10
@@ -448,6 +870,9 @@ class HCEBackendTester:
         except Exception as e:
             self.log_test("GET Alertas", False, f"GET error: {str(e)}")
 
+        activas_path = f"/alertas/activas/{self.test_paciente_id}"
+        etag = conditional_snapshot(self, "Conditional GET Alertas Activas", activas_path)
+
         # Test POST /alertas (create)
         try:
             alerta_data = {
@@ -460,7 +885,7 @@ class HCEBackendTester:
                 "origen": "Historia Clínica"
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/alertas",
                 headers=self.headers,
                 json=alerta_data,
@@ -481,10 +906,13 @@ class HCEBackendTester:
         except Exception as e:
             self.log_test("POST Alerta", False, f"POST error: {str(e)}")
 
+        if self.created_alerta_id:
+            etag = check_invalidation(self, "ETag Alertas Activas after POST", activas_path, etag)
+
         # Test GET /alertas/:id (get by ID)
         if self.created_alerta_id:
             try:
-                response = requests.get(
+                response = self.http.get(
                     f"{self.base_url}/alertas/{self.created_alerta_id}",
                     headers=self.headers,
                     timeout=10
@@ -511,7 +939,7 @@ class HCEBackendTester:
 
         # Test GET /alertas/activas/:paciente_id (get active alerts)
         try:
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/alertas/activas/{self.test_paciente_id}",
                 headers=self.headers,
                 timeout=10
@@ -530,6 +958,24 @@ class HCEBackendTester:
         except Exception as e:
             self.log_test("GET Alertas Activas", False, f"GET active alerts error: {str(e)}")
 
+        # Test POST /alertas/:id/reconocer (acknowledging removes it from the active list)
+        if self.created_alerta_id:
+            try:
+                response = self.http.post(
+                    f"{self.base_url}/alertas/{self.created_alerta_id}/reconocer",
+                    headers=self.headers,
+                    timeout=10
+                )
+
+                if response.status_code == 200:
+                    self.log_test("POST Reconocer Alerta", True, "Alerta acknowledged")
+                    check_invalidation(self, "ETag Alertas Activas after reconocer", activas_path, etag)
+                else:
+                    self.log_test("POST Reconocer Alerta", False, f"Reconocer failed with status {response.status_code}: {response.text}")
+
+            except Exception as e:
+                self.log_test("POST Reconocer Alerta", False, f"Reconocer error: {str(e)}")
+
     def test_error_handling(self):
         """Test error handling scenarios"""
         print("\n⚠️  Testing Error Handling...")
@@ -537,7 +983,7 @@ class HCEBackendTester:
         # Test unauthorized access (without token)
         try:
             headers_no_auth = {"Content-Type": "application/json"}
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/evoluciones",
                 headers=headers_no_auth,
                 timeout=10
@@ -558,7 +1004,7 @@ class HCEBackendTester:
                 "subjetivo": "Missing other SOAP fields"
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/evoluciones",
                 headers=self.headers,
                 json=invalid_data,
@@ -576,7 +1022,7 @@ class HCEBackendTester:
         # Test invalid patient ID
         try:
             fake_uuid = str(uuid.uuid4())
-            response = requests.get(
+            response = self.http.get(
                 f"{self.base_url}/evoluciones?paciente_id={fake_uuid}",
                 headers=self.headers,
                 timeout=10
@@ -612,12 +1058,18 @@ class HCEBackendTester:
             print("❌ Could not get test patient, aborting tests")
             return False
             
+        self.test_patient_search_benchmark()
         self.test_evoluciones_endpoints()
         self.test_signos_vitales_endpoints()
+        self.test_signos_vitales_pagination_benchmark()
         self.test_diagnosticos_endpoints()
         self.test_alertas_endpoints()
+        self.test_pdf_concurrency_benchmark()
         self.test_error_handling()
         
+        for name, ok, message in query_tracker.check():
+            self.log_test(name, ok, message)
+
         # Summary
         print("\n" + "=" * 90)
         print("📊 HCE MODULE TEST SUMMARY")
@@ -4,26 +4,39 @@ Backend API Testing for Clínica Mía - Laboratory Module
 Tests the Laboratory workflow: Order Creation -> Results Entry -> Completion
 """
 
-import requests
 import json
+import random
 import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from tests.api_client import BASE_URL, AuthenticationError, get_session, token_cache
+from tests.query_budget import query_tracker
+
 # Configuration
-BASE_URL = "http://localhost:4000"
 TEST_USER = {
     "email": "admin@clinicamia.com",
     "password": "admin123"
 }
 
+# Analyzer run ingested through POST /ordenes-medicas/completar-lote
+BULK_ORDER_COUNT = 1000
+BULK_SETUP_WORKERS = 8
+BULK_BUDGET_SECONDS = 5
+BULK_UNKNOWN_ORDERS = 2
+
 class LaboratoryBackendTester:
     def __init__(self):
         self.base_url = BASE_URL
+        self.http = get_session()
         self.token = None
         self.headers = {"Content-Type": "application/json"}
         self.test_results = []
         self.test_data = {}
         self.created_order_id = None
+        self.bulk_order_ids = []
 
     def log_test(self, test_name, success, message, response_data=None):
         """Log test results"""
@@ -39,31 +52,21 @@ class LaboratoryBackendTester:
         })
 
     def authenticate(self):
-        """Get JWT token for authentication"""
+        """Get JWT token for authentication (shared cache, logs in only on miss or expiry)"""
         try:
             print("\n🔐 Testing Authentication...")
-            
-            response = requests.post(
-                f"{self.base_url}/auth/login",
-                headers=self.headers,
-                json=TEST_USER,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("success") and "token" in data.get("data", {}):
-                    self.token = data["data"]["token"]
-                    self.headers["Authorization"] = f"Bearer {self.token}"
-                    self.log_test("Authentication", True, "Login successful, token obtained")
-                    return True
-                else:
-                    self.log_test("Authentication", False, f"Invalid response format: {data}")
-                    return False
+
+            self.token, cached = token_cache.get_token(self.base_url, TEST_USER, self.http)
+            self.headers["Authorization"] = f"Bearer {self.token}"
+            if cached:
+                self.log_test("Authentication", True, "Reused cached token")
             else:
-                self.log_test("Authentication", False, f"Login failed with status {response.status_code}: {response.text}")
-                return False
-                
+                self.log_test("Authentication", True, "Login successful, token obtained")
+            return True
+
+        except AuthenticationError as e:
+            self.log_test("Authentication", False, str(e))
+            return False
         except Exception as e:
             self.log_test("Authentication", False, f"Authentication error: {str(e)}")
             return False
@@ -74,7 +77,7 @@ class LaboratoryBackendTester:
         
         try:
             # 1. Get Patient
-            response = requests.get(f"{self.base_url}/pacientes?limit=1", headers=self.headers)
+            response = self.http.get(f"{self.base_url}/pacientes?limit=1", headers=self.headers)
             if response.status_code == 200 and response.json().get("data"):
                 self.test_data["paciente_id"] = response.json()["data"][0]["id"]
                 self.log_test("Setup Patient", True, f"Found patient: {self.test_data['paciente_id']}")
@@ -83,7 +86,7 @@ class LaboratoryBackendTester:
                 return False
 
             # 2. Get Doctor
-            response = requests.get(f"{self.base_url}/doctores", headers=self.headers)
+            response = self.http.get(f"{self.base_url}/doctores", headers=self.headers)
             if response.status_code == 200 and response.json().get("data"):
                 # Handle potential structure difference
                 docs = response.json()["data"]
@@ -100,7 +103,7 @@ class LaboratoryBackendTester:
                 return False
 
             # 3. Get Exam
-            response = requests.get(f"{self.base_url}/examenes-procedimientos?limit=1", headers=self.headers)
+            response = self.http.get(f"{self.base_url}/examenes-procedimientos?limit=1", headers=self.headers)
             if response.status_code == 200 and response.json().get("data"):
                 exam = response.json()["data"][0]
                 self.test_data["examen_id"] = exam["id"]
@@ -130,7 +133,7 @@ class LaboratoryBackendTester:
                 "precio_aplicado": self.test_data["precio"]
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/ordenes-medicas",
                 headers=self.headers,
                 json=order_data
@@ -175,7 +178,7 @@ class LaboratoryBackendTester:
                 }
             }
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.base_url}/ordenes-medicas/{self.created_order_id}/completar",
                 headers=self.headers,
                 json=results_data
@@ -185,7 +188,7 @@ class LaboratoryBackendTester:
                 self.log_test("Complete Order", True, "Order completed successfully")
                 
                 # Verify status and results
-                verify_response = requests.get(
+                verify_response = self.http.get(
                     f"{self.base_url}/ordenes-medicas/{self.created_order_id}",
                     headers=self.headers
                 )
@@ -206,21 +209,137 @@ class LaboratoryBackendTester:
             self.log_test("Complete Order", False, f"Error: {str(e)}")
             return False
 
+    def _create_bulk_order(self, indice):
+        response = self.http.post(
+            f"{self.base_url}/ordenes-medicas",
+            headers=self.headers,
+            json={
+                "paciente_id": self.test_data["paciente_id"],
+                "doctor_id": self.test_data["doctor_id"],
+                "examen_procedimiento_id": self.test_data["examen_id"],
+                "observaciones": f"Bulk analyzer test order {indice}",
+                "precio_aplicado": self.test_data["precio"]
+            },
+            timeout=30
+        )
+        return response.json()["data"]["orden"]["id"] if response.status_code == 201 else None
+
+    def _post_bulk(self, items):
+        started = time.perf_counter()
+        response = self.http.post(
+            f"{self.base_url}/ordenes-medicas/completar-lote",
+            headers=self.headers,
+            json={"items": items},
+            timeout=120
+        )
+        return response, time.perf_counter() - started
+
+    def test_bulk_complete_orders(self):
+        """Ingest an analyzer run of BULK_ORDER_COUNT results in one request, then replay it"""
+        print(f"\n📦 Testing Bulk Result Entry ({BULK_ORDER_COUNT} orders)...")
+
+        try:
+            with ThreadPoolExecutor(max_workers=BULK_SETUP_WORKERS) as executor:
+                creadas = list(executor.map(self._create_bulk_order, range(BULK_ORDER_COUNT)))
+            self.bulk_order_ids = [orden_id for orden_id in creadas if orden_id]
+            if len(self.bulk_order_ids) != BULK_ORDER_COUNT:
+                self.log_test("Bulk Setup", False, f"Created {len(self.bulk_order_ids)} of {BULK_ORDER_COUNT} orders")
+                return False
+        except Exception as e:
+            self.log_test("Bulk Setup", False, f"Error creating orders: {str(e)}")
+            return False
+
+        corrida = f"run-{uuid.uuid4().hex[:8]}"
+        items = [
+            {
+                "orden_id": orden_id,
+                "clave_idempotencia": f"{corrida}-{indice}",
+                "resultados": {
+                    "Glucosa": {"valor": str(70 + indice % 50), "unidad": "mg/dL", "referencia": "70-100"},
+                    "Creatinina": {"valor": f"{0.6 + (indice % 8) / 10:.1f}", "unidad": "mg/dL", "referencia": "0.6-1.3"}
+                }
+            }
+            for indice, orden_id in enumerate(self.bulk_order_ids)
+        ]
+        desconocidas = [
+            {"orden_id": str(uuid.uuid4()), "clave_idempotencia": f"{corrida}-x{i}", "resultados": {"Glucosa": {"valor": "90"}}}
+            for i in range(BULK_UNKNOWN_ORDERS)
+        ]
+
+        try:
+            response, elapsed = self._post_bulk(items + desconocidas)
+            if response.status_code != 200:
+                self.log_test("Bulk Complete", False, f"Failed: {response.status_code} - {response.text[:300]}")
+                return False
+
+            lote = response.json()["data"]
+            resumen = lote["resumen"]
+            estados_ok = (
+                resumen["completada"] == BULK_ORDER_COUNT
+                and resumen["no_encontrada"] == BULK_UNKNOWN_ORDERS
+                and [r["estado"] for r in lote["resultados"][-BULK_UNKNOWN_ORDERS:]] == ["no_encontrada"] * BULK_UNKNOWN_ORDERS
+            )
+            self.log_test("Bulk Complete Per-Item Status", estados_ok, f"Lote {lote['loteId']}: {resumen}")
+            self.log_test(
+                "Bulk Complete Throughput",
+                elapsed < BULK_BUDGET_SECONDS,
+                f"{len(items) + len(desconocidas)} results in {elapsed:.2f}s "
+                f"({(len(items) + len(desconocidas)) / elapsed:.0f} results/s, budget {BULK_BUDGET_SECONDS}s)"
+            )
+
+            muestra = random.sample(range(BULK_ORDER_COUNT), 3)
+            verificadas = 0
+            for indice in muestra:
+                verify = self.http.get(f"{self.base_url}/ordenes-medicas/{self.bulk_order_ids[indice]}", headers=self.headers)
+                orden = verify.json()["data"]["orden"] if verify.status_code == 200 else {}
+                if orden.get("estado") == "Completada" and json.loads(orden.get("resultados") or "{}") == items[indice]["resultados"]:
+                    verificadas += 1
+            self.log_test("Bulk Verify Results", verificadas == len(muestra), f"{verificadas}/{len(muestra)} sampled orders persisted")
+
+            # Replaying the same analyzer run must not re-apply anything
+            response, elapsed = self._post_bulk(items)
+            replay = response.json().get("data", {}) if response.status_code == 200 else {}
+            self.log_test(
+                "Bulk Replay Idempotent",
+                replay.get("resumen", {}).get("duplicada") == BULK_ORDER_COUNT,
+                f"Replay in {elapsed:.2f}s: {replay.get('resumen', response.text[:200])}"
+            )
+            return estados_ok
+        except Exception as e:
+            self.log_test("Bulk Complete", False, f"Error: {str(e)}")
+            return False
+
     def cleanup(self):
         """Delete created order"""
         print("\n🧹 Cleanup...")
         if self.created_order_id:
             try:
-                requests.delete(f"{self.base_url}/ordenes-medicas/{self.created_order_id}", headers=self.headers)
+                self.http.delete(f"{self.base_url}/ordenes-medicas/{self.created_order_id}", headers=self.headers)
                 print("Deleted test order")
             except:
                 pass
+        if self.bulk_order_ids:
+            with ThreadPoolExecutor(max_workers=BULK_SETUP_WORKERS) as executor:
+                list(executor.map(
+                    lambda orden_id: self.http.delete(f"{self.base_url}/ordenes-medicas/{orden_id}", headers=self.headers),
+                    self.bulk_order_ids
+                ))
+            print(f"Deleted {len(self.bulk_order_ids)} bulk test orders")
 
     def run(self):
         if self.authenticate() and self.setup_test_data():
             self.test_create_order()
             self.test_complete_order()
+            self.test_bulk_complete_orders()
         self.cleanup()
+        for name, ok, message in query_tracker.check():
+            self.log_test(name, ok, message)
+        return bool(self.test_results) and all(result["success"] for result in self.test_results)
+
+    def run_all_tests(self):
+        """Alias used by the combined runner"""
+        return self.run()
 
 if __name__ == "__main__":
-    LaboratoryBackendTester().run()
+    success = LaboratoryBackendTester().run()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Backend Testing for Clínica Mía - Appointment Reminder Dispatch
+Seeds N scheduled appointments, runs the recordatoriosCitas pipeline against the
+local fake email provider (backend/scripts/fake-email-provider.js) and measures
+end-to-end dispatch time, delivery counts and duplicate sends
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+from tests.fake_email import FakeEmailProvider
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+# A Monday's worth of appointments across the 7-day and 4-day cohorts
+REMINDER_APPOINTMENTS = int(os.environ.get("REMINDER_APPOINTMENTS", "2000"))
+REMINDER_BUDGET_SECONDS = 60
+FAKE_PROVIDER_LATENCY_MS = 80
+# Injected 429/500 responses the pipeline must retry through
+FAKE_PROVIDER_FAILURE_RATE = 0.1
+
+
+class RecordatoriosTester:
+    def __init__(self, appointments=REMINDER_APPOINTMENTS, failure_rate=FAKE_PROVIDER_FAILURE_RATE):
+        self.appointments = appointments
+        self.failure_rate = failure_rate
+        self.provider = FakeEmailProvider(FAKE_PROVIDER_LATENCY_MS, failure_rate)
+        self.test_results = []
+
+    def log_test(self, test_name, success, message, response_data=None):
+        """Log test results"""
+        status = "✅ PASS" if success else "❌ FAIL"
+        print(f"{status} - {test_name}: {message}")
+
+        self.test_results.append({
+            "test": test_name,
+            "success": success,
+            "message": message,
+            "response_data": response_data,
+            "timestamp": datetime.now().isoformat()
+        })
+
+    def start_provider(self):
+        """Start the fake email provider"""
+        print(f"\n📮 Starting fake email provider on {self.provider.url}...")
+        try:
+            self.provider.start()
+            self.log_test("Fake Provider", True, "Listening")
+            return True
+        except Exception as e:
+            self.log_test("Fake Provider", False, str(e))
+            return False
+
+    def run_dispatch(self):
+        """Seed the appointments and run the dispatch pipeline; returns (result, wall seconds)"""
+        env = self.provider.env(RECORDATORIOS_ESPERA_MS=os.environ.get("RECORDATORIOS_ESPERA_MS", "200"))
+        started = time.perf_counter()
+        completed = subprocess.run(
+            ["node", "scripts/benchmark-recordatorios.js", str(self.appointments), "--limpiar"],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=600
+        )
+        elapsed = time.perf_counter() - started
+        print(completed.stdout)
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.strip()[-500:] or f"exit code {completed.returncode}")
+
+        line = next(l for l in completed.stdout.splitlines() if l.startswith("RESULTADO "))
+        return json.loads(line[len("RESULTADO "):]), elapsed
+
+    def test_dispatch(self):
+        """End-to-end dispatch of N reminders through the fake provider"""
+        print(f"\n🔔 Testing Reminder Dispatch ({self.appointments} appointments, {self.failure_rate:.0%} injected failures)...")
+
+        try:
+            result, elapsed = self.run_dispatch()
+        except Exception as e:
+            self.log_test("Reminder Dispatch", False, f"Dispatch error: {str(e)}")
+            return False
+
+        corrida = result["corrida"]
+        enviados = corrida["enviados7Dias"] + corrida["enviados4Dias"]
+        dispatch_seconds = result["duracionMs"] / 1000
+
+        self.log_test(
+            "Reminder Delivery",
+            enviados == self.appointments and corrida["fallidos"] == 0 and result["pendientes"] == 0,
+            f"{enviados}/{self.appointments} sent, {corrida['fallidos']} failed, {result['pendientes']} left unflagged, "
+            f"{corrida['lotes']} batches, {corrida['reintentos']} retries"
+        )
+        self.log_test(
+            "Reminder Dispatch Time",
+            dispatch_seconds <= REMINDER_BUDGET_SECONDS,
+            f"Dispatch {dispatch_seconds:.2f}s (budget {REMINDER_BUDGET_SECONDS}s), "
+            f"{enviados / dispatch_seconds if dispatch_seconds else 0:.0f} reminders/s; {elapsed:.2f}s including seed"
+        )
+
+        repeticion = result["repeticion"]
+        reenviados = repeticion["enviados7Dias"] + repeticion["enviados4Dias"]
+        self.log_test("Reminder Rerun Idempotent", reenviados == 0, f"Second run sent {reenviados}")
+
+        try:
+            stats = self.provider.stats()
+            self.log_test(
+                "Provider No Duplicates",
+                stats["duplicados"] == 0 and stats["emails"] == self.appointments,
+                f"Provider accepted {stats['emails']} emails in {stats['lotes']} batches, "
+                f"{stats['fallosInyectados']} injected failures, {stats['duplicados']} duplicated recipients"
+            )
+        except Exception as e:
+            self.log_test("Provider No Duplicates", False, f"Stats error: {str(e)}")
+
+        return True
+
+    def run(self):
+        try:
+            if self.start_provider():
+                self.test_dispatch()
+        finally:
+            self.provider.stop()
+        return bool(self.test_results) and all(result["success"] for result in self.test_results)
+
+    def run_all_tests(self):
+        """Alias used by the combined runner"""
+        return self.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reminder dispatch benchmark against the fake email provider")
+    parser.add_argument("--citas", type=int, default=REMINDER_APPOINTMENTS, help="Appointments to seed")
+    parser.add_argument("--fallos", type=float, default=FAKE_PROVIDER_FAILURE_RATE, help="Injected failure rate")
+    args = parser.parse_args()
+
+    success = RecordatoriosTester(args.citas, args.fallos).run()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client layer for the Clínica Mía API testers.
+Provides a keep-alive pooled session and a JWT cache so every suite running in
+the same process reuses connections and logs in once per set of credentials.
+Sessions also record the query count each endpoint reports in Server-Timing
+(see tests/query_budget.py).
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from tests.query_budget import query_tracker
+
+# Configuration
+BASE_URL = os.environ.get("CLINICA_API_URL", "http://localhost:4000")
+POOL_MAXSIZE = int(os.environ.get("CLINICA_API_POOL_SIZE", "20"))
+TOKEN_REFRESH_MARGIN_SECONDS = 60
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class AuthenticationError(Exception):
+    """Raised when /auth/login does not return a usable token"""
+
+
+def create_session(pool_maxsize=POOL_MAXSIZE):
+    """Build a requests.Session with a keep-alive connection pool that records per-endpoint query counts"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return query_tracker.install(session)
+
+
+def get_session():
+    """Return the process-wide pooled session shared by all testers"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def close_session():
+    """Close the shared session and its pooled connections"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def token_expiry(token):
+    """Read the `exp` claim of a JWT without verifying it (None if absent)"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return claims.get("exp")
+    except (IndexError, ValueError):
+        return None
+
+
+def check_pool_metrics(health):
+    """
+    Validate the database pool section of a /health payload.
+    Returns (ok, message) with a one-line summary suitable for log_test.
+    """
+    pool = health.get("pool")
+    if not pool:
+        return False, "/health does not report pool metrics"
+    if pool.get("metrics", True) is None:
+        return False, f"Pool metrics unavailable: {pool.get('error')}"
+
+    limit = pool["config"]["connectionLimit"]
+    connections = pool["connections"]
+    queries = pool["queries"]
+    ok = (
+        limit > 0
+        and connections["open"] <= limit
+        and connections["busy"] + connections["idle"] == connections["open"]
+        and queries["total"] > 0
+    )
+    message = (
+        f"connections open={connections['open']}/{limit} busy={connections['busy']} idle={connections['idle']}, "
+        f"queries total={queries['total']} active={queries['active']} waiting={queries['waiting']}, "
+        f"avg wait={pool['waitMs']['avg']}ms avg duration={pool['durationMs']['avg']}ms"
+    )
+    return ok, message
+
+
+def check_not_modified(session, url, headers, params=None):
+    """
+    Fetch a conditional endpoint and revalidate it with If-None-Match.
+    The first response must carry an ETag and the second must be an empty 304.
+    Returns (ok, message, etag); etag is None when the first GET failed.
+    """
+    first = session.get(url, headers=headers, params=params, timeout=10)
+    etag = first.headers.get("ETag")
+    if first.status_code != 200 or not etag:
+        return False, f"Initial GET returned {first.status_code} with ETag={etag!r}", etag
+
+    second = session.get(url, headers={**headers, "If-None-Match": etag}, params=params, timeout=10)
+    ok = second.status_code == 304 and not second.content and second.headers.get("ETag") == etag
+    message = (
+        f"{first.status_code} ({len(first.content)} bytes) then {second.status_code} "
+        f"({len(second.content)} bytes), ETag {etag}, Last-Modified {first.headers.get('Last-Modified')}"
+    )
+    return ok, message, etag
+
+
+def check_etag_invalidated(session, url, headers, etag, params=None):
+    """
+    Revalidate an ETag taken before a write; the write must force a full 200 with a new ETag.
+    Returns (ok, message, new_etag).
+    """
+    response = session.get(url, headers={**headers, "If-None-Match": etag}, params=params, timeout=10)
+    new_etag = response.headers.get("ETag")
+    ok = response.status_code == 200 and bool(new_etag) and new_etag != etag
+    return ok, f"Stale ETag revalidated with {response.status_code}, ETag {etag} -> {new_etag}", new_etag
+
+
+def conditional_snapshot(tester, test_name, path):
+    """
+    Assert a tester's list endpoint answers 304 to its own ETag and log the result.
+    `tester` provides http, base_url, headers and log_test. Returns the ETag for later
+    invalidation checks, or None when the check failed.
+    """
+    try:
+        ok, message, etag = check_not_modified(tester.http, f"{tester.base_url}{path}", tester.headers)
+        tester.log_test(test_name, ok, message)
+        return etag if ok else None
+    except Exception as e:
+        tester.log_test(test_name, False, f"Conditional GET error: {str(e)}")
+        return None
+
+
+def check_invalidation(tester, test_name, path, etag):
+    """Assert a write invalidated the ETag taken before it and log the result; returns the fresh ETag"""
+    if not etag:
+        return None
+    try:
+        ok, message, new_etag = check_etag_invalidated(tester.http, f"{tester.base_url}{path}", tester.headers, etag)
+        tester.log_test(test_name, ok, message)
+        return new_etag
+    except Exception as e:
+        tester.log_test(test_name, False, f"Revalidation error: {str(e)}")
+        return None
+
+
+class TokenCache:
+    """In-process JWT cache keyed by base URL and login email"""
+
+    def __init__(self):
+        self._tokens = {}
+        self._lock = threading.Lock()
+        self.logins = 0
+        self.hits = 0
+
+    def _is_valid(self, entry):
+        exp = entry["exp"]
+        return exp is None or exp - TOKEN_REFRESH_MARGIN_SECONDS > time.time()
+
+    def get_token(self, base_url, credentials, session=None):
+        """
+        Return (token, from_cache). Logs in only when there is no cached token
+        for these credentials or the cached one is about to expire.
+        """
+        key = (base_url, credentials["email"])
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry and self._is_valid(entry):
+                self.hits += 1
+                return entry["token"], True
+
+            login = self._login(base_url, credentials, session or get_session())
+            token = login["token"]
+            self._tokens[key] = {"token": token, "user": login.get("user"), "exp": token_expiry(token)}
+            self.logins += 1
+            return token, False
+
+    def get_user(self, base_url, credentials):
+        """The `user` payload of the login that produced the cached token (call after get_token)"""
+        with self._lock:
+            entry = self._tokens.get((base_url, credentials["email"]))
+            return entry["user"] if entry else None
+
+    def invalidate(self, base_url, credentials):
+        with self._lock:
+            self._tokens.pop((base_url, credentials["email"]), None)
+
+    def _login(self, base_url, credentials, session):
+        response = session.post(
+            f"{base_url}/auth/login",
+            headers={"Content-Type": "application/json"},
+            json=credentials,
+            timeout=10
+        )
+
+        if response.status_code != 200:
+            raise AuthenticationError(f"Login failed with status {response.status_code}: {response.text}")
+
+        data = response.json()
+        if not (data.get("success") and "token" in data.get("data", {})):
+            raise AuthenticationError(f"Invalid response format: {data}")
+
+        return data["data"]
+
+
+token_cache = TokenCache()
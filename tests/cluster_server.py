@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Clustered backend process for the Clínica Mía load testers.
+Starts backend/cluster.js with a given number of HTTP workers on its own port, so
+throughput can be compared across worker counts against the same database. The
+cron leader and every worker pid are visible through /health.
+"""
+
+import os
+import signal
+import subprocess
+import time
+
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+CLUSTER_PORT = int(os.environ.get("CLUSTER_PUERTO", "4100"))
+STARTUP_TIMEOUT_SECONDS = 60
+
+
+class ClusterServer:
+    """Context manager around `node cluster.js`"""
+
+    def __init__(self, workers, port=CLUSTER_PORT, **env):
+        self.workers = workers
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.env = env
+        self.process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """Start the primary and wait until every worker answers /health"""
+        env = dict(os.environ, PORT=str(self.port), HOST="127.0.0.1", CLUSTER_WORKERS=str(self.workers), **self.env)
+        self.process = subprocess.Popen(
+            ["node", "cluster.js"],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        deadline = time.time() + STARTUP_TIMEOUT_SECONDS
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"cluster.js exited with code {self.process.returncode}")
+            if len(self.pids()) >= self.workers:
+                return
+            time.sleep(0.5)
+        self.stop()
+        raise RuntimeError(f"{self.workers} workers did not start within {STARTUP_TIMEOUT_SECONDS}s")
+
+    def stop(self):
+        if self.process:
+            self.process.terminate()
+            self.process.wait(timeout=60)
+            self.process = None
+
+    def reload(self):
+        """Ask the primary for a rolling restart of every worker"""
+        self.process.send_signal(signal.SIGHUP)
+
+    def health_samples(self, samples=None):
+        """Hit /health on fresh connections so the samples spread over the workers"""
+        results = []
+        for _ in range(samples or self.workers * 8):
+            try:
+                response = requests.get(f"{self.url}/health", timeout=10, headers={"Connection": "close"})
+            except requests.RequestException:
+                # A worker going down during a restart
+                continue
+            if response.status_code == 200:
+                results.append(response.json())
+        return results
+
+    def pids(self, samples=None):
+        return {health["cron"]["pid"] for health in self.health_samples(samples)}
+
+    def leaders(self, samples=None):
+        """Worker pids that currently claim the cron leadership"""
+        return {health["cron"]["pid"] for health in self.health_samples(samples) if health["cron"]["lider"]}
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark for the Clínica Mía API testers.
+Launches a fresh backend/server.js on a spare port, measures the time from spawn
+to the first healthy /health response and appends the result to a JSONL history,
+so startup regressions show up across runs. The measurement runs once per process
+and is shared by every tester's test_health_check.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+COLD_START_PORT = int(os.environ.get("COLD_START_PUERTO", "4300"))
+COLD_START_RUNS = int(os.environ.get("COLD_START_RUNS", "3"))
+COLD_START_BUDGET_MS = int(os.environ.get("COLD_START_BUDGET_MS", "5000"))
+COLD_START_HISTORY = os.environ.get("COLD_START_HISTORY", "cold_start_history.jsonl")
+COLD_START_TIMEOUT_SECONDS = 60
+# A run slower than this factor over the median of recent runs is a regression
+REGRESSION_FACTOR = 1.25
+HISTORY_WINDOW = 10
+POLL_INTERVAL_SECONDS = 0.02
+
+_result = None
+
+
+def measure_cold_start(port=COLD_START_PORT, **env):
+    """Spawn server.js and return (ms to first healthy /health, /health payload)"""
+    # Outside the cron leader election so the probe never runs scheduled jobs
+    process_env = dict(os.environ, PORT=str(port), HOST="127.0.0.1", CRON_HABILITADO="false", **env)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        ["node", "server.js"],
+        cwd=BACKEND_DIR,
+        env=process_env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + COLD_START_TIMEOUT_SECONDS
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"server.js exited with code {process.returncode}")
+            try:
+                response = requests.get(f"http://127.0.0.1:{port}/health", timeout=5)
+                if response.status_code == 200 and response.json().get("status") == "ok":
+                    return (time.perf_counter() - started) * 1000, response.json()
+            except requests.RequestException:
+                pass
+            time.sleep(POLL_INTERVAL_SECONDS)
+        raise RuntimeError(f"No healthy response within {COLD_START_TIMEOUT_SECONDS}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def load_history(path=COLD_START_HISTORY):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_cold_start_benchmark(runs=COLD_START_RUNS, history_path=COLD_START_HISTORY):
+    """Measure `runs` cold starts, compare with the tracked history and append the result"""
+    samples = []
+    health = None
+    for _ in range(runs):
+        elapsed_ms, health = measure_cold_start()
+        samples.append(elapsed_ms)
+
+    arranque = health.get("arranque", {})
+    rutas = health.get("rutas", {})
+    entry = {
+        "timestamp": datetime.now().isoformat(),
+        "revision": git_revision(),
+        "runs": runs,
+        "time_to_healthy_ms": round(statistics.median(samples), 1),
+        "samples_ms": [round(sample, 1) for sample in samples],
+        "listen_ms": arranque.get("listoMs"),
+        "rss_mb": arranque.get("rssMb"),
+        "modules": arranque.get("modulos"),
+        "route_mode": rutas.get("modo"),
+        "routes_loaded": rutas.get("cargadas"),
+        "routes_mounted": rutas.get("montadas"),
+    }
+
+    recent = [item["time_to_healthy_ms"] for item in load_history(history_path)[-HISTORY_WINDOW:]]
+    baseline = statistics.median(recent) if recent else None
+    with open(history_path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return entry, baseline
+
+
+def check_cold_start():
+    """
+    Cold start check for test_health_check.
+    Returns (ok, message) with a one-line summary suitable for log_test; measured once per process.
+    """
+    global _result
+    if _result is not None:
+        return _result
+
+    try:
+        entry, baseline = run_cold_start_benchmark()
+    except Exception as e:
+        _result = (False, f"Cold start measurement failed: {str(e)}")
+        return _result
+
+    elapsed = entry["time_to_healthy_ms"]
+    regression = baseline is not None and elapsed > baseline * REGRESSION_FACTOR
+    trend = f"baseline {baseline:.0f}ms" if baseline is not None else "first tracked run"
+    _result = (
+        elapsed <= COLD_START_BUDGET_MS and not regression,
+        f"time to first healthy response {elapsed:.0f}ms (median of {entry['runs']}, budget {COLD_START_BUDGET_MS}ms, {trend}); "
+        f"listening at {entry['listen_ms']}ms, RSS {entry['rss_mb']}MB, {entry['modules']} modules, "
+        f"routes {entry['routes_loaded']}/{entry['routes_mounted']} loaded ({entry['route_mode']})"
+    )
+    return _result
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Fake email provider process for the Clínica Mía testers.
+Starts backend/scripts/fake-email-provider.js (a Resend-compatible API) and exposes
+its delivery stats, so dispatch benchmarks never send real email. Backend processes
+use it through the env() variables.
+"""
+
+import os
+import subprocess
+import time
+
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+FAKE_PROVIDER_PORT = int(os.environ.get("FAKE_EMAIL_PUERTO", "4010"))
+STARTUP_TIMEOUT_SECONDS = 10
+
+
+class FakeEmailProvider:
+    """Context manager around the fake provider process"""
+
+    def __init__(self, latency_ms=0, failure_rate=0.0, port=FAKE_PROVIDER_PORT):
+        self.url = f"http://127.0.0.1:{port}"
+        self.port = port
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """Start the provider and wait until it answers"""
+        self.process = subprocess.Popen(
+            [
+                "node", "scripts/fake-email-provider.js",
+                "--puerto", str(self.port),
+                "--latencia", str(self.latency_ms),
+                "--fallos", str(self.failure_rate),
+            ],
+            cwd=BACKEND_DIR
+        )
+        deadline = time.time() + STARTUP_TIMEOUT_SECONDS
+        while time.time() < deadline:
+            try:
+                self.reset()
+                return
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"Fake email provider did not start within {STARTUP_TIMEOUT_SECONDS}s")
+
+    def stop(self):
+        if self.process:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+            self.process = None
+
+    def stats(self):
+        return requests.get(f"{self.url}/stats", timeout=5).json()
+
+    def reset(self):
+        requests.delete(f"{self.url}/stats", timeout=1)
+
+    def env(self, **extra):
+        """Environment for backend processes that must send through this provider"""
+        return dict(os.environ, RESEND_BASE_URL=self.url, RESEND_API_KEY="re_fake_provider", **extra)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Load generation harness for the Clínica Mía API testers.
+Runs weighted request mixes concurrently with asyncio and reports latency
+percentiles, histograms, throughput and error rate per endpoint.
+"""
+
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+HISTOGRAM_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+def percentile(sorted_values, pct):
+    """Linear-interpolated percentile over an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (pct / 100) * (len(sorted_values) - 1)
+    lower = int(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = rank - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * weight
+
+
+def parse_mix(mix_arg, available):
+    """Parse a 'name=weight,name=weight' string into a weights dict"""
+    if not mix_arg:
+        return {name: 1 for name in available}
+
+    weights = {}
+    for part in mix_arg.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in available:
+            raise ValueError(f"Escenario desconocido en --mix: {name} (disponibles: {', '.join(available)})")
+        weights[name] = float(weight) if weight else 1.0
+    return weights
+
+
+class EndpointStats:
+    """Latency and error accumulator for a single scenario"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies_ms = []
+        self.errors = 0
+        self.status_codes = {}
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+
+    def record(self, latency_ms, status_code, ok):
+        self.latencies_ms.append(latency_ms)
+        key = str(status_code)
+        self.status_codes[key] = self.status_codes.get(key, 0) + 1
+        if not ok:
+            self.errors += 1
+
+        for index, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+            if latency_ms <= bound:
+                self.histogram[index] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+    def summary(self, elapsed_seconds):
+        values = sorted(self.latencies_ms)
+        count = len(values)
+        labels = [f"<={bound}ms" for bound in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": (self.errors / count) if count else 0.0,
+            "throughput_rps": (count / elapsed_seconds) if elapsed_seconds else 0.0,
+            "latency_ms": {
+                "min": values[0] if values else 0.0,
+                "mean": (sum(values) / count) if count else 0.0,
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "max": values[-1] if values else 0.0,
+            },
+            "histogram": dict(zip(labels, self.histogram)),
+            "status_codes": self.status_codes,
+        }
+
+
+class LoadGenerator:
+    """
+    Runs scenario callables concurrently for a fixed duration.
+
+    Each scenario is a zero-argument callable that performs one blocking HTTP
+    request and returns the response. Calls are dispatched from asyncio
+    workers onto a thread pool sized to the requested concurrency.
+    """
+
+    def __init__(self, scenarios, weights=None, concurrency=10, duration=30, ok_status=None):
+        self.scenarios = scenarios
+        self.weights = weights or {name: 1 for name in scenarios}
+        self.concurrency = concurrency
+        self.duration = duration
+        self.ok_status = ok_status or (lambda status: 200 <= status < 400)
+        self.stats = {name: EndpointStats(name) for name in self.weights}
+
+    def _pick(self, rng):
+        names = list(self.weights.keys())
+        return rng.choices(names, weights=[self.weights[n] for n in names], k=1)[0]
+
+    def _call(self, name):
+        started = time.perf_counter()
+        try:
+            response = self.scenarios[name]()
+            status = response.status_code
+            ok = self.ok_status(status)
+        except Exception:
+            status = "exception"
+            ok = False
+        return (time.perf_counter() - started) * 1000, status, ok
+
+    async def _worker(self, worker_id, executor, deadline):
+        loop = asyncio.get_running_loop()
+        rng = random.Random(worker_id)
+        while time.perf_counter() < deadline:
+            name = self._pick(rng)
+            latency_ms, status, ok = await loop.run_in_executor(executor, self._call, name)
+            self.stats[name].record(latency_ms, status, ok)
+
+    async def _run(self):
+        started = time.perf_counter()
+        deadline = started + self.duration
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            await asyncio.gather(*(self._worker(i, executor, deadline) for i in range(self.concurrency)))
+        return time.perf_counter() - started
+
+    def run(self):
+        """Execute the load test and return the report dict"""
+        elapsed = asyncio.run(self._run())
+
+        total = EndpointStats("TOTAL")
+        for stats in self.stats.values():
+            total.latencies_ms.extend(stats.latencies_ms)
+            total.errors += stats.errors
+            for index, bucket in enumerate(stats.histogram):
+                total.histogram[index] += bucket
+            for status, count in stats.status_codes.items():
+                total.status_codes[status] = total.status_codes.get(status, 0) + count
+
+        return {
+            "timestamp": datetime.now().isoformat(),
+            "concurrency": self.concurrency,
+            "duration_seconds": elapsed,
+            "mix": self.weights,
+            "endpoints": {name: stats.summary(elapsed) for name, stats in self.stats.items()},
+            "total": total.summary(elapsed),
+        }
+
+
+def print_report(report):
+    """Print a load report as a console table"""
+    print("\n" + "=" * 100)
+    print(f"📈 LOAD TEST REPORT - concurrency={report['concurrency']} duration={report['duration_seconds']:.1f}s")
+    print("=" * 100)
+    header = f"{'Endpoint':<32}{'Reqs':>8}{'RPS':>9}{'Err%':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print("-" * len(header))
+
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, summary in rows:
+        latency = summary["latency_ms"]
+        print(
+            f"{name:<32}{summary['requests']:>8}{summary['throughput_rps']:>9.1f}"
+            f"{summary['error_rate'] * 100:>7.1f}%{latency['p50']:>10.1f}{latency['p95']:>10.1f}"
+            f"{latency['p99']:>10.1f}{latency['max']:>10.1f}"
+        )
+
+    print("\nLatency histogram (TOTAL):")
+    total_requests = report["total"]["requests"] or 1
+    for label, count in report["total"]["histogram"].items():
+        bar = "█" * int(40 * count / total_requests)
+        print(f"  {label:>10} {count:>8} {bar}")
+
+
+def write_report(report, path):
+    """Write a load report as a JSON artifact"""
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, ensure_ascii=False)
+    print(f"\n💾 Load report written to {path}")
+
+
+def scaling_summary(reports):
+    """Throughput of each worker count relative to the single-worker run"""
+    base = reports.get(1, {}).get("total", {}).get("throughput_rps")
+    summary = {}
+    for workers, report in sorted(reports.items()):
+        rps = report["total"]["throughput_rps"]
+        speedup = (rps / base) if base else None
+        summary[workers] = {
+            "throughput_rps": rps,
+            "p95_ms": report["total"]["latency_ms"]["p95"],
+            "error_rate": report["total"]["error_rate"],
+            "speedup": speedup,
+            "efficiency": (speedup / workers) if speedup is not None else None,
+        }
+    return summary
+
+
+def print_scaling(summary):
+    """Print a worker-count scaling table built by scaling_summary"""
+    print("\n" + "=" * 70)
+    print("📈 THROUGHPUT SCALING BY WORKER COUNT")
+    print("=" * 70)
+    header = f"{'Workers':>8}{'RPS':>12}{'p95 ms':>10}{'Err%':>8}{'Speedup':>10}{'Effic.':>10}"
+    print(header)
+    print("-" * len(header))
+    for workers, row in summary.items():
+        speedup = f"{row['speedup']:.2f}x" if row["speedup"] is not None else "-"
+        efficiency = f"{row['efficiency']:.0%}" if row["efficiency"] is not None else "-"
+        print(
+            f"{workers:>8}{row['throughput_rps']:>12.1f}{row['p95_ms']:>10.1f}"
+            f"{row['error_rate'] * 100:>7.1f}%{speedup:>10}{efficiency:>10}"
+        )
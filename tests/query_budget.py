@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Per-endpoint query count tracking for the Clínica Mía API testers.
+The backend reports the Prisma queries of every request in the Server-Timing header
+(db;dur=12.4;desc="8 consultas"). Sessions built by tests.api_client record the highest
+count seen per endpoint, and check() compares it with a JSON baseline so an endpoint
+that starts issuing more queries (typically an N+1) fails the suite.
+"""
+
+import json
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+
+QUERY_BASELINE = os.environ.get("QUERY_BASELINE", "query_baseline.json")
+# Extra queries over the baseline tolerated before failing (pagination / optional includes)
+QUERY_TOLERANCE = int(os.environ.get("QUERY_TOLERANCE", "2"))
+
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) consultas"')
+ID_SEGMENT = re.compile(
+    r"^(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|c[a-z0-9]{20,})$",
+    re.IGNORECASE
+)
+
+
+def normalize_path(path):
+    """Same grouping as db/consultas.js normalizarRuta: identifiers become :id"""
+    return "/".join(":id" if ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+
+
+def parse_server_timing(header):
+    """Return (queries, db_ms) from a Server-Timing header, or None if it has no db metric"""
+    match = SERVER_TIMING_DB.search(header or "")
+    if not match:
+        return None
+    return int(match.group(2)), float(match.group(1))
+
+
+def load_baseline(path=QUERY_BASELINE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+class QueryTracker:
+    """Highest query count observed per endpoint (METHOD /normalized/path) since the last check"""
+
+    def __init__(self):
+        self._observed = {}
+        self._lock = threading.Lock()
+
+    def record(self, response, *args, **kwargs):
+        """requests response hook"""
+        parsed = parse_server_timing(response.headers.get("Server-Timing"))
+        if parsed is None or response.status_code >= 500:
+            return
+        queries, db_ms = parsed
+        endpoint = f"{response.request.method} {normalize_path(urlsplit(response.url).path)}"
+        with self._lock:
+            current = self._observed.get(endpoint)
+            if current is None or queries > current["queries"]:
+                self._observed[endpoint] = {"queries": queries, "db_ms": db_ms}
+
+    def install(self, session):
+        session.hooks["response"].append(self.record)
+        return session
+
+    def check(self, baseline_path=QUERY_BASELINE, tolerance=QUERY_TOLERANCE):
+        """
+        Compare the endpoints observed since the last check with the baseline.
+        Returns a list of (name, ok, message) suitable for log_test. Endpoints not in the
+        baseline are added to it; an endpoint only fails when it exceeds its baseline by
+        more than `tolerance` queries, and an improvement lowers the baseline.
+        """
+        with self._lock:
+            observed, self._observed = self._observed, {}
+        if not observed:
+            return []
+
+        baseline = load_baseline(baseline_path)
+        results = []
+        regressions = []
+        for endpoint, sample in sorted(observed.items()):
+            expected = baseline.get(endpoint)
+            if expected is None or sample["queries"] < expected:
+                baseline[endpoint] = sample["queries"]
+            elif sample["queries"] > expected + tolerance:
+                regressions.append(endpoint)
+                results.append((
+                    f"Query Count {endpoint}",
+                    False,
+                    f"{sample['queries']} queries ({sample['db_ms']:.1f}ms DB), baseline {expected} "
+                    f"(tolerance +{tolerance}); see /health/consultas for repeated operations"
+                ))
+
+        with open(baseline_path, "w", encoding="utf-8") as fh:
+            json.dump(baseline, fh, ensure_ascii=False, indent=2, sort_keys=True)
+            fh.write("\n")
+
+        heaviest = max(observed.items(), key=lambda item: item[1]["queries"])
+        results.insert(0, (
+            "Query Counts",
+            not regressions,
+            f"{len(observed)} endpoints checked against {baseline_path}, {len(regressions)} regressed; "
+            f"heaviest {heaviest[0]} with {heaviest[1]['queries']} queries"
+        ))
+        return results
+
+
+query_tracker = QueryTracker()